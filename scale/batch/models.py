@@ -20,6 +20,9 @@ from trigger.models import TriggerEvent
 
 logger = logging.getLogger(__name__)
 
+# The number of old files whose batch recipes are created and queued together
+TRIGGER_CHUNK_SIZE = 100
+
 
 class BatchManager(models.Manager):
     """Provides additional methods for handling batches"""
@@ -194,14 +197,15 @@ class BatchManager(models.Manager):
             trigger_config = batch_definition.trigger_config
 
         # Schedule new recipes and create batch models for old files
-        logger.info('Scheduling new batch recipes for old files: %i', old_recipes_count)
+        logger.info('Scheduling new batch recipes for old files: %i', old_files_count)
+        input_files = []
         for old_file in old_files.iterator():
-            try:
-                self._process_trigger(batch, trigger_config, old_file)
-            except:
-                logger.exception('Unable to trigger batch file: %i', old_file.id)
-                batch.failed_count += 1
-                batch.save()
+            input_files.append(old_file)
+            if len(input_files) >= TRIGGER_CHUNK_SIZE:
+                self._process_triggers(batch, trigger_config, input_files)
+                input_files = []
+        if input_files:
+            self._process_triggers(batch, trigger_config, input_files)
 
         # Update the final batch state
         # Recompute the total to catch models that may have matched after the count query
@@ -348,6 +352,95 @@ class BatchManager(models.Manager):
         # Create all the batch models for the new recipe and jobs
         self._create_batch_models(batch, handler)
 
+    def _process_triggers(self, batch, trigger_config, input_files):
+        """Processes the given input files within the context of a particular batch request, creating and queuing their
+        batch recipes together. If the files cannot be processed together, each file is processed on its own so that
+        only the files that fail are counted as failed.
+
+        :param batch: The batch that defines the recipes to schedule
+        :type batch: :class:`batch.models.Batch`
+        :param trigger_config: The trigger rule configuration to use when evaluating source files.
+        :type trigger_config: :class:`batch.configuration.definition.batch_definition.BatchTriggerConfiguration`
+        :param input_files: The input files that should trigger new batch recipes
+        :type input_files: [:class:`storage.models.ScaleFile`]
+        """
+
+        try:
+            self._process_trigger_chunk(batch, trigger_config, input_files)
+            return
+        except:
+            logger.exception('Unable to trigger %i batch files together, triggering them individually',
+                             len(input_files))
+
+        for input_file in input_files:
+            try:
+                self._process_trigger(batch, trigger_config, input_file)
+            except:
+                logger.exception('Unable to trigger batch file: %i', input_file.id)
+                batch.failed_count += 1
+                batch.save()
+
+    @transaction.atomic
+    def _process_trigger_chunk(self, batch, trigger_config, input_files):
+        """Processes the given input files within the context of a particular batch request. The recipes and jobs of all
+        of the files are created and queued in bulk, and their batch models are created in the same atomic transaction.
+
+        :param batch: The batch that defines the recipes to schedule
+        :type batch: :class:`batch.models.Batch`
+        :param trigger_config: The trigger rule configuration to use when evaluating source files.
+        :type trigger_config: :class:`batch.configuration.definition.batch_definition.BatchTriggerConfiguration`
+        :param input_files: The input files that should trigger new batch recipes
+        :type input_files: [:class:`storage.models.ScaleFile`]
+        """
+
+        condition = None
+        if hasattr(trigger_config, 'get_condition'):
+            condition = trigger_config.get_condition()
+        workspace = None
+        if hasattr(trigger_config, 'get_workspace_name'):
+            workspace = Workspace.objects.get(name=trigger_config.get_workspace_name())
+
+        # Build recipe data and a trigger event for each input file that matches the trigger condition
+        data_list = []
+        events = []
+        now = timezone.now()
+        for input_file in input_files:
+            if condition and not condition.is_condition_met(input_file):
+                continue
+
+            recipe_data = RecipeData({})
+            if hasattr(trigger_config, 'get_input_data_name'):
+                recipe_data.add_file_input(trigger_config.get_input_data_name(), input_file.id)
+            if workspace:
+                recipe_data.set_workspace_id(workspace.id)
+            data_list.append(recipe_data)
+
+            description = {
+                'version': '1.0',
+                'file_id': input_file.id,
+                'file_name': input_file.file_name,
+            }
+            events.append(TriggerEvent(type='BATCH', rule=None, description=description, occurred=now))
+        if not events:
+            return
+
+        TriggerEvent.objects.bulk_create(events)
+        handlers = Queue.objects.queue_new_recipes(batch.recipe_type, data_list, events)
+
+        # Create all the batch models for the new recipes and jobs
+        batch_jobs = []
+        batch_recipes = []
+        for handler in handlers:
+            for new_recipe_job in handler.recipe_jobs:
+                batch_jobs.append(BatchJob(batch=batch, job=new_recipe_job.job, created=now))
+            batch_recipes.append(BatchRecipe(batch=batch, recipe=handler.recipe))
+        BatchJob.objects.bulk_create(batch_jobs)
+        BatchRecipe.objects.bulk_create(batch_recipes)
+
+        # Update the overall batch status
+        Batch.objects.filter(id=batch.id).update(created_count=F('created_count') + len(handlers))
+        batch.created_count += len(handlers)
+
     def _create_batch_models(self, batch, handler, superseded_recipe=None, superseded_jobs=None):
         """Creates all the batch-specific models to track the new jobs that were queued.
 
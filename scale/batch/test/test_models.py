@@ -5,6 +5,7 @@ import datetime
 import django
 from django.test import TransactionTestCase
 from django.utils.timezone import utc
+from mock import patch
 
 import batch.test.utils as batch_test_utils
 import job.test.utils as job_test_utils
@@ -578,6 +579,49 @@ class TestBatchManager(TransactionTestCase):
         self.assertEqual(batch_recipes[0].recipe.recipe_type, self.recipe_type)
         self.assertIsNone(batch_recipes[0].superseded_recipe)
 
+    @patch('batch.models.TRIGGER_CHUNK_SIZE', 2)
+    def test_schedule_trigger_rule_chunks(self):
+        """Tests calling BatchManager.schedule_recipes() where the old files are triggered in several chunks."""
+
+        for _ in range(4):
+            storage_test_utils.create_file()
+        storage_test_utils.create_file(media_type='text/ignore')
+
+        definition = {
+            'trigger_rule': True,
+        }
+
+        batch = batch_test_utils.create_batch(recipe_type=self.recipe_type, definition=definition)
+
+        Batch.objects.schedule_recipes(batch.id)
+
+        batch = Batch.objects.get(pk=batch.id)
+        self.assertEqual(batch.status, 'CREATED')
+        self.assertEqual(batch.created_count, 5)
+        self.assertEqual(batch.failed_count, 0)
+        self.assertEqual(BatchRecipe.objects.filter(batch=batch).count(), 5)
+        self.assertEqual(BatchJob.objects.filter(batch=batch).count(), 5)
+
+    @patch('batch.models.Queue.objects.queue_new_recipes', side_effect=Exception('Bulk failure'))
+    def test_schedule_trigger_rule_chunk_failure(self, mock_queue_new_recipes):
+        """Tests calling BatchManager.schedule_recipes() where the old files fall back to being triggered one by one."""
+
+        storage_test_utils.create_file()
+
+        definition = {
+            'trigger_rule': True,
+        }
+
+        batch = batch_test_utils.create_batch(recipe_type=self.recipe_type, definition=definition)
+
+        Batch.objects.schedule_recipes(batch.id)
+
+        batch = Batch.objects.get(pk=batch.id)
+        self.assertEqual(batch.status, 'CREATED')
+        self.assertEqual(batch.created_count, 2)
+        self.assertEqual(batch.failed_count, 0)
+        self.assertEqual(BatchRecipe.objects.filter(batch=batch).count(), 2)
+
     def test_schedule_trigger_rule_custom(self):
         """Tests calling BatchManager.schedule_recipes() using a custom trigger rule."""
 
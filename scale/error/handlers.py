@@ -1,50 +1,130 @@
 """Error handlers for scale"""
-from logging import Handler
+from __future__ import unicode_literals
 
+import os
 import socket
+import sys
+import threading
+from collections import deque
+from logging import Handler
+
+from django.db import connection
 
 
 class DatabaseLogHandler(Handler):
     """This class inherits from the logging.Handler class to provide
        support for logging messages to a database table.
+
+       Records are placed on a bounded in-memory queue and written to the
+       database in batches by a background thread, so logging never waits on
+       the database. Once the queue is half full only one of every sample_rate
+       records is kept, and once it is full new records are dropped. The number
+       of discarded records is written to the database with the next batch.
     """
 
     # name of the model to log messages
     model = None
 
-    def __init__(self, model=""):
+    def __init__(self, model="", batch_size=500, flush_interval=1.0, flush_timeout=10.0, max_queue_size=10000,
+                 sample_rate=10):
+        """Constructor
+
+        :param model: The full name of the model class to log messages to
+        :type model: str
+        :param batch_size: The maximum number of records to write to the database at a time
+        :type batch_size: int
+        :param flush_interval: The maximum number of seconds that a record waits on the queue before it is written
+        :type flush_interval: float
+        :param flush_timeout: The maximum number of seconds that a flush waits for the queue to be written
+        :type flush_timeout: float
+        :param max_queue_size: The maximum number of records to hold on the queue
+        :type max_queue_size: int
+        :param sample_rate: One of every this many records is kept once the queue is half full
+        :type sample_rate: int
+        """
+
         super(DatabaseLogHandler, self).__init__()
         self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flush_timeout = flush_timeout
+        self.max_queue_size = max_queue_size
+        self.sample_rate = sample_rate
+
+        # Total counts of records that were discarded because the queue was full or their batch failed to be written,
+        # or because the queue was under pressure
+        self.dropped_count = 0
+        self.sampled_count = 0
+
+        self._condition = threading.Condition()
+        self._entries = deque()  # [(Level, Message, Stacktrace)]
+        self._hostname = socket.getfqdn()
+        self._model_class = None
+        self._num_writing = 0
+        self._pid = None
+        self._reported_dropped_count = 0
+        self._reported_sampled_count = 0
+        self._running = False
+        self._sample_count = 0
+        self._thread = None
+
+    def close(self):
+        """Writes any queued records and stops the background writer
+        """
+
+        self.flush()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            thread = self._thread
+        if thread:
+            thread.join(self.flush_timeout)
+        super(DatabaseLogHandler, self).close()
 
     def emit(self, record):
-        """Saves the record object to a database using the Django model class
+        """Queues the record object to be saved to the database using the Django model class
 
         :param record: Record object to save to the database
         :type record: LogRecord
         """
 
-        # get the model by name
-        try:
-            model = self.get_model(self.model)
-        except:
-            from error.models import LogEntry as model
-
-        hostname = socket.getfqdn()
-        levelname = record.levelname
-
         # Note if an exception occurred, the formatter will append it to
         # the message, so need to split the formatted string to get just
         # the message.
-        formatted_message = self.format(record).split('\nTraceback')[0]
-        log_entry = model(host=hostname, level=levelname,
-                          message=formatted_message)
+        try:
+            formatted_message = self.format(record).split('\nTraceback')[0]
+        except Exception:
+            self.handleError(record)
+            return
+        entry = (record.levelname, formatted_message, record.exc_text)
+
+        with self._condition:
+            self._start_writer()
+            queue_size = len(self._entries)
+            if queue_size >= self.max_queue_size:
+                self.dropped_count += 1
+                return
+            if queue_size >= self.max_queue_size // 2:
+                self._sample_count += 1
+                if self._sample_count % self.sample_rate:
+                    self.sampled_count += 1
+                    return
+            self._entries.append(entry)
+            if queue_size + 1 >= self.batch_size:
+                self._condition.notify_all()
 
-        # If there is exception information, add it to the 'LogEntry'
-        if not record.exc_text is None:
-            log_entry.stacktrace = record.exc_text
+    def flush(self):
+        """Waits for the background writer to write all of the queued records
+        """
 
-        # save log entry to database table
-        log_entry.save()
+        with self._condition:
+            if not self._thread or not self._thread.is_alive():
+                return
+            self._condition.notify_all()
+            waited = 0.0
+            while (self._entries or self._num_writing) and waited < self.flush_timeout:
+                self._condition.wait(0.1)
+                waited += 0.1
 
     def handleError(self, record):
         """Handles an exception that happened within the emit method
@@ -64,3 +144,131 @@ class DatabaseLogHandler(Handler):
         names = model_name.split('.')
         python_module = __import__('.'.join(names[:-1]), fromlist=names[-1:])
         return getattr(python_module, names[-1])
+
+    def _get_model_class(self):
+        """Returns the model class to log messages to, looking it up on the first call
+
+        :returns: The model class
+        :rtype: class
+        """
+
+        if not self._model_class:
+            try:
+                self._model_class = self.get_model(self.model)
+            except:
+                from error.models import LogEntry
+                self._model_class = LogEntry
+        return self._model_class
+
+    def _run(self):
+        """The main run loop of the background writer
+        """
+
+        try:
+            while True:
+                with self._condition:
+                    if self._running and len(self._entries) < self.batch_size:
+                        self._condition.wait(self.flush_interval)
+                    if not self._running and not self._entries:
+                        # Let the next emit() start a new writer for any records queued after this one stops
+                        self._pid = None
+                        break
+                    batch, dropped_count, sampled_count = self._take_batch()
+
+                try:
+                    self._write_batch(batch, dropped_count, sampled_count)
+                except Exception as ex:
+                    # Discard the connection in case the error left it unusable
+                    connection.close()
+                    self._report_failed_batch(batch, dropped_count, sampled_count, ex)
+                finally:
+                    with self._condition:
+                        self._num_writing = 0
+                        self._condition.notify_all()
+        finally:
+            connection.close()
+
+    def _report_failed_batch(self, batch, dropped_count, sampled_count, ex):
+        """Counts the records of a batch that could not be written as dropped so that the next batch reports them,
+        along with the discarded records the failed batch was reporting, and notes the failure on stderr
+
+        :param batch: The records that could not be written
+        :type batch: list
+        :param dropped_count: The number of dropped records the failed batch was reporting
+        :type dropped_count: int
+        :param sampled_count: The number of sampled out records the failed batch was reporting
+        :type sampled_count: int
+        :param ex: The error that occurred writing the batch
+        :type ex: :class:`exceptions.Exception`
+        """
+
+        with self._condition:
+            self.dropped_count += len(batch)
+            self._reported_dropped_count -= dropped_count
+            self._reported_sampled_count -= sampled_count
+
+        # The database is unavailable, so the failure can only be reported on stderr
+        try:
+            sys.stderr.write('Database log handler failed to write %d record(s): %s\n' % (len(batch), ex))
+        except Exception:
+            pass
+
+    def _start_writer(self):
+        """Starts the background writer if it is not running in this process, or keeps it running if it is stopping
+        after close() was called. The caller must hold the condition lock.
+        """
+
+        # A forked process does not inherit the writer thread, so a new one is started in the child
+        pid = os.getpid()
+        if self._thread and self._pid == pid:
+            self._running = True
+            return
+
+        self._pid = pid
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='DatabaseLogHandler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _take_batch(self):
+        """Removes the next batch of records from the queue along with the number of records discarded since the last
+        batch. The caller must hold the condition lock.
+
+        :returns: A tuple of the list of records, the number of dropped records, and the number of sampled out records
+        :rtype: tuple
+        """
+
+        batch = []
+        while self._entries and len(batch) < self.batch_size:
+            batch.append(self._entries.popleft())
+        self._num_writing = len(batch)
+
+        dropped_count = self.dropped_count - self._reported_dropped_count
+        sampled_count = self.sampled_count - self._reported_sampled_count
+        self._reported_dropped_count = self.dropped_count
+        self._reported_sampled_count = self.sampled_count
+        return batch, dropped_count, sampled_count
+
+    def _write_batch(self, batch, dropped_count, sampled_count):
+        """Bulk inserts the given batch of records into the database
+
+        :param batch: The records to write as (level, message, stacktrace) tuples
+        :type batch: list
+        :param dropped_count: The number of records dropped because the queue was full or a write failed
+        :type dropped_count: int
+        :param sampled_count: The number of records sampled out because the queue was under pressure
+        :type sampled_count: int
+        """
+
+        model = self._get_model_class()
+        log_entries = []
+        for level, message, stacktrace in batch:
+            log_entries.append(model(host=self._hostname, level=level, message=message, stacktrace=stacktrace))
+        if dropped_count or sampled_count:
+            msg = 'Database log handler discarded %d record(s): %d dropped from a full queue or failed write, '
+            msg += '%d sampled out'
+            message = msg % (dropped_count + sampled_count, dropped_count, sampled_count)
+            log_entries.append(model(host=self._hostname, level='WARNING', message=message))
+
+        if log_entries:
+            model.objects.bulk_create(log_entries)
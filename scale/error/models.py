@@ -21,6 +21,21 @@ class ErrorManager(models.Manager):
         for error in self.filter(is_builtin=True).iterator():
             CACHED_ERRORS[error.name] = error
 
+    def get_categories(self, error_ids):
+        """Returns the categories of the errors with the given IDs, looked up with a single query
+
+        :param error_ids: The error IDs
+        :type error_ids: set
+        :returns: Dict where each error ID maps to its category
+        :rtype: dict
+        """
+
+        categories = {}
+        if error_ids:
+            for error in self.filter(id__in=error_ids).only('id', 'category'):
+                categories[error.id] = error.category
+        return categories
+
     def get_error(self, name):
         """Returns the error with the given name, using the cache if able to prevent database accesses
 
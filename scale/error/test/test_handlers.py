@@ -0,0 +1,192 @@
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import os
+import time
+from unittest import skipUnless
+
+import django
+from django.test import TestCase, TransactionTestCase
+from mock import patch
+
+from error.handlers import DatabaseLogHandler
+from error.models import LogEntry
+
+BENCHMARK_ENV_VAR = 'SCALE_LOGGING_BENCHMARK'
+
+
+class TestDatabaseLogHandler(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def _create_record(self, msg, level=logging.ERROR):
+        return logging.LogRecord('test', level, __file__, 1, msg, None, None)
+
+    @patch('error.handlers.DatabaseLogHandler._start_writer')
+    def test_emit_batches(self, mock_start_writer):
+        """Tests that emitted records are queued and then written in a single batch"""
+
+        handler = DatabaseLogHandler(model='error.models.LogEntry')
+        handler.emit(self._create_record('Message 1'))
+        handler.emit(self._create_record('Message 2', level=logging.WARNING))
+        self.assertEqual(LogEntry.objects.count(), 0)
+
+        handler._write_batch(*handler._take_batch())
+
+        entries = LogEntry.objects.order_by('id')
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0].message, 'Message 1')
+        self.assertEqual(entries[0].level, 'ERROR')
+        self.assertEqual(entries[1].message, 'Message 2')
+        self.assertEqual(entries[1].level, 'WARNING')
+        self.assertEqual(entries[0].host, handler._hostname)
+
+    @patch('error.handlers.DatabaseLogHandler._start_writer')
+    def test_batch_size(self, mock_start_writer):
+        """Tests that a batch is limited to the batch size"""
+
+        handler = DatabaseLogHandler(batch_size=2)
+        for i in range(3):
+            handler.emit(self._create_record('Message %d' % i))
+
+        batch, _dropped_count, _sampled_count = handler._take_batch()
+        self.assertEqual(len(batch), 2)
+        batch, _dropped_count, _sampled_count = handler._take_batch()
+        self.assertEqual(len(batch), 1)
+
+    @patch('error.handlers.DatabaseLogHandler._start_writer')
+    def test_full_queue(self, mock_start_writer):
+        """Tests that records are sampled and then dropped as the queue fills up and that the discarded records are
+        reported"""
+
+        handler = DatabaseLogHandler(max_queue_size=4, sample_rate=2)
+        for i in range(10):
+            handler.emit(self._create_record('Message %d' % i))
+
+        # Two records fill half of the queue, then every other record is kept until the queue is full
+        self.assertEqual(len(handler._entries), 4)
+        self.assertEqual(handler.sampled_count, 2)
+        self.assertEqual(handler.dropped_count, 4)
+
+        handler._write_batch(*handler._take_batch())
+        self.assertEqual(LogEntry.objects.count(), 5)
+        summary = LogEntry.objects.get(level='WARNING')
+        self.assertIn('discarded 6 record(s)', summary.message)
+
+        # The discarded records are only reported once
+        batch, dropped_count, sampled_count = handler._take_batch()
+        self.assertEqual(dropped_count, 0)
+        self.assertEqual(sampled_count, 0)
+
+    @patch('error.handlers.sys.stderr')
+    @patch('error.handlers.connection')
+    @patch('error.handlers.DatabaseLogHandler._write_batch')
+    @patch('error.handlers.DatabaseLogHandler._start_writer')
+    def test_failed_batch(self, mock_start_writer, mock_write_batch, mock_connection, mock_stderr):
+        """Tests that the records of a batch that fails to be written are reported as dropped by the next batch"""
+
+        mock_write_batch.side_effect = Exception('Database unavailable')
+        handler = DatabaseLogHandler()
+        handler.dropped_count = 1
+        for i in range(2):
+            handler.emit(self._create_record('Message %d' % i))
+
+        # Write the one batch and then stop
+        handler._running = False
+        handler._run()
+
+        mock_write_batch.assert_called_once_with(mock_write_batch.call_args[0][0], 1, 0)
+        self.assertTrue(mock_stderr.write.called)
+        self.assertEqual(handler.dropped_count, 3)
+
+        handler.emit(self._create_record('Message 3'))
+        batch, dropped_count, sampled_count = handler._take_batch()
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(dropped_count, 3)
+        self.assertEqual(sampled_count, 0)
+
+
+class TestDatabaseLogHandlerWriter(TransactionTestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_flush_on_close(self):
+        """Tests that the background writer writes the queued records when the handler is closed"""
+
+        handler = DatabaseLogHandler(flush_interval=60.0)
+        for i in range(5):
+            handler.emit(logging.LogRecord('test', logging.ERROR, __file__, 1, 'Message %d', (i,), None))
+        handler.close()
+
+        self.assertEqual(LogEntry.objects.count(), 5)
+        self.assertFalse(handler._thread.is_alive())
+
+    def test_emit_after_close(self):
+        """Tests that records emitted after the handler is closed are written by a new background writer"""
+
+        handler = DatabaseLogHandler(flush_interval=60.0)
+        handler.emit(logging.LogRecord('test', logging.ERROR, __file__, 1, 'Message 1', None, None))
+        handler.close()
+        handler.emit(logging.LogRecord('test', logging.ERROR, __file__, 1, 'Message 2', None, None))
+        self.assertTrue(handler._thread.is_alive())
+        handler.close()
+
+        self.assertEqual(LogEntry.objects.count(), 2)
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the logging benchmark' % BENCHMARK_ENV_VAR)
+class TestDatabaseLogHandlerBenchmark(TransactionTestCase):
+    """Measures the latency of a simulated scheduler loop that logs an error storm. The benchmark is slow so it is only
+    run when the SCALE_LOGGING_BENCHMARK environment variable is set.
+    """
+
+    LOOPS = 100
+    ERRORS_PER_LOOP = 100
+
+    def setUp(self):
+        django.setup()
+
+    def test_scheduler_loop_latency(self):
+        """Compares the loop latency without a database handler, with a synchronous handler, and with the batched
+        handler"""
+
+        print('\nScheduler loop latency with %d error(s) per loop' % self.ERRORS_PER_LOOP)
+        print('No handler: %.3f ms' % self._run_loops(None))
+        print('Synchronous handler: %.3f ms' % self._run_loops(SynchronousLogHandler()))
+        handler = DatabaseLogHandler()
+        print('Batched handler: %.3f ms' % self._run_loops(handler))
+        print('Batched handler dropped %d and sampled out %d record(s)' % (handler.dropped_count,
+                                                                            handler.sampled_count))
+
+    def _run_loops(self, handler):
+        """Runs the simulated scheduler loops and returns the average loop duration in milliseconds"""
+
+        logger = logging.getLogger('error.test.benchmark')
+        logger.propagate = False
+        logger.setLevel(logging.WARNING)
+        if handler:
+            logger.addHandler(handler)
+
+        try:
+            started = time.time()
+            for loop in range(self.LOOPS):
+                for i in range(self.ERRORS_PER_LOOP):
+                    logger.error('Task update %d in loop %d failed', i, loop)
+            duration = time.time() - started
+        finally:
+            if handler:
+                logger.removeHandler(handler)
+                handler.close()
+
+        return duration * 1000.0 / self.LOOPS
+
+
+class SynchronousLogHandler(DatabaseLogHandler):
+    """Writes each record to the database on the logging thread, which is how records were originally written"""
+
+    def emit(self, record):
+        message = self.format(record).split('\nTraceback')[0]
+        self._write_batch([(record.levelname, message, record.exc_text)], 0, 0)
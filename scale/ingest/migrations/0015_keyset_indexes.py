@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingest', '0014_auto_20170412_1225'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='ingest',
+            index_together=set([('last_modified', 'id')]),
+        ),
+    ]
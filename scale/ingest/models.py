@@ -3,11 +3,13 @@ from __future__ import unicode_literals
 
 import datetime
 import logging
+import math
 import os
 
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
 from django.db import models, transaction
+from django.db.models.functions import TruncHour
 from django.utils.timezone import now
 
 from ingest.scan.configuration.scan_configuration import ScanConfiguration
@@ -227,7 +229,7 @@ class IngestManager(models.Manager):
 
         return ingest
 
-    def get_status(self, started=None, ended=None, use_ingest_time=False):
+    def get_status(self, started=None, ended=None, use_ingest_time=False, max_points=None):
         """Returns ingest status information within the given time range grouped by strike process.
 
         :param started: Query ingests updated after this amount of time.
@@ -236,14 +238,17 @@ class IngestManager(models.Manager):
         :type ended: :class:`datetime.datetime`
         :param use_ingest_time: Whether or not to group the status values by ingest time (False) or data time (True).
         :type use_ingest_time: bool
+        :param max_points: The maximum number of values per strike process, where consecutive hourly time slots are
+            combined as needed. None returns every hourly time slot.
+        :type max_points: int
         :returns: The list of ingest status models that match the time range.
         :rtype: list[:class:`ingest.models.IngestStatus`]
         """
 
         # Fetch a list of ingests
-        ingests = Ingest.objects.filter(status='INGESTED')
-        ingests = ingests.select_related('strike')
-        ingests = ingests.defer('strike__configuration')
+        ingests = Ingest.objects.filter(status='INGESTED', strike_id__isnull=False)
+        dated_field = 'ingest_ended' if use_ingest_time else 'data_started'
+        ingests = ingests.filter(**{'%s__isnull' % dated_field: False})
 
         # Apply time range filtering
         if started:
@@ -257,14 +262,14 @@ class IngestManager(models.Manager):
             else:
                 ingests = ingests.filter(data_started__lte=ended)
 
-        # Apply sorting
-        if use_ingest_time:
-            ingests = ingests.order_by('ingest_ended')
-        else:
-            ingests = ingests.order_by('data_started')
+        # Count the ingests by strike process and hourly time slot within the database
+        time_slots = ingests.annotate(time_slot=TruncHour(dated_field, tzinfo=timezone.utc))
+        time_slots = time_slots.values('strike_id', 'time_slot').order_by()
+        time_slots = time_slots.annotate(files=models.Count('id'), size=models.Sum('file_size'),
+                                         most_recent=models.Max(dated_field))
 
-        groups = self._group_by_time(ingests, use_ingest_time)
-        return [self._fill_status(status, time_slots, started, ended) for status, time_slots in groups.iteritems()]
+        groups = self._group_by_time(time_slots)
+        return [self._fill_status(status, slots, started, ended, max_points) for status, slots in groups.iteritems()]
 
     @transaction.atomic
     def start_ingest_tasks(self, ingests, scan_id=None, strike_id=None):
@@ -318,13 +323,11 @@ class IngestManager(models.Manager):
 
             logger.debug('Successfully created ingest task for %s', ingest.file_name)
 
-    def _group_by_time(self, ingests, use_ingest_time):
-        """Groups the given ingests by hourly time slots.
+    def _group_by_time(self, time_slots):
+        """Groups the given hourly ingest counts by strike process.
 
-        :param ingests: Query ingests updated after this amount of time.
-        :type ingests: list[:class:`ingest.models.Ingest`]
-        :param use_ingest_time: Whether or not to group the status values by ingest time (False) or data time (True).
-        :type use_ingest_time: bool
+        :param time_slots: The ingest counts for each strike process and hourly time slot.
+        :type time_slots: list[dict]
         :returns: A mapping of ingest status models to hourly groups of counts.
         :rtype: dict[:class:`ingest.models.IngestStatus`, dict[datetime.datetime, :class:`ingest.models.IngestCounts`]]
         """
@@ -333,61 +336,33 @@ class IngestManager(models.Manager):
         strike_map = {}
         slot_map = {}
         for strike in Strike.objects.all():
-            strike_map[strike] = IngestStatus(strike)
-            slot_map[strike] = {}
+            strike_map[strike.id] = IngestStatus(strike)
+            slot_map[strike.id] = {}
 
         # Build a mapping of ingest status to time slots
-        for ingest in ingests:
-
-            # Initialize the mappings for the first strike
-            if ingest.strike not in strike_map:
-                logger.error('Missing strike process mapping: %s', ingest.strike_id)
+        for time_slot in time_slots.iterator():
+            strike_id = time_slot['strike_id']
+            if strike_id not in strike_map:
+                logger.error('Missing strike process mapping: %s', strike_id)
                 continue
 
-            # Check whether there is a valid date for the requested query
-            dated = ingest.ingest_ended if use_ingest_time else ingest.data_started
-            if dated:
-                ingest_status = strike_map[ingest.strike]
-                time_slots = slot_map[ingest.strike]
-                self._update_status(ingest_status, time_slots, ingest, dated)
+            size = time_slot['size'] or 0
+            slot_map[strike_id][time_slot['time_slot']] = IngestCounts(time_slot['time_slot'], time_slot['files'], size)
 
-        return {strike_map[strike]: slot_map[strike] for strike in strike_map}
+            # Update the summary values for the ingest status
+            ingest_status = strike_map[strike_id]
+            ingest_status.files += time_slot['files']
+            ingest_status.size += size
+            if not ingest_status.most_recent or time_slot['most_recent'] > ingest_status.most_recent:
+                ingest_status.most_recent = time_slot['most_recent']
 
-    def _update_status(self, ingest_status, time_slots, ingest, dated):
-        """Updates the given ingest status model based on attributes of an ingest model.
+        return {strike_map[strike_id]: slot_map[strike_id] for strike_id in strike_map}
 
-        :param ingest_status: The ingest status to update.
-        :type ingest_status: :class:`ingest.models.IngestStatus`
-        :param time_slots: A mapping of hourly time slots to ingest status counts.
-        :type time_slots: dict[datetime.datetime, :class:`ingest.models.IngestCounts`]
-        :param ingest: The ingest model that should be counted.
-        :type ingest: :class:`ingest.models.Ingest`
-        :returns: The ingest status model after the counts are updated.
-        :rtype: :class:`ingest.models.IngestStatus`
-        """
-
-        # Calculate the hourly time slot the record falls within
-        time_slot = datetime.datetime(dated.year, dated.month, dated.day, dated.hour, tzinfo=timezone.utc)
-
-        # Update the values for the current time slot
-        if time_slot not in time_slots:
-            time_slots[time_slot] = IngestCounts(time_slot)
-        values = time_slots[time_slot]
-        values.files += 1
-        values.size += ingest.file_size
-
-        # Update the summary values for the ingest status
-        ingest_status.files += 1
-        ingest_status.size += ingest.file_size
-        if not ingest_status.most_recent or dated > ingest_status.most_recent:
-            ingest_status.most_recent = dated
-
-        return ingest_status
-
-    def _fill_status(self, ingest_status, time_slots, started=None, ended=None):
+    def _fill_status(self, ingest_status, time_slots, started=None, ended=None, max_points=None):
         """Fills all the values for the given ingest status using a specified time range and grouped values.
 
-        This method ensures that each hourly bin has a value, even when no data actually exists.
+        This method ensures that each hourly bin has a value, even when no data actually exists. When there are more
+        hourly bins than the maximum number of points, consecutive bins are combined by adding their counts together.
 
         :param ingest_status: The ingest status to fill with values.
         :type ingest_status: :class:`ingest.models.IngestStatus`
@@ -397,6 +372,8 @@ class IngestManager(models.Manager):
         :type started: datetime.datetime
         :param ended: The end of the time range that needs to be filled.
         :type ended: datetime.datetime
+        :param max_points: The maximum number of values, None for no maximum.
+        :type max_points: int
         :returns: The ingest status model after the values array is filled.
         :rtype: :class:`ingest.models.IngestStatus`
         """
@@ -414,6 +391,15 @@ class IngestManager(models.Manager):
                 status_vals = time_slots[time_slot] if time_slot in time_slots else IngestCounts(time_slot)
                 ingest_status.values.append(status_vals)
 
+        if max_points and len(ingest_status.values) > max_points:
+            slots_per_point = int(math.ceil(len(ingest_status.values) / float(max_points)))
+            values = []
+            for i in range(0, len(ingest_status.values), slots_per_point):
+                slots = ingest_status.values[i:i + slots_per_point]
+                values.append(IngestCounts(slots[0].time, sum(slot.files for slot in slots),
+                                           sum(slot.size for slot in slots)))
+            ingest_status.values = values
+
         return ingest_status
 
 
@@ -626,6 +612,7 @@ class Ingest(models.Model):
     class Meta(object):
         """meta information for database"""
         db_table = 'ingest'
+        index_together = ['last_modified', 'id']
 
 
 class ScanManager(models.Manager):
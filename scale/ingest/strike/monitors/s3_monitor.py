@@ -4,8 +4,14 @@ from __future__ import unicode_literals
 import json
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 
 from botocore.exceptions import ClientError
+from django.db import close_old_connections, connection
+from django.utils.timezone import now
+from six.moves.queue import Empty, Full, Queue
 
 from ingest.models import Ingest
 from ingest.strike.configuration.strike_configuration import ValidationWarning
@@ -13,10 +19,31 @@ from ingest.strike.monitors.exceptions import (InvalidMonitorConfiguration, S3No
                                                SQSNotificationError)
 from ingest.strike.monitors.monitor import Monitor
 from util.aws import AWSClient, SQSClient
+from util.parse import parse_datetime
 
 logger = logging.getLogger(__name__)
 
 
+# The number of threads that process S3 notifications concurrently
+NUM_WORKER_THREADS = 10
+
+# The number of received batches of messages that may wait to be processed, so that receiving the next batch overlaps
+# with processing the current one
+MAX_PREFETCHED_BATCHES = 2
+
+# The number of recently ingested S3 objects remembered so that redelivered notifications are not ingested twice
+MAX_RECENT_OBJECTS = 100000
+
+# How long in seconds a blocked thread waits before checking whether the monitor has been stopped
+STOP_CHECK_INTERVAL = 1.0
+
+# How long in seconds to wait before receiving again after an error
+ERROR_DELAY = 5.0
+
+# How often in seconds the processing rate and lag are logged
+LAG_REPORT_INTERVAL = 60.0
+
+
 class S3Monitor(Monitor):
     """A monitor that watches an AWS SQS queue for S3 file notifications
     """
@@ -37,10 +64,11 @@ class S3Monitor(Monitor):
         # TODO: move these values into Strike configuration
         ###################################################
         # Tuning values for performance
-        # Messages per request set to 1 to minimize visibility timeout expiration causing multiple watching
-        # instances to repeatedly retrieve the same object. Can be bumped up to max (10) if this
-        # proves to not be a problem.
-        self.messages_per_request = 1
+        # Messages received per pass over the queue, processed concurrently by the worker threads. Larger batches
+        # must still be processed within the visibility timeout to avoid other instances receiving the same objects.
+        self.messages_per_request = 10
+        # Number of threads that process the S3 notifications in each batch of messages
+        self.num_workers = NUM_WORKER_THREADS
         # Wait time set to the SQS max to reduce chattiness during downtime without notifications.
         # This will perform a long-poll operation over the duration, but end immediately on message receipt
         self.wait_time = 20
@@ -53,6 +81,17 @@ class S3Monitor(Monitor):
         self.sqs_discard_unrecognized = False
         ###################################################
 
+        self._batches = Queue(MAX_PREFETCHED_BATCHES)  # Received batches of messages waiting to be processed
+        self._messages = Queue()  # Messages of the current batch waiting for a worker thread (index, message, results)
+        self._lock = threading.Lock()
+        self._recent_objects = OrderedDict()  # Recently ingested S3 objects {(bucket, key, sequencer): True}
+
+        # Processing statistics since the last lag report
+        self._last_report = time.time()
+        self._num_processed = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+
     def load_configuration(self, configuration):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.load_configuration`
         """
@@ -68,37 +107,26 @@ class S3Monitor(Monitor):
 
         logger.info('Running experimental S3 Strike processor')
 
-        # Loop endlessly polling SQS queue
-        while self._running:
-            # Between each pass over the SQS, refresh configuration from database in case of credential changes.
-            # This eliminates the need to stop and restart a Strike job to pick up configuration updates.
-            self.reload_configuration()
-
-            with SQSClient(self._credentials, self._region_name) as client:
-                # For each new file we receive a notification about:
-                logger.debug('Beginning long-poll against queue with wait time of %s seconds.' % self.wait_time)
-                messages = client.receive_messages(self._sqs_name,
-                                                   batch_size=10,
-                                                   wait_time_seconds=self.wait_time,
-                                                   visibility_timeout_seconds=self.visibility_timeout)
-
-                for message in messages:
-                    try:
-                        # Perform message extraction and then callback to ingest
-                        self._process_s3_notification(message)
-
-                        # Remove message from queue now that the message is processed
-                        message.delete()
-                    except SQSNotificationError:
-                        logger.exception('Unable to process message. Invalid SQS S3 notification.')
-
-                        if self.sqs_discard_unrecognized:
-                            # Remove message from queue when unrecognized
-                            logger.warning('Removing message that cannot be processed.')
-                            message.delete()
-                    except S3NoDataNotificationError:
-                        logger.exception('Unable to process message. File size of 0')
-                        message.delete()
+        # Messages are received on a separate thread so that the next batch is ready as soon as the current one is done
+        receiver = threading.Thread(target=self._receive_batches, name='S3MonitorReceiver')
+        receiver.daemon = True
+        receiver.start()
+
+        workers = self._start_workers()
+        try:
+            while self._running:
+                # Keep one client, and its session, until the configuration changes
+                credentials, region_name = self._credentials, self._region_name
+                with SQSClient(credentials, region_name) as client:
+                    while self._running and (credentials, region_name) == (self._credentials, self._region_name):
+                        try:
+                            batch = self._batches.get(timeout=STOP_CHECK_INTERVAL)
+                        except Empty:
+                            continue
+                        self._process_batch(client, batch)
+                        self._report_lag()
+        finally:
+            self._stop_workers(workers)
 
     def stop(self):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.stop`
@@ -133,6 +161,74 @@ class S3Monitor(Monitor):
 
         return warnings
 
+    def _claim_object(self, object_id):
+        """Claims the given S3 object for ingest, unless a notification for the same object has already been processed
+
+        :param object_id: The (bucket name, object key, sequencer) tuple identifying the S3 object
+        :type object_id: tuple
+        :returns: True if the object was claimed, False if it is a duplicate
+        :rtype: bool
+        """
+
+        with self._lock:
+            if object_id in self._recent_objects:
+                return False
+            self._recent_objects[object_id] = True
+            if len(self._recent_objects) > MAX_RECENT_OBJECTS:
+                self._recent_objects.popitem(last=False)
+            return True
+
+    def _handle_message(self, message):
+        """Processes the given SQS message and indicates whether it should be deleted from the queue. This method is
+        called concurrently by the worker threads.
+
+        :param message: SQS message containing S3 notification object
+        :type message: object
+        :returns: True if the message should be deleted, False otherwise
+        :rtype: bool
+        """
+
+        try:
+            # Worker threads are long-lived, so drop any database connection that has expired or become unusable
+            close_old_connections()
+            # Perform message extraction and then callback to ingest
+            self._process_s3_notification(message)
+            return True
+        except SQSNotificationError:
+            logger.exception('Unable to process message. Invalid SQS S3 notification.')
+            if self.sqs_discard_unrecognized:
+                # Remove message from queue when unrecognized
+                logger.warning('Removing message that cannot be processed.')
+                return True
+        except S3NoDataNotificationError:
+            logger.exception('Unable to process message. File size of 0')
+            return True
+        except Exception:
+            # The message will be received again once its visibility timeout expires
+            logger.exception('Unexpected error processing message')
+        return False
+
+    def _process_batch(self, client, batch):
+        """Processes the given batch of SQS messages on the worker threads and then deletes the processed messages
+        from the queue together
+
+        :param client: The SQS client
+        :type client: :class:`util.aws.SQSClient`
+        :param batch: The SQS messages
+        :type batch: list
+        """
+
+        results = [False] * len(batch)
+        for index, message in enumerate(batch):
+            self._messages.put((index, message, results))
+        self._messages.join()
+        processed = [message for message, delete in zip(batch, results) if delete]
+        if processed:
+            try:
+                client.delete_messages(self._sqs_name, processed)
+            except ClientError:
+                logger.exception('Unable to delete %d processed message(s)', len(processed))
+
     def _process_s3_notification(self, message):
         """Extracts an S3 notification object from SQS message body and calls on to ingest.
         We want to ensure we have the following minimal values before passing S3 object on:
@@ -158,6 +254,7 @@ class S3Monitor(Monitor):
                     if 'eventName' in record and record['eventName'].startswith('ObjectCreated') and \
                                     'eventVersion' in record and record['eventVersion'] == self.event_version_supported:
                         self._ingest_s3_notification_object(record['s3'])
+                        self._record_lag(record.get('eventTime'))
                     else:
                         # Log message that didn't match with valid EventName and EventVersion
                         raise SQSNotificationError('Unable to process message as it does not match '
@@ -190,8 +287,150 @@ class S3Monitor(Monitor):
         if not object_size:
             raise S3NoDataNotificationError('Skipping folder or 0 byte file: %s' % object_key)
 
-        object_name = os.path.basename(object_key)
-        ingest = Ingest.objects.create_ingest(object_name, self._monitored_workspace, strike_id=self.strike_id)
-        logger.info('New ingest in %s: %s', ingest.workspace.name, ingest.file_name)
-        self._process_ingest(ingest, object_key, object_size)
+        # SQS delivers each message at least once, so the same object may be seen more than once
+        object_id = (bucket_name, object_key, s3_notification['object'].get('sequencer'))
+        if not self._claim_object(object_id):
+            logger.info("Skipping duplicate notification for '%s' from bucket '%s'", object_key, bucket_name)
+            return
+
+        try:
+            object_name = os.path.basename(object_key)
+            ingest = Ingest.objects.create_ingest(object_name, self._monitored_workspace, strike_id=self.strike_id)
+            logger.info('New ingest in %s: %s', ingest.workspace.name, ingest.file_name)
+            self._process_ingest(ingest, object_key, object_size)
+        except Exception:
+            # Allow the object to be ingested when the notification is received again
+            with self._lock:
+                self._recent_objects.pop(object_id, None)
+            raise
         logger.info("Strike ingested '%s' from bucket '%s'..." % (object_key, bucket_name))
+
+    def _receive_batches(self):
+        """Receives batches of messages from the SQS queue until the monitor is stopped, blocking while the maximum
+        number of batches are waiting to be processed
+        """
+
+        try:
+            while self._running:
+                try:
+                    # Between each pass over the SQS, refresh configuration from database in case of credential
+                    # changes. This eliminates the need to stop and restart a Strike job to pick up configuration
+                    # updates. The receiver thread is long-lived, so first drop any expired database connection.
+                    close_old_connections()
+                    self.reload_configuration()
+                    credentials, region_name = self._credentials, self._region_name
+                    with SQSClient(credentials, region_name) as client:
+                        while self._running and (credentials, region_name) == (self._credentials, self._region_name):
+                            logger.debug('Beginning long-poll against queue with wait time of %s seconds.',
+                                         self.wait_time)
+                            messages = list(client.receive_messages(self._sqs_name,
+                                                                    batch_size=self.messages_per_request,
+                                                                    wait_time_seconds=self.wait_time,
+                                                                    visibility_timeout_seconds=self.visibility_timeout))
+                            if messages:
+                                self._put_batch(messages)
+                            close_old_connections()
+                            self.reload_configuration()
+                except Exception:
+                    logger.exception('Error receiving messages from SQS, retrying in %s seconds', ERROR_DELAY)
+                    time.sleep(ERROR_DELAY)
+        finally:
+            connection.close()
+
+    def _run_worker(self):
+        """Handles messages of the current batch until told to stop by a None message
+        """
+
+        try:
+            while True:
+                item = self._messages.get()
+                try:
+                    if item is None:
+                        break
+                    index, message, results = item
+                    results[index] = self._handle_message(message)
+                finally:
+                    self._messages.task_done()
+        finally:
+            connection.close()
+
+    def _start_workers(self):
+        """Starts the threads that handle the messages of each batch
+
+        :returns: The worker threads
+        :rtype: list
+        """
+
+        workers = []
+        for i in xrange(self.num_workers):
+            worker = threading.Thread(target=self._run_worker, name='S3MonitorWorker-%d' % i)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        return workers
+
+    def _stop_workers(self, workers):
+        """Stops the given worker threads once they have handled all waiting messages
+
+        :param workers: The worker threads
+        :type workers: list
+        """
+
+        for _ in workers:
+            self._messages.put(None)
+        for worker in workers:
+            worker.join()
+
+    def _put_batch(self, batch):
+        """Passes the given batch of messages to be processed, blocking while the processing is behind unless the
+        monitor has been stopped
+
+        :param batch: The SQS messages
+        :type batch: list
+        """
+
+        while self._running:
+            try:
+                self._batches.put(batch, timeout=STOP_CHECK_INTERVAL)
+                return
+            except Full:
+                continue
+
+    def _record_lag(self, event_time):
+        """Records that an S3 notification has been processed, along with the time between the S3 event and the end of
+        its processing
+
+        :param event_time: The ISO-8601 time of the S3 event, possibly None
+        :type event_time: string
+        """
+
+        lag = 0.0
+        if event_time:
+            try:
+                lag = max((now() - parse_datetime(event_time)).total_seconds(), 0.0)
+            except (TypeError, ValueError):
+                logger.warning('Invalid S3 event time: %s', event_time)
+
+        with self._lock:
+            self._num_processed += 1
+            self._total_lag += lag
+            self._max_lag = max(self._max_lag, lag)
+
+    def _report_lag(self):
+        """Logs the processing rate and the lag between the S3 events and their processing, once per reporting interval
+        """
+
+        current = time.time()
+        duration = current - self._last_report
+        if duration < LAG_REPORT_INTERVAL:
+            return
+
+        with self._lock:
+            num_processed, total_lag, max_lag = self._num_processed, self._total_lag, self._max_lag
+            self._num_processed, self._total_lag, self._max_lag = 0, 0.0, 0.0
+        self._last_report = current
+
+        avg_lag = total_lag / num_processed if num_processed else 0.0
+        logger.info('S3 monitor processed %d object(s) in %.0f seconds (%.1f/s), average lag %.1f seconds, max lag '
+                    '%.1f seconds, %d batch(es) waiting', num_processed, duration, num_processed / duration, avg_lag,
+                    max_lag, self._batches.qsize())
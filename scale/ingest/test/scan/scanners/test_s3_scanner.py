@@ -1,14 +1,21 @@
+from __future__ import print_function
 from __future__ import unicode_literals
 
+import os
+from unittest import skipUnless
+
 import django
 from django.test import TestCase
 from mock import patch
 
+import ingest.test.utils as ingest_test_utils
 import storage.test.utils as storage_test_utils
 from ingest.models import Ingest
 from ingest.scan.scanners.exceptions import ScannerInterruptRequested
 from ingest.scan.scanners.s3_scanner import S3Scanner
 from storage.brokers.broker import FileDetails
+from util.test.benchmark import BENCHMARK_ENV_VAR, Benchmark, create_benchmark_server, get_benchmark_setting
+from util.test.fake_aws import FakeAWSServer
 
 
 class TestS3Scanner(TestCase):
@@ -189,3 +196,88 @@ class TestScanner(TestCase):
         self.assertFalse(scanner._stop_received)
         scanner.stop()
         self.assertTrue(scanner._stop_received)
+
+
+class TestS3ScannerWithFakeServer(TestCase):
+    """Tests the S3 scanner listing a bucket on an in-process fake S3 server"""
+
+    def setUp(self):
+        django.setup()
+
+        self.server = FakeAWSServer(max_keys=2)
+        self.server.start()
+        self.server.create_bucket('my-bucket')
+        self.workspace = storage_test_utils.create_workspace(json_config={
+            'version': '1.0',
+            'broker': {'type': 's3', 'bucket_name': 'my-bucket', 'region_name': 'us-east-1',
+                       'credentials': {'access_key_id': 'ABC', 'secret_access_key': '123'}}
+        })
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_run_dry_run(self):
+        """Tests that a dry run detects every object in the bucket across multiple listing pages"""
+
+        for key in ['a.h5', 'dir/b.h5', 'dir/sub/c.h5', 'd.h5', 'dir/']:
+            self.server.put_object('my-bucket', key, b'' if key.endswith('/') else b'data')
+        configuration = {'version': '1.0', 'workspace': self.workspace.name, 'scanner': {'type': 's3'},
+                         'recursive': True, 'files_to_ingest': [{'filename_regex': '.*'}]}
+        scan = ingest_test_utils.create_scan(configuration=configuration)
+        scanner = scan.get_scan_configuration().get_scanner()
+        scanner.scan_id = scan.id
+
+        with self.settings(**self.server.get_client_settings()):
+            scanner.run(dry_run=True)
+
+        # The empty directory key is not a file
+        self.assertEqual(scanner._count, 4)
+        self.assertEqual(self.server.get_request_counts()['ListObjects'], 3)
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the S3 benchmark' % BENCHMARK_ENV_VAR)
+class TestS3ScannerBenchmark(TestCase):
+    """Measures Scan listing a bucket on a fake S3 server and creating the ingests for its objects. The benchmark is
+    slow so it is only run when the SCALE_AWS_BENCHMARK environment variable is set. Set SCALE_AWS_BENCHMARK_FILES and
+    SCALE_AWS_BENCHMARK_FILE_SIZE (in bytes) to change the number and size of the objects, and
+    SCALE_AWS_BENCHMARK_LATENCY to add a simulated network latency (in milliseconds) to every request.
+    """
+
+    def setUp(self):
+        django.setup()
+
+        self.num_files = get_benchmark_setting('FILES', 1000)
+        self.file_size = get_benchmark_setting('FILE_SIZE', 64 * 1024)
+        self.server = create_benchmark_server()
+        self.server.start()
+        self.server.create_bucket('benchmark')
+        data = os.urandom(self.file_size)
+        for i in range(self.num_files):
+            self.server.put_object('benchmark', 'dir_%d/%d.h5' % (i % 10, i), data)
+
+        workspace = storage_test_utils.create_workspace(json_config={
+            'version': '1.0',
+            'broker': {'type': 's3', 'bucket_name': 'benchmark', 'region_name': 'us-east-1',
+                       'credentials': {'access_key_id': 'ABC', 'secret_access_key': '123'}}
+        })
+        self.configuration = {'version': '1.0', 'workspace': workspace.name, 'scanner': {'type': 's3'},
+                              'recursive': True, 'files_to_ingest': [{'filename_regex': '.*'}]}
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_scan_throughput(self):
+        """Measures the rate at which a dry run detects objects and a full run creates their ingests"""
+
+        print('\nScanning %d S3 objects' % self.num_files)
+        for dry_run in [True, False]:
+            scan = ingest_test_utils.create_scan(configuration=self.configuration)
+            scanner = scan.get_scan_configuration().get_scanner()
+            scanner.scan_id = scan.id
+
+            benchmark = Benchmark('S3 Scan (%s)' % ('dry run' if dry_run else 'ingest'))
+            with self.settings(**self.server.get_client_settings()):
+                with benchmark.measure():
+                    scanner.run(dry_run=dry_run)
+            benchmark.report(scanner._count, scanner._count * self.file_size)
+            self.assertEqual(scanner._count, self.num_files)
@@ -1,14 +1,28 @@
+from __future__ import print_function
 from __future__ import unicode_literals
 
 import collections
 import json
+import os
+import random
+import threading
+import time
+from unittest import skipUnless
 
 import django
-from django.test import TestCase
-from mock import patch
+from django.test import TestCase, TransactionTestCase
+from django.utils.timezone import now
+from mock import MagicMock, patch
 
+import ingest.test.utils as ingest_test_utils
+import storage.test.utils as storage_test_utils
+from ingest.models import Ingest
 from ingest.strike.monitors.exceptions import (InvalidMonitorConfiguration, SQSNotificationError)
 from ingest.strike.monitors.s3_monitor import S3Monitor
+from util.aws import SQSClient
+from util.parse import datetime_to_string
+from util.test.benchmark import BENCHMARK_ENV_VAR, Benchmark, create_benchmark_server, get_benchmark_setting
+from util.test.fake_aws import FakeAWSServer
 
 SQSMessage = collections.namedtuple('SQSMessage', ['body'])
 
@@ -113,3 +127,154 @@ class TestS3Monitor(TestCase):
         monitor = S3Monitor()
         with self.assertRaises(SQSNotificationError):
             monitor._process_s3_notification(message)
+
+    @patch('ingest.strike.monitors.s3_monitor.S3Monitor._ingest_s3_notification_object')
+    def test_process_batch(self, ingest_mock):
+        """Tests calling S3Monitor._process_batch() deletes the processed messages together"""
+
+        record = {'eventVersion': '2.0', 'eventName': 'ObjectCreated:Put', 'eventTime': '1970-01-01T00:00:00.000Z',
+                  's3': {}}
+        valid_body = json.dumps({'Message': json.dumps({'Records': [record]})})
+        batch = [SQSMessage(valid_body), SQSMessage(''), SQSMessage(valid_body)]
+        client = MagicMock()
+
+        monitor = S3Monitor()
+        monitor._sqs_name = 'my-sqs'
+        monitor.num_workers = 2
+        workers = monitor._start_workers()
+        try:
+            monitor._process_batch(client, batch)
+        finally:
+            monitor._stop_workers(workers)
+
+        self.assertFalse(any(worker.is_alive() for worker in workers))
+
+        self.assertEqual(ingest_mock.call_count, 2)
+        client.delete_messages.assert_called_once_with('my-sqs', [batch[0], batch[2]])
+        self.assertEqual(monitor._num_processed, 2)
+
+    @patch('ingest.strike.monitors.s3_monitor.S3Monitor._process_ingest')
+    @patch('ingest.strike.monitors.s3_monitor.Ingest.objects.create_ingest')
+    def test_ingest_duplicate_notification(self, create_ingest_mock, process_ingest_mock):
+        """Tests that a redelivered S3 notification for the same object is only ingested once"""
+
+        s3_notification = {'bucket': {'name': 'mybucket'},
+                           'object': {'key': 'dir/HappyFace.jpg', 'size': 1024, 'sequencer': '0055AED6DCD90281E5'}}
+
+        monitor = S3Monitor()
+        monitor._ingest_s3_notification_object(s3_notification)
+        monitor._ingest_s3_notification_object(s3_notification)
+
+        self.assertEqual(create_ingest_mock.call_count, 1)
+        process_ingest_mock.assert_called_once_with(create_ingest_mock.return_value, 'dir/HappyFace.jpg', 1024)
+
+
+def create_s3_notification(bucket_name, key, size):
+    """Creates the body of an SQS message holding an S3 notification for a new object"""
+
+    record = {'eventVersion': '2.0', 'eventName': 'ObjectCreated:Put', 'eventTime': datetime_to_string(now()),
+              's3': {'bucket': {'name': bucket_name},
+                     'object': {'key': key, 'size': size, 'sequencer': '%016X' % random.getrandbits(64)}}}
+    return json.dumps({'Message': json.dumps({'Records': [record]})})
+
+
+class TestS3MonitorWithFakeServer(TestCase):
+    """Tests the S3 monitor receiving notifications from an in-process fake SQS server"""
+
+    def setUp(self):
+        django.setup()
+
+        self.server = FakeAWSServer()
+        self.server.start()
+        self.server.create_queue('my-sqs')
+
+    def tearDown(self):
+        self.server.stop()
+
+    @patch('ingest.strike.monitors.s3_monitor.S3Monitor._ingest_s3_notification_object')
+    def test_process_batch(self, ingest_mock):
+        """Tests that a received batch of notifications is processed and deleted from the queue"""
+
+        for i in range(3):
+            self.server.send_message('my-sqs', create_s3_notification('my-bucket', 'dir/%d.h5' % i, 1024))
+        self.server.send_message('my-sqs', 'invalid')
+
+        monitor = S3Monitor()
+        monitor.load_configuration({'type': 's3', 'sqs_name': 'my-sqs', 'region_name': 'us-east-1',
+                                    'credentials': {'access_key_id': 'ABC', 'secret_access_key': '123'}})
+        monitor.num_workers = 2
+        workers = monitor._start_workers()
+        try:
+            with self.settings(**self.server.get_client_settings()):
+                with SQSClient(monitor._credentials, monitor._region_name) as client:
+                    batch = list(client.receive_messages('my-sqs', batch_size=10, wait_time_seconds=0))
+                    monitor._process_batch(client, batch)
+        finally:
+            monitor._stop_workers(workers)
+
+        self.assertEqual(ingest_mock.call_count, 3)
+        # The invalid message is left on the queue to become visible again
+        self.assertEqual(self.server.get_queue_size('my-sqs'), 1)
+        self.assertEqual(len(self.server.get_message_latencies('my-sqs')), 3)
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the S3 benchmark' % BENCHMARK_ENV_VAR)
+class TestS3MonitorBenchmark(TransactionTestCase):
+    """Measures Strike ingesting S3 notifications received from a fake SQS server, including the database work of
+    creating the ingests. The benchmark is slow so it is only run when the SCALE_AWS_BENCHMARK environment variable is
+    set. Set SCALE_AWS_BENCHMARK_FILES and SCALE_AWS_BENCHMARK_FILE_SIZE (in bytes) to change the number of
+    notifications and the object size they report, and SCALE_AWS_BENCHMARK_LATENCY to add a simulated network latency
+    (in milliseconds) to every request.
+    """
+
+    def setUp(self):
+        django.setup()
+
+        self.num_files = get_benchmark_setting('FILES', 1000)
+        self.file_size = get_benchmark_setting('FILE_SIZE', 64 * 1024)
+        self.server = create_benchmark_server()
+        self.server.start()
+        self.server.create_queue('benchmark', visibility_timeout=120)
+
+        credentials = {'access_key_id': 'ABC', 'secret_access_key': '123'}
+        workspace = storage_test_utils.create_workspace(json_config={
+            'version': '1.0',
+            'broker': {'type': 's3', 'bucket_name': 'benchmark', 'region_name': 'us-east-1',
+                       'credentials': credentials}
+        })
+        configuration = {'version': '2.0', 'workspace': workspace.name,
+                         'monitor': {'type': 's3', 'sqs_name': 'benchmark', 'region_name': 'us-east-1',
+                                     'credentials': credentials},
+                         'files_to_ingest': [{'filename_regex': '.*', 'data_types': []}]}
+        self.strike = ingest_test_utils.create_strike(configuration=configuration)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_ingest_throughput(self):
+        """Measures the rate at which the S3 monitor ingests notifications"""
+
+        for i in range(self.num_files):
+            self.server.send_message('benchmark', create_s3_notification('benchmark', 'dir/%d.h5' % i,
+                                                                         self.file_size))
+
+        print('\nIngesting %d S3 notifications' % self.num_files)
+        with self.settings(**self.server.get_client_settings()):
+            monitor = self.strike.get_strike_configuration().get_monitor()
+            monitor.strike_id = self.strike.id
+            monitor.wait_time = 1
+            thread = threading.Thread(target=monitor.run, name='S3MonitorBenchmark')
+            thread.daemon = True
+
+            benchmark = Benchmark('S3 Strike ingest')
+            with benchmark.measure():
+                thread.start()
+                while self.server.get_queue_size('benchmark'):
+                    time.sleep(0.01)
+            monitor.stop()
+            thread.join()
+
+        for latency in self.server.get_message_latencies('benchmark'):
+            benchmark.add_latency('Notification (sent to deleted)', latency)
+        benchmark.report(self.num_files, self.num_files * self.file_size, 'notifications')
+        self.assertEqual(Ingest.objects.filter(strike_id=self.strike.id).count(), self.num_files)
@@ -207,6 +207,27 @@ class TestIngestStatusView(TestCase):
         self.assertEqual(entry['size'], self.ingest3.file_size)
         self.assertEqual(len(entry['values']), 24)
 
+    def test_max_points(self):
+        """Tests successfully calling the ingest status view with the hourly values combined into fewer points."""
+
+        url = rest_util.get_url('/ingests/status/?started=2015-01-01T00:00:00Z&ended=2015-01-02T10:00:00Z&'
+                                'max_points=10')
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        entry = result['results'][0]
+        self.assertEqual(len(entry['values']), 10)
+        self.assertEqual(sum(value['files'] for value in entry['values']), entry['files'])
+
+    def test_bad_max_points(self):
+        """Tests calling the ingest status view with a max_points value that is not positive."""
+
+        url = rest_util.get_url('/ingests/status/?max_points=0')
+        response = self.client.generic('GET', url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
+
     def test_multiple_strikes(self):
         """Tests successfully calling the ingest status view with multiple strike process groupings."""
         ingest_test_utils.create_strike()
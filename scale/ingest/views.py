@@ -28,6 +28,7 @@ class IngestsView(ListAPIView):
     """This view is the endpoint for retrieving the list of all ingests."""
     queryset = Ingest.objects.all()
     serializer_class = IngestSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request):
         """Retrieves the list of all ingests and returns it in JSON form
@@ -113,8 +114,11 @@ class IngestsStatusView(ListAPIView):
         rest_util.check_time_range(started, ended, max_duration=datetime.timedelta(days=31))
 
         use_ingest_time = rest_util.parse_bool(request, 'use_ingest_time', default_value=False)
+        max_points = rest_util.parse_int(request, 'max_points', required=False)
+        if max_points is not None and max_points <= 0:
+            raise rest_util.BadParameter('Parameter must be a positive integer: "max_points"')
 
-        ingests = Ingest.objects.get_status(started, ended, use_ingest_time)
+        ingests = Ingest.objects.get_status(started, ended, use_ingest_time, max_points)
 
         page = self.paginate_queryset(ingests)
         serializer = self.get_serializer(page, many=True)
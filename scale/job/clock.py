@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 import abc
 import datetime
+import heapq
 import logging
 import math
 
@@ -17,6 +18,10 @@ logger = logging.getLogger(__name__)
 # Mapping of clock event processor name to processor class definition
 _PROCESSORS = {}
 
+ONE_DAY = datetime.timedelta(days=1)
+ONE_HOUR = datetime.timedelta(hours=1)
+ONE_MINUTE = datetime.timedelta(minutes=1)
+
 
 class ClockEventError(Exception):
     """Error class used when a clock event processor encounters a problem."""
@@ -40,23 +45,128 @@ class ClockEventProcessor(object):
         raise NotImplemented()
 
 
-def perform_tick():
-    """Performs an iteration of the Scale clock.
-
-    A clock iteration consists of inspecting any trigger rules and corresponding events to see if there are any that
-    have exceeded their scheduled time threshold. For rules that are due to run, a new event is created of the
-    configured type and the registered clock function is executed.
+class ClockScheduler(object):
+    """Schedules the active clock trigger rules by keeping a min-heap of the next time that each rule will fire. The
+    rules and their last events are loaded with a constant number of queries and are reloaded whenever the rules change,
+    so the trigger_event table is not polled for every rule on every tick.
     """
 
-    # Check all the clock trigger rules
-    rules = TriggerRule.objects.filter(type='CLOCK', is_active=True)
-    for rule in rules:
-        try:
-            _check_rule(rule)
-        except ClockEventError:
-            logger.exception('Clock scheduler caught known rule error: %s', rule.id)
-        except:
-            logger.exception('Clock scheduler encountered unexpected rule error: %s', rule.id)
+    def __init__(self):
+        """Constructor
+        """
+
+        self._heap = []  # [(Next fire time, Rule ID)]
+        self._rule_versions = None  # {Rule ID: Last modified}
+        self._rules = {}  # {Rule ID: _ScheduledRule}
+
+    def check_rules(self):
+        """Reloads the clock trigger rules if any of the active rules have been added, changed, or removed since they
+        were last loaded
+        """
+
+        rule_versions = dict(TriggerRule.objects.filter(type='CLOCK', is_active=True).values_list('id',
+                                                                                                  'last_modified'))
+        if rule_versions != self._rule_versions:
+            logger.info('Clock trigger rules have changed, reloading schedule')
+            self.load()
+
+    def get_next_fire_time(self):
+        """Returns the next time that a rule is due to fire
+
+        :returns: The next fire time, possibly None if no rule will fire
+        :rtype: :class:`datetime.datetime`
+        """
+
+        return self._heap[0][0] if self._heap else None
+
+    def load(self):
+        """Loads the active clock trigger rules and their last events and computes the next fire time of each rule
+        """
+
+        rules = list(TriggerRule.objects.filter(type='CLOCK', is_active=True))
+        last_events = {}
+        if rules:
+            # Postgres DISTINCT ON returns the most recent event of each rule in a single query
+            events_qry = TriggerEvent.objects.filter(rule_id__in=[rule.id for rule in rules])
+            for event in events_qry.order_by('rule_id', '-occurred').distinct('rule_id'):
+                last_events[event.rule_id] = event
+
+        self._heap = []
+        self._rule_versions = {rule.id: rule.last_modified for rule in rules}
+        self._rules = {}
+        current = timezone.now().replace(second=0, microsecond=0)
+        for rule in rules:
+            try:
+                duration = _get_rule_duration(rule)
+            except ClockEventError:
+                logger.exception('Clock scheduler caught known rule error: %s', rule.id)
+                continue
+            scheduled_rule = _ScheduledRule(rule, duration, last_events.get(rule.id))
+            self._rules[rule.id] = scheduled_rule
+            self._schedule_rule(scheduled_rule, current)
+
+    def process_due_rules(self):
+        """Checks each rule whose next fire time has been reached and triggers a new event for it if its schedule
+        requires
+
+        :returns: The number of events that were triggered
+        :rtype: int
+        """
+
+        count = 0
+        current = timezone.now()
+        while self._heap and self._heap[0][0] <= current:
+            _fire_time, rule_id = heapq.heappop(self._heap)
+            scheduled_rule = self._rules[rule_id]
+            try:
+                logger.debug('Checking rule schedule: %s -> %s since %s', scheduled_rule.rule.type,
+                             scheduled_rule.duration, scheduled_rule.last_event)
+                if _check_schedule(scheduled_rule.duration, scheduled_rule.last_event):
+                    scheduled_rule.last_event = _trigger_event(scheduled_rule.rule, scheduled_rule.last_event)
+                    count += 1
+            except ClockEventError:
+                logger.exception('Clock scheduler caught known rule error: %s', rule_id)
+            except:
+                logger.exception('Clock scheduler encountered unexpected rule error: %s', rule_id)
+
+            # This minute has been checked, so the rule can next fire in the following minute
+            self._schedule_rule(scheduled_rule, current.replace(second=0, microsecond=0) + ONE_MINUTE)
+        return count
+
+    def _schedule_rule(self, scheduled_rule, after):
+        """Adds the given rule to the heap at its next fire time, if it has one
+
+        :param scheduled_rule: The rule to schedule
+        :type scheduled_rule: :class:`job.clock._ScheduledRule`
+        :param after: The earliest time that the rule may fire
+        :type after: :class:`datetime.datetime`
+        """
+
+        fire_time = _get_next_fire_time(scheduled_rule.duration, scheduled_rule.last_event, after)
+        if fire_time:
+            heapq.heappush(self._heap, (fire_time, scheduled_rule.rule.id))
+        else:
+            logger.warning('Clock trigger rule %s will not fire again with its current schedule',
+                           scheduled_rule.rule.id)
+
+
+class _ScheduledRule(object):
+    """Represents a clock trigger rule along with its parsed schedule and last event"""
+
+    def __init__(self, rule, duration, last_event):
+        """Constructor
+
+        :param rule: The clock trigger rule
+        :type rule: :class:`trigger.models.TriggerRule`
+        :param duration: The scheduled duration between trigger events
+        :type duration: datetime.timedelta
+        :param last_event: The last event triggered for the rule, possibly None
+        :type last_event: :class:`trigger.models.TriggerEvent`
+        """
+
+        self.rule = rule
+        self.duration = duration
+        self.last_event = last_event
 
 
 def register_processor(name, processor_class):
@@ -75,11 +185,13 @@ def register_processor(name, processor_class):
     _PROCESSORS[name].append(processor_class)
 
 
-def _check_rule(rule):
-    """Checks the given rule for validation errors and then triggers an event for processing if the schedule requires.
+def _get_rule_duration(rule):
+    """Validates the given rule and returns the duration of its schedule.
 
-    :param rule: The system name of the processor, which is used in trigger rule configurations.
+    :param rule: The clock trigger rule
     :type rule: :class:`trigger.models.TriggerRule`
+    :returns: The scheduled duration between trigger events
+    :rtype: datetime.timedelta
 
     :raises :class:`job.clock.ClockEventError`: If there is a configuration problem with the rule.
     """
@@ -90,21 +202,16 @@ def _check_rule(rule):
 
     # Validate the event type attribute
     if 'event_type' not in rule.configuration or not rule.configuration['event_type']:
-        raise ClockEventError('Clock trigger rule missing "event_type" attribute: ' % rule.id)
+        raise ClockEventError('Clock trigger rule missing "event_type" attribute: %s' % rule.id)
 
     # Validate the clock schedule
     if 'schedule' not in rule.configuration or not rule.configuration['schedule']:
-        raise ClockEventError('Clock trigger rule missing "schedule" attribute: ' % rule.id)
+        raise ClockEventError('Clock trigger rule missing "schedule" attribute: %s' % rule.id)
     schedule = rule.configuration['schedule']
     duration = parse.parse_duration(schedule)
     if not duration:
         raise ClockEventError('Invalid format for clock trigger "schedule" attribute: %s -> %s' % (rule.id, schedule))
-
-    # Trigger a new event when the schedule is surpassed
-    last_event = TriggerEvent.objects.filter(rule=rule).order_by('-occurred').first()
-    logger.debug('Checking rule schedule: %s -> %s since %s', rule.type, duration, last_event)
-    if _check_schedule(duration, last_event):
-        _trigger_event(rule, last_event)
+    return duration
 
 
 def _check_schedule(duration, last_event=None):
@@ -144,6 +251,82 @@ def _check_schedule(duration, last_event=None):
     return last_event.occurred + duration >= target and target <= current
 
 
+def _ceil_minute(when):
+    """Rounds the given time up to the next whole minute
+
+    :param when: The time to round
+    :type when: :class:`datetime.datetime`
+    :returns: The rounded time
+    :rtype: :class:`datetime.datetime`
+    """
+
+    if when.second or when.microsecond:
+        return when.replace(second=0, microsecond=0) + ONE_MINUTE
+    return when
+
+
+def _get_next_fire_time(duration, last_event, after):
+    """Returns the first whole minute, at or after the given time, at which :meth:`job.clock._check_schedule` will
+    trigger a new event for the given schedule and last event.
+
+    :param duration: The scheduled duration used to determine when to fire the next trigger event.
+    :type duration: datetime.timedelta
+    :param last_event: The last event that was triggered for the rule associated with this schedule. May be None if the
+        rule has never triggered an event.
+    :type last_event: :class:`trigger.models.TriggerEvent`
+    :param after: The earliest time to consider
+    :type after: :class:`datetime.datetime`
+    :returns: The next fire time, possibly None if the schedule will never trigger again
+    :rtype: :class:`datetime.datetime`
+    """
+
+    after = _ceil_minute(after)
+    base = datetime.datetime(year=after.year, month=after.month, day=after.day, tzinfo=timezone.utc)
+
+    # The first ever event triggers at the duration into the current day, or immediately for a daily schedule
+    if not last_event:
+        if duration < ONE_DAY:
+            return max(after, _ceil_minute(base + duration))
+        return after
+
+    # Schedules of an hour or more trigger once the elapsed time exceeds the duration
+    fire_times = []
+    if duration >= ONE_HOUR:
+        fire_times.append(max(after, _ceil_minute(last_event.occurred + duration)))
+
+    # Any schedule triggers at an absolute step within the day while the last event is within one duration
+    step_time = _get_next_step_time(duration, after)
+    if step_time <= last_event.occurred + duration:
+        fire_times.append(step_time)
+
+    return min(fire_times) if fire_times else None
+
+
+def _get_next_step_time(duration, after):
+    """Returns the first whole minute, at or after the given time, that is a multiple of the given duration from the
+    start of its day. The start of the next day is always a step.
+
+    :param duration: The scheduled duration
+    :type duration: datetime.timedelta
+    :param after: The earliest time to consider, which must be a whole minute
+    :type after: :class:`datetime.datetime`
+    :returns: The next step time
+    :rtype: :class:`datetime.datetime`
+    """
+
+    base = datetime.datetime(year=after.year, month=after.month, day=after.day, tzinfo=timezone.utc)
+    next_base = base + ONE_DAY
+    seconds = duration.total_seconds()
+    steps = math.ceil((after - base).total_seconds() / seconds)
+    while True:
+        step_time = base + datetime.timedelta(seconds=seconds * steps)
+        if step_time >= next_base:
+            return next_base
+        if not step_time.second and not step_time.microsecond:
+            return step_time
+        steps += 1
+
+
 @transaction.atomic
 def _trigger_event(rule, last_event=None):
     """Creates a new event based on the given rule and invokes the registered processor to handle it.
@@ -154,6 +337,9 @@ def _trigger_event(rule, last_event=None):
         rule has never triggered an event.
     :type last_event: :class:`trigger.models.TriggerEvent`
 
+    :returns: The new trigger event
+    :rtype: :class:`trigger.models.TriggerEvent`
+
     :raises :class:`job.clock.ClockEventError`: If the registered processor rejects the event.
     """
 
@@ -170,3 +356,4 @@ def _trigger_event(rule, last_event=None):
             logger.exception('Clock processor raised known rule error: %s', rule.id)
         except:
             logger.exception('Clock processor encountered unexpected rule error: %s', rule.id)
+    return event
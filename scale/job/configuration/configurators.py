@@ -24,6 +24,10 @@ from storage.models import Workspace
 from scheduler.vault.manager import secrets_mgr
 
 
+# Templates of the job type specific parts of scheduled execution configurations, kept across scheduling passes
+_JOB_TYPE_TEMPLATES = {}  # {Job type ID: JobTypeTemplate}
+
+
 def normalize_env_var_name(name):
     """Returns a normalized version of the given string name so it can be used as the name of an environment variable
 
@@ -214,8 +218,72 @@ class QueuedExecutionConfigurator(object):
         return workspaces
 
 
+class JobTypeTemplate(object):
+    """Captures the parts of a scheduled execution configuration that only depend on the job type, so that they are
+    built once per job type revision instead of once per scheduled job execution
+    """
+
+    def __init__(self, job_type):
+        """Creates the template for the given job type
+
+        :param job_type: The job type model
+        :type job_type: :class:`job.models.JobType`
+        """
+
+        self.key = JobTypeTemplate.get_key(job_type)
+        self.job_config = job_type.get_job_configuration()
+        self.pull_args = create_pull_command(job_type.docker_image)
+        self.secrets_key = job_type.get_secrets_key()
+
+        # Shared memory required by this job type
+        self.shared_mem_params = []
+        self.shared_mem_env_vars = {}
+        shared_mem = job_type.shared_mem_required
+        if shared_mem > 0:
+            shared_mem = int(math.ceil(shared_mem))
+            self.shared_mem_params = [DockerParameter('shm-size', '%dm' % shared_mem)]
+            self.shared_mem_env_vars = {'ALLOCATED_SHARED_MEM': '%.1f' % float(shared_mem)}
+
+        # TODO: this feature should be removed once Scale drops support for job type docker params
+        self.docker_params = []
+        if job_type.docker_params:
+            for key, value in job_type.docker_params.items():
+                self.docker_params.append(DockerParameter(key, value))
+
+    @staticmethod
+    def get_key(job_type):
+        """Returns the key that identifies the version of the given job type that a template was built from
+
+        :param job_type: The job type model
+        :type job_type: :class:`job.models.JobType`
+        :returns: The template key
+        :rtype: tuple
+        """
+
+        return job_type.revision_num, job_type.last_modified
+
+    @staticmethod
+    def get_template(job_type):
+        """Returns the template for the given job type, building a new one if the job type has changed since its
+        template was last built
+
+        :param job_type: The job type model
+        :type job_type: :class:`job.models.JobType`
+        :returns: The job type template
+        :rtype: :class:`job.configuration.configurators.JobTypeTemplate`
+        """
+
+        template = _JOB_TYPE_TEMPLATES.get(job_type.id)
+        if not template or template.key != JobTypeTemplate.get_key(job_type):
+            template = JobTypeTemplate(job_type)
+            _JOB_TYPE_TEMPLATES[job_type.id] = template
+        return template
+
+
 class ScheduledExecutionConfigurator(object):
-    """Configurator that handles execution configurations when a job execution is scheduled
+    """Configurator that handles execution configurations when a job execution is scheduled. The parts of each
+    configuration that only depend on the job type, the workspaces, or the cluster settings are built once and reused
+    for every job execution that is configured.
     """
 
     def __init__(self, workspaces):
@@ -233,6 +301,26 @@ class ScheduledExecutionConfigurator(object):
                                  'SCALE_DB_PORT': db['PORT']}
         self._system_settings_hidden = {key: '*****' for key in self._system_settings.keys()}
 
+        self._workspace_volumes = {}  # {(Workspace name, mode): Volume kwargs, None if workspace has no volume}
+
+        # Docker parameters for logging, read once from the cluster settings
+        self._log_params = []
+        self._es_param = None
+        if settings.LOGGING_ADDRESS is not None:
+            log_driver = DockerParameter('log-driver', 'syslog')
+            # Must explicitly specify RFC3164 to ensure compatibility with logstash in Docker 1.11+
+            syslog_format = DockerParameter('log-opt', 'syslog-format=rfc3164')
+            log_address = DockerParameter('log-opt', 'syslog-address=%s' % settings.LOGGING_ADDRESS)
+            self._log_params = [log_driver, syslog_format, log_address]
+            # TODO: remove es_urls parameter when Scale no longer supports old style job types
+            es_urls = None
+            # Use connection pool to get up-to-date list of elasticsearch nodes
+            if settings.ELASTICSEARCH:
+                hosts = [host.host for host in settings.ELASTICSEARCH.transport.connection_pool.connections]
+                es_urls = ','.join(hosts)
+            # Post task needs ElasticSearch URL to grab logs for old artifact registration
+            self._es_param = DockerParameter('env', 'SCALE_ELASTICSEARCH_URLS=%s' % es_urls)
+
     def configure_scheduled_job(self, job_exe, job_type, interface):
         """Configures the JSON configuration field for the given scheduled job execution. The given job_exe and job_type
         models will not have any related fields populated. The execution configuration in the job_exe model will have
@@ -251,21 +339,22 @@ class ScheduledExecutionConfigurator(object):
         """
 
         config = job_exe.get_execution_configuration()
+        template = JobTypeTemplate.get_template(job_type)
 
         # Configure items specific to the main task
-        ScheduledExecutionConfigurator._configure_main_task(config, job_exe, job_type, interface)
+        ScheduledExecutionConfigurator._configure_main_task(config, job_exe, template, interface)
 
         # Configure job tasks based upon whether system job or regular job
         if job_type.is_system:
             ScheduledExecutionConfigurator._configure_system_job(config, job_exe)
         else:
-            ScheduledExecutionConfigurator._configure_regular_job(config, job_exe, job_type)
+            ScheduledExecutionConfigurator._configure_regular_job(config, job_exe, template)
 
         # Configure items that apply to all tasks
         self._configure_all_tasks(config, job_exe, job_type)
 
         # Configure secrets
-        config_with_secrets = self._configure_secrets(config, job_exe, job_type, interface)
+        config_with_secrets = self._configure_secrets(config, job_exe, job_type, template, interface)
 
         job_exe.configuration = config.get_dict()
         return config_with_secrets
@@ -294,72 +383,44 @@ class ScheduledExecutionConfigurator(object):
             # Configure workspace volumes
             workspace_volumes = {}
             for task_workspace in config.get_workspaces(task_type):
-                workspace_model = self._workspaces[task_workspace.name]
-                # TODO: Should refactor workspace broker to return a Volume object and remove BrokerVolume
-                if workspace_model.volume:
+                volume_kwargs = self._get_workspace_volume_kwargs(task_workspace)
+                if volume_kwargs:
                     vol_name = get_workspace_volume_name(job_exe, task_workspace.name)
-                    cont_path = get_workspace_volume_path(workspace_model.name)
-                    if workspace_model.volume.host:
-                        host_path = workspace_model.volume.remote_path
-                        volume = Volume(vol_name, cont_path, task_workspace.mode, is_host=True, host_path=host_path)
-                    else:
-                        driver = workspace_model.volume.driver
-                        driver_opts = {}
-                        # TODO: Hack alert for nfs broker, as stated above, we should return Volume from broker
-                        if driver == 'nfs':
-                            driver_opts = {'share': workspace_model.volume.remote_path}
-                        volume = Volume(vol_name, cont_path, task_workspace.mode, is_host=False, driver=driver,
-                                        driver_opts=driver_opts)
-                    workspace_volumes[task_workspace.name] = volume
+                    workspace_volumes[task_workspace.name] = Volume(vol_name, **volume_kwargs)
 
             config.add_to_task(task_type, env_vars=env_vars, wksp_volumes=workspace_volumes)
 
         # Configure tasks for logging
-        if settings.LOGGING_ADDRESS is not None:
-            log_driver = DockerParameter('log-driver', 'syslog')
-            # Must explicitly specify RFC3164 to ensure compatibility with logstash in Docker 1.11+
-            syslog_format = DockerParameter('log-opt', 'syslog-format=rfc3164')
-            log_address = DockerParameter('log-opt', 'syslog-address=%s' % settings.LOGGING_ADDRESS)
+        if self._log_params:
             if not job_type.is_system:
                 pre_task_tag = DockerParameter('log-opt', 'tag=%s' % config.get_task_id('pre'))
-                config.add_to_task('pre', docker_params=[log_driver, syslog_format, log_address, pre_task_tag])
+                config.add_to_task('pre', docker_params=self._log_params + [pre_task_tag])
                 post_task_tag = DockerParameter('log-opt', 'tag=%s' % config.get_task_id('post'))
-                config.add_to_task('post', docker_params=[log_driver, syslog_format, log_address, post_task_tag])
-                # TODO: remove es_urls parameter when Scale no longer supports old style job types
-                es_urls = None
-                # Use connection pool to get up-to-date list of elasticsearch nodes
-                if settings.ELASTICSEARCH:
-                    hosts = [host.host for host in settings.ELASTICSEARCH.transport.connection_pool.connections]
-                    es_urls = ','.join(hosts)
-                # Post task needs ElasticSearch URL to grab logs for old artifact registration
-                es_param = DockerParameter('env', 'SCALE_ELASTICSEARCH_URLS=%s' % es_urls)
-                config.add_to_task('post', docker_params=[es_param])
+                config.add_to_task('post', docker_params=self._log_params + [post_task_tag])
+                config.add_to_task('post', docker_params=[self._es_param])
             main_task_tag = DockerParameter('log-opt', 'tag=%s' % config.get_task_id('main'))
-            config.add_to_task('main', docker_params=[log_driver, syslog_format, log_address, main_task_tag])
+            config.add_to_task('main', docker_params=self._log_params + [main_task_tag])
 
     @staticmethod
-    def _configure_main_task(config, job_exe, job_type, interface):
+    def _configure_main_task(config, job_exe, template, interface):
         """Configures the main task for the given execution with items specific to the main task
 
         :param config: The execution configuration
         :type config: :class:`job.configuration.json.execution.exe_config.ExecutionConfiguration`
         :param job_exe: The job execution model being scheduled
         :type job_exe: :class:`job.models.JobExecution`
-        :param job_type: The job type model
-        :type job_type: :class:`job.models.JobType`
+        :param template: The template for the job type
+        :type template: :class:`job.configuration.configurators.JobTypeTemplate`
         :param interface: The job interface
         :type interface: :class:`job.configuration.interface.job_interface.JobInterface`
         """
 
         # Set shared memory if required by this job type
-        shared_mem = job_type.shared_mem_required
-        if shared_mem > 0:
-            shared_mem = int(math.ceil(shared_mem))
-            env_vars = {'ALLOCATED_SHARED_MEM': '%.1f' % float(shared_mem)}
-            config.add_to_task('main', docker_params=[DockerParameter('shm-size', '%dm' % shared_mem)],
-                               env_vars=env_vars)
+        if template.shared_mem_params:
+            config.add_to_task('main', docker_params=template.shared_mem_params,
+                               env_vars=dict(template.shared_mem_env_vars))
 
-        job_config = job_type.get_job_configuration()
+        job_config = template.job_config
         mount_volumes = {}
         # TODO: use better interface method once we switch to Seed
         for mount in interface.get_dict()['mounts']:
@@ -375,7 +436,7 @@ class ScheduledExecutionConfigurator(object):
         config.add_to_task('main', mount_volumes=mount_volumes)
 
     @staticmethod
-    def _configure_regular_job(config, job_exe, job_type):
+    def _configure_regular_job(config, job_exe, template):
         """Configures the given execution as a regular (non-system) job by adding pre and post tasks,
         input/output mounts, etc
 
@@ -383,12 +444,12 @@ class ScheduledExecutionConfigurator(object):
         :type config: :class:`job.configuration.json.execution.exe_config.ExecutionConfiguration`
         :param job_exe: The job execution model being scheduled
         :type job_exe: :class:`job.models.JobExecution`
-        :param job_type: The job type model
-        :type job_type: :class:`job.models.JobType`
+        :param template: The template for the job type
+        :type template: :class:`job.configuration.configurators.JobTypeTemplate`
         """
 
         config.create_tasks(['pull', 'pre', 'main', 'post'])
-        config.add_to_task('pull', args=create_pull_command(job_type.docker_image))
+        config.add_to_task('pull', args=template.pull_args)
         env_vars = {'SCALE_JOB_ID': unicode(job_exe.job_id), 'SCALE_EXE_NUM': unicode(job_exe.exe_num)}
         config.add_to_task('pre', args=PRE_TASK_COMMAND_ARGS, env_vars=env_vars)
         config.add_to_task('post', args=POST_TASK_COMMAND_ARGS, env_vars=env_vars)
@@ -443,7 +504,7 @@ class ScheduledExecutionConfigurator(object):
         resources.remove_resource('disk')
         config.add_to_task('post', resources=resources)
 
-    def _configure_secrets(self, config, job_exe, job_type, interface):
+    def _configure_secrets(self, config, job_exe, job_type, template, interface):
         """Creates a copy of the configuration, configures secrets (masked in one of the copies), and applies any final
         configuration
 
@@ -453,6 +514,8 @@ class ScheduledExecutionConfigurator(object):
         :type job_exe: :class:`job.models.JobExecution`
         :param job_type: The job type model
         :type job_type: :class:`job.models.JobType`
+        :param template: The template for the job type
+        :type template: :class:`job.configuration.configurators.JobTypeTemplate`
         :param interface: The job interface
         :type interface: :class:`job.configuration.interface.job_interface.JobInterface`
         :returns: The copy of the execution configuration that contains the secrets
@@ -471,8 +534,8 @@ class ScheduledExecutionConfigurator(object):
             config_with_secrets.add_to_task('pre', settings=self._system_settings)
             config.add_to_task('post', settings=self._system_settings_hidden)
             config_with_secrets.add_to_task('post', settings=self._system_settings)
-            job_config = job_type.get_job_configuration()
-            secret_settings = secrets_mgr.retrieve_job_type_secrets(job_type.get_secrets_key())
+            job_config = template.job_config
+            secret_settings = secrets_mgr.retrieve_job_type_secrets(template.secrets_key)
             for _config, secrets_hidden in [(config, True), (config_with_secrets, False)]:
                 task_settings = {}
                 # TODO: use better interface method once we switch to Seed
@@ -519,13 +582,9 @@ class ScheduledExecutionConfigurator(object):
 
         # TODO: this feature should be removed once Scale drops support for job type docker params
         # Configure docker parameters listed in job type
-        if job_type.docker_params:
-            docker_params = []
-            for key, value in job_type.docker_params.items():
-                docker_params.append(DockerParameter(key, value))
-            if docker_params:
-                config.add_to_task('main', docker_params=docker_params)
-                config_with_secrets.add_to_task('main', docker_params=docker_params)
+        if template.docker_params:
+            config.add_to_task('main', docker_params=template.docker_params)
+            config_with_secrets.add_to_task('main', docker_params=template.docker_params)
 
         return config_with_secrets
 
@@ -540,3 +599,36 @@ class ScheduledExecutionConfigurator(object):
         """
 
         config.add_to_task('main', resources=job_exe.get_resources())
+
+    def _get_workspace_volume_kwargs(self, task_workspace):
+        """Returns the arguments, other than the volume name, for creating the Docker volume of the given task
+        workspace. The arguments are only built once for each workspace and mode.
+
+        :param task_workspace: The task workspace
+        :type task_workspace: :class:`job.configuration.workspace.TaskWorkspace`
+        :returns: The volume keyword arguments, possibly None if the workspace does not have a volume
+        :rtype: dict
+        """
+
+        key = (task_workspace.name, task_workspace.mode)
+        if key in self._workspace_volumes:
+            return self._workspace_volumes[key]
+
+        volume_kwargs = None
+        workspace_model = self._workspaces[task_workspace.name]
+        # TODO: Should refactor workspace broker to return a Volume object and remove BrokerVolume
+        if workspace_model.volume:
+            cont_path = get_workspace_volume_path(workspace_model.name)
+            volume_kwargs = {'container_path': cont_path, 'mode': task_workspace.mode}
+            if workspace_model.volume.host:
+                volume_kwargs.update({'is_host': True, 'host_path': workspace_model.volume.remote_path})
+            else:
+                driver = workspace_model.volume.driver
+                driver_opts = {}
+                # TODO: Hack alert for nfs broker, as stated above, we should return Volume from broker
+                if driver == 'nfs':
+                    driver_opts = {'share': workspace_model.volume.remote_path}
+                volume_kwargs.update({'is_host': False, 'driver': driver, 'driver_opts': driver_opts})
+
+        self._workspace_volumes[key] = volume_kwargs
+        return volume_kwargs
@@ -9,6 +9,7 @@ from django.utils.timezone import now
 from job.execution.metrics import TotalJobExeMetrics
 from job.execution.tasks.exe_task import JOB_TASK_ID_PREFIX
 from job.messages.job_exe_end import CreateJobExecutionEnd
+from job.messages.running_jobs import create_running_job_messages
 from job.models import Job, JobExecution
 
 
@@ -24,7 +25,7 @@ class JobExecutionManager(object):
 
         self._job_exe_end_models = []  # Holds job_exe_end models to send in next messages
         self._running_job_exes = {}  # {Cluster ID: RunningJobExecution}
-        self._running_job_messages = []  # Holds running job messages to send
+        self._running_job_exes_to_send = []  # Holds newly running job executions to send in next messages
         self._lock = threading.Lock()
         self._metrics = TotalJobExeMetrics(now())
 
@@ -43,6 +44,7 @@ class JobExecutionManager(object):
         """
 
         self._running_job_exes = {}
+        self._running_job_exes_to_send = []
         self._metrics = TotalJobExeMetrics(now())
 
     def generate_status_json(self, nodes_list, when):
@@ -65,8 +67,9 @@ class JobExecutionManager(object):
         """
 
         with self._lock:
-            messages = self._running_job_messages
-            self._running_job_messages = []
+            # Running job executions from all scheduling passes since the last call are coalesced into full messages
+            messages = create_running_job_messages(self._running_job_exes_to_send)
+            self._running_job_exes_to_send = []
 
             message = None
             for job_exe_end in self._job_exe_end_models:
@@ -145,12 +148,7 @@ class JobExecutionManager(object):
                         finished_job_exe = job_exe
                         # return job_exe
 
-        # TODO: this can be removed once database operations move to messaging backend
-        if finished_job_exe:
-            self._handle_finished_job_exe_in_database(finished_job_exe)
-            return finished_job_exe
-
-        return None
+        return finished_job_exe
 
     def init_with_database(self):
         """Initializes the job execution metrics with the execution history from the database
@@ -171,7 +169,6 @@ class JobExecutionManager(object):
         """
 
         lost_exes = []
-        finished_job_exes = []
         with self._lock:
             for job_exe in self._running_job_exes.values():
                 if job_exe.node_id == node_id:
@@ -179,27 +176,20 @@ class JobExecutionManager(object):
                     job_exe.execution_lost(when)
                     if job_exe.is_finished():
                         self._handle_finished_job_exe(job_exe)
-                        finished_job_exes.append(job_exe)
-
-        # TODO: this can be removed once database operations move to messaging backend
-        for finished_job_exe in finished_job_exes:
-            self._handle_finished_job_exe_in_database(finished_job_exe)
 
         return lost_exes
 
-    def schedule_job_exes(self, job_exes, messages):
+    def schedule_job_exes(self, job_exes):
         """Adds newly scheduled running job executions to the manager
 
         :param job_exes: A list of the running job executions to add
         :type job_exes: list
-        :param messages: The messages for the running jobs
-        :type messages: list
         """
 
         with self._lock:
             for job_exe in job_exes:
                 self._running_job_exes[job_exe.cluster_id] = job_exe
-            self._running_job_messages.extend(messages)
+            self._running_job_exes_to_send.extend(job_exes)
             self._metrics.add_running_job_exes(job_exes)
 
     def sync_with_database(self):
@@ -223,7 +213,6 @@ class JobExecutionManager(object):
             job_models[job.id] = job
 
         canceled_tasks = []
-        finished_job_exes = []
         when_canceled = now()
         with self._lock:
             for running_job_exe in running_job_exes:
@@ -239,11 +228,6 @@ class JobExecutionManager(object):
                     else:
                         if running_job_exe.is_finished():
                             self._handle_finished_job_exe(running_job_exe)
-                            finished_job_exes.append(running_job_exe)
-
-        # TODO: this can be removed once database operations move to messaging backend
-        for finished_job_exe in finished_job_exes:
-            self._handle_finished_job_exe_in_database(finished_job_exe)
 
         return canceled_tasks
 
@@ -261,24 +245,5 @@ class JobExecutionManager(object):
         del self._running_job_exes[running_job_exe.cluster_id]
         self._metrics.job_exe_finished(running_job_exe)
 
-    def _handle_finished_job_exe_in_database(self, running_job_exe):
-        """Handles the finished job execution by performing any needed database operations. This is a stop gap until
-        these database operations move to the messaging backend.
-
-        :param running_job_exe: The finished job execution
-        :type running_job_exe: :class:`job.execution.job_exe.RunningJobExecution`
-        """
-
-        # TODO: handling job completion and failure here for now, later these will be sent via messaging backend in a
-        # background thread
-        from queue.models import Queue
-        job_id = running_job_exe.job_id
-        exe_num = running_job_exe.exe_num
-        when = running_job_exe.finished
-        if running_job_exe.status == 'COMPLETED':
-            Queue.objects.handle_job_completion(job_id, exe_num, when)
-        elif running_job_exe.status == 'FAILED':
-            Queue.objects.handle_job_failure(job_id, exe_num, when, running_job_exe.error)
-
 
 job_exe_mgr = JobExecutionManager()
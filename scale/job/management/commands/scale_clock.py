@@ -2,7 +2,6 @@
 from __future__ import unicode_literals
 
 import logging
-import math
 import signal
 import sys
 import time
@@ -30,6 +29,7 @@ class Command(BaseCommand):
         self.running = False
         self.throttle = 60
         self.job_id = None
+        self.scheduler = clock.ClockScheduler()
 
         # Number of executions for the clock job
         # Keeping track of this will allow us to kill the clock process if this becomes an old job execution that was
@@ -48,7 +48,7 @@ class Command(BaseCommand):
 
         logger.info('Command starting: scale_clock')
         while self.running:
-            secs_passed = 0
+            delay = self.throttle
             try:
                 if not self.job_id:
                     self._init_clock()
@@ -56,20 +56,21 @@ class Command(BaseCommand):
                     self._check_clock()
 
                 started = now()
-                clock.perform_tick()
+                self.scheduler.check_rules()
+                self.scheduler.process_due_rules()
                 ended = now()
+                logger.debug('Clock tick took %.3f seconds', (ended - started).total_seconds())
 
-                secs_passed = (ended - started).total_seconds()
+                # Sleep until the next rule is due, waking at least once per throttle period to check the rules
+                next_fire_time = self.scheduler.get_next_fire_time()
+                if next_fire_time:
+                    delay = min(self.throttle, max((next_fire_time - now()).total_seconds(), 0.0))
             except:
                 logger.exception('Clock encountered error')
             finally:
                 if self.running:
-                    # If process time takes less than throttle time, throttle
-                    if secs_passed < self.throttle:
-                        # Delay until full throttle time reached
-                        delay = math.ceil(self.throttle - secs_passed)
-                        logger.debug('Pausing for %i seconds', delay)
-                        time.sleep(delay)
+                    logger.debug('Pausing for %.3f seconds', delay)
+                    time.sleep(delay)
         logger.info('Command completed: scale_clock')
 
         # Clock never successfully finishes, it should always run
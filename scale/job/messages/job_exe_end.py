@@ -1,15 +1,19 @@
 """Defines a command message that creates job_exe_end models"""
 from __future__ import unicode_literals
 
+import json
 import logging
 
-from job.models import JobExecutionEnd
-from messaging.messages.message import CommandMessage
+from django.db import transaction
+
+from error.models import Error
+from job.models import JobExecution, JobExecutionEnd
+from messaging.messages.message import CommandMessage, MAX_MESSAGE_SIZE
+from queue.models import Queue
 from util.parse import datetime_to_string, parse_datetime
 
-# This is the maximum number of job_exe_end models that can fit in one message. This maximum ensures that every message
-# of this type is less than 25 KiB long.
-MAX_NUM = 10
+# The number of bytes reserved for the message JSON outside of the list of job_exe_end models
+BASE_SIZE = len('{"job_exe_end_models": []}')
 
 
 logger = logging.getLogger(__name__)
@@ -26,6 +30,8 @@ class CreateJobExecutionEnd(CommandMessage):
         super(CreateJobExecutionEnd, self).__init__('create_job_exe_ends')
 
         self._job_exe_ends = []
+        self._max_model_size = 0  # Size of the largest job_exe_end model JSON in this message
+        self._size = BASE_SIZE
 
     def add_job_exe_end(self, job_exe_end):
         """Adds the given job_exe_end model to this message
@@ -34,36 +40,28 @@ class CreateJobExecutionEnd(CommandMessage):
         :type job_exe_end: :class:`job.models.JobExecutionEnd`
         """
 
+        model_size = len(json.dumps(CreateJobExecutionEnd._job_exe_end_to_json(job_exe_end))) + 2
         self._job_exe_ends.append(job_exe_end)
+        self._max_model_size = max(self._max_model_size, model_size)
+        self._size += model_size
 
     def can_fit_more(self):
-        """Indicates whether more job_exe_end models can fit in this message
+        """Indicates whether more job_exe_end models can fit in this message. Since task results vary in size, the
+        largest job_exe_end model in this message is used as the estimate for the size of the next one.
 
         :return: True if more job_exe_end models can fit, False otherwise
         :rtype: bool
         """
 
-        return len(self._job_exe_ends) < MAX_NUM
+        return self._size + self._max_model_size <= MAX_MESSAGE_SIZE
 
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
         job_exe_end_list = []
-
         for job_exe_end in self._job_exe_ends:
-            job_exe_end_dict = {'id': job_exe_end.job_exe_id, 'job_id': job_exe_end.job_id,
-                                'job_type_id': job_exe_end.job_type_id, 'exe_num': job_exe_end.exe_num,
-                                'task_results': job_exe_end.task_results, 'status': job_exe_end.status,
-                                'queued': datetime_to_string(job_exe_end.queued),
-                                'ended': datetime_to_string(job_exe_end.ended)}
-            if job_exe_end.error_id:
-                job_exe_end_dict['error_id'] = job_exe_end.error_id
-            if job_exe_end.node_id:
-                job_exe_end_dict['node_id'] = job_exe_end.node_id
-            if job_exe_end.started:
-                job_exe_end_dict['started'] = datetime_to_string(job_exe_end.started)
-            job_exe_end_list.append(job_exe_end_dict)
+            job_exe_end_list.append(CreateJobExecutionEnd._job_exe_end_to_json(job_exe_end))
 
         return {'job_exe_end_models': job_exe_end_list}
 
@@ -98,20 +96,99 @@ class CreateJobExecutionEnd(CommandMessage):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
-        # See if any of the job_exe_end models already exist
+        if not self._job_exe_ends:
+            return True
+
         job_exe_ids = [job_exe_end.job_exe_id for job_exe_end in self._job_exe_ends]
-        job_exe_end_qry = JobExecutionEnd.objects.filter(job_exe_id__in=job_exe_ids).only('job_exe_id')
-        existing_ids = set(model.job_exe_id for model in job_exe_end_qry)
+        with transaction.atomic():
+            # The partitioned job_exe_end table can only enforce the uniqueness of job_exe_id within each partition, so
+            # lock the job_exe models to serialize the check for existing job_exe_end models across messages
+            list(JobExecution.objects.select_for_update().filter(id__in=job_exe_ids).order_by('id').values_list('id'))
+
+            # See if any of the job_exe_end models already exist. A job execution always ends after it was queued, so
+            # the earliest queued time limits the query to the table partitions that could hold these models.
+            earliest_queued = min(job_exe_end.queued for job_exe_end in self._job_exe_ends)
+            job_exe_end_qry = JobExecutionEnd.objects.filter(job_exe_id__in=job_exe_ids, ended__gte=earliest_queued)
+            existing_ids = set(job_exe_end_qry.values_list('job_exe_id', flat=True))
+
+            # Filter out job_exe_end models that already exist, including duplicates within this message
+            models_to_create = []
+            for job_exe_end in self._job_exe_ends:
+                if job_exe_end.job_exe_id not in existing_ids:
+                    existing_ids.add(job_exe_end.job_exe_id)
+                    models_to_create.append(job_exe_end)
+
+            # Bulk create new job_exe_end models
+            if models_to_create:
+                logger.info('Creating %d job_exe_end model(s)', len(models_to_create))
+                JobExecutionEnd.objects.create_job_exe_ends(models_to_create)
+
+                # Complete or fail the jobs in the same transaction so that a finished execution is never recorded
+                # without its job being updated, even if the scheduler restarts
+                self._handle_finished_jobs(models_to_create)
 
-        # Filter out job_exe_end models that already exist
-        models_to_create = []
-        for job_exe_end in self._job_exe_ends:
-            if job_exe_end.job_exe_id not in existing_ids:
-                models_to_create.append(job_exe_end)
+        return True
 
-        # Bulk create new job_exe_end models
-        if models_to_create:
-            logger.info('Creating %d job_exe_end model(s)', len(models_to_create))
-            JobExecutionEnd.objects.bulk_create(models_to_create)
+    def _handle_finished_jobs(self, job_exe_ends):
+        """Completes or fails the jobs of the given completed and failed job executions. The jobs are handled together
+        so that each recipe is evaluated once no matter how many of its jobs finished. If that fails, each job is
+        handled on its own so that one bad job does not hold up the others.
 
-        return True
+        :param job_exe_ends: The new job_exe_end models
+        :type job_exe_ends: [:class:`job.models.JobExecutionEnd`]
+        """
+
+        completions = []
+        failures = []
+        error_ids = {job_exe_end.error_id for job_exe_end in job_exe_ends if job_exe_end.status == 'FAILED'}
+        errors = Error.objects.in_bulk(list(error_ids)) if error_ids else {}
+        for job_exe_end in job_exe_ends:
+            if job_exe_end.status == 'COMPLETED':
+                completions.append((job_exe_end.job_id, job_exe_end.exe_num, job_exe_end.ended))
+            elif job_exe_end.status == 'FAILED':
+                error = errors.get(job_exe_end.error_id) or Error.objects.get_unknown_error()
+                failures.append((job_exe_end.job_id, job_exe_end.exe_num, job_exe_end.ended, error))
+
+        try:
+            with transaction.atomic():
+                if completions:
+                    Queue.objects.handle_job_completions(completions)
+                if failures:
+                    Queue.objects.handle_job_failures(failures)
+        except Exception:
+            logger.exception('Error handling batch of finished jobs, handling them individually')
+            for completion in completions:
+                try:
+                    with transaction.atomic():
+                        Queue.objects.handle_job_completions([completion])
+                except Exception:
+                    logger.exception('Error handling completed job %d', completion[0])
+            for failure in failures:
+                try:
+                    with transaction.atomic():
+                        Queue.objects.handle_job_failures([failure])
+                except Exception:
+                    logger.exception('Error handling failed job %d', failure[0])
+
+    @staticmethod
+    def _job_exe_end_to_json(job_exe_end):
+        """Returns the JSON dict for the given job_exe_end model
+
+        :param job_exe_end: The job_exe_end model
+        :type job_exe_end: :class:`job.models.JobExecutionEnd`
+        :returns: The JSON dict for the model
+        :rtype: dict
+        """
+
+        job_exe_end_dict = {'id': job_exe_end.job_exe_id, 'job_id': job_exe_end.job_id,
+                            'job_type_id': job_exe_end.job_type_id, 'exe_num': job_exe_end.exe_num,
+                            'task_results': job_exe_end.task_results, 'status': job_exe_end.status,
+                            'queued': datetime_to_string(job_exe_end.queued),
+                            'ended': datetime_to_string(job_exe_end.ended)}
+        if job_exe_end.error_id:
+            job_exe_end_dict['error_id'] = job_exe_end.error_id
+        if job_exe_end.node_id:
+            job_exe_end_dict['node_id'] = job_exe_end.node_id
+        if job_exe_end.started:
+            job_exe_end_dict['started'] = datetime_to_string(job_exe_end.started)
+        return job_exe_end_dict
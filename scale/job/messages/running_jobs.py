@@ -3,49 +3,50 @@ from __future__ import unicode_literals
 
 import logging
 
-from django.db import transaction
 from django.utils.timezone import now
 
 from job.models import Job
-from messaging.messages.message import CommandMessage
+from messaging.messages.message import CommandMessage, MAX_MESSAGE_SIZE
 from util.parse import datetime_to_string, parse_datetime
 
-# This is the maximum number of job models that can fit in one message. This maximum ensures that every message of this
-# type is less than 25 KiB long.
-MAX_NUM = 100
+# The approximate number of bytes that a group of running jobs for a node and start time takes in the message JSON, not
+# including the jobs themselves
+GROUP_SIZE = len('{"id": 1234567890, "started": "1970-01-01T00:00:00.000000Z", "jobs": []}, ')
+
+# The maximum number of bytes that a single running job takes in the message JSON
+JOB_SIZE = len('[12345678901234, 1234], ')
 
 
 logger = logging.getLogger(__name__)
 
 
 def create_running_job_messages(running_job_exes):
-    """Creates a list of running job messages for the given running job executions (they must all have the same start
-    time)
+    """Creates a list of running job messages for the given running job executions. Running job executions with
+    different start times are coalesced into the same message and each message is filled up to the maximum message size.
 
     :param running_job_exes: The running job executions
     :type running_job_exes: list
-    :return: The runnin job messages
+    :return: The running job messages
     :rtype: list
     """
 
     messages = []
 
     message = None
-    started = None
     for running_job_exe in running_job_exes:
-        if not started:
-            started = running_job_exe.started
         if not message:
-            message = RunningJobs(started)
+            message = RunningJobs(running_job_exe.started)
         elif not message.can_fit_more():
             messages.append(message)
-            message = RunningJobs(started)
-        message.add_running_job(running_job_exe.job_id, running_job_exe.exe_num, running_job_exe.node_id)
+            message = RunningJobs(running_job_exe.started)
+        message.add_running_job(running_job_exe.job_id, running_job_exe.exe_num, running_job_exe.node_id,
+                                running_job_exe.started)
     if message:
         messages.append(message)
 
     return messages
 
+
 class RunningJobs(CommandMessage):
     """Command message that sets RUNNING status for job models
     """
@@ -53,7 +54,7 @@ class RunningJobs(CommandMessage):
     def __init__(self, started=None):
         """Constructor
 
-        :param started: The time that the jobs started running
+        :param started: The time that the jobs started running, used for any jobs added without their own start time
         :type started: :class:`datetime.datetime`
         """
 
@@ -63,10 +64,11 @@ class RunningJobs(CommandMessage):
             started = now()
 
         self._count = 0
-        self._running_jobs = {}  # {Node ID: [(Job ID, Execution Number)]}
+        self._running_jobs = {}  # {(Node ID, Started): [(Job ID, Execution Number)]}
+        self._size = GROUP_SIZE
         self._started = started
 
-    def add_running_job(self, job_id, exe_num, node_id):
+    def add_running_job(self, job_id, exe_num, node_id, started=None):
         """Adds the given running job to this message
 
         :param job_id: The running job ID
@@ -75,14 +77,22 @@ class RunningJobs(CommandMessage):
         :type exe_num: int
         :param node_id: The node ID that the job is running on
         :type node_id: int
+        :param started: The time that the job started running, defaults to the start time of this message
+        :type started: :class:`datetime.datetime`
         """
 
+        if not started:
+            started = self._started
+
         self._count += 1
+        self._size += JOB_SIZE
         job_tuple = (job_id, exe_num)
-        if node_id in self._running_jobs:
-            self._running_jobs[node_id].append(job_tuple)
+        group_key = (node_id, started)
+        if group_key in self._running_jobs:
+            self._running_jobs[group_key].append(job_tuple)
         else:
-            self._running_jobs[node_id] = [job_tuple]
+            self._size += GROUP_SIZE
+            self._running_jobs[group_key] = [job_tuple]
 
     def can_fit_more(self):
         """Indicates whether more running jobs can fit in this message
@@ -91,18 +101,20 @@ class RunningJobs(CommandMessage):
         :rtype: bool
         """
 
-        return self._count < MAX_NUM
+        return self._size + GROUP_SIZE + JOB_SIZE <= MAX_MESSAGE_SIZE
 
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
+        # Jobs are encoded as compact [job ID, execution number] pairs and the start time is only included for node
+        # groups that did not start at the time of the message
         node_list = []
-        for node_id, job_list in self._running_jobs.items():
-            jobs_list = []
-            for job_tuple in job_list:
-                jobs_list.append({'id': job_tuple[0], 'exe_num': job_tuple[1]})
-            node_list.append({'id': node_id, 'jobs': jobs_list})
+        for group_key, job_list in self._running_jobs.items():
+            node_dict = {'id': group_key[0], 'jobs': [[job_tuple[0], job_tuple[1]] for job_tuple in job_list]}
+            if group_key[1] != self._started:
+                node_dict['started'] = datetime_to_string(group_key[1])
+            node_list.append(node_dict)
 
         return {'started': datetime_to_string(self._started), 'nodes': node_list}
 
@@ -116,10 +128,16 @@ class RunningJobs(CommandMessage):
 
         for node_dict in json_dict['nodes']:
             node_id = node_dict['id']
-            for job_dict in node_dict['jobs']:
-                job_id = job_dict['id']
-                exe_num = job_dict['exe_num']
-                message.add_running_job(job_id, exe_num, node_id)
+            node_started = parse_datetime(node_dict['started']) if 'started' in node_dict else started
+            for job_item in node_dict['jobs']:
+                if isinstance(job_item, dict):
+                    # Older messages encoded each job as a dict
+                    job_id = job_item['id']
+                    exe_num = job_item['exe_num']
+                else:
+                    job_id = job_item[0]
+                    exe_num = job_item[1]
+                message.add_running_job(job_id, exe_num, node_id, node_started)
 
         return message
 
@@ -127,41 +145,16 @@ class RunningJobs(CommandMessage):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
-        job_ids = []
-        for job_list in self._running_jobs.values():
+        running_jobs = []
+        for group_key, job_list in self._running_jobs.items():
+            node_id = group_key[0]
+            started = group_key[1]
             for job_tuple in job_list:
-                job_ids.append(job_tuple[0])
-
-        with transaction.atomic():
-            # Retrieve locked job models
-            job_models = {}
-            for job in Job.objects.get_locked_jobs(job_ids):
-                job_models[job.id] = job
-
-            job_ids_for_status_update = []
-            for node_id, job_list in self._running_jobs.items():
-                job_ids_for_node_update = []
-                for job_tuple in job_list:
-                    job_id = job_tuple[0]
-                    exe_num = job_tuple[1]
-                    job_model = job_models[job_id]
-                    if job_model.num_exes != exe_num:
-                        continue  # Execution number does not match so this update is out of date, ignore job
-                    # Execution numbers match, so this job needs to have its node_id set
-                    job_ids_for_node_update.append(job_id)
-                    # Check status because if it is not QUEUED, then this update came too late (after job already
-                    # reached a final status) and we don't want to update status then
-                    if job_model.status == 'QUEUED':
-                        # Job status is still QUEUED, so update to RUNNING
-                        job_ids_for_status_update.append(job_id)
-
-                # Update jobs for this node
-                if job_ids_for_node_update:
-                    Job.objects.update_jobs_node(job_ids_for_node_update, node_id, self._started)
-
-            # Update jobs that need status set to RUNNING
-            if job_ids_for_status_update:
-                logger.info('Setting %d job(s) to RUNNING status', len(job_ids_for_status_update))
-                Job.objects.update_jobs_to_running(job_ids_for_status_update, self._started)
+                running_jobs.append((job_tuple[0], job_tuple[1], node_id, started))
+
+        # Jobs whose execution number does not match are out of date and ignored, all others have their node and start
+        # time set and are moved to RUNNING if they are still QUEUED
+        count = Job.objects.update_running_jobs(running_jobs)
+        logger.info('Updated %d running job(s)', count)
 
         return True
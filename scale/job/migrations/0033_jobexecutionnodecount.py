@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-10-04 14:12
+from __future__ import unicode_literals
+
+from django.db import connection, migrations, models
+import django.db.models.deletion
+
+
+def populate_job_exe_node_count(apps, schema_editor):
+    # Populate counts from recent job_exe_end models so node statistics are available right away
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO job_exe_node_count (node_id, status, error_category, time_block, count, most_recent)
+            SELECT jee.node_id, jee.status, COALESCE(e.category, ''),
+                   to_timestamp(floor(extract(epoch FROM jee.created) / 300) * 300), count(*), max(jee.created)
+            FROM job_exe_end jee
+            LEFT OUTER JOIN error e ON jee.error_id = e.id
+            WHERE jee.node_id IS NOT NULL AND jee.created > now() - interval '1 day'
+            GROUP BY 1, 2, 3, 4
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('error', '0004_error_should_be_retried'),
+        ('node', '0004_auto_20170524_1639'),
+        ('job', '0032_job_node'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobExecutionNodeCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('FAILED', 'FAILED'), ('COMPLETED', 'COMPLETED'), ('CANCELED', 'CANCELED')], max_length=50)),
+                ('error_category', models.CharField(blank=True, default='', max_length=50)),
+                ('time_block', models.DateTimeField(db_index=True)),
+                ('count', models.IntegerField()),
+                ('most_recent', models.DateTimeField()),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='node.Node')),
+            ],
+            options={
+                'db_table': 'job_exe_node_count',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobexecutionnodecount',
+            unique_together=set([('time_block', 'node', 'status', 'error_category')]),
+        ),
+        migrations.RunPython(populate_job_exe_node_count),
+    ]
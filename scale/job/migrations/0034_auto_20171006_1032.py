@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.2 on 2017-10-06 10:32
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0033_jobexecutionnodecount'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskupdate',
+            name='job_exe',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='job.JobExecution'),
+        ),
+        migrations.AlterField(
+            model_name='taskupdate',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
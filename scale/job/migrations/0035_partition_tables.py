@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def partition_tables(apps, schema_editor):
+    # Converts job_exe_end and task_update into tables partitioned by month (requires PostgreSQL 11 or later, otherwise
+    # the tables are left unpartitioned). The primary key of job_exe_end becomes (job_exe_id, ended), so job_exe_id is
+    # only unique within each partition and CreateJobExecutionEnd skips job_exe_end models that already exist.
+    from util.partition import JOB_EXE_END_TABLE, TASK_UPDATE_TABLE
+
+    JOB_EXE_END_TABLE.convert()
+    TASK_UPDATE_TABLE.convert()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0034_auto_20171006_1032'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def populate_job_input_file(apps, schema_editor):
+    # File lineage is derived from the job_input_file table, so populate it for any older jobs created before the
+    # table existed using the input files in their job data
+    from django.db import connection
+
+    qry = """
+        INSERT INTO job_input_file (job_id, input_file_id, job_input, created)
+        SELECT j.id, i.file_id, i.name, now() FROM job j
+        CROSS JOIN LATERAL (
+            SELECT d->>'name' AS name, (d->>'file_id')::integer AS file_id
+            FROM jsonb_array_elements(j.data->'input_data') d WHERE jsonb_typeof(d->'file_id') = 'number'
+            UNION ALL
+            SELECT d->>'name' AS name, f::integer AS file_id
+            FROM jsonb_array_elements(j.data->'input_data') d
+            CROSS JOIN LATERAL jsonb_array_elements_text(d->'file_ids') f WHERE jsonb_typeof(d->'file_ids') = 'array'
+        ) i
+        WHERE jsonb_typeof(j.data->'input_data') = 'array'
+        AND NOT EXISTS (SELECT 1 FROM job_input_file jif WHERE jif.job_id = j.id)
+        AND EXISTS (SELECT 1 FROM scale_file sf WHERE sf.id = i.file_id)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(qry)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0035_partition_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_job_input_file, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0036_populate_job_input_file'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='job',
+            index_together=set([('last_modified', 'job_type', 'status'), ('last_modified', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='jobexecution',
+            index_together=set([('job', 'exe_num'), ('created', 'id')]),
+        ),
+    ]
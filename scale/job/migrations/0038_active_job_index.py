@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0037_keyset_indexes'),
+    ]
+
+    operations = [
+        # Lets the job load be counted from the active jobs alone instead of scanning the entire job table
+        migrations.RunSQL(
+            "CREATE INDEX job_active_job_type_status_idx ON job (job_type_id, status) "
+            "WHERE status IN ('PENDING', 'QUEUED', 'RUNNING')",
+            'DROP INDEX job_active_job_type_status_idx',
+        ),
+    ]
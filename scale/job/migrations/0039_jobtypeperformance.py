@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import connection, migrations, models
+import django.db.models.deletion
+
+
+def populate_job_type_performance(apps, schema_editor):
+    # Populate counts from the jobs that recently reached a final status so job type details are available right away.
+    # This covers the widest job type details window (24 hours), expanded to the start of its first hourly time block
+    # as the details query does. Task duration histograms are only collected for job executions that end from now on.
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO job_type_performance (job_type_id, status, error_category, time_block, count, most_recent,
+                                              pre_histogram, main_histogram, post_histogram)
+            SELECT j.job_type_id, j.status, COALESCE(e.category, ''),
+                   to_timestamp(floor(extract(epoch FROM j.last_status_change) / 3600) * 3600), count(*),
+                   max(j.last_status_change), '[]', '[]', '[]'
+            FROM job j
+            LEFT OUTER JOIN error e ON j.error_id = e.id
+            WHERE j.status IN ('FAILED', 'COMPLETED', 'CANCELED')
+            AND j.last_status_change >= to_timestamp(
+                floor(extract(epoch FROM now() - interval '24 hours') / 3600) * 3600)
+            GROUP BY 1, 2, 3, 4
+        """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0038_active_job_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobTypePerformance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('FAILED', 'FAILED'), ('COMPLETED', 'COMPLETED'), ('CANCELED', 'CANCELED')], max_length=50)),
+                ('error_category', models.CharField(blank=True, default='', max_length=50)),
+                ('time_block', models.DateTimeField(db_index=True)),
+                ('count', models.IntegerField()),
+                ('most_recent', models.DateTimeField()),
+                ('pre_histogram', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('main_histogram', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('post_histogram', django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+                ('job_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='job.JobType')),
+            ],
+            options={
+                'db_table': 'job_type_performance',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobtypeperformance',
+            unique_together=set([('time_block', 'job_type', 'status', 'error_category')]),
+        ),
+        migrations.RunPython(populate_job_type_performance, migrations.RunPython.noop),
+    ]
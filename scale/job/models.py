@@ -1,16 +1,20 @@
 """Defines the database models for jobs and job types"""
 from __future__ import unicode_literals
 
+import bisect
 import copy
 import datetime
+import io
+import json
 import logging
 import math
 
 import django.contrib.postgres.fields
 import django.utils.html
 from django.conf import settings
-from django.db import models, transaction
-from django.db.models import Q
+from django.db import connection, models, transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.db.models.functions import Greatest
 from django.utils import dateparse, timezone
 
 import util.parse
@@ -38,6 +42,14 @@ from vault.secrets_handler import SecretsHandler
 logger = logging.getLogger(__name__)
 
 
+# Adds the bucket counts of an existing histogram and the histogram being upserted, which may differ in length
+_HISTOGRAM_MERGE_SQL = """COALESCE((
+    SELECT jsonb_agg(COALESCE(a.value::text::int, 0) + COALESCE(b.value::text::int, 0) ORDER BY COALESCE(a.i, b.i))
+    FROM jsonb_array_elements(job_type_performance.%(field)s_histogram) WITH ORDINALITY AS a (value, i)
+    FULL OUTER JOIN jsonb_array_elements(EXCLUDED.%(field)s_histogram) WITH ORDINALITY AS b (value, i) ON a.i = b.i
+), '[]'::jsonb)"""
+
+
 # Required resource minimums for jobs (e.g. resources required for pre and post tasks)
 MIN_CPUS = 0.25
 MIN_MEM = 128.0
@@ -48,6 +60,7 @@ MIN_DISK = 0.0
 # Always adhere to the following model order for obtaining row locks via select_for_update() in order to prevent
 # deadlocks and ensure query efficiency
 # When applying status updates to jobs: Job, Recipe
+# When creating job_exe_end models: JobExecution, Job, Recipe
 # When editing a job/recipe type: RecipeType, JobType, TriggerRule
 
 
@@ -65,6 +78,7 @@ class JobManager(models.Manager):
         :type when: :class:`datetime.datetime`
         """
 
+        JobTypePerformance.objects.update_job_counts([job], 'COMPLETED', when)
         job.status = 'COMPLETED'
         job.ended = when
         job.last_status_change = when
@@ -88,7 +102,7 @@ class JobManager(models.Manager):
         except BatchJob.DoesNotExist:
             pass
 
-    def create_job(self, job_type, event, superseded_job=None, delete_superseded=True):
+    def create_job(self, job_type, event, superseded_job=None, delete_superseded=True, job_type_rev=None):
         """Creates a new job for the given type and returns the job model. Optionally a job can be provided that the new
         job is superseding. If provided, the caller must have obtained a model lock on the job to supersede. The
         returned job model will have not yet been saved in the database.
@@ -101,6 +115,8 @@ class JobManager(models.Manager):
         :type superseded_job: :class:`job.models.Job`
         :param delete_superseded: Whether the created job should delete products from the superseded job
         :type delete_superseded: :class:`job.models.Job`
+        :param job_type_rev: The current revision of the job type, queried if not provided
+        :type job_type_rev: :class:`job.models.JobTypeRevision`
         :returns: The new job
         :rtype: :class:`job.models.Job`
         """
@@ -111,7 +127,9 @@ class JobManager(models.Manager):
 
         job = Job()
         job.job_type = job_type
-        job.job_type_rev = JobTypeRevision.objects.get_revision(job_type.id, job_type.revision_num)
+        if not job_type_rev:
+            job_type_rev = JobTypeRevision.objects.get_revision(job_type.id, job_type.revision_num)
+        job.job_type_rev = job_type_rev
         job.event = event
         job.priority = job_type.priority
         job.timeout = job_type.timeout
@@ -139,6 +157,7 @@ class JobManager(models.Manager):
         :type error: :class:`error.models.Error`
         """
 
+        JobTypePerformance.objects.update_job_counts([job], 'FAILED', when, error)
         job.status = 'FAILED'
         job.error = error
         job.ended = when
@@ -442,15 +461,13 @@ class JobManager(models.Manager):
         :rtype: list
         """
 
+        jobs_to_queue = [job for job in jobs if job.is_ready_to_queue and job.data and not job.is_superseded]
+        JobTypePerformance.objects.update_job_counts(jobs_to_queue, 'QUEUED', when)
+
         # Update job models in memory and collect job IDs
         job_ids = set()
-        jobs_to_queue = []
-        for job in jobs:
-            if not job.is_ready_to_queue or not job.data or job.is_superseded:
-                continue
-
+        for job in jobs_to_queue:
             job_ids.add(job.id)
-            jobs_to_queue.append(job)
             job.status = 'QUEUED'
             job.node = None
             job.error = None
@@ -524,10 +541,6 @@ class JobManager(models.Manager):
             job_inputs.append(job_input)
         JobInputFile.objects.bulk_create(job_inputs)
 
-        # Populate file ancestry links
-        from product.models import FileAncestryLink
-        FileAncestryLink.objects.create_file_ancestry_links(input_file_ids, None, job, None)
-
         # Update job model in database with single query
         self.filter(id=job.id).update(data=data.get_dict(), disk_in_required=disk_in_required,
                                       disk_out_required=disk_out_required, last_modified=modified)
@@ -593,19 +606,6 @@ class JobManager(models.Manager):
         if jobs_to_cancel:
             self.update_status(jobs_to_cancel, 'CANCELED', when)
 
-    def update_jobs_node(self, job_ids, node_id, when):
-        """Updates the jobs with the given IDs to have the given node and start time
-
-        :param job_ids: A list of job IDs to update
-        :type job_ids: list
-        :param node_id: The node ID
-        :type node_id: int
-        :param when: The start time
-        :type when: :class:`datetime.datetime`
-        """
-
-        self.filter(id__in=job_ids).update(node_id=node_id, started=when, last_modified=timezone.now())
-
     @transaction.atomic
     def update_jobs_to_canceled(self, job_ids, when):
         """Updates the given jobs to the CANCELED status. Any jobs that cannot be canceled will be ignored. All database
@@ -620,24 +620,51 @@ class JobManager(models.Manager):
         jobs_to_update = []
         for locked_job in self.get_locked_jobs(job_ids):
             if locked_job.can_be_canceled:
-                jobs_to_update.append(locked_job.id)
+                jobs_to_update.append(locked_job)
 
         if jobs_to_update:
+            JobTypePerformance.objects.update_job_counts(jobs_to_update, 'CANCELED', when)
             # Update job models in database
-            self.filter(id__in=jobs_to_update).update(status='CANCELED', last_status_change=when,
-                                                      last_modified=timezone.now())
-
-    def update_jobs_to_running(self, job_ids, when):
-        """Updates the jobs with the given IDs to the RUNNING status. The caller must have obtained model locks on the
-        job models.
-
-        :param job_ids: A list of job IDs to update
-        :type job_ids: list
-        :param when: The start time
-        :type when: :class:`datetime.datetime`
-        """
-
-        self.filter(id__in=job_ids).update(status='RUNNING', last_status_change=when, last_modified=timezone.now())
+            job_ids_to_update = [job.id for job in jobs_to_update]
+            self.filter(id__in=job_ids_to_update).update(status='CANCELED', last_status_change=when,
+                                                         last_modified=timezone.now())
+
+    def update_running_jobs(self, running_jobs):
+        """Updates the jobs for the given running job executions in a single database statement. Each job whose current
+        execution number matches has its node and start time set, and is also moved to the RUNNING status if it is still
+        QUEUED (a job with any other status has already reached a later status, so its status is left alone). Jobs whose
+        execution number does not match are ignored since the update is out of date. The job row locks are obtained in
+        order of ascending ID within the same statement.
+
+        :param running_jobs: A list of (job ID, execution number, node ID, start time) tuples
+        :type running_jobs: list
+        :returns: The number of jobs updated
+        :rtype: int
+        """
+
+        if not running_jobs:
+            return 0
+
+        job_ids = [running_job[0] for running_job in running_jobs]
+        values_sql = ', '.join(['(%s, %s, %s, %s::timestamp with time zone)'] * len(running_jobs))
+        params = list(job_ids)
+        params.append(timezone.now())
+        for running_job in running_jobs:
+            params.extend(running_job)
+
+        qry = """
+            WITH locked AS (SELECT id FROM job WHERE id IN (%s) ORDER BY id FOR UPDATE)
+            UPDATE job SET node_id = v.node_id, started = v.started,
+                status = CASE WHEN job.status = 'QUEUED' THEN 'RUNNING' ELSE job.status END,
+                last_status_change = CASE WHEN job.status = 'QUEUED' THEN v.started ELSE job.last_status_change END,
+                last_modified = %%s
+            FROM locked, (VALUES %s) AS v (job_id, exe_num, node_id, started)
+            WHERE job.id = locked.id AND job.id = v.job_id AND job.num_exes = v.exe_num
+        """ % (', '.join(['%s'] * len(job_ids)), values_sql)
+
+        with connection.cursor() as cursor:
+            cursor.execute(qry, params)
+            return cursor.rowcount
 
     def update_status(self, jobs, status, when, error=None):
         """Updates the given jobs with the new status. The caller must have obtained model locks on the job models.
@@ -659,6 +686,8 @@ class JobManager(models.Manager):
         if not status == 'FAILED' and error:
             raise Exception('Status %s is invalid with an error' % status)
 
+        JobTypePerformance.objects.update_job_counts(jobs, status, when, error)
+
         change_started = (status == 'RUNNING')
         ended = when if status in Job.FINAL_STATUSES else None
         modified = timezone.now()
@@ -933,7 +962,7 @@ class Job(models.Model):
     class Meta(object):
         """meta information for the db"""
         db_table = 'job'
-        index_together = ['last_modified', 'job_type', 'status']
+        index_together = [('last_modified', 'job_type', 'status'), ('last_modified', 'id')]
 
 
 class JobExecutionManager(models.Manager):
@@ -949,12 +978,17 @@ class JobExecutionManager(models.Manager):
         """
 
         job_exe = JobExecution.objects.all().select_related(
-            'job', 'job__job_type', 'job__error', 'job__event', 'job__event__rule', 'node', 'error', 'jobexecutionend',
+            'job', 'job__job_type', 'job__error', 'job__event', 'job__event__rule', 'node', 'error',
             'jobexecutionoutput'
         )
         job_exe = job_exe.defer('stdout', 'stderr')
         job_exe = job_exe.get(pk=job_exe_id)
 
+        # A job execution always ends after it was queued, which limits the job_exe_end query to the table partitions
+        # that could hold its model
+        job_exe_end_qry = JobExecutionEnd.objects.select_related('error').filter(ended__gte=job_exe.queued)
+        prefetch_related_objects([job_exe], Prefetch('jobexecutionend', queryset=job_exe_end_qry))
+
         # Populate command arguments
         job_exe.command_arguments = job_exe.get_execution_configuration().get_args('main')
 
@@ -1347,7 +1381,7 @@ class JobExecution(models.Model):
     class Meta(object):
         """Meta information for the database"""
         db_table = 'job_exe'
-        index_together = ['job', 'exe_num']
+        index_together = [('job', 'exe_num'), ('created', 'id')]
 
 
 class JobExecutionEndManager(models.Manager):
@@ -1368,6 +1402,26 @@ class JobExecutionEndManager(models.Manager):
         job_exe_end_query = job_exe_end_query.defer('task_results')
         return job_exe_end_query
 
+    @transaction.atomic
+    def create_job_exe_ends(self, job_exe_ends, when=None):
+        """Creates the given job_exe_end models in the database and updates the per-node job execution counts and the
+        per-job type performance statistics to include them. All of this happens within the same transaction so the
+        counts never drift from the job_exe_end table.
+
+        :param job_exe_ends: The job_exe_end models to create
+        :type job_exe_ends: list
+        :param when: The time that the models are being created, defaults to now
+        :type when: :class:`datetime.datetime`
+        """
+
+        if not job_exe_ends:
+            return
+
+        when = when if when else timezone.now()
+        self.bulk_create(job_exe_ends)
+        JobExecutionNodeCount.objects.add_job_exe_ends(job_exe_ends, when)
+        JobTypePerformance.objects.add_job_exe_ends(job_exe_ends, when)
+
 
 class JobExecutionEnd(models.Model):
     """Represents the end of a job execution, including the execution's final status and end time
@@ -1438,6 +1492,148 @@ class JobExecutionEnd(models.Model):
         index_together = ['job', 'exe_num']
 
 
+class JobExecutionNodeCountManager(models.Manager):
+    """Provides additional methods for handling job execution node counts"""
+
+    def add_job_exe_ends(self, job_exe_ends, when):
+        """Adds the given job_exe_end models to the job execution counts for the time block containing the given time.
+        Models without a node are not counted. The counts are added with a single upsert so that concurrent callers
+        adding to the same new count do not conflict. Whenever a new count is created, the counts that are past their
+        retention period are deleted. The caller is expected to be within a transaction.
+
+        :param job_exe_ends: The job_exe_end models to count
+        :type job_exe_ends: list
+        :param when: The time that the job_exe_end models were created
+        :type when: :class:`datetime.datetime`
+        """
+
+        time_block = JobExecutionNodeCount.get_time_block(when)
+
+        # Look up error categories for all the errors at once
+        error_ids = set(job_exe_end.error_id for job_exe_end in job_exe_ends if job_exe_end.error_id)
+        categories = Error.objects.get_categories(error_ids)
+
+        # Total up the new counts: {(Node ID, status, error category): count}
+        new_counts = {}
+        for job_exe_end in job_exe_ends:
+            if not job_exe_end.node_id:
+                continue
+            category = categories.get(job_exe_end.error_id, '')
+            key = (job_exe_end.node_id, job_exe_end.status, category)
+            new_counts[key] = new_counts.get(key, 0) + 1
+        if not new_counts:
+            return
+
+        # Rows are sorted so that concurrent upserts lock them in the same order
+        params = []
+        for key in sorted(new_counts.keys()):
+            params.extend([key[0], key[1], key[2], time_block, new_counts[key], when])
+        values_sql = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(new_counts))
+        qry = """
+            INSERT INTO job_exe_node_count (node_id, status, error_category, time_block, count, most_recent)
+            VALUES %s
+            ON CONFLICT (time_block, node_id, status, error_category) DO UPDATE
+            SET count = job_exe_node_count.count + EXCLUDED.count,
+                most_recent = GREATEST(job_exe_node_count.most_recent, EXCLUDED.most_recent)
+            RETURNING xmax = 0
+        """ % values_sql
+        with connection.cursor() as cursor:
+            cursor.execute(qry, params)
+            # A zero xmax indicates a newly inserted row, which happens at most a few times per time block
+            was_inserted = any(row[0] for row in cursor.fetchall())
+
+        if was_inserted:
+            self.delete_old_counts(when)
+
+    def delete_old_counts(self, when):
+        """Deletes the job execution counts that are past the retention period given by the
+        JOB_EXE_NODE_COUNT_RETENTION_DAYS setting
+
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        :returns: The number of deleted counts
+        :rtype: int
+        """
+
+        retention_days = settings.JOB_EXE_NODE_COUNT_RETENTION_DAYS
+        if retention_days is None:
+            return 0
+        before = JobExecutionNodeCount.get_time_block(when - datetime.timedelta(days=retention_days))
+        deleted_count = self.filter(time_block__lt=before).delete()[0]
+        if deleted_count:
+            logger.info('Deleted %d job execution node count(s) before %s', deleted_count, before)
+        return deleted_count
+
+    def get_counts(self, started, ended=None):
+        """Returns the job execution counts for the time blocks within the given time range. Since counts are stored in
+        time blocks, the range is expanded to include the entire time block that contains the started time.
+
+        :param started: Query counts for job executions that ended after this time
+        :type started: :class:`datetime.datetime`
+        :param ended: Query counts for job executions that ended before this time
+        :type ended: :class:`datetime.datetime`
+        :returns: The list of count dicts with node_id, status, error_category, count, and most_recent
+        :rtype: list
+        """
+
+        counts_qry = self.filter(time_block__gte=JobExecutionNodeCount.get_time_block(started))
+        if ended:
+            counts_qry = counts_qry.filter(time_block__lte=ended)
+        counts_qry = counts_qry.values('node_id', 'status', 'error_category')
+        return counts_qry.annotate(count=models.Sum('count'), most_recent=models.Max('most_recent'))
+
+
+class JobExecutionNodeCount(models.Model):
+    """Represents a count of finished job executions for a node, status, and error category within a block of time.
+    These counts are maintained as job_exe_end models are created so that node statistics do not need to scan the
+    job_exe_end table.
+
+    :keyword node: The node on which the job executions ran
+    :type node: :class:`django.db.models.ForeignKey`
+    :keyword status: The final status of the job executions
+    :type status: :class:`django.db.models.CharField`
+    :keyword error_category: The category of the error that caused the failures (empty if there was no error)
+    :type error_category: :class:`django.db.models.CharField`
+    :keyword time_block: The start of the block of time in which the job_exe_end models were created
+    :type time_block: :class:`django.db.models.DateTimeField`
+    :keyword count: The number of job executions
+    :type count: :class:`django.db.models.IntegerField`
+    :keyword most_recent: When the most recent job_exe_end model within this count was created
+    :type most_recent: :class:`django.db.models.DateTimeField`
+    """
+
+    BLOCK_LENGTH = datetime.timedelta(minutes=5)
+
+    node = models.ForeignKey('node.Node', on_delete=models.PROTECT)
+    status = models.CharField(choices=JobExecutionEnd.JOB_EXE_END_STATUSES, max_length=50)
+    error_category = models.CharField(blank=True, default='', max_length=50)
+    time_block = models.DateTimeField(db_index=True)
+    count = models.IntegerField()
+    most_recent = models.DateTimeField()
+
+    objects = JobExecutionNodeCountManager()
+
+    @staticmethod
+    def get_time_block(when):
+        """Returns the start of the time block that contains the given time
+
+        :param when: The time
+        :type when: :class:`datetime.datetime`
+        :returns: The start of the time block
+        :rtype: :class:`datetime.datetime`
+        """
+
+        block_secs = int(JobExecutionNodeCount.BLOCK_LENGTH.total_seconds())
+        epoch = datetime.datetime.utcfromtimestamp(0).replace(tzinfo=timezone.utc)
+        secs = int((when - epoch).total_seconds())
+        return epoch + datetime.timedelta(seconds=secs - (secs % block_secs))
+
+    class Meta(object):
+        """Meta information for the database"""
+        db_table = 'job_exe_node_count'
+        unique_together = ('time_block', 'node', 'status', 'error_category')
+
+
 class JobExecutionOutput(models.Model):
     """Represents the output of a job execution
 
@@ -1517,12 +1713,16 @@ class JobTypeStatusCounts(object):
     :keyword category: The category of the job execution status being counted. Note that currently this will only be
         populated for types of ERROR status values.
     :type category: string
+    :keyword durations: The estimated task duration percentiles in seconds for each task type, only populated for the
+        final statuses of job executions.
+    :type durations: dict
     """
-    def __init__(self, status, count=0, most_recent=None, category=None):
+    def __init__(self, status, count=0, most_recent=None, category=None, durations=None):
         self.status = status
         self.count = count
         self.most_recent = most_recent
         self.category = category
+        self.durations = durations
 
 
 class JobTypeStatus(object):
@@ -1876,7 +2076,8 @@ class JobTypeManager(models.Manager):
         return job_type
 
     def get_performance(self, job_type_id, started, ended=None):
-        """Returns the job count statistics for a given job type and time range.
+        """Returns the job count statistics for a given job type and time range. Jobs in a final status are counted from
+        the precomputed performance statistics, which also provide the estimated task durations of the job executions.
 
         :param job_type_id: The unique identifier of the job type.
         :type job_type_id: int
@@ -1887,8 +2088,12 @@ class JobTypeManager(models.Manager):
         :returns: A list of job counts organized by status.
         :rtype: [:class:`job.models.JobTypeStatusCounts`]
         """
+
+        # Jobs that are still active are counted directly from the job table, which only holds a small number of them
+        active_statuses = [status for status, _ in Job.JOB_STATUSES if status not in Job.FINAL_STATUSES]
         count_dicts = Job.objects.values('job_type__id', 'status', 'error__category')
-        count_dicts = count_dicts.filter(job_type_id=job_type_id, last_status_change__gte=started)
+        count_dicts = count_dicts.filter(job_type_id=job_type_id, status__in=active_statuses,
+                                         last_status_change__gte=started)
         if ended:
             count_dicts = count_dicts.filter(last_status_change__lte=ended)
         count_dicts = count_dicts.annotate(count=models.Count('job_type'),
@@ -1898,6 +2103,9 @@ class JobTypeManager(models.Manager):
             counts = JobTypeStatusCounts(count_dict['status'], count_dict['count'],
                                          count_dict['most_recent'], count_dict['error__category'])
             results.append(counts)
+
+        # Jobs in a final status are summed from the precomputed performance statistics
+        results.extend(JobTypePerformance.objects.get_performance(job_type_id, started, ended))
         return results
 
     def get_status(self, started, ended=None, is_operational=None):
@@ -2357,6 +2565,317 @@ class JobType(models.Model):
         unique_together = ('name', 'version')
 
 
+class JobTypePerformanceManager(models.Manager):
+    """Provides additional methods for handling job type performance statistics"""
+
+    def add_job_exe_ends(self, job_exe_ends, when):
+        """Adds the task durations of the given job_exe_end models to the histograms for the time block containing the
+        given time. The job counts are not changed since they are maintained as jobs change status (see
+        update_job_counts()). The caller is expected to be within a transaction.
+
+        :param job_exe_ends: The job_exe_end models to add
+        :type job_exe_ends: list
+        :param when: The time that the job_exe_end models were created
+        :type when: :class:`datetime.datetime`
+        """
+
+        time_block = JobTypePerformance.get_time_block(when)
+
+        # Look up error categories for all the errors at once
+        error_ids = set(job_exe_end.error_id for job_exe_end in job_exe_ends if job_exe_end.error_id)
+        categories = Error.objects.get_categories(error_ids)
+
+        # Total up the new statistics: {(Job type ID, status, error category): JobTypePerformance}
+        new_stats = {}
+        for job_exe_end in job_exe_ends:
+            category = categories.get(job_exe_end.error_id, '')
+            key = (job_exe_end.job_type_id, job_exe_end.status, category)
+            if key not in new_stats:
+                new_stats[key] = JobTypePerformance(job_type_id=key[0], status=key[1], error_category=key[2],
+                                                    time_block=time_block, count=0, most_recent=when)
+            new_stats[key].add_job_exe_end(job_exe_end)
+
+        self._upsert(new_stats)
+
+    def update_job_counts(self, jobs, status, when, error=None):
+        """Updates the job counts for the given jobs, which are changing to the given status. Each job that is leaving
+        a final status is removed from the count for the time block in which it reached that status, and each job that
+        is reaching a final status is added to the count for the time block containing the given time. This must be
+        called before the job models are updated. The caller is expected to be within a transaction.
+
+        :param jobs: The job models, which still hold their current status
+        :type jobs: [:class:`job.models.Job`]
+        :param status: The new status of the jobs
+        :type status: string
+        :param when: The time that the status change occurred
+        :type when: :class:`datetime.datetime`
+        :param error: The error that caused the failure, possibly None
+        :type error: :class:`error.models.Error`
+        """
+
+        # Jobs that are leaving a final status, such as failed jobs that are re-queued, are no longer counted
+        jobs_to_remove = [job for job in jobs if job.status in Job.FINAL_STATUSES]
+        if jobs_to_remove:
+            error_ids = set(job.error_id for job in jobs_to_remove if job.error_id)
+            categories = Error.objects.get_categories(error_ids)
+            old_counts = {}  # {(Job type ID, status, error category, time block): count}
+            for job in jobs_to_remove:
+                time_block = JobTypePerformance.get_time_block(job.last_status_change)
+                key = (job.job_type_id, job.status, categories.get(job.error_id, ''), time_block)
+                old_counts[key] = old_counts.get(key, 0) + 1
+            for key in sorted(old_counts.keys()):
+                performance_qry = self.filter(job_type_id=key[0], status=key[1], error_category=key[2],
+                                              time_block=key[3])
+                performance_qry.update(count=Greatest(models.F('count') - old_counts[key], models.Value(0)))
+
+        if status not in Job.FINAL_STATUSES:
+            return
+        time_block = JobTypePerformance.get_time_block(when)
+        category = error.category if error else ''
+        new_stats = {}  # {(Job type ID, status, error category): JobTypePerformance}
+        for job in jobs:
+            key = (job.job_type_id, status, category)
+            if key not in new_stats:
+                new_stats[key] = JobTypePerformance(job_type_id=key[0], status=key[1], error_category=key[2],
+                                                    time_block=time_block, count=0, most_recent=when)
+            new_stats[key].count += 1
+
+        self._upsert(new_stats)
+
+    def _upsert(self, new_stats):
+        """Adds the given statistics to the database with a single upsert, which sums the counts and the task duration
+        histograms of any statistics that already exist, so that concurrent callers adding to the same new statistics do
+        not conflict. The most recent time is only changed by statistics that add to the count.
+
+        :param new_stats: Dict where each (job type ID, status, error category) tuple maps to the statistics to add
+        :type new_stats: dict
+        """
+
+        if not new_stats:
+            return
+
+        # Rows are sorted so that concurrent upserts lock them in the same order
+        params = []
+        for key in sorted(new_stats.keys()):
+            performance = new_stats[key]
+            params.extend([key[0], key[1], key[2], performance.time_block, performance.count, performance.most_recent])
+            for task_type in JobTypePerformance.TASK_TYPES:
+                params.append(json.dumps(performance._get_histogram(task_type)))
+        values_sql = ', '.join(['(%s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb, %s::jsonb)'] * len(new_stats))
+        histograms_sql = ', '.join(['%s_histogram = %s' % (task_type, _HISTOGRAM_MERGE_SQL % {'field': task_type})
+                                    for task_type in JobTypePerformance.TASK_TYPES])
+        qry = """
+            INSERT INTO job_type_performance (job_type_id, status, error_category, time_block, count, most_recent,
+                                              pre_histogram, main_histogram, post_histogram)
+            VALUES %s
+            ON CONFLICT (time_block, job_type_id, status, error_category) DO UPDATE
+            SET count = job_type_performance.count + EXCLUDED.count,
+                most_recent = CASE WHEN EXCLUDED.count > 0
+                    THEN GREATEST(job_type_performance.most_recent, EXCLUDED.most_recent)
+                    ELSE job_type_performance.most_recent END, %s
+        """ % (values_sql, histograms_sql)
+        with connection.cursor() as cursor:
+            cursor.execute(qry, params)
+
+    def get_performance(self, job_type_id, started, ended=None):
+        """Returns the counts of the jobs in each final status and the task duration percentiles of the job executions
+        for the given job type and time range, summed from the statistics of each time block. Since statistics are
+        stored in time blocks, the range is expanded to include the entire time block that contains the started time.
+
+        :param job_type_id: The unique identifier of the job type
+        :type job_type_id: int
+        :param started: Query jobs that reached their final status after this time
+        :type started: :class:`datetime.datetime`
+        :param ended: Query jobs that reached their final status before this time
+        :type ended: :class:`datetime.datetime`
+        :returns: A list of job counts organized by status and error category
+        :rtype: [:class:`job.models.JobTypeStatusCounts`]
+        """
+
+        time_block = JobTypePerformance.get_time_block(started)
+        performance_qry = self.filter(job_type_id=job_type_id, time_block__gte=time_block)
+        if ended:
+            performance_qry = performance_qry.filter(time_block__lte=ended)
+
+        # Sum the time blocks: {(Status, error category): JobTypePerformance}
+        totals = {}
+        most_recent = {}  # {(Status, error category): When a job most recently reached the status}
+        for performance in performance_qry.order_by('time_block'):
+            key = (performance.status, performance.error_category)
+            if key in totals:
+                totals[key].merge(performance)
+            else:
+                totals[key] = performance
+            if performance.count and (key not in most_recent or performance.most_recent > most_recent[key]):
+                most_recent[key] = performance.most_recent
+
+        # Statistics of job executions whose jobs are no longer in the final status, such as retried failures, only
+        # contribute their task durations
+        results = []
+        for key, performance in totals.items():
+            if performance.count > 0:
+                counts = JobTypeStatusCounts(performance.status, performance.count, most_recent[key],
+                                             performance.error_category or None, performance.get_durations())
+                results.append(counts)
+        return results
+
+
+class JobTypePerformance(models.Model):
+    """Represents the performance statistics of a job type for a final status and error category within a block of
+    time: the number of jobs that reached the status within the time block and are still in it, and the task durations
+    of the job executions that finished with the status within the time block. The counts are maintained as jobs change
+    status and the durations as job_exe_end models are created, so that job type details do not need to scan the job
+    and job_exe_end tables. Task durations are kept as histograms with fixed buckets so that the histograms of any
+    number of time blocks can be summed and percentiles estimated from the total.
+
+    :keyword job_type: The type of the jobs
+    :type job_type: :class:`django.db.models.ForeignKey`
+    :keyword status: The final status of the jobs and job executions
+    :type status: :class:`django.db.models.CharField`
+    :keyword error_category: The category of the error that caused the failures (empty if there was no error)
+    :type error_category: :class:`django.db.models.CharField`
+    :keyword time_block: The start of the block of time in which the jobs reached the status
+    :type time_block: :class:`django.db.models.DateTimeField`
+    :keyword count: The number of jobs that reached the status within the time block and are still in it
+    :type count: :class:`django.db.models.IntegerField`
+    :keyword most_recent: When a job within the count most recently reached the status
+    :type most_recent: :class:`django.db.models.DateTimeField`
+
+    :keyword pre_histogram: The number of pre-tasks with a duration within each of the DURATION_BUCKETS
+    :type pre_histogram: :class:`django.contrib.postgres.fields.JSONField`
+    :keyword main_histogram: The number of main tasks with a duration within each of the DURATION_BUCKETS
+    :type main_histogram: :class:`django.contrib.postgres.fields.JSONField`
+    :keyword post_histogram: The number of post-tasks with a duration within each of the DURATION_BUCKETS
+    :type post_histogram: :class:`django.contrib.postgres.fields.JSONField`
+    """
+
+    BLOCK_LENGTH = datetime.timedelta(hours=1)
+
+    # The upper bounds of the task duration buckets in seconds, each histogram has one more bucket for longer durations
+    DURATION_BUCKETS = [1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400, 28800, 43200, 86400]
+    DURATION_PERCENTILES = [('p50', 0.5), ('p90', 0.9), ('p99', 0.99)]
+    TASK_TYPES = ['pre', 'main', 'post']
+
+    job_type = models.ForeignKey('job.JobType', on_delete=models.PROTECT)
+    status = models.CharField(choices=JobExecutionEnd.JOB_EXE_END_STATUSES, max_length=50)
+    error_category = models.CharField(blank=True, default='', max_length=50)
+    time_block = models.DateTimeField(db_index=True)
+    count = models.IntegerField()
+    most_recent = models.DateTimeField()
+
+    pre_histogram = django.contrib.postgres.fields.JSONField(default=list)
+    main_histogram = django.contrib.postgres.fields.JSONField(default=list)
+    post_histogram = django.contrib.postgres.fields.JSONField(default=list)
+
+    objects = JobTypePerformanceManager()
+
+    def add_job_exe_end(self, job_exe_end):
+        """Adds the task durations of the given job_exe_end model to the histograms
+
+        :param job_exe_end: The job_exe_end model
+        :type job_exe_end: :class:`job.models.JobExecutionEnd`
+        """
+
+        task_results = job_exe_end.get_task_results()
+        for task_type in JobTypePerformance.TASK_TYPES:
+            run_length = task_results.get_task_run_length(task_type)
+            if run_length is not None:
+                histogram = self._get_histogram(task_type)
+                histogram[bisect.bisect_left(JobTypePerformance.DURATION_BUCKETS, run_length.total_seconds())] += 1
+
+    def get_durations(self):
+        """Returns the estimated duration percentiles in seconds for each task type that has any durations
+
+        :returns: Dict where each task type maps to a dict of percentile names and their durations
+        :rtype: dict
+        """
+
+        durations = {}
+        for task_type in JobTypePerformance.TASK_TYPES:
+            histogram = self._get_histogram(task_type)
+            if sum(histogram):
+                percentiles = {}
+                for name, fraction in JobTypePerformance.DURATION_PERCENTILES:
+                    percentiles[name] = JobTypePerformance.estimate_percentile(histogram, fraction)
+                durations[task_type] = percentiles
+        return durations
+
+    def merge(self, performance):
+        """Adds the count and histograms of the given statistics to these statistics
+
+        :param performance: The statistics to add
+        :type performance: :class:`job.models.JobTypePerformance`
+        """
+
+        self.count += performance.count
+        for task_type in JobTypePerformance.TASK_TYPES:
+            histogram = self._get_histogram(task_type)
+            for index, bucket_count in enumerate(performance._get_histogram(task_type)):
+                histogram[index] += bucket_count
+
+    def _get_histogram(self, task_type):
+        """Returns the histogram for the given task type, filling in any missing buckets
+
+        :param task_type: The task type
+        :type task_type: string
+        :returns: The number of tasks within each duration bucket
+        :rtype: list
+        """
+
+        field_name = '%s_histogram' % task_type
+        histogram = getattr(self, field_name)
+        num_buckets = len(JobTypePerformance.DURATION_BUCKETS) + 1
+        if len(histogram) < num_buckets:
+            histogram = histogram + [0] * (num_buckets - len(histogram))
+            setattr(self, field_name, histogram)
+        return histogram
+
+    @staticmethod
+    def estimate_percentile(histogram, fraction):
+        """Estimates a duration percentile from the given histogram by interpolating within the bucket that contains
+        it. Percentiles that fall within the last bucket are reported as the upper bound of the largest bucket.
+
+        :param histogram: The number of tasks within each duration bucket
+        :type histogram: list
+        :param fraction: The percentile as a fraction, such as 0.99
+        :type fraction: float
+        :returns: The estimated duration in seconds, possibly None if the histogram is empty
+        :rtype: float
+        """
+
+        buckets = JobTypePerformance.DURATION_BUCKETS
+        rank = fraction * sum(histogram)
+        seen = 0
+        for index, bucket_count in enumerate(histogram):
+            if bucket_count and seen + bucket_count >= rank:
+                if index >= len(buckets):
+                    return float(buckets[-1])
+                lower = buckets[index - 1] if index else 0
+                return lower + (buckets[index] - lower) * (rank - seen) / float(bucket_count)
+            seen += bucket_count
+        return None
+
+    @staticmethod
+    def get_time_block(when):
+        """Returns the start of the time block that contains the given time
+
+        :param when: The time
+        :type when: :class:`datetime.datetime`
+        :returns: The start of the time block
+        :rtype: :class:`datetime.datetime`
+        """
+
+        block_secs = int(JobTypePerformance.BLOCK_LENGTH.total_seconds())
+        epoch = datetime.datetime.utcfromtimestamp(0).replace(tzinfo=timezone.utc)
+        secs = int((when - epoch).total_seconds())
+        return epoch + datetime.timedelta(seconds=secs - (secs % block_secs))
+
+    class Meta(object):
+        """Meta information for the database"""
+        db_table = 'job_type_performance'
+        unique_together = ('time_block', 'job_type', 'status', 'error_category')
+
+
 class JobTypeRevisionManager(models.Manager):
     """Provides additional methods for handling job type revisions
     """
@@ -2401,6 +2920,23 @@ class JobTypeRevisionManager(models.Manager):
 
         return JobTypeRevision.objects.get(job_type_id=job_type_id, revision_num=revision_num)
 
+    def get_revisions(self, job_types):
+        """Returns the current revisions of the given job types, retrieved with a single query
+
+        :param job_types: The job types
+        :type job_types: [:class:`job.models.JobType`]
+        :returns: The current revision of each job type stored by job type ID
+        :rtype: dict
+        """
+
+        filters = None
+        for job_type in job_types:
+            job_type_filter = Q(job_type_id=job_type.id, revision_num=job_type.revision_num)
+            filters = filters | job_type_filter if filters else job_type_filter
+        if not filters:
+            return {}
+        return {revision.job_type_id: revision for revision in JobTypeRevision.objects.filter(filters)}
+
 
 class JobTypeRevision(models.Model):
     """Represents a revision of a job type. New revisions are created when the interface of a job type changes. Any
@@ -2449,10 +2985,61 @@ class JobTypeRevision(models.Model):
         unique_together = ('job_type', 'revision_num')
 
 
+class TaskUpdateManager(models.Manager):
+    """Provides additional methods for handling task updates"""
+
+    COPY_COLUMNS = ('job_exe_id', 'task_id', 'status', 'timestamp', 'source', 'reason', 'message', 'created')
+
+    def copy_task_updates(self, task_updates, when=None):
+        """Inserts the given task update models into the database using a single PostgreSQL COPY operation, which is
+        much faster than a multi-row insert for large numbers of rows. The created time of the models is set to the
+        given time.
+
+        :param task_updates: The task update models to insert
+        :type task_updates: list
+        :param when: The time that the task updates are being saved, defaults to now
+        :type when: :class:`datetime.datetime`
+        """
+
+        if not task_updates:
+            return
+
+        if not when:
+            when = timezone.now()
+        lines = []
+        for task_update in task_updates:
+            task_update.created = when
+            values = [getattr(task_update, column) for column in TaskUpdateManager.COPY_COLUMNS]
+            lines.append('\t'.join([TaskUpdateManager._copy_value(value) for value in values]))
+        data = io.BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+
+        qry = 'COPY task_update (%s) FROM STDIN' % ', '.join(TaskUpdateManager.COPY_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(qry, data)
+
+    @staticmethod
+    def _copy_value(value):
+        """Returns the given value encoded for the PostgreSQL COPY text format
+
+        :param value: The value to encode
+        :type value: object
+        :returns: The encoded value
+        :rtype: string
+        """
+
+        if value is None:
+            return '\\N'
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        value = '%s' % value
+        value = value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+        return value
+
+
 class TaskUpdate(models.Model):
     """Represents a status update received for a task
 
-    :keyword job_exe: The job execution that the task belongs to
+    :keyword job_exe: The job execution that the task belongs to (None for node and system tasks)
     :type job_exe: :class:`django.db.models.ForeignKey`
     :keyword task_id: The task ID
     :type task_id: :class:`django.db.models.CharField`
@@ -2472,7 +3059,7 @@ class TaskUpdate(models.Model):
     :type created: :class:`django.db.models.DateTimeField`
     """
 
-    job_exe = models.ForeignKey('job.JobExecution', on_delete=models.PROTECT)
+    job_exe = models.ForeignKey('job.JobExecution', blank=True, null=True, on_delete=models.PROTECT)
     task_id = models.CharField(max_length=250)
     status = models.CharField(max_length=250)
 
@@ -2481,7 +3068,9 @@ class TaskUpdate(models.Model):
     reason = models.CharField(blank=True, max_length=250, null=True)
     message = models.TextField(blank=True, null=True)
 
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = TaskUpdateManager()
 
     class Meta(object):
         """Meta information for the database"""
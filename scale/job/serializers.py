@@ -58,6 +58,11 @@ class JobTypeStatusCountsSerializer(serializers.Serializer):
     category = serializers.CharField()
 
 
+class JobTypePerformanceSerializer(JobTypeStatusCountsSerializer):
+    """Converts job type status count object fields, including task duration percentiles, to REST output."""
+    durations = serializers.JSONField()
+
+
 class JobTypeDetailsSerializer(JobTypeSerializer):
     """Converts job type model fields to REST output."""
     from error.serializers import ErrorSerializer
@@ -70,9 +75,9 @@ class JobTypeDetailsSerializer(JobTypeSerializer):
     errors = ErrorSerializer(many=True)
     trigger_rule = TriggerRuleDetailsSerializer()
 
-    job_counts_6h = JobTypeStatusCountsSerializer(many=True)
-    job_counts_12h = JobTypeStatusCountsSerializer(many=True)
-    job_counts_24h = JobTypeStatusCountsSerializer(many=True)
+    job_counts_6h = JobTypePerformanceSerializer(many=True)
+    job_counts_12h = JobTypePerformanceSerializer(many=True)
+    job_counts_24h = JobTypePerformanceSerializer(many=True)
 
 
 class JobTypeStatusSerializer(serializers.Serializer):
@@ -83,6 +83,7 @@ class Task(object):
         self._uses_docker = False
         self._docker_image = None
         self._docker_params = []
+        self._has_static_docker_params = False
         self._is_docker_privileged = False
         self._command = 'echo "Hello Scale"'
         self._command_arguments = None
@@ -199,6 +200,17 @@ class Task(object):
 
         return self._has_timed_out
 
+    @property
+    def has_static_docker_params(self):
+        """Indicates whether this task's Docker parameters are the same for every task of its kind, which allows the
+        Mesos task built from them to be reused
+
+        :returns: True if the Docker parameters are static, False otherwise
+        :rtype: bool
+        """
+
+        return self._has_static_docker_params
+
     @property
     def id(self):
         """Returns the unique ID of the task
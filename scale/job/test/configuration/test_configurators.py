@@ -1,13 +1,19 @@
+from __future__ import print_function
 from __future__ import unicode_literals
 
+import copy
 import os
+import time
+from unittest import skipUnless
 
 import django
 from django.test import TestCase
 from django.utils.timezone import now
 from mock import patch, MagicMock
 
-from job.configuration.configurators import QueuedExecutionConfigurator, ScheduledExecutionConfigurator
+import job.configuration.configurators as configurators
+from job.configuration.configurators import (JobTypeTemplate, QueuedExecutionConfigurator,
+                                             ScheduledExecutionConfigurator)
 from job.configuration.data.job_data import JobData
 from job.configuration.json.execution.exe_config import ExecutionConfiguration
 from job.execution.container import get_job_exe_input_vol_name, get_job_exe_output_vol_name, get_mount_volume_name, \
@@ -24,6 +30,8 @@ from storage.container import get_workspace_volume_path
 from storage.test import utils as storage_test_utils
 from trigger.test import utils as trigger_test_utils
 
+BENCHMARK_ENV_VAR = 'SCALE_CONFIGURATOR_BENCHMARK'
+
 
 class TestQueuedExecutionConfigurator(TestCase):
 
@@ -793,3 +801,87 @@ class TestScheduledExecutionConfigurator(TestCase):
         env_vars = exe_config_with_secrets.get_env_vars('main')
         self.assertTrue('ALLOCATED_SHARED_MEM' in env_vars)
         self.assertEqual(env_vars['ALLOCATED_SHARED_MEM'], '1024.0')
+
+    def test_job_type_template(self):
+        """Tests that a job type template is reused until the job type changes"""
+
+        job_type = job_test_utils.create_job_type(configuration={'version': '2.0', 'settings': {'s_1': 'value'}})
+
+        template = JobTypeTemplate.get_template(job_type)
+        self.assertIs(JobTypeTemplate.get_template(job_type), template)
+        self.assertEqual(template.pull_args, create_pull_command(job_type.docker_image))
+
+        job_type.docker_image = 'new-image'
+        job_type.save()
+        new_template = JobTypeTemplate.get_template(job_type)
+        self.assertIsNot(new_template, template)
+        self.assertEqual(new_template.pull_args, create_pull_command('new-image'))
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the configurator benchmark' % BENCHMARK_ENV_VAR)
+class TestScheduledExecutionConfiguratorBenchmark(TestCase):
+    """Measures how many job executions are configured per second when the configuration is rebuilt from scratch for
+    each execution, compared to reusing the job type, workspace and cluster settings templates. The benchmark is only
+    run when the SCALE_CONFIGURATOR_BENCHMARK environment variable is set.
+    """
+
+    NUM_EXECUTIONS = 2000
+
+    def setUp(self):
+        django.setup()
+
+        node = node_test_utils.create_node()
+        broker_dict = {'version': '1.0', 'broker': {'type': 'host', 'host_path': '/w_1/host/path'}}
+        workspace = storage_test_utils.create_workspace(json_config=broker_dict)
+        self.workspaces = {workspace.name: workspace}
+        file_1 = storage_test_utils.create_file(workspace=workspace)
+        interface_dict = {'version': '1.4', 'command': 'foo', 'command_arguments': '${input_1} ${job_output_dir}',
+                          'env_vars': [], 'mounts': [{'name': 'm_1', 'path': '/the/cont/path', 'mode': 'ro'}],
+                          'settings': [{'name': 's_1'}, {'name': 's_2', 'secret': True}],
+                          'input_data': [{'name': 'input_1', 'type': 'file'}],
+                          'output_data': [{'name': 'output_1', 'type': 'file'}]}
+        data_dict = {'input_data': [{'name': 'input_1', 'file_id': file_1.id}],
+                     'output_data': [{'name': 'output_1', 'workspace_id': workspace.id}]}
+        job_type_config_dict = {'version': '2.0', 'settings': {'s_1': 's_1_value'},
+                                'mounts': {'m_1': {'type': 'host', 'host_path': '/m_1/host_path'}}}
+        self.job_type = job_test_utils.create_job_type(interface=interface_dict, configuration=job_type_config_dict)
+        from queue.job_exe import QueuedJobExecution
+        from queue.models import Queue
+        job = Queue.objects.queue_new_job(self.job_type, JobData(data_dict), trigger_test_utils.create_trigger_event())
+        queue = Queue.objects.get(job_id=job.id)
+        queued_job_exe = QueuedJobExecution(queue)
+        queued_job_exe.scheduled('agent_1', node.id, job.get_resources())
+        self.job_exe_model = queued_job_exe.create_job_exe_model('1234', now())
+        self.queued_config = copy.deepcopy(self.job_exe_model.configuration)
+        self.interface = queue.get_job_interface()
+
+    def test_configure_throughput(self):
+        """Compares configuring every execution from scratch with reusing the templates"""
+
+        with patch('job.configuration.configurators.secrets_mgr') as mock_secrets_mgr:
+            mock_secrets_mgr.retrieve_job_type_secrets.return_value = {'s_2': 's_2_secret'}
+
+            def configure_from_scratch():
+                configurators._JOB_TYPE_TEMPLATES.clear()
+                configurator = ScheduledExecutionConfigurator(self.workspaces)
+                self._configure(configurator)
+
+            configurator = ScheduledExecutionConfigurator(self.workspaces)
+            print('\nConfiguring %d job executions' % self.NUM_EXECUTIONS)
+            self._report('Rebuilt per execution', self._run(configure_from_scratch))
+            self._report('Reused templates', self._run(lambda: self._configure(configurator)))
+
+    def _configure(self, configurator):
+        self.job_exe_model.configuration = copy.deepcopy(self.queued_config)
+        configurator.configure_scheduled_job(self.job_exe_model, self.job_type, self.interface)
+
+    def _report(self, name, duration):
+        print('%s: %.1f executions/s' % (name, self.NUM_EXECUTIONS / duration))
+
+    def _run(self, configure_func):
+        """Calls the given function once per execution and returns the duration in seconds"""
+
+        started = time.time()
+        for _ in xrange(self.NUM_EXECUTIONS):
+            configure_func()
+        return time.time() - started
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 
+import json
 from datetime import timedelta
 
 import django
@@ -10,9 +11,9 @@ import job.test.utils as job_test_utils
 import node.test.utils as node_test_utils
 from error.models import CACHED_ERRORS
 from job.execution.manager import JobExecutionManager
-from job.messages.job_exe_end import MAX_NUM
 from job.models import Job
 from job.tasks.update import TaskStatusUpdate
+from messaging.messages.message import MAX_MESSAGE_SIZE
 
 
 class TestJobExecutionManager(TransactionTestCase):
@@ -37,7 +38,7 @@ class TestJobExecutionManager(TransactionTestCase):
     def test_generate_status_json(self):
         """Tests calling generate_status_json() successfully"""
 
-        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2], [])
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2])
         json_dict = [{'id': self.node_model_1.id}, {'id': self.node_model_2.id}]
         self.job_exe_mgr.generate_status_json(json_dict, now())
 
@@ -48,19 +49,37 @@ class TestJobExecutionManager(TransactionTestCase):
         """Tests calling get_messages() successfully when canceled job_exes have been added"""
 
         job_exe_ends = []
-        for _ in range(int(MAX_NUM * 2.5)):  # Should result in 3 messages
+        for _ in range(25):
             job_exe = job_test_utils.create_job_exe()
             job_exe_ends.append(job_exe.create_canceled_job_exe_end_model(now()))
+        # Add enough copies to require several messages
+        job_exe_ends = job_exe_ends * 10
 
         self.job_exe_mgr.add_canceled_job_exes(job_exe_ends)
         messages = self.job_exe_mgr.get_messages()
 
-        self.assertEqual(len(messages), 3)
+        self.assertGreater(len(messages), 1)
+        self.assertEqual(sum(len(message._job_exe_ends) for message in messages), 250)
+        for message in messages:
+            self.assertLessEqual(len(json.dumps(message.to_json())), MAX_MESSAGE_SIZE)
+
+    def test_get_messages_for_running_job_exes(self):
+        """Tests calling get_messages() successfully when job_exes have been scheduled in multiple passes"""
+
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_1])
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_2])
+        messages = self.job_exe_mgr.get_messages()
+
+        # Running jobs from both scheduling passes should be coalesced into a single message
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0].type, 'running_jobs')
+        self.assertEqual(messages[0]._count, 2)
+        self.assertListEqual(self.job_exe_mgr.get_messages(), [])
 
     def test_handle_task_timeout(self):
         """Tests calling handle_task_timeout() successfully"""
 
-        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2], [])
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2])
 
         task = self.job_exe_1.start_next_task()
         self.job_exe_mgr.handle_task_timeout(task, now())
@@ -70,7 +89,8 @@ class TestJobExecutionManager(TransactionTestCase):
     def test_handle_task_update(self):
         """Tests calling handle_task_update() successfully"""
 
-        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2], [])
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2])
+        self.job_exe_mgr.get_messages()  # Clear the running job messages
 
         # Start task
         task_1 = self.job_exe_1.start_next_task()
@@ -102,7 +122,8 @@ class TestJobExecutionManager(TransactionTestCase):
     def test_lost_node(self):
         """Tests calling lost_node() successfully"""
 
-        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2], [])
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2])
+        self.job_exe_mgr.get_messages()  # Clear the running job messages
 
         task_1 = self.job_exe_1.start_next_task()
         task_1_started = now() - timedelta(minutes=5)
@@ -121,7 +142,7 @@ class TestJobExecutionManager(TransactionTestCase):
     def test_schedule_job_exes(self):
         """Tests calling schedule_job_exes() successfully"""
 
-        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2], [])
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2])
 
         # Both executions should be in the manager and ready
         self.assertEqual(len(self.job_exe_mgr.get_running_job_exes()), 2)
@@ -131,7 +152,8 @@ class TestJobExecutionManager(TransactionTestCase):
     def test_sync_with_database(self):
         """Tests calling sync_with_database() successfully"""
 
-        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2], [])
+        self.job_exe_mgr.schedule_job_exes([self.job_exe_1, self.job_exe_2])
+        self.job_exe_mgr.get_messages()  # Clear the running job messages
 
         task_1 = self.job_exe_1.start_next_task()
         task_1_started = now() - timedelta(minutes=5)
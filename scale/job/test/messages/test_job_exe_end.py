@@ -1,14 +1,18 @@
 from __future__ import unicode_literals
 
+import datetime
+
 import django
 from django.utils.timezone import now
 from django.test import TransactionTestCase
+from mock import patch
 
 import job.test.utils as job_test_utils
 from error.models import CACHED_ERRORS
 from job.messages.job_exe_end import CreateJobExecutionEnd
-from job.models import JobExecutionEnd
+from job.models import Job, JobExecutionEnd
 from job.tasks.update import TaskStatusUpdate
+from queue.models import Queue
 
 
 class TestCreateJobExecutionEnd(TransactionTestCase):
@@ -154,3 +158,92 @@ class TestCreateJobExecutionEnd(TransactionTestCase):
         # Old models should not cause an error and no new ones should get created
         message_3.execute()
         self.assertEqual(JobExecutionEnd.objects.filter(job_exe_id__in=job_exe_ids).count(), len(job_exe_ids))
+
+    def test_execute_different_ended(self):
+        """Tests that CreateJobExecutionEnd.execute() ignores a duplicate model with a different ended time"""
+
+        job_exe = job_test_utils.create_running_job_exe()
+        while not job_exe.is_finished():
+            task = job_exe.start_next_task()
+            task.launch(now())
+            update = job_test_utils.create_task_status_update(task.id, task.agent_id, TaskStatusUpdate.RUNNING, now())
+            task.update(update)
+            job_exe.task_update(update)
+            update = job_test_utils.create_task_status_update(task.id, task.agent_id, TaskStatusUpdate.FINISHED, now())
+            task.update(update)
+            job_exe.task_update(update)
+        message_1 = CreateJobExecutionEnd()
+        message_1.add_job_exe_end(job_exe.create_job_exe_end_model())
+        duplicate = job_exe.create_job_exe_end_model()
+        duplicate.ended += datetime.timedelta(days=40)
+        message_2 = CreateJobExecutionEnd()
+        message_2.add_job_exe_end(duplicate)
+
+        message_1.execute()
+        message_2.execute()
+
+        self.assertEqual(JobExecutionEnd.objects.filter(job_exe_id=job_exe.id).count(), 1)
+
+    def test_execute_finished_jobs(self):
+        """Tests that CreateJobExecutionEnd.execute() completes and fails the jobs of the finished executions"""
+
+        job_1 = job_test_utils.create_job(status='RUNNING', num_exes=1)
+        job_exe_1 = job_test_utils.create_running_job_exe(job=job_1)
+        while not job_exe_1.is_finished():
+            task = job_exe_1.start_next_task()
+            task.launch(now())
+            update = job_test_utils.create_task_status_update(task.id, task.agent_id, TaskStatusUpdate.RUNNING, now())
+            task.update(update)
+            job_exe_1.task_update(update)
+            update = job_test_utils.create_task_status_update(task.id, task.agent_id, TaskStatusUpdate.FINISHED, now())
+            task.update(update)
+            job_exe_1.task_update(update)
+
+        job_2 = job_test_utils.create_job(status='RUNNING', num_exes=1)
+        job_exe_2 = job_test_utils.create_running_job_exe(job=job_2)
+        task = job_exe_2.start_next_task()
+        task.launch(now())
+        update = job_test_utils.create_task_status_update(task.id, task.agent_id, TaskStatusUpdate.FAILED, now())
+        task.update(update)
+        job_exe_2.task_update(update)
+
+        message = CreateJobExecutionEnd()
+        message.add_job_exe_end(job_exe_1.create_job_exe_end_model())
+        message.add_job_exe_end(job_exe_2.create_job_exe_end_model())
+        message.execute()
+
+        job_1 = Job.objects.get(id=job_1.id)
+        self.assertEqual(job_1.status, 'COMPLETED')
+        self.assertEqual(job_1.ended, job_exe_1.finished)
+        self.assertNotEqual(Job.objects.get(id=job_2.id).status, 'RUNNING')
+
+    @patch.object(Queue.objects, 'handle_job_completions')
+    def test_execute_finished_jobs_error(self, mock_handle_job_completions):
+        """Tests that CreateJobExecutionEnd.execute() handles each finished job on its own when the batch fails"""
+
+        mock_handle_job_completions.side_effect = [Exception('Batch failed'), None, Exception('Job failed')]
+        message = CreateJobExecutionEnd()
+        for _ in range(2):
+            job = job_test_utils.create_job(status='RUNNING', num_exes=1)
+            job_exe = job_test_utils.create_running_job_exe(job=job)
+            while not job_exe.is_finished():
+                task = job_exe.start_next_task()
+                task.launch(now())
+                update = job_test_utils.create_task_status_update(task.id, task.agent_id, TaskStatusUpdate.RUNNING,
+                                                                  now())
+                task.update(update)
+                job_exe.task_update(update)
+                update = job_test_utils.create_task_status_update(task.id, task.agent_id, TaskStatusUpdate.FINISHED,
+                                                                  now())
+                task.update(update)
+                job_exe.task_update(update)
+            message.add_job_exe_end(job_exe.create_job_exe_end_model())
+
+        self.assertTrue(message.execute())
+
+        self.assertEqual(mock_handle_job_completions.call_count, 3)
+        self.assertEqual(len(mock_handle_job_completions.call_args_list[1][0][0]), 1)
+
+        # The job_exe_end models are still created
+        job_exe_ids = [job_exe_end.job_exe_id for job_exe_end in message._job_exe_ends]
+        self.assertEqual(JobExecutionEnd.objects.filter(job_exe_id__in=job_exe_ids).count(), 2)
@@ -1,13 +1,18 @@
 from __future__ import unicode_literals
 
+import datetime
+import json
+
 import django
 from django.utils.timezone import now
 from django.test import TransactionTestCase
 
-from job.messages.running_jobs import RunningJobs
+from job.messages.running_jobs import create_running_job_messages, RunningJobs
 from job.models import Job
 from job.test import utils as job_test_utils
+from messaging.messages.message import MAX_MESSAGE_SIZE
 from node.test import utils as node_test_utils
+from util.parse import datetime_to_string
 
 
 class TestRunningJobs(TransactionTestCase):
@@ -115,3 +120,76 @@ class TestRunningJobs(TransactionTestCase):
         self.assertEqual(jobs[4].status, 'CANCELED')
         self.assertEqual(jobs[4].started, started)
         self.assertEqual(jobs[4].node_id, node_2.id)
+
+    def test_json_legacy_format(self):
+        """Tests converting a RunningJobs message from the older JSON format that encoded each job as a dict"""
+
+        node_1 = node_test_utils.create_node()
+        job_1 = job_test_utils.create_job(num_exes=1, status='QUEUED')
+        started = now()
+        json_dict = {'started': datetime_to_string(started),
+                     'nodes': [{'id': node_1.id, 'jobs': [{'id': job_1.id, 'exe_num': 1}]}]}
+
+        result = RunningJobs.from_json(json_dict).execute()
+
+        self.assertTrue(result)
+        job_1 = Job.objects.get(id=job_1.id)
+        self.assertEqual(job_1.status, 'RUNNING')
+        self.assertEqual(job_1.started, started)
+        self.assertEqual(job_1.node_id, node_1.id)
+
+    def test_json_multiple_start_times(self):
+        """Tests converting a RunningJobs message with jobs that started at different times to and from JSON"""
+
+        node_1 = node_test_utils.create_node()
+        job_1 = job_test_utils.create_job(num_exes=1, status='QUEUED')
+        job_2 = job_test_utils.create_job(num_exes=1, status='QUEUED')
+        started_1 = now()
+        started_2 = started_1 + datetime.timedelta(seconds=5)
+        message = RunningJobs(started_1)
+        message.add_running_job(job_1.id, job_1.num_exes, node_1.id)
+        message.add_running_job(job_2.id, job_2.num_exes, node_1.id, started_2)
+
+        new_message = RunningJobs.from_json(message.to_json())
+        result = new_message.execute()
+
+        self.assertTrue(result)
+        jobs = Job.objects.filter(id__in=[job_1.id, job_2.id]).order_by('id')
+        self.assertEqual(jobs[0].status, 'RUNNING')
+        self.assertEqual(jobs[0].started, started_1)
+        self.assertEqual(jobs[0].last_status_change, started_1)
+        self.assertEqual(jobs[1].status, 'RUNNING')
+        self.assertEqual(jobs[1].started, started_2)
+        self.assertEqual(jobs[1].last_status_change, started_2)
+
+    def test_message_size(self):
+        """Tests that running job messages are filled up to, but not past, the maximum message size"""
+
+        started = now()
+        message = RunningJobs(started)
+        count = 0
+        while message.can_fit_more():
+            message.add_running_job(12345678 + count, 12, 1000 + count % 50, started)
+            count += 1
+
+        self.assertGreater(count, 100)
+        self.assertLessEqual(len(json.dumps(message.to_json())), MAX_MESSAGE_SIZE)
+
+    def test_create_running_job_messages(self):
+        """Tests that create_running_job_messages() splits running jobs into messages within the maximum size"""
+
+        class RunningJobExe(object):
+            def __init__(self, job_id, started):
+                self.job_id = job_id
+                self.exe_num = 1
+                self.node_id = 1
+                self.started = started
+
+        started = now()
+        running_job_exes = [RunningJobExe(i, started + datetime.timedelta(seconds=i % 3)) for i in range(5000)]
+        messages = create_running_job_messages(running_job_exes)
+
+        self.assertGreater(len(messages), 1)
+        self.assertEqual(sum(message._count for message in messages), 5000)
+        for message in messages:
+            self.assertLessEqual(len(json.dumps(message.to_json())), MAX_MESSAGE_SIZE)
@@ -21,55 +21,73 @@ class TestClock(TestCase):
         self.processor = MagicMock(ClockEventProcessor)
         clock.register_processor('test-name', lambda: self.processor)
 
-    @patch('job.clock._check_rule')
-    def test_perform_tick(self, mock_check_rule):
-        """Tests performing a single clock tick."""
-        job_test_utils.create_clock_rule()
-        job_test_utils.create_clock_rule()
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
+    @patch('job.clock._check_schedule')
+    def test_process_due_rules(self, mock_check_schedule):
+        """Tests processing the due rules checks each active clock rule."""
+        mock_check_schedule.return_value = False
 
-        clock.perform_tick()
+        job_test_utils.create_clock_rule(name='test-name')
+        job_test_utils.create_clock_rule(name='test-name')
 
-        self.assertEqual(mock_check_rule.call_count, 2)
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
+        scheduler.process_due_rules()
 
-    @patch('job.clock._check_rule')
-    def test_perform_tick_skip(self, mock_check_rule):
-        """Tests performing a single clock tick with rules that should be skipped."""
-        job_test_utils.create_clock_rule(is_active=False)
-        job_test_utils.create_clock_rule(rule_type='NOT_CLOCK')
+        self.assertEqual(mock_check_schedule.call_count, 2)
+
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
+    @patch('job.clock._check_schedule')
+    def test_process_due_rules_skip(self, mock_check_schedule):
+        """Tests processing the due rules with rules that should be skipped."""
+        job_test_utils.create_clock_rule(name='test-name', is_active=False)
+        job_test_utils.create_clock_rule(name='test-name', rule_type='NOT_CLOCK')
 
-        clock.perform_tick()
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
+        scheduler.process_due_rules()
 
-        self.assertFalse(mock_check_rule.called)
+        self.assertFalse(mock_check_schedule.called)
 
-    @patch('job.clock._check_rule')
-    def test_perform_tick_error(self, mock_check_rule):
-        """Tests performing a clock tick will continue even when rules fail."""
-        mock_check_rule.side_effect = ClockEventError()
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
+    @patch('job.clock._check_schedule')
+    def test_process_due_rules_error(self, mock_check_schedule):
+        """Tests processing the due rules will continue even when rules fail."""
+        mock_check_schedule.side_effect = ClockEventError()
 
-        job_test_utils.create_clock_rule()
-        job_test_utils.create_clock_rule()
+        job_test_utils.create_clock_rule(name='test-name')
+        job_test_utils.create_clock_rule(name='test-name')
 
-        clock.perform_tick()
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
 
-        self.assertEqual(mock_check_rule.call_count, 2)
+        self.assertEqual(scheduler.process_due_rules(), 0)
+        self.assertEqual(mock_check_schedule.call_count, 2)
 
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
     @patch('job.clock._trigger_event')
     @patch('job.clock._check_schedule')
-    def test_check_rule(self, mock_check_schedule, mock_trigger_event):
+    def test_process_due_rules_trigger(self, mock_check_schedule, mock_trigger_event):
         """Tests a valid rule triggers a new event."""
         mock_check_schedule.return_value = True
+        mock_trigger_event.return_value = None
 
         rule = job_test_utils.create_clock_rule(name='test-name', schedule='PT1H0M0S')
 
-        clock._check_rule(rule)
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
 
+        self.assertEqual(scheduler.process_due_rules(), 1)
         mock_check_schedule.assert_called_with(datetime.timedelta(hours=1), None)
-        self.assertTrue(mock_trigger_event.called)
+        mock_trigger_event.assert_called_with(rule, None)
 
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
     @patch('job.clock._trigger_event')
     @patch('job.clock._check_schedule')
-    def test_check_rule_last_event(self, mock_check_schedule, mock_trigger_event):
+    def test_process_due_rules_last_event(self, mock_check_schedule, mock_trigger_event):
         """Tests a valid rule checks the most recent matching event type."""
+        mock_check_schedule.return_value = False
+
         rule = job_test_utils.create_clock_rule(name='test-name', schedule='PT1H0M0S')
         job_test_utils.create_clock_event(rule=rule, occurred=datetime.datetime(2013, 1, 1, tzinfo=utc))
         job_test_utils.create_clock_event(rule=rule, occurred=datetime.datetime(2012, 1, 1, tzinfo=utc))
@@ -77,46 +95,63 @@ class TestClock(TestCase):
         job_test_utils.create_clock_event(rule=rule, occurred=datetime.datetime(2011, 1, 1, tzinfo=utc))
         job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 1, tzinfo=utc))
 
-        clock._check_rule(rule)
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
+        scheduler.process_due_rules()
 
         mock_check_schedule.assert_called_with(datetime.timedelta(hours=1), last)
 
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
     @patch('job.clock._trigger_event')
     @patch('job.clock._check_schedule')
-    def test_check_rule_skip(self, mock_check_schedule, mock_trigger_event):
+    def test_process_due_rules_not_due(self, mock_check_schedule, mock_trigger_event):
         """Tests a valid rule does not trigger a new event when the schedule threshold has not been met."""
         mock_check_schedule.return_value = False
 
-        rule = job_test_utils.create_clock_rule(name='test-name')
+        job_test_utils.create_clock_rule(name='test-name')
 
-        clock._check_rule(rule)
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
 
+        self.assertEqual(scheduler.process_due_rules(), 0)
         self.assertTrue(mock_check_schedule.called)
         self.assertFalse(mock_trigger_event.called)
 
-    def test_check_rule_name_error(self):
-        """Tests checking a rule with a name configuration problem."""
+    def test_get_rule_duration_name_error(self):
+        """Tests validating a rule with a name configuration problem."""
         rule1 = job_test_utils.create_clock_rule(name='')
-        self.assertRaises(ClockEventError, clock._check_rule, rule1)
+        self.assertRaises(ClockEventError, clock._get_rule_duration, rule1)
 
         rule2 = job_test_utils.create_clock_rule(name='missing')
-        self.assertRaises(ClockEventError, clock._check_rule, rule2)
+        self.assertRaises(ClockEventError, clock._get_rule_duration, rule2)
 
-    def test_check_rule_event_type_error(self):
-        """Tests checking a rule with an event type configuration problem."""
-        rule = job_test_utils.create_clock_rule(event_type='')
-        self.assertRaises(ClockEventError, clock._check_rule, rule)
+    def test_get_rule_duration_event_type_error(self):
+        """Tests validating a rule with an event type configuration problem."""
+        rule = job_test_utils.create_clock_rule(name='test-name')
+        rule.configuration['event_type'] = ''
+        self.assertRaises(ClockEventError, clock._get_rule_duration, rule)
 
-    def test_check_rule_schedule_error(self):
-        """Tests checking a rule with a schedule configuration problem."""
-        rule1 = job_test_utils.create_clock_rule(schedule='')
-        self.assertRaises(ClockEventError, clock._check_rule, rule1)
+    def test_get_rule_duration_schedule_error(self):
+        """Tests validating a rule with a schedule configuration problem."""
+        rule1 = job_test_utils.create_clock_rule(name='test-name', schedule='')
+        self.assertRaises(ClockEventError, clock._get_rule_duration, rule1)
 
-        rule2 = job_test_utils.create_clock_rule(schedule='invalid')
-        self.assertRaises(ClockEventError, clock._check_rule, rule2)
+        rule2 = job_test_utils.create_clock_rule(name='test-name', schedule='invalid')
+        self.assertRaises(ClockEventError, clock._get_rule_duration, rule2)
 
-        rule3 = job_test_utils.create_clock_rule(schedule='1H0M0S')
-        self.assertRaises(ClockEventError, clock._check_rule, rule1)
+        rule3 = job_test_utils.create_clock_rule(name='test-name', schedule='1H0M0S')
+        self.assertRaises(ClockEventError, clock._get_rule_duration, rule3)
+
+    def test_load_invalid_rule(self):
+        """Tests that rules with configuration problems are not scheduled."""
+        job_test_utils.create_clock_rule(name='missing')
+        job_test_utils.create_clock_rule(name='test-name', schedule='invalid')
+
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
+
+        self.assertDictEqual(scheduler._rules, {})
+        self.assertIsNone(scheduler.get_next_fire_time())
 
     @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
     def test_check_schedule_hour_first(self):
@@ -233,3 +268,91 @@ class TestClock(TestCase):
         clock._trigger_event(rule)
 
         self.assertEqual(self.processor.process_event.call_count, 2)
+
+    def test_get_next_fire_time_first(self):
+        """Tests the next fire time of a schedule that was never triggered before."""
+        after = datetime.datetime(2015, 1, 1, 0, 30, 30, tzinfo=utc)
+
+        fire_time = clock._get_next_fire_time(datetime.timedelta(hours=1), None, after)
+        self.assertEqual(fire_time, datetime.datetime(2015, 1, 1, 1, tzinfo=utc))
+
+        fire_time = clock._get_next_fire_time(datetime.timedelta(hours=24), None, after)
+        self.assertEqual(fire_time, datetime.datetime(2015, 1, 1, 0, 31, tzinfo=utc))
+
+    def test_get_next_fire_time_last(self):
+        """Tests the next fire time of a schedule that was triggered before."""
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 1, 12, 0, 10, tzinfo=utc))
+        after = datetime.datetime(2015, 1, 1, 12, 1, tzinfo=utc)
+
+        fire_time = clock._get_next_fire_time(datetime.timedelta(hours=1), last, after)
+        self.assertEqual(fire_time, datetime.datetime(2015, 1, 1, 13, tzinfo=utc))
+
+        fire_time = clock._get_next_fire_time(datetime.timedelta(hours=24), last, after)
+        self.assertEqual(fire_time, datetime.datetime(2015, 1, 2, tzinfo=utc))
+
+    def test_get_next_fire_time_never(self):
+        """Tests the next fire time of a short schedule that missed its last step."""
+        last = job_test_utils.create_clock_event(occurred=datetime.datetime(2015, 1, 1, 12, tzinfo=utc))
+        after = datetime.datetime(2015, 1, 1, 12, 30, tzinfo=utc)
+
+        self.assertIsNone(clock._get_next_fire_time(datetime.timedelta(minutes=5), last, after))
+
+
+class TestClockScheduler(TestCase):
+    """Tests the ClockScheduler class."""
+
+    def setUp(self):
+        django.setup()
+
+        self.processor = MagicMock(ClockEventProcessor)
+        clock.register_processor('test-scheduler', lambda: self.processor)
+
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 12, 30, 30, tzinfo=utc))
+    def test_load(self):
+        """Tests loading the rules with the most recent event of each rule."""
+        rule1 = job_test_utils.create_clock_rule(name='test-scheduler', schedule='PT1H0M0S')
+        job_test_utils.create_clock_event(rule=rule1, occurred=datetime.datetime(2015, 1, 1, 10, tzinfo=utc))
+        job_test_utils.create_clock_event(rule=rule1, occurred=datetime.datetime(2015, 1, 1, 12, tzinfo=utc))
+        rule2 = job_test_utils.create_clock_rule(name='test-scheduler', schedule='PT24H0M0S')
+        job_test_utils.create_clock_event(rule=rule2, occurred=datetime.datetime(2015, 1, 1, tzinfo=utc))
+        job_test_utils.create_clock_rule(name='missing')
+
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
+
+        self.assertSetEqual(set(scheduler._rules.keys()), {rule1.id, rule2.id})
+        self.assertEqual(scheduler._rules[rule1.id].last_event.occurred,
+                         datetime.datetime(2015, 1, 1, 12, tzinfo=utc))
+        self.assertEqual(scheduler.get_next_fire_time(), datetime.datetime(2015, 1, 1, 13, tzinfo=utc))
+
+    @patch('job.clock.timezone.now', lambda: datetime.datetime(2015, 1, 1, 1, 30, 30, tzinfo=utc))
+    def test_process_due_rules(self):
+        """Tests processing a rule that is due and rescheduling it."""
+        rule = job_test_utils.create_clock_rule(name='test-scheduler', schedule='PT1H0M0S', event_type='TEST_TYPE')
+
+        scheduler = clock.ClockScheduler()
+        scheduler.load()
+
+        self.assertEqual(scheduler.process_due_rules(), 1)
+        self.assertEqual(TriggerEvent.objects.filter(rule=rule).count(), 1)
+        self.assertEqual(self.processor.process_event.call_count, 1)
+        self.assertEqual(scheduler.get_next_fire_time(), datetime.datetime(2015, 1, 1, 2, tzinfo=utc))
+
+        # The rule is not due again until its next fire time
+        self.assertEqual(scheduler.process_due_rules(), 0)
+
+    def test_check_rules(self):
+        """Tests that the rules are only reloaded when they change."""
+        rule = job_test_utils.create_clock_rule(name='test-scheduler')
+
+        scheduler = clock.ClockScheduler()
+        with patch.object(scheduler, 'load', wraps=scheduler.load) as mock_load:
+            scheduler.check_rules()
+            scheduler.check_rules()
+            self.assertEqual(mock_load.call_count, 1)
+
+            rule.is_active = False
+            rule.save()
+            scheduler.check_rules()
+            self.assertEqual(mock_load.call_count, 2)
+            self.assertIsNone(scheduler.get_next_fire_time())
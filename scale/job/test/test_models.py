@@ -10,6 +10,7 @@ from django.test import TestCase, TransactionTestCase
 
 import error.test.utils as error_test_utils
 import job.test.utils as job_test_utils
+import node.test.utils as node_test_utils
 import storage.test.utils as storage_test_utils
 import trigger.test.utils as trigger_test_utils
 from error.models import Error
@@ -17,9 +18,12 @@ from job.configuration.data.exceptions import InvalidConnection
 from job.configuration.data.job_data import JobData
 from job.configuration.interface.error_interface import ErrorInterface
 from job.configuration.interface.job_interface import JobInterface
-from job.models import Job, JobExecution, JobInputFile, JobType, JobTypeRevision
+from job.execution.tasks.json.results.task_results import TaskResults
+from job.models import (Job, JobExecution, JobExecutionEnd, JobExecutionNodeCount, JobInputFile, JobType,
+                        JobTypePerformance, JobTypeRevision)
 from node.resources.json.resources import Resources
 from trigger.models import TriggerRule
+from util.parse import datetime_to_string
 
 
 class TestJobManager(TransactionTestCase):
@@ -407,6 +411,180 @@ class TestJobExecutionManager(TransactionTestCase):
         self.assertDictEqual(latest_job_exes, expected_result, 'latest job executions do not match expected results')
 
 
+class TestJobExecutionNodeCountManager(TransactionTestCase):
+    """Tests for the job execution node count model manager"""
+
+    def setUp(self):
+        django.setup()
+
+        self.node_1 = node_test_utils.create_node()
+        self.node_2 = node_test_utils.create_node()
+        self.data_error = error_test_utils.create_error(category='DATA')
+
+    def test_add_job_exe_ends(self):
+        """Tests that job_exe_end models are added to existing and new counts"""
+
+        when = timezone.now()
+        job_exe_1 = job_test_utils.create_job_exe(status='FAILED', error=self.data_error, node=self.node_1)
+        job_exe_2 = job_test_utils.create_job_exe(status='COMPLETED', node=self.node_1)
+        job_exe_3 = job_test_utils.create_job_exe(status='COMPLETED', node=self.node_2)
+        job_exe_ends = list(JobExecutionEnd.objects.filter(job_exe_id__in=[job_exe_1.id, job_exe_2.id, job_exe_3.id]))
+        JobExecutionNodeCount.objects.add_job_exe_ends(job_exe_ends, when)
+
+        counts = {}
+        for node_count in JobExecutionNodeCount.objects.get_counts(when - datetime.timedelta(hours=1)):
+            counts[(node_count['node_id'], node_count['status'], node_count['error_category'])] = node_count['count']
+
+        # Each job execution was counted once when created and once more when explicitly added above
+        self.assertDictEqual(counts, {(self.node_1.id, 'FAILED', 'DATA'): 2, (self.node_1.id, 'COMPLETED', ''): 2,
+                                      (self.node_2.id, 'COMPLETED', ''): 2})
+
+    def test_get_counts_time_range(self):
+        """Tests that counts outside of the requested time range are not returned"""
+
+        old_time = timezone.now() - datetime.timedelta(hours=5)
+        job_exe = job_test_utils.create_job_exe(status='COMPLETED', node=self.node_1)
+        JobExecutionNodeCount.objects.add_job_exe_ends([JobExecutionEnd.objects.get(job_exe_id=job_exe.id)], old_time)
+
+        counts = JobExecutionNodeCount.objects.get_counts(timezone.now() - datetime.timedelta(hours=3))
+        self.assertListEqual([node_count['count'] for node_count in counts], [1])
+        counts = JobExecutionNodeCount.objects.get_counts(old_time, old_time + datetime.timedelta(hours=1))
+        self.assertListEqual([node_count['count'] for node_count in counts], [1])
+
+    def test_add_job_exe_ends_deletes_old_counts(self):
+        """Tests that creating a new count deletes the counts that are past their retention period"""
+
+        old_time = timezone.now() - datetime.timedelta(days=10)
+        job_exe = job_test_utils.create_job_exe(status='COMPLETED', node=self.node_1)
+        job_exe_end = JobExecutionEnd.objects.get(job_exe_id=job_exe.id)
+        JobExecutionNodeCount.objects.add_job_exe_ends([job_exe_end], old_time)
+
+        with self.settings(JOB_EXE_NODE_COUNT_RETENTION_DAYS=5):
+            JobExecutionNodeCount.objects.add_job_exe_ends([job_exe_end], timezone.now() + datetime.timedelta(hours=1))
+
+        old_time_block = JobExecutionNodeCount.get_time_block(old_time)
+        self.assertEqual(JobExecutionNodeCount.objects.filter(time_block=old_time_block).count(), 0)
+        self.assertEqual(JobExecutionNodeCount.objects.count(), 2)
+
+    def test_get_time_block(self):
+        """Tests that times are placed into the correct time block"""
+
+        when = datetime.datetime(2017, 10, 4, 14, 12, 34, 567, tzinfo=timezone.utc)
+        self.assertEqual(JobExecutionNodeCount.get_time_block(when),
+                         datetime.datetime(2017, 10, 4, 14, 10, tzinfo=timezone.utc))
+
+
+class TestJobTypePerformanceManager(TransactionTestCase):
+    """Tests for the job type performance model manager"""
+
+    def setUp(self):
+        django.setup()
+
+        self.job_type = job_test_utils.create_job_type()
+        self.data_error = error_test_utils.create_error(category='DATA')
+
+    def _create_task_results(self, main_secs):
+        """Creates task results with a main task that ran for the given number of seconds"""
+
+        started = timezone.now() - datetime.timedelta(seconds=main_secs)
+        return TaskResults({'version': '1.0',
+                            'tasks': [{'task_id': '1', 'type': 'main', 'was_launched': True,
+                                       'started': datetime_to_string(started),
+                                       'ended': datetime_to_string(started + datetime.timedelta(seconds=main_secs))}]})
+
+    def test_add_job_exe_ends(self):
+        """Tests that the task durations of job_exe_end models are added to the histograms of the counted jobs"""
+
+        job_1 = job_test_utils.create_job(job_type=self.job_type, status='RUNNING')
+        job_test_utils.create_job_exe(job=job_1, status='COMPLETED', task_results=self._create_task_results(30))
+        job_2 = job_test_utils.create_job(job_type=self.job_type, status='RUNNING')
+        job_test_utils.create_job_exe(job=job_2, status='COMPLETED', task_results=self._create_task_results(90))
+
+        # Only jobs are counted, not job executions
+        started = timezone.now() - datetime.timedelta(hours=1)
+        self.assertListEqual(JobTypePerformance.objects.get_performance(self.job_type.id, started), [])
+
+        JobTypePerformance.objects.update_job_counts([job_1, job_2], 'COMPLETED', timezone.now())
+        results = JobTypePerformance.objects.get_performance(self.job_type.id, started)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].status, 'COMPLETED')
+        self.assertEqual(results[0].count, 2)
+        main_durations = results[0].durations['main']
+        self.assertAlmostEqual(main_durations['p50'], 30.0)
+        self.assertAlmostEqual(main_durations['p99'], 118.8)
+
+    def test_update_job_counts(self):
+        """Tests that jobs are counted when they reach a final status and removed when they leave it"""
+
+        when = timezone.now()
+        job_1 = job_test_utils.create_job(job_type=self.job_type, status='RUNNING')
+        job_2 = job_test_utils.create_job(job_type=self.job_type, status='PENDING')
+        Job.objects.update_status([job_1], 'FAILED', when, error=self.data_error)
+        Job.objects.update_status([job_2], 'CANCELED', when)
+
+        results = JobTypePerformance.objects.get_performance(self.job_type.id, when - datetime.timedelta(hours=1))
+        counts = {(counts.status, counts.category): counts.count for counts in results}
+        self.assertDictEqual(counts, {('FAILED', 'DATA'): 1, ('CANCELED', None): 1})
+
+        # Re-queue the failed job
+        JobTypePerformance.objects.update_job_counts([job_1], 'QUEUED', when + datetime.timedelta(minutes=1))
+
+        results = JobTypePerformance.objects.get_performance(self.job_type.id, when - datetime.timedelta(hours=1))
+        counts = {(counts.status, counts.category): counts.count for counts in results}
+        self.assertDictEqual(counts, {('CANCELED', None): 1})
+
+    def test_get_performance_time_range(self):
+        """Tests that statistics from separate time blocks are summed and ones outside of the time range are ignored"""
+
+        old_time = timezone.now() - datetime.timedelta(hours=5)
+        job = job_test_utils.create_job(job_type=self.job_type, status='RUNNING')
+        JobTypePerformance.objects.update_job_counts([job], 'COMPLETED', timezone.now())
+        JobTypePerformance.objects.update_job_counts([job], 'COMPLETED', old_time)
+        JobTypePerformance.objects.update_job_counts([job], 'COMPLETED', old_time - datetime.timedelta(hours=2))
+
+        results = JobTypePerformance.objects.get_performance(self.job_type.id,
+                                                             timezone.now() - datetime.timedelta(hours=3))
+        self.assertListEqual([counts.count for counts in results], [1])
+        results = JobTypePerformance.objects.get_performance(self.job_type.id,
+                                                             timezone.now() - datetime.timedelta(hours=12))
+        self.assertListEqual([counts.count for counts in results], [3])
+        results = JobTypePerformance.objects.get_performance(self.job_type.id, old_time,
+                                                             old_time + datetime.timedelta(minutes=30))
+        self.assertListEqual([counts.count for counts in results], [1])
+
+    def test_job_type_get_performance(self):
+        """Tests that job type performance includes both active jobs and jobs in a final status"""
+
+        job_test_utils.create_job(job_type=self.job_type, status='QUEUED')
+        job = job_test_utils.create_job(job_type=self.job_type, status='RUNNING')
+        job_test_utils.create_job_exe(job=job, status='COMPLETED')
+        Job.objects.complete_job(job, timezone.now())
+
+        results = JobType.objects.get_performance(self.job_type.id, timezone.now() - datetime.timedelta(hours=1))
+        counts = {counts.status: counts.count for counts in results}
+        self.assertDictEqual(counts, {'QUEUED': 1, 'COMPLETED': 1})
+
+    def test_estimate_percentile(self):
+        """Tests estimating percentiles from a task duration histogram"""
+
+        histogram = [0] * (len(JobTypePerformance.DURATION_BUCKETS) + 1)
+        histogram[0] = 2  # Two durations of at most 1 second
+        histogram[3] = 2  # Two durations between 5 and 10 seconds
+
+        self.assertAlmostEqual(JobTypePerformance.estimate_percentile(histogram, 0.25), 0.5)
+        self.assertAlmostEqual(JobTypePerformance.estimate_percentile(histogram, 0.75), 7.5)
+        histogram[-1] = 96
+        self.assertEqual(JobTypePerformance.estimate_percentile(histogram, 0.99), 86400.0)
+        self.assertIsNone(JobTypePerformance.estimate_percentile([], 0.5))
+
+    def test_get_time_block(self):
+        """Tests that times are placed into the correct time block"""
+
+        when = datetime.datetime(2017, 10, 4, 14, 12, 34, 567, tzinfo=timezone.utc)
+        self.assertEqual(JobTypePerformance.get_time_block(when),
+                         datetime.datetime(2017, 10, 4, 14, tzinfo=timezone.utc))
+
+
 class TestJobTypeManagerCreateJobType(TransactionTestCase):
 
     def setUp(self):
@@ -166,6 +166,59 @@ class TestJobsView(TestCase):
         self.assertEqual(result['results'][2]['job_type']['id'], self.job_type1.id)
         self.assertEqual(result['results'][3]['job_type']['id'], self.job_type2.id)
 
+    def test_cursor(self):
+        """Tests paging through the jobs view with a cursor."""
+
+        url = rest_util.get_url('/jobs/?cursor=&page_size=1')
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertNotIn('count', result)
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['id'], self.job1.id)
+        self.assertIsNone(result['previous'])
+        self.assertIsNotNone(result['next'])
+
+        response = self.client.generic('GET', result['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['id'], self.job2.id)
+        self.assertIsNone(result['next'])
+        self.assertIsNotNone(result['previous'])
+
+        response = self.client.generic('GET', result['previous'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertEqual(len(result['results']), 1)
+        self.assertEqual(result['results'][0]['id'], self.job1.id)
+        self.assertIsNone(result['previous'])
+
+    def test_cursor_count(self):
+        """Tests calling the jobs view with a cursor and requesting the total count."""
+
+        url = rest_util.get_url('/jobs/?cursor=&include_count=true')
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertEqual(result['count'], 2)
+        self.assertEqual(len(result['results']), 2)
+
+    def test_cursor_invalid(self):
+        """Tests calling the jobs view with an invalid cursor or with a cursor and an order."""
+
+        url = rest_util.get_url('/jobs/?cursor=bad')
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
+
+        url = rest_util.get_url('/jobs/?cursor=&order=id')
+        response = self.client.generic('GET', url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
+
 
 class TestJobDetailsView(TestCase):
 
@@ -232,7 +232,7 @@ def create_job_exe(job_type=None, job=None, exe_num=None, node=None, timeout=Non
         if not ended:
             ended = started + datetime.timedelta(seconds=1)
         job_exe_end.ended = ended
-        job_exe_end.save()
+        JobExecutionEnd.objects.create_job_exe_ends([job_exe_end])
 
     if status == 'COMPLETED':
         job_exe_output = JobExecutionOutput()
@@ -523,6 +523,7 @@ class JobsView(ListAPIView):
     """This view is the endpoint for retrieving a list of all available jobs."""
     queryset = Job.objects.all()
     serializer_class = JobSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request):
         """Retrieves jobs and returns it in JSON form
@@ -616,6 +617,7 @@ class JobUpdatesView(ListAPIView):
     """This view is the endpoint for retrieving job updates over a given time range."""
     queryset = Job.objects.all()
     serializer_class = JobUpdateSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def get(self, request):
         """Retrieves the job updates for a given time range and returns it in JSON form
@@ -651,6 +653,7 @@ class JobsWithExecutionView(ListAPIView):
     """This view is the endpoint for viewing jobs and their associated latest execution"""
     queryset = Job.objects.all()
     serializer_class = JobWithExecutionSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request):
         """Gets jobs and their associated latest execution
@@ -692,6 +695,7 @@ class JobExecutionsView(ListAPIView):
     """This view is the endpoint for viewing job executions and their associated job_type id, name, and version"""
     queryset = JobExecution.objects.all()
     serializer_class = JobExecutionSerializer
+    cursor_ordering = ('created', 'id')
 
     def list(self, request):
         """Gets job executions and their associated job_type id, name, and version
@@ -6,9 +6,25 @@ from mesos.interface import mesos_pb2
 from django.conf import settings
 
 
+# The maximum number of partially built Mesos tasks kept in each template cache before the cache is cleared
+MAX_CACHED_TEMPLATES = 1000
+
+# Partially built Mesos tasks holding the fields that are shared between tasks, copied into each new Mesos task
+_TASK_TEMPLATES = {}  # {Template key: TaskInfo}
+_RESOURCE_TEMPLATES = {}  # {Tuple of (resource name, value): TaskInfo with only resources}
+
+
 logger = logging.getLogger(__name__)
 
 
+def clear_task_templates():
+    """Clears the cached Mesos task templates
+    """
+
+    _TASK_TEMPLATES.clear()
+    _RESOURCE_TEMPLATES.clear()
+
+
 def create_mesos_task(task):
     """Creates and returns a Mesos task from a Scale task
 
@@ -24,30 +40,23 @@ def create_mesos_task(task):
     return _create_command_task(task)
 
 
-def _create_base_task(task):
-    """Creates and returns a base Mesos task from a Scale task
+def _create_base_task(task, template):
+    """Creates and returns a base Mesos task from a Scale task, starting from a copy of the given template
 
     :param task: The task
     :type task: :class:`job.tasks.base_task.Task`
+    :param template: The template holding the fields shared with other tasks
+    :type template: :class:`mesos_pb2.TaskInfo`
     :returns: The base Mesos task
     :rtype: :class:`mesos_pb2.TaskInfo`
     """
 
     mesos_task = mesos_pb2.TaskInfo()
+    mesos_task.CopyFrom(template)
+    mesos_task.MergeFrom(_get_resource_template(task))
     mesos_task.task_id.value = task.id
     mesos_task.slave_id.value = task.agent_id
     mesos_task.name = task.name
-    resources = task.get_resources()
-
-    if settings.CONFIG_URI:
-        mesos_task.command.uris.add().value = settings.CONFIG_URI
-
-    for resource in resources.resources:
-        if resource.value > 0.0:
-            task_resource = mesos_task.resources.add()
-            task_resource.name = resource.name
-            task_resource.type = mesos_pb2.Value.SCALAR
-            task_resource.scalar.value = resource.value
 
     return mesos_task
 
@@ -61,7 +70,8 @@ def _create_command_task(task):
     :rtype: :class:`mesos_pb2.TaskInfo`
     """
 
-    mesos_task = _create_base_task(task)
+    template = _get_template(_TASK_TEMPLATES, ('command', settings.CONFIG_URI), _create_template)
+    mesos_task = _create_base_task(task, template)
     command = task.command if task.command else 'echo'
     if task.command_arguments:
         command += ' ' + task.command_arguments
@@ -79,22 +89,108 @@ def _create_docker_task(task):
     rtype: :class:`mesos_pb2.TaskInfo`
     """
 
-    mesos_task = _create_base_task(task)
-    mesos_task.container.type = mesos_pb2.ContainerInfo.DOCKER
-    mesos_task.container.docker.image = task.docker_image
-    for param in task.docker_params:
-        mesos_task.container.docker.parameters.add(key=param.flag, value=param.value)
+    # Docker parameters that are unique to each task are added to every Mesos task instead of to the template
+    docker_params = None
+    if task.has_static_docker_params:
+        docker_params = tuple((param.flag, param.value) for param in task.docker_params)
+    key = ('docker', settings.CONFIG_URI, task.docker_image, task.is_docker_privileged, docker_params)
+    template = _get_template(_TASK_TEMPLATES, key, lambda: _create_docker_template(task, docker_params))
+
+    mesos_task = _create_base_task(task, template)
+    if docker_params is None:
+        parameters = mesos_task.container.docker.parameters
+        for param in task.docker_params:
+            parameters.add(key=param.flag, value=param.value)
+    mesos_task.command.arguments.extend(task.command_arguments.split(" "))
+
+    return mesos_task
+
+
+def _create_docker_template(task, docker_params):
+    """Creates and returns a template holding the fields of a Dockerized Mesos task that are shared with other tasks
+
+    :param task: The task
+    :type task: :class:`job.tasks.base_task.Task`
+    :param docker_params: The list of (flag, value) tuples for static Docker parameters, possibly None
+    :type docker_params: list
+    :returns: The template
+    :rtype: :class:`mesos_pb2.TaskInfo`
+    """
+
+    template = _create_template()
+    template.container.type = mesos_pb2.ContainerInfo.DOCKER
+    template.container.docker.image = task.docker_image
+    if docker_params:
+        for flag, value in docker_params:
+            template.container.docker.parameters.add(key=flag, value=value)
     if task.is_docker_privileged:
-        mesos_task.container.docker.privileged = True
+        template.container.docker.privileged = True
 
     # Use Docker image entrypoint
-    mesos_task.command.shell = False
+    template.command.shell = False
 
-    arguments = task.command_arguments.split(" ")
-    for argument in arguments:
-        mesos_task.command.arguments.append(argument)
+    template.container.docker.network = mesos_pb2.ContainerInfo.DockerInfo.Network.Value('BRIDGE')
+    template.container.docker.force_pull_image = False
 
-    mesos_task.container.docker.network = mesos_pb2.ContainerInfo.DockerInfo.Network.Value('BRIDGE')
-    mesos_task.container.docker.force_pull_image = False
+    return template
 
-    return mesos_task
+
+def _create_template():
+    """Creates and returns a template holding the fields that are shared by every Mesos task
+
+    :returns: The template
+    :rtype: :class:`mesos_pb2.TaskInfo`
+    """
+
+    template = mesos_pb2.TaskInfo()
+    if settings.CONFIG_URI:
+        template.command.uris.add().value = settings.CONFIG_URI
+
+    return template
+
+
+def _get_resource_template(task):
+    """Returns a template holding only the resources of the given task, which is shared by tasks requiring the same
+    resources
+
+    :param task: The task
+    :type task: :class:`job.tasks.base_task.Task`
+    :returns: The resource template
+    :rtype: :class:`mesos_pb2.TaskInfo`
+    """
+
+    resources = tuple((resource.name, resource.value) for resource in task.get_resources().resources
+                      if resource.value > 0.0)
+
+    def create_resource_template():
+        template = mesos_pb2.TaskInfo()
+        for name, value in resources:
+            task_resource = template.resources.add()
+            task_resource.name = name
+            task_resource.type = mesos_pb2.Value.SCALAR
+            task_resource.scalar.value = value
+        return template
+
+    return _get_template(_RESOURCE_TEMPLATES, resources, create_resource_template)
+
+
+def _get_template(cache, key, create_func):
+    """Returns the template with the given key from the given cache, creating and caching it if needed
+
+    :param cache: The template cache
+    :type cache: dict
+    :param key: The template key
+    :type key: tuple
+    :param create_func: The function that creates the template
+    :type create_func: func
+    :returns: The template
+    :rtype: :class:`mesos_pb2.TaskInfo`
+    """
+
+    template = cache.get(key)
+    if template is None:
+        if len(cache) >= MAX_CACHED_TEMPLATES:
+            cache.clear()
+        template = create_func()
+        cache[key] = template
+    return template
@@ -0,0 +1,4 @@
+import logging
+
+# Disable logging for unit tests
+logging.disable(logging.CRITICAL)
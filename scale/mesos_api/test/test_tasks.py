@@ -0,0 +1,160 @@
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import time
+from unittest import skipUnless
+
+import django
+from django.test import TestCase
+from django.test.utils import override_settings
+from mesos.interface import mesos_pb2
+
+from job.configuration.docker_param import DockerParameter
+from job.tasks.base_task import Task
+from mesos_api.tasks import clear_task_templates, create_mesos_task
+from node.resources.node_resources import NodeResources
+from node.resources.resource import Cpus, Disk, Mem
+from scheduler.tasks.db_update_task import DatabaseUpdateTask
+
+BENCHMARK_ENV_VAR = 'SCALE_MESOS_TASK_BENCHMARK'
+
+
+# Non-abstract class for a Docker task with parameters that are unique to each task
+class ImplementedTask(Task):
+
+    def __init__(self, task_id, agent_id, num_params=3):
+        super(ImplementedTask, self).__init__(task_id, 'Task %s' % task_id, agent_id)
+
+        self._uses_docker = True
+        self._docker_image = 'my-image:1.0'
+        self._docker_params = [DockerParameter('env', 'TASK_ID=%s' % task_id)]
+        for i in range(num_params - 1):
+            self._docker_params.append(DockerParameter('volume', '%s_%d:/vol_%d:rw' % (task_id, i, i)))
+        self._command_arguments = 'run --input ${INPUT} --output /out'
+
+    def get_resources(self):
+        return NodeResources([Cpus(1.0), Mem(1024.0), Disk(2048.0)])
+
+
+class TestCreateMesosTask(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        clear_task_templates()
+
+    def _get_params(self, mesos_task):
+        return [(param.key, param.value) for param in mesos_task.container.docker.parameters]
+
+    def test_static_docker_params(self):
+        """Tests that tasks with static Docker parameters share a template but are built independently"""
+
+        task_1 = DatabaseUpdateTask('framework_1')
+        task_1.agent_id = 'agent_1'
+        task_2 = DatabaseUpdateTask('framework_1')
+        task_2.agent_id = 'agent_2'
+
+        mesos_task_1 = create_mesos_task(task_1)
+        mesos_task_1.container.docker.parameters.add(key='env', value='EXTRA=1')
+        mesos_task_2 = create_mesos_task(task_2)
+
+        self.assertEqual(mesos_task_2.task_id.value, task_2.id)
+        self.assertEqual(mesos_task_2.slave_id.value, 'agent_2')
+        self.assertEqual(mesos_task_2.container.type, mesos_pb2.ContainerInfo.DOCKER)
+        self.assertEqual(mesos_task_2.container.docker.image, task_2.docker_image)
+        self.assertFalse(mesos_task_2.command.shell)
+        self.assertListEqual(list(mesos_task_2.command.arguments), ['scale_db_update'])
+        self.assertListEqual(self._get_params(mesos_task_2), [(p.flag, p.value) for p in task_2.docker_params])
+        resources = {resource.name: resource.scalar.value for resource in mesos_task_2.resources}
+        self.assertDictEqual(resources, {'cpus': 0.5, 'mem': 512.0})
+
+    def test_unique_docker_params(self):
+        """Tests that Docker parameters unique to each task are added to each Mesos task"""
+
+        mesos_task_1 = create_mesos_task(ImplementedTask('task_1', 'agent_1'))
+        mesos_task_2 = create_mesos_task(ImplementedTask('task_2', 'agent_1'))
+
+        self.assertEqual(self._get_params(mesos_task_1)[0], ('env', 'TASK_ID=task_1'))
+        self.assertEqual(self._get_params(mesos_task_2)[0], ('env', 'TASK_ID=task_2'))
+        self.assertEqual(len(mesos_task_2.container.docker.parameters), 3)
+        self.assertListEqual(list(mesos_task_2.command.arguments), ['run', '--input', '${INPUT}', '--output', '/out'])
+
+    @override_settings(CONFIG_URI='file:///my/config.tar.gz')
+    def test_command_task(self):
+        """Tests creating a command-line Mesos task"""
+
+        task = ImplementedTask('task_1', 'agent_1')
+        task._uses_docker = False
+        task._command = 'ls'
+        task._command_arguments = '-l'
+
+        mesos_task = create_mesos_task(task)
+
+        self.assertEqual(mesos_task.command.value, 'ls -l')
+        self.assertListEqual([uri.value for uri in mesos_task.command.uris], ['file:///my/config.tar.gz'])
+        self.assertFalse(mesos_task.HasField('container'))
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the Mesos task benchmark' % BENCHMARK_ENV_VAR)
+class TestCreateMesosTaskBenchmark(TestCase):
+    """Measures how many Mesos tasks are built per second. The benchmark is only run when the SCALE_MESOS_TASK_BENCHMARK
+    environment variable is set.
+    """
+
+    NUM_TASKS = 20000
+
+    def setUp(self):
+        django.setup()
+
+        clear_task_templates()
+
+    def test_tasks_per_second(self):
+        """Compares building every Mesos task from scratch with building them from cached templates"""
+
+        job_tasks = [ImplementedTask('task_%d' % i, 'agent_1', num_params=30) for i in range(self.NUM_TASKS)]
+        system_tasks = []
+        for _ in range(self.NUM_TASKS):
+            system_task = DatabaseUpdateTask('framework_1')
+            system_task.agent_id = 'agent_1'
+            system_tasks.append(system_task)
+
+        print('\nBuilding %d Mesos tasks' % self.NUM_TASKS)
+        for name, tasks in [('job tasks, 30 unique params', job_tasks), ('system tasks', system_tasks)]:
+            self._report('From scratch (%s)' % name, self._run(self._create_from_scratch, tasks))
+            self._report('From templates (%s)' % name, self._run(create_mesos_task, tasks))
+
+    def _create_from_scratch(self, task):
+        """Builds a Mesos task the way it was built before templates were cached"""
+
+        mesos_task = mesos_pb2.TaskInfo()
+        mesos_task.task_id.value = task.id
+        mesos_task.slave_id.value = task.agent_id
+        mesos_task.name = task.name
+        for resource in task.get_resources().resources:
+            if resource.value > 0.0:
+                task_resource = mesos_task.resources.add()
+                task_resource.name = resource.name
+                task_resource.type = mesos_pb2.Value.SCALAR
+                task_resource.scalar.value = resource.value
+        mesos_task.container.type = mesos_pb2.ContainerInfo.DOCKER
+        mesos_task.container.docker.image = task.docker_image
+        for param in task.docker_params:
+            mesos_task.container.docker.parameters.add(key=param.flag, value=param.value)
+        mesos_task.command.shell = False
+        for argument in task.command_arguments.split(" "):
+            mesos_task.command.arguments.append(argument)
+        mesos_task.container.docker.network = mesos_pb2.ContainerInfo.DockerInfo.Network.Value('BRIDGE')
+        mesos_task.container.docker.force_pull_image = False
+        return mesos_task
+
+    def _report(self, name, duration):
+        print('%s: %.0f tasks/s' % (name, self.NUM_TASKS / duration))
+
+    def _run(self, create_func, tasks):
+        """Builds a Mesos task for each of the given tasks and returns the duration in seconds"""
+
+        started = time.time()
+        for task in tasks:
+            create_func(task)
+        return time.time() - started
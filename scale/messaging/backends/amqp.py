@@ -24,6 +24,17 @@ class AMQPMessagingBackend(MessagingBackend):
         # Message retrieval timeout
         self._timeout = 1
 
+    def get_queue_size(self):
+        """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
+        with Connection(self._broker_url) as connection:
+            try:
+                # A passive declare returns the queue's message count without creating or modifying the queue
+                _, message_count, _ = connection.default_channel.queue_declare(queue=self._queue_name, passive=True)
+            except connection.channel_errors:
+                # The queue has not been created yet
+                return 0
+        return message_count
+
     def send_messages(self, messages):
         """See :meth:`messaging.backends.backend.MessagingBackend.send_messages`"""
         with Connection(self._broker_url) as connection:
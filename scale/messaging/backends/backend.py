@@ -22,6 +22,14 @@ class MessagingBackend(object):
         # TODO: Transition to more advanced message routing per command message type
         self._queue_name = settings.QUEUE_NAME
 
+    @abstractmethod
+    def get_queue_size(self):
+        """Returns the approximate number of messages waiting in the backend queue to be received
+
+        :return: The approximate number of waiting messages
+        :rtype: int
+        """
+
     @abstractmethod
     def send_messages(self, messages):
         """Send a collection of messages to the backend
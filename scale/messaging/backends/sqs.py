@@ -25,6 +25,11 @@ class SQSMessagingBackend(MessagingBackend):
         self._credentials = AWSCredentials(self._broker.get_user_name(),
                                            self._broker.get_password())
 
+    def get_queue_size(self):
+        """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
+        with SQSClient(self._credentials, self._region_name) as client:
+            return client.get_queue_size(self._queue_name)
+
     def send_messages(self, messages):
         """See:meth:`messaging.backends.backend.MessagingBackend.send_messages`"""
         with SQSClient(self._credentials, self._region_name) as client:
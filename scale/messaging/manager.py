@@ -32,6 +32,15 @@ class CommandMessageManager(object):
 
         self._backend = get_message_backend(broker_type)
 
+    def get_queue_size(self):
+        """Returns the approximate number of messages waiting in the configured message broker to be processed
+
+        :return: The approximate number of waiting messages
+        :rtype: int
+        """
+
+        return self._backend.get_queue_size()
+
     def send_messages(self, commands):
         """Serialize CommandMessages and send via configured message broker
 
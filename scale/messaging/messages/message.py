@@ -1,5 +1,9 @@
 from abc import ABCMeta, abstractmethod
 
+# The maximum size in bytes of the JSON body of a single message. SQS limits a batch of 10 messages to 256 KiB in total,
+# so message types that pack many items into one message should fill each message up to, but not past, this size.
+MAX_MESSAGE_SIZE = 25 * 1024
+
 
 class CommandMessage(object):
     """This ABC defines the interface all CommandMessage classes should implement.
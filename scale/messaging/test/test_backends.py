@@ -23,6 +23,9 @@ class DummyBackend(MessagingBackend):
     def __init__(self):
         super(DummyBackend, self).__init__('dummy')
 
+    def get_queue_size(self):  # pragma: no cover
+        pass
+
     def send_messages(self, message):  # pragma: no cover
         pass
 
@@ -40,6 +43,18 @@ class TestAMQPBackend(TestCase):
         self.assertEqual(backend.type, 'amqp')
         self.assertEqual(backend._timeout, 1)
 
+    @patch('messaging.backends.amqp.Connection')
+    def test_get_queue_size(self, connection):
+        """Validate the queue size is retrieved with a passive queue declare via the AMQP backend"""
+
+        channel = connection.return_value.__enter__.return_value.default_channel
+        channel.queue_declare.return_value = ('scale-command-messages', 25, 2)
+
+        backend = AMQPMessagingBackend()
+
+        self.assertEqual(backend.get_queue_size(), 25)
+        channel.queue_declare.assert_called_with(queue=backend._queue_name, passive=True)
+
     @patch('messaging.backends.amqp.Connection')
     def test_valid_send_message(self, connection):
         """Validate message is sent via the AMQP backend"""
@@ -221,6 +236,16 @@ class TestSQSBackend(TestCase):
         self.assertEqual(backend._credentials.access_key_id, user_name)
         self.assertEqual(backend._credentials.secret_access_key, password)
 
+    @patch('messaging.backends.sqs.SQSClient')
+    def test_get_queue_size(self, client):
+        """Validate the queue size is retrieved via the SQS backend"""
+
+        client.return_value.__enter__.return_value.get_queue_size.return_value = 12
+
+        backend = SQSMessagingBackend()
+
+        self.assertEqual(backend.get_queue_size(), 12)
+
     @patch('messaging.backends.sqs.SQSClient')
     def test_valid_single_send_messages(self, client):
         """Validate message is sent via the SQS backend"""
@@ -6,6 +6,8 @@ import datetime
 import logging
 import sys
 
+from django.db.models import Count, Max, Min, Sum
+
 logger = logging.getLogger(__name__)
 
 
@@ -246,6 +248,10 @@ class MetricsPlotData(object):
         :rtype: list[:class:`metrics.registry.MetricsPlotData`]
         """
         results = {column.name: MetricsPlotData(column=column, values=[]) for column in columns}
+        if not choice_ids:
+            MetricsPlotData._add_aggregated_values(results, query_set, date_field, columns)
+            return results.values()
+
         for entry in query_set.iterator():
             for column in columns:
                 if column.name not in results:
@@ -253,6 +259,78 @@ class MetricsPlotData(object):
                 MetricsPlotData._add_plot_value(results[column.name], entry, date_field, choice_field, choice_ids)
         return results.values()
 
+    def downsample(self, max_points):
+        """Reduces the values of each choice in this series to at most the given number of points using the largest
+        triangle three buckets algorithm, which keeps the points that best preserve the visual shape of the series
+
+        :param max_points: The maximum number of values per choice
+        :type max_points: int
+        """
+
+        series = {}
+        for plot_value in self.values:
+            series.setdefault(plot_value.id, []).append(plot_value)
+        if all(len(values) <= max_points for values in series.values()):
+            return
+
+        values = []
+        for choice_values in series.values():
+            values.extend(_largest_triangle_three_buckets(choice_values, max_points))
+        self.values = sorted(values, key=lambda plot_value: plot_value.date)
+
+    @classmethod
+    def _add_aggregated_values(cls, results, query_set, date_field, columns):
+        """Adds values to the given plot data models that are aggregated across all choices by date within the database
+
+        :param results: The plot data models to update by column name.
+        :type results: dict[string, :class:`metrics.registry.MetricsPlotData`]
+        :param query_set: A set of database models that are being counted towards metrics.
+        :type query_set: :class:`django.models.QuerySet`
+        :param date_field: The name of the field within each model that contains the recorded date.
+        :type date_field: string
+        :param columns: A list of metrics type column definitions that should be included.
+        :type columns: list[:class:`metrics.registry.MetricsTypeColumn`]
+        """
+
+        aggregates = {}
+        for column in columns:
+            aggregates['plot_sum_%s' % column.name] = Sum(column.name)
+            aggregates['plot_count_%s' % column.name] = Count(column.name)
+            aggregates['plot_min_%s' % column.name] = Min(column.name)
+            aggregates['plot_max_%s' % column.name] = Max(column.name)
+        entries = query_set.values(date_field).annotate(**aggregates).order_by(date_field)
+
+        for entry in entries.iterator():
+            entry_date = entry[date_field]
+            for column in columns:
+                count = entry['plot_count_%s' % column.name]
+                if not count:
+                    continue
+                total = entry['plot_sum_%s' % column.name]
+                min_val = entry['plot_min_%s' % column.name]
+                max_val = entry['plot_max_%s' % column.name]
+
+                # Update the bounds for the axes
+                plot_data = results[column.name]
+                plot_data.min_y = min_val if plot_data.min_y is None else min(plot_data.min_y, min_val)
+                plot_data.max_y = max_val if plot_data.max_y is None else max(plot_data.max_y, max_val)
+                plot_data.min_x = entry_date if plot_data.min_x is None else min(plot_data.min_x, entry_date)
+                plot_data.max_x = entry_date if plot_data.max_x is None else max(plot_data.max_x, entry_date)
+
+                # Compute the value based on the aggregate type
+                plot_value = MetricsPlotValue(choice_id=None, date=entry_date, count=count, total=total)
+                if column.aggregate == 'sum':
+                    plot_value.value = total
+                elif column.aggregate == 'min':
+                    plot_value.value = min_val
+                elif column.aggregate == 'max':
+                    plot_value.value = max_val
+                elif column.aggregate == 'avg':
+                    plot_value.value = total / count
+                else:
+                    logger.warning('Unknown metrics aggregate type: %s', column.aggregate)
+                plot_data.values.append(plot_value)
+
     @classmethod
     def _add_plot_value(cls, plot_data, entry, date_field, choice_field, choice_ids=None):
         """Adds metrics to an existing plot data model.
@@ -311,6 +389,51 @@ class MetricsPlotData(object):
         return plot_value
 
 
+def _largest_triangle_three_buckets(values, max_points):
+    """Downsamples the given plot values to the given number of points by always keeping the first and last values and
+    picking the value from each bucket in between that forms the largest triangle with the previously picked value and
+    the average of the next bucket
+
+    :param values: The plot values ordered by date
+    :type values: list[:class:`metrics.registry.MetricsPlotValue`]
+    :param max_points: The maximum number of values to return
+    :type max_points: int
+    :returns: The downsampled plot values
+    :rtype: list[:class:`metrics.registry.MetricsPlotValue`]
+    """
+
+    if len(values) <= max_points:
+        return values
+    if max_points < 3:
+        return [values[0], values[-1]][:max_points]
+
+    points = [(value.date.toordinal(), value.value or 0) for value in values]
+    bucket_size = (len(values) - 2) / float(max_points - 2)
+    results = [values[0]]
+    picked = 0
+    for i in range(max_points - 2):
+        # Average the next bucket, which is just the last value for the final bucket
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, len(values))
+        next_points = points[next_start:next_end]
+        avg_x = sum(point[0] for point in next_points) / float(len(next_points))
+        avg_y = sum(point[1] for point in next_points) / float(len(next_points))
+
+        picked_x, picked_y = points[picked]
+        max_area = -1.0
+        for index in range(int(i * bucket_size) + 1, next_start):
+            x, y = points[index]
+            area = abs((picked_x - avg_x) * (y - picked_y) - (picked_x - x) * (avg_y - picked_y))
+            if area > max_area:
+                max_area = area
+                max_index = index
+        results.append(values[max_index])
+        picked = max_index
+
+    results.append(values[-1])
+    return results
+
+
 class MetricsTypeError(Exception):
     """Error class used when there is a problem generating metrics."""
     pass
@@ -11,7 +11,7 @@ import source.test.utils as source_test_utils
 import metrics.test.utils as metrics_test_utils
 from job.execution.tasks.json.results.task_results import TaskResults
 from metrics.models import MetricsError, MetricsIngest, MetricsJobType
-from metrics.registry import MetricsTypeColumn
+from metrics.registry import MetricsPlotData, MetricsPlotValue, MetricsTypeColumn
 from util.parse import datetime_to_string
 
 
@@ -145,6 +145,44 @@ class TestMetricsError(TestCase):
         self.assertEqual(len(plot_data), 1)
         self.assertEqual(len(plot_data[0].values), 1)
 
+    def test_get_plot_data_aggregated(self):
+        """Tests getting the metrics plot data aggregated across all choices by date."""
+        metrics_test_utils.create_error(occurred=datetime.date(2015, 1, 1), total_count=1)
+        metrics_test_utils.create_error(occurred=datetime.date(2015, 1, 1), total_count=3)
+        metrics_test_utils.create_error(occurred=datetime.date(2015, 1, 2), total_count=2)
+
+        plot_data = MetricsError.objects.get_plot_data(started=datetime.date(2015, 1, 1),
+                                                       ended=datetime.date(2015, 1, 10))
+
+        self.assertEqual(len(plot_data), 1)
+        self.assertListEqual([value.value for value in plot_data[0].values], [4, 2])
+        self.assertEqual(plot_data[0].min_x, datetime.date(2015, 1, 1))
+        self.assertEqual(plot_data[0].max_x, datetime.date(2015, 1, 2))
+        self.assertEqual(plot_data[0].min_y, 1)
+        self.assertEqual(plot_data[0].max_y, 3)
+
+
+class TestMetricsPlotData(TestCase):
+    """Tests the MetricsPlotData logic."""
+
+    def test_downsample(self):
+        """Tests downsampling each choice of a series while keeping the peaks."""
+        values = []
+        for day in range(100):
+            date = datetime.date(2015, 1, 1) + datetime.timedelta(days=day)
+            values.append(MetricsPlotValue(choice_id=1, date=date, value=100 if day == 50 else day % 2))
+            values.append(MetricsPlotValue(choice_id=2, date=date, value=day))
+        plot_data = MetricsPlotData(MetricsTypeColumn('total_count'), values=values)
+
+        plot_data.downsample(10)
+
+        self.assertEqual(len(plot_data.values), 20)
+        choice_1_values = [value for value in plot_data.values if value.id == 1]
+        self.assertEqual(len(choice_1_values), 10)
+        self.assertIn(100, [value.value for value in choice_1_values])
+        self.assertEqual(choice_1_values[0].date, datetime.date(2015, 1, 1))
+        self.assertEqual(choice_1_values[-1].date, datetime.date(2015, 4, 10))
+
 
 class TestMetricsIngest(TestCase):
     """Tests the MetricsIngest model logic."""
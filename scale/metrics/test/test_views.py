@@ -174,3 +174,11 @@ class TestMetricPlotView(TransactionTestCase):
         result = json.loads(response.content)
         self.assertEqual(len(result['results']), 1)
         self.assertEqual(result['results'][0]['values'][0]['value'], 330)
+
+    def test_bad_max_points(self):
+        """Tests calling the metric plot view with a max_points value that is not positive."""
+
+        url = rest_util.get_url('/metrics/job-types/plot-data/?max_points=-1')
+        response = self.client.generic('GET', url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
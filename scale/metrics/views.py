@@ -79,6 +79,9 @@ class MetricPlotView(ListAPIView):
         choice_ids = rest_util.parse_string_list(request, 'choice_id', required=False)
         column_names = rest_util.parse_string_list(request, 'column', required=False)
         group_names = rest_util.parse_string_list(request, 'group', required=False)
+        max_points = rest_util.parse_int(request, 'max_points', required=False)
+        if max_points is not None and max_points <= 0:
+            raise rest_util.BadParameter('Parameter must be a positive integer: "max_points"')
 
         try:
             provider = registry.get_provider(name)
@@ -91,6 +94,9 @@ class MetricPlotView(ListAPIView):
 
         # Get the actual plot values
         metrics_values = provider.get_plot_data(started, ended, choice_ids, columns)
+        if max_points:
+            for plot_data in metrics_values:
+                plot_data.downsample(max_points)
 
         page = self.paginate_queryset(metrics_values)
         if len(choice_ids) > 1:
@@ -135,16 +135,21 @@ class NodeManager(models.Manager):
             nodes = nodes.order_by('last_modified')
         return nodes
 
-    def get_scheduler_nodes(self, hostnames):
+    def get_scheduler_nodes(self, hostnames, modified_since=None):
         """Returns a list of all nodes that either have one of the given host names or is active.
 
         :param hostnames: The list of host names
         :type hostnames: list
+        :param modified_since: If provided, only nodes modified at or after this time are returned
+        :type modified_since: :class:`datetime.datetime`
         :returns: The list of nodes for the scheduler
         :rtype: list
         """
 
-        return Node.objects.filter(models.Q(hostname__in=hostnames) | models.Q(is_active=True))
+        nodes = Node.objects.filter(models.Q(hostname__in=hostnames) | models.Q(is_active=True))
+        if modified_since:
+            nodes = nodes.filter(last_modified__gte=modified_since)
+        return nodes
 
     @transaction.atomic
     def update_node(self, new_data, node_id=None):
@@ -171,6 +176,8 @@ class NodeManager(models.Manager):
         if new_data.get('is_paused', None) == False:
             # restarting the node, we should clear the pause_reason
             new_data['pause_reason'] = None
+        # update() does not set auto_now fields and the scheduler relies on last_modified to detect changed nodes
+        new_data['last_modified'] = now()
         node_query.update(**new_data)
 
     # TODO: remove when REST API v4 is removed
@@ -192,43 +199,26 @@ class NodeManager(models.Manager):
 
         # Lazy load the the execution model since it is an optional lower level dependency
         try:
-            from job.models import JobExecution, JobExecutionEnd
+            from job.models import JobExecution, JobExecutionNodeCount
         except:
             return [NodeStatus(node) for node in nodes]
 
-        # Fetch a list of recent job executions
-        job_exe_ends = JobExecutionEnd.objects.select_related('error')
-        job_exe_ends = job_exe_ends.filter(created__gte=started)
-        if ended:
-            job_exe_ends = job_exe_ends.filter(created__lte=ended)
-            
-        job_exe_ends = job_exe_ends.values('node_id', 'created', 'status', 'error__category')
-
-        # Build a mapping of node_id -> (status + error category) -> associated counts
+        # Build a mapping of node_id -> (status + error category) -> associated counts using the pre-aggregated counts
+        # that are maintained as job_exe_end models are created
         job_exes_dict = {}
-        for job_exe in job_exe_ends:
-
-            # Make sure the node mapping entry exists
-            if job_exe['node_id'] not in job_exes_dict:
-                job_exes_dict[job_exe['node_id']] = {}
-            job_exe_dict = job_exes_dict[job_exe['node_id']]
-
-            # Make sure the counts mapping entry exists
-            status_key = '%s.%s' % (job_exe['status'], job_exe['error__category'])
-            if status_key not in job_exe_dict:
-                job_exe_dict[status_key] = NodeStatusCounts(job_exe['status'])
-
-            # Update the count based on the status
-            status_counts = job_exe_dict[status_key]
-            status_counts.count += 1
-            if not status_counts.most_recent or job_exe['created'] > status_counts.most_recent:
-                status_counts.most_recent = job_exe['created']
-            if job_exe['error__category']:
-                status_counts.category = job_exe['error__category']
+        for node_count in JobExecutionNodeCount.objects.get_counts(started, ended):
+            if node_count['node_id'] not in job_exes_dict:
+                job_exes_dict[node_count['node_id']] = {}
+            category = node_count['error_category'] if node_count['error_category'] else None
+            status_counts = NodeStatusCounts(node_count['status'], node_count['count'], node_count['most_recent'],
+                                             category)
+            job_exes_dict[node_count['node_id']]['%s.%s' % (node_count['status'], category)] = status_counts
 
         # Build a mapping of node_id -> running job executions
+        # Jobs are set to RUNNING when the scheduler launches their current execution, so this matches the scheduler's
+        # set of running job executions without scanning the job_exe_end table
         running_dict = {}
-        running_exes = JobExecution.objects.exclude(jobexecutionend__status__in=['FAILED', 'COMPLETED', 'CANCELED'])
+        running_exes = JobExecution.objects.filter(job__status='RUNNING', exe_num=models.F('job__num_exes'))
         running_exes = running_exes.order_by('created')
         running_exes = running_exes.select_related('job').defer('stdout', 'stderr')
         for job_exe in running_exes:
@@ -225,7 +225,8 @@ class TestNodesStatusView(TransactionTestCase):
         job_exe_4.created = now() - timedelta(hours=1)
         job_exe_4.job_completed = now()
         job_exe_4.save()
-        job_exe_5 = job_test_utils.create_job_exe(job=self.job, status='RUNNING', node=self.node3)
+        running_job = job_test_utils.create_job(status='RUNNING', num_exes=1)
+        job_exe_5 = job_test_utils.create_job_exe(job=running_job, status='RUNNING', node=self.node3)
         job_exe_5.created = now()
         job_exe_5.save()
 
@@ -9,7 +9,7 @@ from django.utils.timezone import now
 
 from job.configuration.data.data_file import AbstractDataFileStore
 from job.execution.container import SCALE_JOB_EXE_OUTPUT_PATH
-from product.models import FileAncestryLink, ProductFile
+from product.models import ProductFile
 from recipe.models import Recipe
 from storage.models import Workspace
 
@@ -68,9 +68,6 @@ class ProductDataFileStore(AbstractDataFileStore):
                     product_file = product_files[i]
                     results[full_local_path] = product_file.id
 
-            FileAncestryLink.objects.create_file_ancestry_links(input_file_ids, set(results.values()), job_exe.job,
-                                                                job_exe.id)
-
         return results
 
     def _calculate_remote_path(self, job_exe, input_file_ids):
@@ -97,7 +94,7 @@ class ProductDataFileStore(AbstractDataFileStore):
 
         # Try to use data start time from earliest ancestor source file
         the_date = None
-        for source_file in FileAncestryLink.objects.get_source_ancestors(list(input_file_ids)):
+        for source_file in ProductFile.objects.get_source_ancestors(list(input_file_ids)):
             if source_file.data_started:
                 if not the_date or source_file.data_started < the_date:
                     the_date = source_file.data_started
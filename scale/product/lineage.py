@@ -0,0 +1,99 @@
+"""Defines the functions for querying the lineage of files. The lineage is stored once per job as its edge set: the
+input files of each job (job_input_file) and the output files that its executions produced (scale_file.job_id).
+Ancestors and descendants are found by walking these edges with recursive queries, so no links need to be written
+between each ancestor and descendant file."""
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+
+# Walks from each file to the input files of the job that produced it, repeating for those input files
+ANCESTORS_CTE = """
+WITH RECURSIVE lineage(file_id, ancestor_id) AS (
+    SELECT f.id, jif.input_file_id FROM scale_file f
+    JOIN job_input_file jif ON jif.job_id = f.job_id
+    WHERE f.id = ANY(%s)
+  UNION
+    SELECT l.file_id, jif.input_file_id FROM lineage l
+    JOIN scale_file f ON f.id = l.ancestor_id
+    JOIN job_input_file jif ON jif.job_id = f.job_id
+)
+"""
+ANCESTORS_QUERY = ANCESTORS_CTE + 'SELECT file_id, ancestor_id FROM lineage'
+ANCESTOR_IDS_QUERY = ANCESTORS_CTE + 'SELECT ancestor_id FROM lineage'
+
+# Walks from each file to the jobs that took it as input and the output files of those jobs, repeating for the outputs
+DESCENDANTS_CTE = """
+WITH RECURSIVE lineage(job_id, file_id) AS (
+    SELECT jif.job_id, f.id FROM job_input_file jif
+    LEFT OUTER JOIN scale_file f ON f.job_id = jif.job_id
+    WHERE jif.input_file_id = ANY(%s)
+  UNION
+    SELECT jif.job_id, f.id FROM lineage l
+    JOIN job_input_file jif ON jif.input_file_id = l.file_id
+    LEFT OUTER JOIN scale_file f ON f.job_id = jif.job_id
+)
+"""
+DESCENDANT_IDS_QUERY = DESCENDANTS_CTE + 'SELECT file_id FROM lineage WHERE file_id IS NOT NULL'
+DESCENDANT_JOB_IDS_QUERY = DESCENDANTS_CTE + 'SELECT job_id FROM lineage'
+
+
+def get_ancestor_ids_query(file_ids):
+    """Returns a subquery for the IDs of all of the files that the given files descended from through one or more jobs.
+    The subquery is meant to be used in a filter such as id__in so that the lineage is walked within the database.
+
+    :param file_ids: The file IDs
+    :type file_ids: list
+    :returns: The subquery of ancestor file IDs
+    :rtype: :class:`django.db.models.expressions.RawSQL`
+    """
+
+    return RawSQL(ANCESTOR_IDS_QUERY, [list(file_ids)])
+
+
+def get_ancestor_map(file_ids):
+    """Returns the IDs of the ancestor files for each of the given files
+
+    :param file_ids: The file IDs
+    :type file_ids: list
+    :returns: Dict where each given file ID maps to the set of its ancestor file IDs
+    :rtype: dict
+    """
+
+    ancestor_map = {file_id: set() for file_id in file_ids}
+    if not file_ids:
+        return ancestor_map
+
+    with connection.cursor() as cursor:
+        cursor.execute(ANCESTORS_QUERY, [list(file_ids)])
+        for file_id, ancestor_id in cursor.fetchall():
+            ancestor_map[file_id].add(ancestor_id)
+    return ancestor_map
+
+
+def get_descendant_ids_query(file_ids):
+    """Returns a subquery for the IDs of all of the files that descended from the given files through one or more jobs.
+    The subquery is meant to be used in a filter such as id__in so that the lineage is walked within the database.
+
+    :param file_ids: The file IDs
+    :type file_ids: list
+    :returns: The subquery of descendant file IDs
+    :rtype: :class:`django.db.models.expressions.RawSQL`
+    """
+
+    return RawSQL(DESCENDANT_IDS_QUERY, [list(file_ids)])
+
+
+def get_descendant_job_ids_query(file_ids):
+    """Returns a subquery for the IDs of all of the jobs that took the given files, or any of their descendant files,
+    as input. The subquery is meant to be used in a filter such as id__in so that the lineage is walked within the
+    database.
+
+    :param file_ids: The file IDs
+    :type file_ids: list
+    :returns: The subquery of job IDs
+    :rtype: :class:`django.db.models.expressions.RawSQL`
+    """
+
+    return RawSQL(DESCENDANT_JOB_IDS_QUERY, [list(file_ids)])
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def restore_file_ancestry_links(apps, schema_editor):
+    # Rebuilds the file_ancestry_link rows from job inputs and outputs when this migration is reversed. Each job gets a
+    # link from every (direct or indirect) ancestor file to each of its products, or a link with no descendant when the
+    # job has no products. Execution, recipe and batch columns come from the product file, so they are empty for links
+    # without a descendant.
+    from django.db import connection
+
+    qry = """
+        WITH RECURSIVE lineage(job_id, ancestor_id) AS (
+            SELECT jif.job_id, jif.input_file_id FROM job_input_file jif
+            UNION
+            SELECT l.job_id, jif.input_file_id FROM lineage l
+            JOIN scale_file sf ON sf.id = l.ancestor_id
+            JOIN job_input_file jif ON jif.job_id = sf.job_id
+        )
+        INSERT INTO file_ancestry_link (ancestor_id, descendant_id, job_id, job_exe_id, recipe_id, batch_id,
+                                        ancestor_job_id, ancestor_job_exe_id, created)
+        SELECT l.ancestor_id, p.id, l.job_id, p.job_exe_id, p.recipe_id, p.batch_id, a.job_id, a.job_exe_id, now()
+        FROM lineage l
+        JOIN scale_file a ON a.id = l.ancestor_id
+        LEFT JOIN scale_file p ON p.job_id = l.job_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(qry)
+
+
+class Migration(migrations.Migration):
+
+    # File lineage is now derived from job inputs and outputs, which requires job_input_file to be fully populated
+    dependencies = [
+        ('job', '0036_populate_job_input_file'),
+        ('product', '0010_auto_20170727_1349'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_file_ancestry_links),
+        migrations.DeleteModel(
+            name='FileAncestryLink',
+        ),
+    ]
@@ -7,7 +7,9 @@ import os
 import django.contrib.gis.db.models as models
 import django.utils.timezone as timezone
 from django.db import transaction
+from django.db.models import Q
 
+import product.lineage as lineage
 import storage.geospatial_utils as geo_utils
 from recipe.models import Recipe
 from storage.brokers.broker import FileUpload
@@ -18,176 +20,6 @@ from util.parse import parse_datetime
 logger = logging.getLogger(__name__)
 
 
-class FileAncestryLinkManager(models.Manager):
-    """Provides additional methods for handling ancestry links for files used in jobs
-    """
-
-    @transaction.atomic
-    def create_file_ancestry_links(self, parent_ids, child_ids, job, job_exe_id):
-        """Creates the appropriate file ancestry links for the given parent and child files. All database changes are
-        made in an atomic transaction.
-
-        :param parent_ids: Set of parent file IDs
-        :type parent_ids: set of int
-        :param child_ids: Set of child file IDs. Passing None can be used to link input files to jobs and recipes
-            without any derived products.
-        :type child_ids: set of int
-        :param job: The job that is creating the file links
-        :type job: :class:`job.models.Job`
-        :param job_exe_id: The job execution that is creating the file links
-        :type job_exe_id: int
-        """
-
-        new_links = []
-        created = timezone.now()
-
-        # Delete any previous file ancestry links for the given job
-        # This overrides any file input links that were created when the job first received its input data
-        FileAncestryLink.objects.filter(job_id=job.id).delete()
-
-        # Not all jobs have a recipe so attempt to get one if applicable
-        job_recipe = Recipe.objects.get_recipe_for_job(job.id)
-
-        # See if this job is in a batch
-        from batch.models import BatchJob
-        try:
-            batch_id = BatchJob.objects.get(job_id=job.id).batch_id
-        except BatchJob.DoesNotExist:
-            batch_id = None
-
-        # Grab ancestors for the parents
-        ancestor_map = dict()
-        ancestor_links = FileAncestryLink.objects.filter(descendant_id__in=parent_ids)
-        for ancestor_link in ancestor_links:
-            if ancestor_link.ancestor_id not in parent_ids:
-                ancestor_map[ancestor_link.ancestor_id] = ancestor_link
-
-        # Make sure all input file links are still created when no products are generated
-        if not child_ids:
-            child_ids = {None}
-
-        # Create direct links by leaving the ancestor job fields as null
-        for parent_id in parent_ids:
-            for child_id in child_ids:
-
-                # Set references to the current file
-                link = FileAncestryLink(created=created)
-                link.ancestor_id = parent_id
-                link.descendant_id = child_id
-
-                # Set references to the current execution
-                link.job_exe_id = job_exe_id
-                link.job = job
-                link.batch_id = batch_id
-                new_links.append(link)
-
-                if job_recipe:
-                    link.recipe = job_recipe.recipe
-                else:
-                    link.recipe = None
-
-        # Create indirect links by setting the ancestor job fields
-        for ancestor_link in ancestor_map.itervalues():
-            for child_id in child_ids:
-
-                # Set references to the current file
-                link = FileAncestryLink(created=created)
-                link.ancestor_id = ancestor_link.ancestor_id
-                link.descendant_id = child_id
-
-                # Set references to the current execution
-                link.job_exe_id = job_exe_id
-                link.job = job
-                link.batch_id = batch_id
-
-                if job_recipe:
-                    link.recipe = job_recipe.recipe
-                else: 
-                    link.recipe = None
-
-                # Set references to the ancestor execution
-                link.ancestor_job = ancestor_link.job
-                link.ancestor_job_exe = ancestor_link.job_exe
-                new_links.append(link)
-
-        FileAncestryLink.objects.bulk_create(new_links)
-
-    def get_source_ancestors(self, file_ids):
-        """Returns a list of the source file ancestors for the given file IDs. This will include any of the given files
-        that are source files themselves.
-
-        :param file_ids: The file IDs
-        :type file_ids: list[int]
-        :returns: The list of ancestor source files
-        :rtype: list[:class:`storage.models.ScaleFile`]
-        """
-
-        potential_src_file_ids = list(file_ids)
-        # Get all ancestors to include as possible source files
-        for ancestor_link in self.filter(descendant_id__in=file_ids):
-            potential_src_file_ids.append(ancestor_link.ancestor_id)
-        return ScaleFile.objects.filter(id__in=potential_src_file_ids, file_type='SOURCE')
-
-
-class FileAncestryLink(models.Model):
-    """Represents an ancestry link between two files where the ancestor resulted in the descendant through a series of
-    one or more job executions. A direct ancestry link (parent to child) is formed when the parent is passed as input to
-    a job execution and the child is created as an output of that job execution.
-
-    :keyword ancestor: An ancestor file from which the other file is descended
-    :type ancestor: :class:`django.db.models.ForeignKey`
-    :keyword descendant: A product file that descended from the ancestor file
-    :type descendant: :class:`django.db.models.ForeignKey`
-
-    :keyword job_exe: The job execution that caused this link to be formed
-    :type job_exe: :class:`django.db.models.ForeignKey`
-    :keyword job: The job that caused this link to be formed
-    :type job: :class:`django.db.models.ForeignKey`
-    :keyword recipe: The recipe that caused this link to be formed. Note that not all jobs are created from a recipe and
-        so this field could be None.
-    :type recipe: :class:`django.db.models.ForeignKey`
-    :keyword batch: The batch associated with this link's job/recipe, possibly None
-    :type batch: :class:`django.db.models.ForeignKey`
-
-    :keyword ancestor_job: The higher level job that took the ancestor as input and indirectly caused this link to be
-        formed. Note that this field will be null for directly created files, where the ancestor is a parent that was
-        fed as input to a job and the descendant is a child produced as output by that same job.
-    :type ancestor_job: :class:`django.db.models.ForeignKey`
-    :keyword ancestor_job_exe: The higher level job execution that took the ancestor as input and indirectly caused this
-        link to be formed. Note that this field will be null for directly created files, where the ancestor is a parent
-        that was fed as input to a job execution and the descendant is a child produced as output by that same job
-        execution.
-    :type ancestor_job_exe: :class:`django.db.models.ForeignKey`
-
-    :keyword created: When the file link was created
-    :type created: :class:`django.db.models.DateTimeField`
-    """
-
-    ancestor = models.ForeignKey('storage.ScaleFile', on_delete=models.PROTECT, related_name='descendants')
-    descendant = models.ForeignKey('storage.ScaleFile', blank=True, null=True, on_delete=models.PROTECT,
-                                   related_name='ancestors')
-
-    job_exe = models.ForeignKey('job.JobExecution', blank=True, null=True, on_delete=models.PROTECT,
-                                related_name='job_exe_file_links')
-    job = models.ForeignKey('job.Job', on_delete=models.PROTECT, related_name='job_file_links')
-    recipe = models.ForeignKey('recipe.Recipe', blank=True, on_delete=models.PROTECT, null=True,
-                               related_name='recipe_file_links')
-    batch = models.ForeignKey('batch.Batch', blank=True, on_delete=models.PROTECT, null=True)
-
-    ancestor_job = models.ForeignKey('job.Job', blank=True, on_delete=models.PROTECT,
-                                     related_name='ancestor_job_file_links', null=True)
-    ancestor_job_exe = models.ForeignKey('job.JobExecution', blank=True, on_delete=models.PROTECT,
-                                         related_name='ancestor_job_exe_file_links', null=True)
-
-    created = models.DateTimeField(auto_now_add=True)
-
-    objects = FileAncestryLinkManager()
-
-    class Meta(object):
-        """meta information for the db"""
-        db_table = 'file_ancestry_link'
-
-
 class ProductFileManager(models.GeoManager):
     """Provides additional methods for handling product files
     """
@@ -374,10 +206,23 @@ class ProductFileManager(models.GeoManager):
         from source.models import SourceFile
         sources = SourceFile.objects.filter_sources(started=started, ended=ended, time_field=time_field,
                                                     is_parsed=is_parsed, file_name=file_name, order=order)
-        sources = sources.filter(descendants__descendant_id=product_file_id)
+        sources = sources.filter(id__in=lineage.get_ancestor_ids_query([product_file_id]))
 
         return sources
 
+    def get_source_ancestors(self, file_ids):
+        """Returns a list of the source file ancestors for the given file IDs. This will include any of the given files
+        that are source files themselves.
+
+        :param file_ids: The file IDs
+        :type file_ids: list[int]
+        :returns: The list of ancestor source files
+        :rtype: list[:class:`storage.models.ScaleFile`]
+        """
+
+        potential_src_files = Q(id__in=file_ids) | Q(id__in=lineage.get_ancestor_ids_query(file_ids))
+        return ScaleFile.objects.filter(potential_src_files, file_type='SOURCE')
+
     def get_details(self, product_id):
         """Gets additional details for the given product model
 
@@ -410,7 +255,7 @@ class ProductFileManager(models.GeoManager):
         # Attempt to fetch all ancestor files
         sources = []
         products = []
-        ancestors = ScaleFile.objects.filter(descendants__descendant_id=product.id)
+        ancestors = ScaleFile.objects.filter(id__in=lineage.get_ancestor_ids_query([product.id]))
         ancestors = ancestors.select_related('job_type', 'workspace').defer('workspace__json_config')
         ancestors = ancestors.prefetch_related('countries').order_by('created')
         for ancestor in ancestors:
@@ -422,7 +267,7 @@ class ProductFileManager(models.GeoManager):
         product.ancestor_products = products
 
         # Attempt to fetch all descendant products
-        descendants = ScaleFile.objects.filter(ancestors__ancestor_id=product.id)
+        descendants = ScaleFile.objects.filter(id__in=lineage.get_descendant_ids_query([product.id]))
         descendants = descendants.select_related('job_type', 'workspace').defer('workspace__json_config')
         descendants = descendants.prefetch_related('countries').order_by('created')
         product.descendant_products = descendants
@@ -436,22 +281,22 @@ class ProductFileManager(models.GeoManager):
         :type products: list of :class:`storage.models.ScaleFile`
         """
 
-        product_lists = {}  # {product ID: list of source files}
-        for product in products:
-            product.source_files = []
-            product_lists[product.id] = product.source_files
+        ancestor_map = lineage.get_ancestor_map([product.id for product in products])
+        all_ancestor_ids = set()
+        for ancestor_ids in ancestor_map.values():
+            all_ancestor_ids.update(ancestor_ids)
 
         source_files = {}  # {source file ID: source file}
-        src_qry = ScaleFile.objects.filter(descendants__descendant_id__in=product_lists.keys())
-        src_qry = src_qry.select_related('workspace').defer('workspace__json_config').order_by('id').distinct('id')
+        src_qry = ScaleFile.objects.filter(id__in=all_ancestor_ids, file_type='SOURCE')
+        src_qry = src_qry.select_related('workspace').defer('workspace__json_config').order_by('id')
         for source in src_qry:
-            if source.file_type == 'SOURCE':
-                source_files[source.id] = source
+            source_files[source.id] = source
 
-        link_qry = FileAncestryLink.objects.filter(ancestor_id__in=source_files.keys())
-        link_qry = link_qry.filter(descendant_id__in=product_lists.keys())
-        for link in link_qry:
-            product_lists[link.descendant_id].append(source_files[link.ancestor_id])
+        for product in products:
+            product.source_files = []
+            for ancestor_id in sorted(ancestor_map[product.id]):
+                if ancestor_id in source_files:
+                    product.source_files.append(source_files[ancestor_id])
 
     @transaction.atomic
     def publish_products(self, job_exe_id, job, when):
@@ -536,7 +381,7 @@ class ProductFileManager(models.GeoManager):
         input_products_operational = all([f.is_operational for f in input_products])
 
         # Compute the overall start and stop times for all file_entries
-        source_files = FileAncestryLink.objects.get_source_ancestors([f['id'] for f in input_files])
+        source_files = self.get_source_ancestors([f['id'] for f in input_files])
         start_times = [f.data_started for f in source_files]
         end_times = [f.data_ended for f in source_files]
         start_times.sort()
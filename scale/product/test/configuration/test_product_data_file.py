@@ -53,9 +53,8 @@ class TestProductDataFileStoreStoreFiles(TransactionTestCase):
         self.remote_base_path = os.path.join('jobs', get_valid_filename(self.job.job_type.name),
                                              get_valid_filename(self.job.job_type.version))
 
-    @patch('product.models.FileAncestryLink.objects.create_file_ancestry_links')
     @patch('product.models.ProductFile.objects.upload_files')
-    def test_successful(self, mock_upload_files, mock_create_file_ancestry_links):
+    def test_successful(self, mock_upload_files):
         """Tests calling ProductDataFileType.store_files() successfully"""
 
         local_path_1 = os.path.join('my', 'path', 'one', 'my_test.txt')
@@ -105,12 +104,9 @@ class TestProductDataFileStoreStoreFiles(TransactionTestCase):
 
         self.assertDictEqual(results, {local_path_1: long(1), local_path_2: long(2), local_path_3: long(3),
                                        local_path_4: long(4)})
-        mock_create_file_ancestry_links.assert_called_once_with(parent_ids, {1, 2, 3, 4}, self.job_exe.job,
-                                                                self.job_exe.id)
 
-    @patch('product.models.FileAncestryLink.objects.create_file_ancestry_links')
     @patch('product.models.ProductFile.objects.upload_files')
-    def test_successful_recipe_path(self, mock_upload_files, mock_create_file_ancestry_links):
+    def test_successful_recipe_path(self, mock_upload_files):
         """Tests calling ProductDataFileType.store_files() successfully with a job that is in a recipe"""
 
         job_exe_in_recipe = job_utils.create_job_exe(status='RUNNING')
@@ -166,9 +162,8 @@ class TestProductDataFileStoreStoreFiles(TransactionTestCase):
 
         ProductDataFileStore().store_files(data_files, parent_ids, job_exe_in_recipe)
 
-    @patch('product.models.FileAncestryLink.objects.create_file_ancestry_links')
     @patch('product.models.ProductFile.objects.upload_files')
-    def test_geo_metadata(self, mock_upload_files, mock_create_file_ancestry_links):
+    def test_geo_metadata(self, mock_upload_files):
         """Tests calling ProductDataFileType.store_files() successfully"""
 
         geo_metadata = {
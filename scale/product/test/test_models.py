@@ -12,6 +12,7 @@ from django.utils.timezone import now, utc
 from mock import MagicMock, patch
 
 import job.test.utils as job_test_utils
+import product.lineage as lineage
 import product.test.utils as prod_test_utils
 import recipe.test.utils as recipe_test_utils
 import source.test.utils as source_test_utils
@@ -20,14 +21,13 @@ import trigger.test.utils as trigger_test_utils
 from batch.models import BatchRecipe, BatchJob
 from batch.test import utils as batch_test_utils
 from job.execution.container import SCALE_JOB_EXE_OUTPUT_PATH
-from job.models import Job, JobManager
-from product.models import FileAncestryLink, ProductFile
+from job.models import Job, JobInputFile, JobManager
+from product.models import ProductFile
 from recipe.models import RecipeManager
 from storage.models import ScaleFile
 
 
-class TestFileAncestryLinkManagerCreateFileAncestryLinks(TestCase):
-    fixtures = ['batch_job_types.json']
+class TestFileLineage(TestCase):
 
     def setUp(self):
         django.setup()
@@ -37,138 +37,69 @@ class TestFileAncestryLinkManagerCreateFileAncestryLinks(TestCase):
         self.file_2 = storage_test_utils.create_file()
 
         # Generation 2
-        job_exe_1 = job_test_utils.create_job_exe()
-        recipe_job_1 = recipe_test_utils.create_recipe_job(job=job_exe_1.job)
-        self.file_3 = prod_test_utils.create_product(job_exe=job_exe_1)
-        self.file_4 = prod_test_utils.create_product(job_exe=job_exe_1)
-        self.file_5 = prod_test_utils.create_product(job_exe=job_exe_1)
+        self.job_exe_1 = job_test_utils.create_job_exe()
+        self.file_3 = prod_test_utils.create_product(job_exe=self.job_exe_1)
+        self.file_4 = prod_test_utils.create_product(job_exe=self.job_exe_1)
+        self.file_5 = prod_test_utils.create_product(job_exe=self.job_exe_1)
 
         # Generation 3
-        job_exe_2 = job_test_utils.create_job_exe()
-        recipe_job_2 = recipe_test_utils.create_recipe_job(job=job_exe_2.job)
-        self.file_6 = prod_test_utils.create_product(job_exe=job_exe_2)
+        self.job_exe_2 = job_test_utils.create_job_exe()
+        self.file_6 = prod_test_utils.create_product(job_exe=self.job_exe_2)
 
         # Stand alone file
         self.file_7 = prod_test_utils.create_product()
 
-        # First job links generation 1 to 2
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_3, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_3, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        # Second job links generation 2 to 3
-        FileAncestryLink.objects.create(ancestor=self.file_3, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe,
-                                        ancestor_job_exe=job_exe_1, ancestor_job=job_exe_1.job)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe,
-                                        ancestor_job_exe=job_exe_1, ancestor_job=job_exe_1.job)
-
-    def test_batch_recipe(self):
-        """Tests creating a link that has a recipe and batch."""
-
-        parent_ids = [self.file_1.id]
-        job_exe = job_test_utils.create_job_exe()
-        recipe_job = recipe_test_utils.create_recipe_job(job=job_exe.job)
-        batch = batch_test_utils.create_batch()
-        BatchRecipe.objects.create(batch_id=batch.id, recipe_id=recipe_job.recipe.id)
-        BatchJob.objects.create(batch_id=batch.id, job_id=job_exe.job_id)
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, None, job_exe.job, job_exe.id)
+        # First job takes generation 1 as input, second job takes one file from generation 2
+        JobInputFile.objects.create(job=self.job_exe_1.job, input_file=self.file_1, job_input='input_1')
+        JobInputFile.objects.create(job=self.job_exe_1.job, input_file=self.file_2, job_input='input_2')
+        JobInputFile.objects.create(job=self.job_exe_2.job, input_file=self.file_3, job_input='input_1')
 
-        link = FileAncestryLink.objects.get(job_exe=job_exe)
-        self.assertEqual(link.recipe_id, recipe_job.recipe_id)
-        self.assertEqual(link.batch_id, batch.id)
+    def _get_file_ids(self, query):
+        return set(ScaleFile.objects.filter(id__in=query).values_list('id', flat=True))
 
-    def test_inputs(self):
-        """Tests creating links for only input files before any products are generated."""
+    def test_get_ancestor_ids_query(self):
+        """Tests calling get_ancestor_ids_query() successfully."""
 
-        parent_ids = [self.file_4.id, self.file_6.id, self.file_7.id]
-        job_exe = job_test_utils.create_job_exe()
-        recipe_test_utils.create_recipe_job(job=job_exe.job)
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, None, job_exe.job, job_exe.id)
+        self.assertSetEqual(self._get_file_ids(lineage.get_ancestor_ids_query([self.file_6.id])),
+                            {self.file_1.id, self.file_2.id, self.file_3.id})
+        self.assertSetEqual(self._get_file_ids(lineage.get_ancestor_ids_query([self.file_4.id])),
+                            {self.file_1.id, self.file_2.id})
+        self.assertSetEqual(self._get_file_ids(lineage.get_ancestor_ids_query([self.file_1.id, self.file_7.id])),
+                            set())
+        self.assertSetEqual(self._get_file_ids(lineage.get_ancestor_ids_query([])), set())
 
-        direct_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                     ancestor_job__isnull=True)
-        self.assertEqual(direct_qry.count(), 3)
-        file_8_parent_ids = {link.ancestor_id for link in direct_qry}
-        self.assertSetEqual(file_8_parent_ids, {self.file_4.id, self.file_6.id, self.file_7.id})
+    def test_get_ancestor_map(self):
+        """Tests calling get_ancestor_map() successfully."""
 
-        indirect_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                       ancestor_job__isnull=False)
-        self.assertEqual(indirect_qry.count(), 3)
-        file_8_ancestor_ids = {link.ancestor_id for link in indirect_qry}
-        self.assertSetEqual(file_8_ancestor_ids, {self.file_1.id, self.file_2.id, self.file_3.id})
+        ancestor_map = lineage.get_ancestor_map([self.file_5.id, self.file_6.id, self.file_7.id])
 
-    def test_products(self):
-        """Tests creating links for inputs with generated products at the same time."""
+        self.assertDictEqual(ancestor_map, {self.file_5.id: {self.file_1.id, self.file_2.id},
+                                            self.file_6.id: {self.file_1.id, self.file_2.id, self.file_3.id},
+                                            self.file_7.id: set()})
 
-        file_8 = storage_test_utils.create_file()
+    def test_get_descendant_ids_query(self):
+        """Tests calling get_descendant_ids_query() successfully."""
 
-        parent_ids = [self.file_4.id, self.file_6.id, self.file_7.id]
-        child_ids = [file_8.id]
-        job_exe = job_test_utils.create_job_exe()
-        recipe_test_utils.create_recipe_job(job=job_exe.job)
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, child_ids, job_exe.job, job_exe.id)
+        self.assertSetEqual(self._get_file_ids(lineage.get_descendant_ids_query([self.file_1.id])),
+                            {self.file_3.id, self.file_4.id, self.file_5.id, self.file_6.id})
+        self.assertSetEqual(self._get_file_ids(lineage.get_descendant_ids_query([self.file_3.id])), {self.file_6.id})
+        self.assertSetEqual(self._get_file_ids(lineage.get_descendant_ids_query([self.file_4.id, self.file_6.id])),
+                            set())
 
-        direct_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=True)
-        self.assertEqual(direct_qry.count(), 3)
-        file_8_parent_ids = {link.ancestor_id for link in direct_qry}
-        self.assertSetEqual(file_8_parent_ids, {self.file_4.id, self.file_6.id, self.file_7.id})
+    def test_get_descendant_job_ids_query(self):
+        """Tests calling get_descendant_job_ids_query() successfully, including a job that has not produced any
+        outputs."""
 
-        indirect_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=False)
-        self.assertEqual(indirect_qry.count(), 3)
-        file_8_ancestor_ids = {link.ancestor_id for link in indirect_qry}
-        self.assertSetEqual(file_8_ancestor_ids, {self.file_1.id, self.file_2.id, self.file_3.id})
-
-    def test_inputs_and_products(self):
-        """Tests creating links for inputs and then later replacing with generated products."""
-
-        file_8 = storage_test_utils.create_file()
-
-        parent_ids = [self.file_4.id, self.file_6.id, self.file_7.id]
-        child_ids = [file_8.id]
-        job_exe = job_test_utils.create_job_exe()
-        recipe_test_utils.create_recipe_job(job=job_exe.job)
-
-        # First create only the input files
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, None, job_exe.job, job_exe.id)
-
-        # Replace the inputs with the new links for both inputs and products
-        FileAncestryLink.objects.create_file_ancestry_links(parent_ids, child_ids, job_exe.job, job_exe.id)
-
-        # Make sure the old entries were deleted
-        old_direct_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                         ancestor_job__isnull=True)
-        self.assertEqual(len(old_direct_qry), 0)
-
-        old_indirect_qry = FileAncestryLink.objects.filter(descendant__isnull=True, job_exe=job_exe,
-                                                           ancestor_job__isnull=False)
-        self.assertEqual(len(old_indirect_qry), 0)
+        job = job_test_utils.create_job()
+        JobInputFile.objects.create(job=job, input_file=self.file_6, job_input='input_1')
 
-        direct_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=True)
-        self.assertEqual(direct_qry.count(), 3)
-        file_8_parent_ids = {link.ancestor_id for link in direct_qry}
-        self.assertSetEqual(file_8_parent_ids, {self.file_4.id, self.file_6.id, self.file_7.id})
+        job_ids = Job.objects.filter(id__in=lineage.get_descendant_job_ids_query([self.file_2.id]))
+        job_ids = set(job_ids.values_list('id', flat=True))
 
-        indirect_qry = FileAncestryLink.objects.filter(descendant=file_8, job_exe=job_exe, ancestor_job__isnull=False)
-        self.assertEqual(indirect_qry.count(), 3)
-        file_8_ancestor_ids = {link.ancestor_id for link in indirect_qry}
-        self.assertSetEqual(file_8_ancestor_ids, {self.file_1.id, self.file_2.id, self.file_3.id})
+        self.assertSetEqual(job_ids, {self.job_exe_1.job_id, self.job_exe_2.job_id, job.id})
 
 
-class TestFileAncestryLinkManagerGetSourceAncestors(TestCase):
+class TestProductFileManagerGetSourceAncestors(TestCase):
     def setUp(self):
         django.setup()
 
@@ -179,43 +110,25 @@ class TestFileAncestryLinkManagerGetSourceAncestors(TestCase):
 
         # Generation 2
         job_exe_1 = job_test_utils.create_job_exe()
-        recipe_job_1 = recipe_test_utils.create_recipe_job(job=job_exe_1.job)
         self.file_3 = prod_test_utils.create_product(job_exe=job_exe_1)
         self.file_4 = prod_test_utils.create_product(job_exe=job_exe_1)
-        self.file_5 = prod_test_utils.create_product(job_exe=job_exe_1)
 
         # Generation 3
         job_exe_2 = job_test_utils.create_job_exe()
-        recipe_job_2 = recipe_test_utils.create_recipe_job(job=job_exe_2.job)
         self.file_6 = prod_test_utils.create_product(job_exe=job_exe_2)
 
-        # Stand alone file
-        self.file_7 = prod_test_utils.create_product()
+        # Separate job that uses the second source file
+        job_exe_3 = job_test_utils.create_job_exe()
+        self.file_7 = prod_test_utils.create_product(job_exe=job_exe_3)
 
-        # First job links generation 1 to 2
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_3, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_4, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_2, descendant=self.file_5, job_exe=job_exe_1,
-                                        job=job_exe_1.job, recipe=recipe_job_1.recipe)
-
-        # Second job links generation 2 to 3
-        FileAncestryLink.objects.create(ancestor=self.file_3, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe)
-        FileAncestryLink.objects.create(ancestor=self.file_1, descendant=self.file_6, job_exe=job_exe_2,
-                                        job=job_exe_2.job, recipe=recipe_job_2.recipe,
-                                        ancestor_job_exe=job_exe_1, ancestor_job=job_exe_1.job)
+        prod_test_utils.create_file_link(ancestor=self.file_1, descendant=self.file_3)
+        prod_test_utils.create_file_link(ancestor=self.file_3, descendant=self.file_6)
+        prod_test_utils.create_file_link(ancestor=self.file_2, descendant=self.file_7)
 
     def test_successful(self):
-        """Tests calling FileAncestryLinkManager.get_source_ancestors() successfully."""
+        """Tests calling ProductFileManager.get_source_ancestors() successfully."""
 
-        source_files = FileAncestryLink.objects.get_source_ancestors([self.file_6.id, self.file_8.id])
+        source_files = ProductFile.objects.get_source_ancestors([self.file_6.id, self.file_8.id])
 
         result_ids = []
         for source_file in source_files:
@@ -442,22 +355,14 @@ class TestProductFileManagerPopulateSourceAncestors(TestCase):
         self.recipe_job_1 = recipe_test_utils.create_recipe_job(job=self.job_exe_1.job)
         self.product_1 = prod_test_utils.create_product(self.job_exe_1, has_been_published=True)
         self.product_2 = prod_test_utils.create_product(self.job_exe_1, has_been_published=True)
-        FileAncestryLink.objects.create(ancestor=self.src_file_1, descendant=self.product_1, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_1, descendant=self.product_2, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_2, descendant=self.product_1, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_2, descendant=self.product_2, job_exe=self.job_exe_1,
-                                        job=self.job_exe_1.job, recipe=self.recipe_job_1.recipe)
+        prod_test_utils.create_file_link(ancestor=self.src_file_1, descendant=self.product_1)
+        prod_test_utils.create_file_link(ancestor=self.src_file_2, descendant=self.product_1)
 
         self.job_exe_2 = job_test_utils.create_job_exe()
         self.recipe_job_2 = recipe_test_utils.create_recipe_job(job=self.job_exe_2.job)
         self.product_3 = prod_test_utils.create_product(self.job_exe_2, has_been_published=True)
-        FileAncestryLink.objects.create(ancestor=self.src_file_3, descendant=self.product_3, job_exe=self.job_exe_2,
-                                        job=self.job_exe_2.job, recipe=self.recipe_job_2.recipe)
-        FileAncestryLink.objects.create(ancestor=self.src_file_4, descendant=self.product_3, job_exe=self.job_exe_2,
-                                        job=self.job_exe_2.job, recipe=self.recipe_job_2.recipe)
+        prod_test_utils.create_file_link(ancestor=self.src_file_3, descendant=self.product_3)
+        prod_test_utils.create_file_link(ancestor=self.src_file_4, descendant=self.product_3)
 
     def test_successful(self):
         """Tests calling ProductFileManager.populate_source_ancestors() successfully"""
@@ -5,32 +5,38 @@ import hashlib
 
 import django.utils.timezone as timezone
 
+from job.models import JobInputFile
 from job.test import utils as job_utils
-from product.models import FileAncestryLink
 from storage.models import ScaleFile
 from storage.test import utils as storage_utils
 
 
 def create_file_link(ancestor=None, descendant=None, job=None, job_exe=None, recipe=None, batch=None):
-    """Creates a file ancestry link model for unit testing
+    """Creates a file lineage link for unit testing by recording the ancestor file as an input of the job that produced
+    the descendant file (or of the given job when there is no descendant)
 
-    :returns: The file ancestry link model
-    :rtype: :class:`product.models.FileAncestryLink`
+    :returns: The job input file model
+    :rtype: :class:`job.models.JobInputFile`
     """
 
     if not job:
         if descendant and descendant.job:
             job = descendant.job
+        elif job_exe:
+            job = job_exe.job
         else:
             job = job_utils.create_job()
-    if not job_exe:
-        if descendant and descendant.job_exe:
-            job_exe = descendant.job_exe
-        else:
-            job_exe = job_utils.create_job_exe(job_type=job.job_type, job=job)
 
-    return FileAncestryLink.objects.create(ancestor=ancestor, descendant=descendant, job=job, job_exe=job_exe,
-                                           recipe=recipe, batch=batch)
+    if descendant and recipe:
+        descendant.recipe = recipe
+        descendant.save()
+    if descendant and batch:
+        descendant.batch = batch
+        descendant.save()
+
+    job_input_file, _created = JobInputFile.objects.get_or_create(job=job, input_file=ancestor,
+                                                                  defaults={'job_input': 'input'})
+    return job_input_file
 
 
 def create_product(job_exe=None, workspace=None, has_been_published=False, is_published=False, uuid=None,
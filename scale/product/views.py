@@ -21,6 +21,7 @@ class ProductsView(ListAPIView):
     """This view is the endpoint for retrieving a product by filename"""
     queryset = ScaleFile.objects.all()
     serializer_class = ProductFileSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request):
         """Retrieves the product for a given file name and returns it in JSON form
@@ -172,6 +173,7 @@ class ProductUpdatesView(ListAPIView):
     """This view is the endpoint for retrieving product updates over a given time range."""
     queryset = ScaleFile.objects.all()
     serializer_class = ProductFileUpdateSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request):
         """Retrieves the product updates for a given time range and returns it in JSON form
@@ -9,6 +9,7 @@ class JobLoadProcessor(ClockEventProcessor):
     def process_event(self, event, last_event=None):
         """See :meth:`job.clock.ClockEventProcessor.process_event`.
 
-        Calculates metrics for the job load over time.
+        Calculates metrics for the job load over time and compacts the older metrics into hourly rollups.
         """
         JobLoad.objects.calculate()
+        JobLoad.objects.compact()
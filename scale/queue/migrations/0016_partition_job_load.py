@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def partition_job_load(apps, schema_editor):
+    # Converts job_load into a table partitioned by month (requires PostgreSQL 11 or later, otherwise the table is left
+    # unpartitioned)
+    from util.partition import JOB_LOAD_TABLE
+
+    JOB_LOAD_TABLE.convert()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queue', '0015_auto_20170731_1527'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_job_load, migrations.RunPython.noop),
+    ]
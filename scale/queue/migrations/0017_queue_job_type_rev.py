@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0037_keyset_indexes'),
+        ('queue', '0016_partition_job_load'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queue',
+            name='job_type_rev',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='job.JobTypeRevision'),
+        ),
+        migrations.RunSQL(
+            'UPDATE queue SET job_type_rev_id = job.job_type_rev_id FROM job WHERE queue.job_id = job.id',
+            'UPDATE queue SET interface = job_type_revision.interface FROM job_type_revision '
+            'WHERE queue.job_type_rev_id = job_type_revision.id',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queue', '0017_queue_job_type_rev'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='queue',
+            name='job_type_rev',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='job.JobTypeRevision'),
+        ),
+        migrations.RemoveField(
+            model_name='queue',
+            name='interface',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0038_active_job_index'),
+        ('queue', '0018_remove_queue_interface'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLoadRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('measured', models.DateTimeField(db_index=True)),
+                ('pending_count', models.IntegerField()),
+                ('queued_count', models.IntegerField()),
+                ('running_count', models.IntegerField()),
+                ('total_count', models.IntegerField()),
+                ('job_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT,
+                                               to='job.JobType')),
+            ],
+            options={
+                'db_table': 'job_load_rollup',
+            },
+        ),
+    ]
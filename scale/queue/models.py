@@ -2,11 +2,14 @@
 from __future__ import unicode_literals
 
 import abc
+import datetime
 import logging
 
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
+from django.conf import settings
 from django.db import models, transaction
+from django.db.models.functions import TruncHour
 
 from error.models import Error
 from job.configuration.configurators import QueuedExecutionConfigurator
@@ -14,7 +17,7 @@ from job.configuration.data.exceptions import InvalidData
 from job.configuration.data.job_data import JobData
 from job.configuration.interface.job_interface import JobInterface
 from job.configuration.json.execution.exe_config import ExecutionConfiguration
-from job.models import Job, JobType
+from job.models import Job, JobType, JobTypeRevision
 from job.models import JobExecution
 from node.resources.json.resources import Resources
 from product.models import ProductFile
@@ -28,6 +31,17 @@ QUEUE_ORDER_FIFO = 'FIFO'
 QUEUE_ORDER_LIFO = 'LIFO'
 DEFAULT_QUEUE_ORDER = QUEUE_ORDER_FIFO
 
+# Job load history is kept as raw samples for recent time ranges and as hourly rollups of the samples for longer ones
+JOB_LOAD_ROLLUP_PERIOD = datetime.timedelta(hours=1)
+RAW_JOB_LOAD_WINDOW = datetime.timedelta(days=1)
+
+# The maximum amount of raw job load history that is compacted into rollups at once, so that catching up on a backlog
+# of samples is spread over several clock events
+MAX_JOB_LOAD_COMPACTION = datetime.timedelta(days=7)
+
+# Interfaces of the job type revisions referenced by queued job executions, revisions never change once created
+_REVISION_INTERFACES = {}  # {Job type revision ID: JobInterface}
+
 
 class JobLoadGroup(object):
     """Represents a group of job load models.
@@ -55,7 +69,7 @@ class JobLoadManager(models.Manager):
     def calculate(self):
         """Calculates and saves new job load models grouped by job type based on a current jobs snapshot."""
 
-        # Get a list of job counts grouped by type and status
+        # Get a list of job counts grouped by type and status, which only reads the partial index of active jobs
         jobs = Job.objects.filter(status__in=['PENDING', 'QUEUED', 'RUNNING'])
         jobs = jobs.values('job_type_id', 'status')
         jobs = jobs.annotate(count=models.Count('job_type'))
@@ -93,6 +107,146 @@ class JobLoadManager(models.Manager):
             # Save an empty record as a place holder
             JobLoad(measured=measured, pending_count=0, queued_count=0, running_count=0, total_count=0).save()
 
+    @transaction.atomic
+    def compact(self, when=None):
+        """Compacts the raw job load samples of each complete hour into hourly rollups that hold the average counts of
+        each job type, and then removes the raw samples and rollups that are past their retention periods
+
+        :param when: The current time, defaults to now
+        :type when: :class:`datetime.datetime`
+        :returns: The number of rollups that were created
+        :rtype: int
+        """
+
+        if not when:
+            when = timezone.now()
+        current_hour = _get_hour_start(when)
+
+        # Continue from the end of the latest rollup, skipping any gap with no samples
+        rolled_up_through = JobLoadRollup.objects.get_rolled_up_through()
+        samples = JobLoad.objects.all()
+        if rolled_up_through:
+            samples = samples.filter(measured__gte=rolled_up_through)
+        first_measured = samples.aggregate(first=models.Min('measured'))['first']
+
+        rollups = []
+        if first_measured and first_measured < current_hour:
+            started = _get_hour_start(first_measured)
+            ended = min(current_hour, started + MAX_JOB_LOAD_COMPACTION)
+            samples = JobLoad.objects.filter(measured__gte=started, measured__lt=ended)
+            samples = samples.annotate(hour=TruncHour('measured', tzinfo=timezone.utc))
+
+            # Job types without any jobs are not sampled, so their counts are averaged over every sample of the hour
+            num_samples = samples.values('hour').annotate(count=models.Count('measured', distinct=True))
+            num_samples = {row['hour']: row['count'] for row in num_samples}
+            sums = samples.values('hour', 'job_type_id').annotate(pending=models.Sum('pending_count'),
+                                                                 queued=models.Sum('queued_count'),
+                                                                 running=models.Sum('running_count'))
+            for row in sums:
+                count = num_samples[row['hour']]
+                pending_count = int(round(row['pending'] / float(count)))
+                queued_count = int(round(row['queued'] / float(count)))
+                running_count = int(round(row['running'] / float(count)))
+                rollups.append(JobLoadRollup(job_type_id=row['job_type_id'], measured=row['hour'],
+                                             pending_count=pending_count, queued_count=queued_count,
+                                             running_count=running_count,
+                                             total_count=pending_count + queued_count + running_count))
+            JobLoadRollup.objects.bulk_create(rollups)
+            rolled_up_through = ended
+
+        # Only raw samples that have been rolled up are removed
+        retention_days = settings.JOB_LOAD_RETENTION_DAYS
+        if retention_days is not None and rolled_up_through:
+            before = min(when - datetime.timedelta(days=retention_days), rolled_up_through)
+            JobLoad.objects.filter(measured__lt=before).delete()
+        retention_days = settings.JOB_LOAD_ROLLUP_RETENTION_DAYS
+        if retention_days is not None:
+            JobLoadRollup.objects.filter(measured__lt=when - datetime.timedelta(days=retention_days)).delete()
+
+        return len(rollups)
+
+    def downsample(self, groups, max_points):
+        """Downsamples the given job load groups to at most the given number of points by splitting the time range into
+        equal buckets and averaging the counts of the groups within each bucket
+
+        :param groups: The job load groups ordered by time
+        :type groups: list[:class:`queue.models.JobLoadGroup`]
+        :param max_points: The maximum number of points to return
+        :type max_points: int
+        :returns: The downsampled job load groups
+        :rtype: list[:class:`queue.models.JobLoadGroup`]
+        """
+
+        if not max_points or len(groups) <= max_points:
+            return groups
+
+        bucket_size = (groups[-1].time - groups[0].time).total_seconds() / max_points
+        buckets = []
+        for group in groups:
+            bucket_index = min(int((group.time - groups[0].time).total_seconds() / bucket_size), max_points - 1)
+            if not buckets or buckets[-1][0] != bucket_index:
+                buckets.append((bucket_index, []))
+            buckets[-1][1].append(group)
+
+        results = []
+        for _, bucket in buckets:
+            count = float(len(bucket))
+            results.append(JobLoadGroup(bucket[0].time,
+                                        pending_count=int(round(sum(g.pending_count for g in bucket) / count)),
+                                        queued_count=int(round(sum(g.queued_count for g in bucket) / count)),
+                                        running_count=int(round(sum(g.running_count for g in bucket) / count))))
+        return results
+
+    def get_job_load_groups(self, started, ended=None, job_type_ids=None, job_type_names=None,
+                            job_type_categories=None, job_type_priorities=None, max_points=None):
+        """Returns the job load within the given time range grouped by time. Time ranges longer than a day are read from
+        the hourly rollups, with the raw samples covering the time since the latest rollup. Shorter time ranges are read
+        from the raw samples, with the hourly rollups covering any part of the range before the oldest raw sample that
+        has not been removed.
+
+        :param started: Query job loads measured after this time.
+        :type started: :class:`datetime.datetime`
+        :param ended: Query job loads measured before this time, defaults to now.
+        :type ended: :class:`datetime.datetime`
+        :param job_type_ids: Query jobs of the type associated with the identifier.
+        :type job_type_ids: list[int]
+        :param job_type_names: Query jobs of the type associated with the name.
+        :type job_type_names: list[str]
+        :param job_type_categories: Query jobs of the type associated with the category.
+        :type job_type_categories: list[str]
+        :param job_type_priorities: Query jobs of the type associated with the priority.
+        :type job_type_priorities: list[int]
+        :param max_points: The maximum number of points to return, None to return every point
+        :type max_points: int
+        :returns: The list of job loads grouped by time.
+        :rtype: list[:class:`queue.models.JobLoadGroup`]
+
+        :raises :class:`exceptions.ValueError`: If max_points is not positive
+        """
+
+        if max_points is not None and max_points <= 0:
+            raise ValueError('max_points must be positive')
+
+        filters = (job_type_ids, job_type_names, job_type_categories, job_type_priorities)
+        raw_started = started
+        groups = []
+        rolled_up_through = JobLoadRollup.objects.get_rolled_up_through()
+        if rolled_up_through and started < rolled_up_through:
+            # Short time ranges prefer the raw samples wherever they have not been removed yet
+            raw_started = rolled_up_through
+            if (ended or timezone.now()) - started <= RAW_JOB_LOAD_WINDOW:
+                oldest_raw = JobLoad.objects.aggregate(oldest=models.Min('measured'))['oldest']
+                if oldest_raw and oldest_raw < raw_started:
+                    raw_started = max(oldest_raw, started)
+            if started < raw_started:
+                rollup_ended = min(ended, raw_started) if ended else raw_started
+                rollups = _filter_job_loads(JobLoadRollup.objects.all(), started, None, *filters)
+                groups = self.group_by_time(rollups.filter(measured__lt=rollup_ended).order_by('measured'))
+
+        if not ended or raw_started <= ended:
+            groups.extend(self.group_by_time(self.get_job_loads(raw_started, ended, *filters)))
+        return self.downsample(groups, max_points)
+
     def get_job_loads(self, started=None, ended=None, job_type_ids=None, job_type_names=None, job_type_categories=None,
                       job_type_priorities=None, order=None):
         """Returns a list of job loads within the given time range.
@@ -117,22 +271,8 @@ class JobLoadManager(models.Manager):
 
         # Fetch a list of job loads
         job_loads = JobLoad.objects.all().select_related('job_type')
-
-        # Apply time range filtering
-        if started:
-            job_loads = job_loads.filter(measured__gte=started)
-        if ended:
-            job_loads = job_loads.filter(measured__lte=ended)
-
-        # Apply additional filters
-        if job_type_ids:
-            job_loads = job_loads.filter(job_type_id__in=job_type_ids)
-        if job_type_names:
-            job_loads = job_loads.filter(job_type__name__in=job_type_names)
-        if job_type_categories:
-            job_loads = job_loads.filter(job_type__category__in=job_type_categories)
-        if job_type_priorities:
-            job_loads = job_loads.filter(job_type__priority__in=job_type_priorities)
+        job_loads = _filter_job_loads(job_loads, started, ended, job_type_ids, job_type_names, job_type_categories,
+                                      job_type_priorities)
 
         # Apply sorting
         if order:
@@ -192,6 +332,106 @@ class JobLoad(models.Model):
         db_table = 'job_load'
 
 
+class JobLoadRollupManager(models.Manager):
+    """This class manages the JobLoadRollup model."""
+
+    def get_rolled_up_through(self):
+        """Returns the time through which the raw job load samples have been compacted into rollups
+
+        :returns: The end of the latest rollup, possibly None
+        :rtype: :class:`datetime.datetime`
+        """
+
+        latest = self.aggregate(latest=models.Max('measured'))['latest']
+        return latest + JOB_LOAD_ROLLUP_PERIOD if latest else None
+
+
+class JobLoadRollup(models.Model):
+    """Represents the average load counts for each job type over an hour, compacted from the raw job load samples so
+    that long time ranges of job load history can be kept and queried cheaply.
+
+    :keyword job_type: The type of job being measured.
+    :type job_type: :class:`django.db.models.ForeignKey`
+    :keyword measured: The start of the hour that the counts were averaged over.
+    :type measured: :class:`django.db.models.DateTimeField`
+
+    :keyword pending_count: The average number of jobs in pending status for the type.
+    :type pending_count: :class:`django.db.models.IntegerField`
+    :keyword queued_count: The average number of jobs in queued status for the type.
+    :type queued_count: :class:`django.db.models.IntegerField`
+    :keyword running_count: The average number of jobs in running status for the type.
+    :type running_count: :class:`django.db.models.IntegerField`
+    :keyword total_count: The average number of jobs in pending, queued, or running status for the type.
+    :type total_count: :class:`django.db.models.IntegerField`
+    """
+
+    job_type = models.ForeignKey('job.JobType', on_delete=models.PROTECT, blank=True, null=True)
+    measured = models.DateTimeField(db_index=True)
+
+    pending_count = models.IntegerField()
+    queued_count = models.IntegerField()
+    running_count = models.IntegerField()
+    total_count = models.IntegerField()
+
+    objects = JobLoadRollupManager()
+
+    class Meta(object):
+        """meta information for the db"""
+        db_table = 'job_load_rollup'
+
+
+def _filter_job_loads(job_loads, started=None, ended=None, job_type_ids=None, job_type_names=None,
+                      job_type_categories=None, job_type_priorities=None):
+    """Applies the given time range and job type filters to the given job load or job load rollup query
+
+    :param job_loads: The job load query
+    :type job_loads: :class:`django.db.models.query.QuerySet`
+    :param started: Query job loads measured after this time.
+    :type started: :class:`datetime.datetime`
+    :param ended: Query job loads measured before this time.
+    :type ended: :class:`datetime.datetime`
+    :param job_type_ids: Query jobs of the type associated with the identifier.
+    :type job_type_ids: list[int]
+    :param job_type_names: Query jobs of the type associated with the name.
+    :type job_type_names: list[str]
+    :param job_type_categories: Query jobs of the type associated with the category.
+    :type job_type_categories: list[str]
+    :param job_type_priorities: Query jobs of the type associated with the priority.
+    :type job_type_priorities: list[int]
+    :returns: The filtered query
+    :rtype: :class:`django.db.models.query.QuerySet`
+    """
+
+    # Apply time range filtering
+    if started:
+        job_loads = job_loads.filter(measured__gte=started)
+    if ended:
+        job_loads = job_loads.filter(measured__lte=ended)
+
+    # Apply additional filters
+    if job_type_ids:
+        job_loads = job_loads.filter(job_type_id__in=job_type_ids)
+    if job_type_names:
+        job_loads = job_loads.filter(job_type__name__in=job_type_names)
+    if job_type_categories:
+        job_loads = job_loads.filter(job_type__category__in=job_type_categories)
+    if job_type_priorities:
+        job_loads = job_loads.filter(job_type__priority__in=job_type_priorities)
+    return job_loads
+
+
+def _get_hour_start(when):
+    """Returns the start of the hour (UTC) that contains the given time
+
+    :param when: The time
+    :type when: :class:`datetime.datetime`
+    :returns: The start of the hour
+    :rtype: :class:`datetime.datetime`
+    """
+
+    return when.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
 class QueueStatus(object):
     """Represents queue status statistics.
 
@@ -215,6 +455,20 @@ class QueueManager(models.Manager):
     """Provides additional methods for managing the queue
     """
 
+    def cache_job_interfaces(self, queues):
+        """Caches the interfaces of the job type revisions referenced by the given queue models, retrieving any
+        revisions that are not already cached with a single query
+
+        :param queues: The queue models
+        :type queues: list
+        """
+
+        revision_ids = {queue.job_type_rev_id for queue in queues if queue.job_type_rev_id not in _REVISION_INTERFACES}
+        if revision_ids:
+            for revision in JobTypeRevision.objects.filter(id__in=revision_ids).only('id', 'interface'):
+                # Interfaces were validated when the revision was created
+                _REVISION_INTERFACES[revision.id] = JobInterface(revision.interface, do_validate=False)
+
     def get_queue(self, order_mode, ignore_job_type_ids=None):
         """Returns the list of queue models sorted according to their priority first, and then according to the provided
         mode
@@ -294,35 +548,57 @@ class QueueManager(models.Manager):
         :type when: :class:`datetime.datetime`
         """
 
-        job = Job.objects.get_locked_job(job_id)
-        # If the status isn't RUNNING or the execution number has changed, this update is obsolete
-        if job.status != 'RUNNING' or job.num_exes != exe_num:
-            return
+        self.handle_job_completions([(job_id, exe_num, when)])
 
-        Job.objects.complete_job(job, when)
+    @transaction.atomic
+    def handle_job_completions(self, completions):
+        """Handles the successful completion of the given jobs. The number of each job's running execution is provided
+        to resolve race conditions. Each recipe containing the completed jobs is only evaluated once, no matter how many
+        of its jobs completed. All database changes occur in an atomic transaction.
 
-        # Publish this job's products
-        # TODO: we should eventually refactor how product publishing is handled
-        job_exe = JobExecution.objects.get(job_id=job_id, exe_num=exe_num)
-        ProductFile.objects.publish_products(job_exe.id, job, job.ended)
+        :param completions: The list of (job ID, execution number, completed time) tuples
+        :type completions: list
+        """
 
-        # If this job is in a recipe, queue any jobs in the recipe that have their job dependencies completed
-        handler = Recipe.objects.get_recipe_handler_for_job(job_id)
-        if handler:
-            if not job.is_superseded:  # Do not queue dependent jobs for superseded jobs
-                jobs_to_queue = []
-                for job_tuple in handler.get_existing_jobs_to_queue():
-                    job_to_queue = job_tuple[0]
-                    job_data = job_tuple[1]
+        completions_by_id = {job_id: (exe_num, when) for job_id, exe_num, when in completions}
+        completed_jobs = []
+        for job in Job.objects.get_locked_jobs(completions_by_id.keys()):
+            exe_num, when = completions_by_id[job.id]
+            # If the status isn't RUNNING or the execution number has changed, this update is obsolete
+            if job.status != 'RUNNING' or job.num_exes != exe_num:
+                continue
+            Job.objects.complete_job(job, when)
+            completed_jobs.append(job)
+        if not completed_jobs:
+            return
+
+        # Publish the completed jobs' products
+        # TODO: we should eventually refactor how product publishing is handled
+        jobs_by_id = {job.id: job for job in completed_jobs}
+        for job_exe in JobExecution.objects.filter(job_id__in=jobs_by_id.keys()).only('id', 'job_id', 'exe_num'):
+            job = jobs_by_id[job_exe.job_id]
+            if job_exe.exe_num == job.num_exes:
+                ProductFile.objects.publish_products(job_exe.id, job, job.ended)
+
+        # If these jobs are in recipes, queue any jobs in the recipes that have their job dependencies completed
+        active_job_ids = {job.id for job in completed_jobs if not job.is_superseded}
+        jobs_to_queue = []
+        for handler in Recipe.objects.get_recipe_handlers_for_jobs(jobs_by_id.keys()):
+            # Do not queue dependent jobs for superseded jobs
+            if any(recipe_job.job_id in active_job_ids for recipe_job in handler.recipe_jobs):
+                for job_to_queue, job_data in handler.get_existing_jobs_to_queue():
                     try:
                         Job.objects.populate_job_data(job_to_queue, job_data)
                     except InvalidData as ex:
                         raise Exception('Scale created invalid job data: %s' % str(ex))
                     jobs_to_queue.append(job_to_queue)
-                if jobs_to_queue:
-                    self._queue_jobs(jobs_to_queue)
             if handler.is_completed():
+                # The recipe completed when the last of its jobs in this batch completed
+                when = max(jobs_by_id[recipe_job.job_id].ended for recipe_job in handler.recipe_jobs
+                           if recipe_job.job_id in jobs_by_id)
                 Recipe.objects.complete_recipe(handler.recipe.id, when)
+        if jobs_to_queue:
+            self._queue_jobs(jobs_to_queue)
 
     @transaction.atomic
     def handle_job_failure(self, job_id, exe_num, when, error):
@@ -340,31 +616,62 @@ class QueueManager(models.Manager):
         :type error: :class:`error.models.Error`
         """
 
-        job = Job.objects.get_locked_job(job_id)
-        # If the status isn't RUNNING or the execution number has changed, this update is obsolete
-        if job.status != 'RUNNING' or job.num_exes != exe_num:
+        self.handle_job_failures([(job_id, exe_num, when, error)])
+
+    @transaction.atomic
+    def handle_job_failures(self, failures):
+        """Handles the failure of the given jobs. The number of each job's running execution is provided to resolve race
+        conditions. Jobs with tries remaining are put back on the queue, the others are marked failed. Each recipe
+        containing the failed jobs is only evaluated once. All database changes occur in an atomic transaction.
+
+        :param failures: The list of (job ID, execution number, failed time, error model) tuples
+        :type failures: list
+        """
+
+        failures_by_id = {job_id: (exe_num, when, error) for job_id, exe_num, when, error in failures}
+        job_ids = []
+        for job in Job.objects.get_locked_jobs(failures_by_id.keys()):
+            # If the status isn't RUNNING or the execution number has changed, this update is obsolete
+            if job.status == 'RUNNING' and job.num_exes == failures_by_id[job.id][0]:
+                job_ids.append(job.id)
+        if not job_ids:
             return
 
         # Need related job_type and job_type_rev models
         # TODO: refactor this as part of the move to the messaging backend
-        job = Job.objects.select_related('job_type', 'job_type_rev').get(id=job_id)
-
-        # Re-try job if error supports re-try and there are more tries left
-        retry = error.should_be_retried and job.num_exes < job.max_tries
-        # Also re-try long running jobs
-        retry = retry or job.job_type.is_long_running
-        # Do not re-try superseded jobs
-        retry = retry and not job.is_superseded
-
-        if retry:
-            self._queue_jobs([job])
-        else:
-            Job.objects.fail_job(job, when, error)
-            # If this job is in a recipe, update dependent jobs so that they are BLOCKED
-            handler = Recipe.objects.get_recipe_handler_for_job(job_id)
-            if handler:
-                jobs_to_blocked = handler.get_blocked_jobs()
-                Job.objects.update_status(jobs_to_blocked, 'BLOCKED', when)
+        jobs_to_retry = []
+        failed_jobs = []
+        for job in Job.objects.select_related('job_type', 'job_type_rev').filter(id__in=job_ids).iterator():
+            exe_num, when, error = failures_by_id[job.id]
+
+            # Re-try job if error supports re-try and there are more tries left
+            retry = error.should_be_retried and job.num_exes < job.max_tries
+            # Also re-try long running jobs
+            retry = retry or job.job_type.is_long_running
+            # Do not re-try superseded jobs
+            retry = retry and not job.is_superseded
+
+            if retry:
+                jobs_to_retry.append(job)
+            else:
+                Job.objects.fail_job(job, when, error)
+                failed_jobs.append(job)
+
+        if jobs_to_retry:
+            self._queue_jobs(jobs_to_retry)
+        if failed_jobs:
+            # If these jobs are in recipes, update dependent jobs so that they are BLOCKED when the last of the recipe's
+            # jobs in this batch failed
+            failed_jobs_by_id = {job.id: job for job in failed_jobs}
+            jobs_to_blocked = {}  # {Blocked time: [Job]}
+            for handler in Recipe.objects.get_recipe_handlers_for_jobs(failed_jobs_by_id.keys()):
+                blocked_jobs = handler.get_blocked_jobs()
+                if blocked_jobs:
+                    when = max(failed_jobs_by_id[recipe_job.job_id].ended for recipe_job in handler.recipe_jobs
+                               if recipe_job.job_id in failed_jobs_by_id)
+                    jobs_to_blocked.setdefault(when, []).extend(blocked_jobs)
+            for when, blocked_jobs in jobs_to_blocked.items():
+                Job.objects.update_status(blocked_jobs, 'BLOCKED', when)
 
     @transaction.atomic
     def queue_new_job(self, job_type, data, event):
@@ -458,6 +765,40 @@ class QueueManager(models.Manager):
 
         return handler
 
+    @transaction.atomic
+    def queue_new_recipes(self, recipe_type, data_list, events, priority=None):
+        """Creates a batch of new recipes for the given type and data and queues any of their jobs that are ready to
+        run. The jobs of all of the recipes are created and queued together in bulk. All database changes occur in an
+        atomic transaction.
+
+        :param recipe_type: The type of the new recipes to create
+        :type recipe_type: :class:`recipe.models.RecipeType`
+        :param data_list: The data to run on for each recipe
+        :type data_list: [:class:`recipe.configuration.data.recipe_data.RecipeData`]
+        :param events: The event that triggered the creation of each recipe, in the same order as data_list
+        :type events: [:class:`trigger.models.TriggerEvent`]
+        :param priority: An optional argument to reset the priority of associated jobs before they are queued
+        :type priority: int
+        :returns: A handler for each new recipe, in the same order as data_list
+        :rtype: [:class:`recipe.handlers.handler.RecipeHandler`]
+
+        :raises :class:`recipe.configuration.data.exceptions.InvalidRecipeData`: If the recipe data is invalid
+        """
+
+        handlers = Recipe.objects.create_recipes(recipe_type, data_list, events)
+        jobs_to_queue = []
+        for handler in handlers:
+            for job, job_data in handler.get_existing_jobs_to_queue():
+                try:
+                    Job.objects.populate_job_data(job, job_data)
+                except InvalidData as ex:
+                    raise Exception('Scale created invalid job data: %s' % str(ex))
+                jobs_to_queue.append(job)
+        if jobs_to_queue:
+            self._queue_jobs(jobs_to_queue, priority=priority)
+
+        return handlers
+
     # TODO: once Django user auth is used, have the user information passed into here
     @transaction.atomic
     def queue_new_recipe_for_user(self, recipe_type, data):
@@ -577,7 +918,7 @@ class QueueManager(models.Manager):
             queue.is_canceled = False
             queue.priority = job.priority
             queue.timeout = job.timeout
-            queue.interface = job.get_job_interface().get_dict()
+            queue.job_type_rev_id = job.job_type_rev_id
             queue.configuration = config.get_dict()
             queue.resources = job.get_resources().get_json().get_dict()
             queue.queued = when_queued
@@ -594,6 +935,8 @@ class Queue(models.Model):
     :type job_type: :class:`django.db.models.ForeignKey`
     :keyword job: The job that has been queued
     :type job: :class:`django.db.models.ForeignKey`
+    :keyword job_type_rev: The revision of the job type, which provides the job's interface
+    :type job_type_rev: :class:`django.db.models.ForeignKey`
     :keyword exe_num: The number for this job execution
     :type exe_num: :class:`django.db.models.IntegerField`
 
@@ -606,8 +949,6 @@ class Queue(models.Model):
     :keyword timeout: The maximum amount of time to allow this execution to run before being killed (in seconds)
     :type timeout: :class:`django.db.models.IntegerField`
 
-    :keyword interface: JSON description describing the job's interface
-    :type interface: :class:`django.contrib.postgres.fields.JSONField`
     :keyword configuration: JSON description describing the execution configuration for how the job should be run
     :type configuration: :class:`django.contrib.postgres.fields.JSONField`
     :keyword resources: JSON description describing the resources required for this job
@@ -621,6 +962,7 @@ class Queue(models.Model):
 
     job_type = models.ForeignKey('job.JobType', on_delete=models.PROTECT)
     job = models.ForeignKey('job.Job', on_delete=models.PROTECT)
+    job_type_rev = models.ForeignKey('job.JobTypeRevision', on_delete=models.PROTECT)
     exe_num = models.IntegerField()
 
     input_file_size = models.FloatField()
@@ -628,7 +970,6 @@ class Queue(models.Model):
     priority = models.IntegerField(db_index=True)
     timeout = models.IntegerField()
 
-    interface = django.contrib.postgres.fields.JSONField(default=dict)
     configuration = django.contrib.postgres.fields.JSONField(default=dict)
     resources = django.contrib.postgres.fields.JSONField(default=dict)
 
@@ -647,13 +988,16 @@ class Queue(models.Model):
         return ExecutionConfiguration(self.configuration, do_validate=False)
 
     def get_job_interface(self):
-        """Returns the interface for this queued job
+        """Returns the interface for this queued job. The interface is shared by every job queued with the same job type
+        revision and must not be modified.
 
         :returns: The job interface
         :rtype: :class:`job.configuration.interface.job_interface.JobInterface`
         """
 
-        return JobInterface(self.interface, do_validate=False)
+        if self.job_type_rev_id not in _REVISION_INTERFACES:
+            Queue.objects.cache_job_interfaces([self])
+        return _REVISION_INTERFACES[self.job_type_rev_id]
 
     def get_resources(self):
         """Returns the resources required by this queued job
@@ -1,12 +1,19 @@
+from __future__ import print_function
 from __future__ import unicode_literals
 
 import datetime
+import os
 import time
+from unittest import skipUnless
 
 import django
-from django.utils.timezone import now
+from django.db import connection
+from django.db.models import F
+from django.utils.timezone import now, utc
 from django.test import TestCase, TransactionTestCase
-from mock import MagicMock
+from mock import MagicMock, patch
+
+import queue.models as queue_models
 
 import job.test.utils as job_test_utils
 import node.test.utils as node_test_utils
@@ -17,18 +24,22 @@ import storage.test.utils as storage_test_utils
 import source.test.utils as source_test_utils
 import trigger.test.utils as trigger_test_utils
 from error.models import CACHED_ERRORS, Error
+from job.configuration.interface.job_interface import JobInterface
+from job.configuration.json.execution.exe_config import ExecutionConfiguration
 from job.configuration.results.job_results import JobResults
 from job.configuration.results.results_manifest.results_manifest import ResultsManifest
-from job.models import Job, JobExecution, JobExecutionOutput
+from job.models import Job, JobExecution, JobExecutionOutput, JobTypeRevision
 from node.resources.node_resources import NodeResources
 from node.resources.resource import Cpus, Disk, Mem
 from queue.job_exe import QueuedJobExecution
-from queue.models import JobLoad, Queue, QUEUE_ORDER_FIFO, QUEUE_ORDER_LIFO
+from queue.models import JobLoad, JobLoadGroup, JobLoadRollup, Queue, QUEUE_ORDER_FIFO, QUEUE_ORDER_LIFO
 from recipe.configuration.data.recipe_data import RecipeData
 from recipe.configuration.definition.recipe_definition import RecipeDefinition
 from recipe.handlers.graph_delta import RecipeGraphDelta
 from recipe.models import Recipe, RecipeJob
 
+BENCHMARK_ENV_VAR = 'SCALE_QUEUE_BENCHMARK'
+
 
 class TestJobLoadManager(TestCase):
 
@@ -104,6 +115,97 @@ class TestJobLoadManager(TestCase):
             else:
                 self.fail('Found unexpected job type: %i' % result.job_type_id)
 
+    def test_compact(self):
+        """Tests compacting the raw job load samples of complete hours into hourly rollups"""
+
+        job_type = job_test_utils.create_job_type()
+        queue_test_utils.create_job_load(job_type=job_type, measured=datetime.datetime(2017, 1, 1, 10, tzinfo=utc),
+                                         pending_count=2, running_count=4)
+        JobLoad.objects.create(measured=datetime.datetime(2017, 1, 1, 10, 30, tzinfo=utc), pending_count=0,
+                               queued_count=0, running_count=0, total_count=0)
+        queue_test_utils.create_job_load(job_type=job_type, measured=datetime.datetime(2017, 1, 1, 11, 10, tzinfo=utc),
+                                         pending_count=6)
+
+        when = datetime.datetime(2017, 1, 1, 11, 30, tzinfo=utc)
+        self.assertEqual(JobLoad.objects.compact(when), 2)
+        self.assertEqual(JobLoad.objects.compact(when), 0)
+
+        # The job type is averaged over both samples of the hour, including the one where it had no jobs
+        rollup = JobLoadRollup.objects.get(job_type=job_type)
+        self.assertEqual(rollup.measured, datetime.datetime(2017, 1, 1, 10, tzinfo=utc))
+        self.assertEqual(rollup.pending_count, 1)
+        self.assertEqual(rollup.running_count, 2)
+        self.assertEqual(rollup.total_count, 3)
+        self.assertEqual(JobLoadRollup.objects.get_rolled_up_through(), datetime.datetime(2017, 1, 1, 11, tzinfo=utc))
+
+    def test_compact_retention(self):
+        """Tests that compacting removes the rolled up raw samples and the rollups past their retention periods"""
+
+        when = now()
+        job_type = job_test_utils.create_job_type()
+        queue_test_utils.create_job_load(job_type=job_type, measured=when - datetime.timedelta(days=2), queued_count=1)
+        queue_test_utils.create_job_load(job_type=job_type, measured=when, queued_count=1)
+        JobLoadRollup.objects.create(job_type=job_type, measured=when - datetime.timedelta(days=31), pending_count=0,
+                                     queued_count=1, running_count=0, total_count=1)
+
+        with self.settings(JOB_LOAD_RETENTION_DAYS=1, JOB_LOAD_ROLLUP_RETENTION_DAYS=30):
+            JobLoad.objects.compact(when)
+
+        self.assertEqual(JobLoad.objects.count(), 1)
+        self.assertEqual(JobLoadRollup.objects.count(), 1)
+
+    def test_get_job_load_groups(self):
+        """Tests that long time ranges combine the hourly rollups with the raw samples since the latest rollup"""
+
+        when = now()
+        job_type = job_test_utils.create_job_type()
+        for hours in range(1, 49):
+            queue_test_utils.create_job_load(job_type=job_type, measured=when - datetime.timedelta(hours=hours),
+                                             queued_count=hours)
+        JobLoad.objects.compact(when)
+        queue_test_utils.create_job_load(job_type=job_type, measured=when, queued_count=1)
+
+        groups = JobLoad.objects.get_job_load_groups(when - datetime.timedelta(days=3))
+        self.assertEqual(len(groups), 49)
+        self.assertListEqual([group.queued_count for group in groups], list(range(48, 0, -1)) + [1])
+
+        groups = JobLoad.objects.get_job_load_groups(when - datetime.timedelta(days=3), max_points=12)
+        self.assertLessEqual(len(groups), 12)
+
+    def test_get_job_load_groups_old_short_range(self):
+        """Tests that short time ranges older than the remaining raw samples are read from the hourly rollups"""
+
+        when = now()
+        started = when - datetime.timedelta(days=3)
+        job_type = job_test_utils.create_job_type()
+        for hours in range(6):
+            queue_test_utils.create_job_load(job_type=job_type, measured=started + datetime.timedelta(hours=hours),
+                                             queued_count=hours + 1)
+        with self.settings(JOB_LOAD_RETENTION_DAYS=1):
+            JobLoad.objects.compact(when)
+        queue_test_utils.create_job_load(job_type=job_type, measured=when, queued_count=1)
+
+        groups = JobLoad.objects.get_job_load_groups(started - datetime.timedelta(hours=1),
+                                                     started + datetime.timedelta(hours=6))
+        self.assertListEqual([group.queued_count for group in groups], [1, 2, 3, 4, 5, 6])
+
+    def test_get_job_load_groups_bad_max_points(self):
+        """Tests that requesting a non-positive number of points is rejected"""
+
+        self.assertRaises(ValueError, JobLoad.objects.get_job_load_groups, now(), max_points=0)
+
+    def test_downsample(self):
+        """Tests downsampling job load groups by averaging them within equal time buckets"""
+
+        started = datetime.datetime(2017, 1, 1, tzinfo=utc)
+        groups = [JobLoadGroup(started + datetime.timedelta(minutes=i), running_count=2 * i) for i in range(10)]
+
+        results = JobLoad.objects.downsample(groups, 5)
+
+        self.assertListEqual([result.time for result in results], [group.time for group in groups[::2]])
+        self.assertListEqual([result.running_count for result in results], [1, 5, 9, 13, 17])
+        self.assertListEqual(JobLoad.objects.downsample(groups, 20), groups)
+
 
 class TestQueueManager(TransactionTestCase):
 
@@ -114,6 +216,24 @@ class TestQueueManager(TransactionTestCase):
 
         CACHED_ERRORS.clear()  # Clear error cache since the error models keep getting rolled back
 
+    def test_cache_job_interfaces(self):
+        """Tests that queued jobs of the same job type revision share one cached interface"""
+
+        job_type = job_test_utils.create_job_type()
+        queue_1 = queue_test_utils.create_queue(job_type=job_type)
+        queue_2 = queue_test_utils.create_queue(job_type=job_type)
+        queue_models._REVISION_INTERFACES.clear()
+
+        queues = list(Queue.objects.get_queue(QUEUE_ORDER_FIFO))
+        Queue.objects.cache_job_interfaces(queues)
+
+        with self.assertNumQueries(0):
+            interface_1 = queues[0].get_job_interface()
+            interface_2 = queues[1].get_job_interface()
+        self.assertIs(interface_1, interface_2)
+        self.assertEqual(queues[0].job_type_rev_id, queue_1.job.job_type_rev_id)
+        self.assertDictEqual(interface_1.get_dict(), queue_2.job.get_job_interface().get_dict())
+
     def test_get_queue_fifo(self):
         """Tests calling QueueManager.get_queue() in FIFO mode"""
 
@@ -213,6 +333,25 @@ class TestQueueManager(TransactionTestCase):
         self.assertEqual(job.error_id, error.id)
         self.assertTrue(job.is_superseded)
 
+    def test_handle_job_failures(self):
+        """Tests calling QueueManager.handle_job_failures() with a batch where one job retries and one job fails"""
+
+        job_type_1 = job_test_utils.create_job_type(max_tries=2)
+        job_1 = job_test_utils.create_job(job_type=job_type_1, status='RUNNING', num_exes=1)
+        job_type_2 = job_test_utils.create_job_type(max_tries=1)
+        job_2 = job_test_utils.create_job(job_type=job_type_2, status='RUNNING', num_exes=1)
+        error = Error.objects.get_error('database-operation')
+
+        # Call method to test
+        Queue.objects.handle_job_failures([(job_1.id, job_1.num_exes, now(), error),
+                                           (job_2.id, job_2.num_exes, now(), error)])
+
+        # Make sure the first job retried and the second job failed
+        self.assertEqual(Job.objects.get(pk=job_1.id).status, 'QUEUED')
+        job_2 = Job.objects.get(pk=job_2.id)
+        self.assertEqual(job_2.status, 'FAILED')
+        self.assertEqual(job_2.error_id, error.id)
+
 
 class TestQueueManagerHandleJobCancellation(TransactionTestCase):
 
@@ -497,6 +636,61 @@ class TestQueueManagerHandleJobCompletion(TransactionTestCase):
         recipe = Recipe.objects.get(pk=handler.recipe.id)
         self.assertIsNotNone(recipe.completed)
 
+    def test_successful_with_batch(self):
+        """Tests calling QueueManager.handle_job_completions() with jobs from multiple recipes in one batch"""
+
+        handlers = [Queue.objects.queue_new_recipe(self.recipe_type, self.data, self.event) for _ in range(2)]
+        completions = []
+        for handler in handlers:
+            job_1 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 1').job
+            job_exe_1 = job_test_utils.create_job_exe(job=job_1, status='RUNNING')
+            output_file = product_test_utils.create_product(job_exe=job_exe_1, workspace=self.workspace)
+
+            results = JobResults()
+            results.add_file_list_parameter('Test Output 1', [output_file.id])
+            JobExecutionOutput.objects.create(job_exe_id=job_exe_1.id, job_id=job_exe_1.job_id,
+                                              job_type_id=job_exe_1.job_type_id, exe_num=job_exe_1.exe_num,
+                                              output=results.get_dict())
+            Job.objects.filter(pk=job_1.id).update(status='RUNNING')
+            completions.append((job_1.id, job_1.num_exes, now()))
+
+        # Call method to test
+        with patch.object(Recipe.objects, 'get_recipe_handlers_for_jobs',
+                          wraps=Recipe.objects.get_recipe_handlers_for_jobs) as mock_get_handlers:
+            Queue.objects.handle_job_completions(completions)
+
+        # Make sure the recipe handlers were loaded once and Job 2 in each recipe is queued
+        self.assertEqual(mock_get_handlers.call_count, 1)
+        for handler in handlers:
+            recipe_job_2 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 2')
+            self.assertEqual(recipe_job_2.job.status, 'QUEUED')
+
+    def test_batch_recipe_completed_times(self):
+        """Tests that each recipe completed in a batch is given the completion time of its own last job"""
+
+        handlers = [Queue.objects.queue_new_recipe(self.recipe_type, self.data, self.event) for _ in range(2)]
+        completed_times = [datetime.datetime(2017, 1, 1, 10, tzinfo=utc), datetime.datetime(2017, 1, 1, 11, tzinfo=utc)]
+        for job_name in ('Job 1', 'Job 2'):
+            completions = []
+            for handler, when in zip(handlers, completed_times):
+                job = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name=job_name).job
+                job_exe = job_test_utils.create_job_exe(job=job, status='RUNNING')
+                output_file = product_test_utils.create_product(job_exe=job_exe, workspace=self.workspace)
+
+                results = JobResults()
+                results.add_file_list_parameter('Test Output %s' % job_name[-1], [output_file.id])
+                JobExecutionOutput.objects.create(job_exe_id=job_exe.id, job_id=job_exe.job_id,
+                                                  job_type_id=job_exe.job_type_id, exe_num=job_exe.exe_num,
+                                                  output=results.get_dict())
+                Job.objects.filter(pk=job.id).update(status='RUNNING')
+                completions.append((job.id, job.num_exes, when))
+
+            # Call method to test
+            Queue.objects.handle_job_completions(completions)
+
+        for handler, when in zip(handlers, completed_times):
+            self.assertEqual(Recipe.objects.get(pk=handler.recipe.id).completed, when)
+
 
 class TestQueueManagerQueueNewRecipe(TransactionTestCase):
 
@@ -607,6 +801,20 @@ class TestQueueManagerQueueNewRecipe(TransactionTestCase):
         recipe = Recipe.objects.get(pk=handler.recipe.id)
         self.assertIsNone(recipe.completed)
 
+    def test_queue_new_recipes(self):
+        """Tests calling QueueManager.queue_new_recipes() successfully."""
+
+        event_2 = trigger_test_utils.create_trigger_event()
+        handlers = Queue.objects.queue_new_recipes(self.recipe_type, [self.data, self.data], [self.event, event_2])
+
+        self.assertEqual(len(handlers), 2)
+        for handler in handlers:
+            recipe_job_1 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 1')
+            self.assertEqual(recipe_job_1.job.status, 'QUEUED')
+            recipe_job_2 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 2')
+            self.assertEqual(recipe_job_2.job.status, 'PENDING')
+        self.assertEqual(Queue.objects.count(), 2)
+
     def test_successful_priority(self):
         """Tests calling QueueManager.queue_new_recipe() successfully with an override priority."""
 
@@ -628,7 +836,7 @@ class TestQueueManagerQueueNewRecipe(TransactionTestCase):
         recipe = Recipe.objects.get(id=handler.recipe.id)
         recipe_job_1 = RecipeJob.objects.select_related('job')
         recipe_job_1 = recipe_job_1.get(recipe_id=handler.recipe.id, job_name='Job 1')
-        Job.objects.update_jobs_to_running({recipe_job_1.job.id: recipe_job_1.job.num_exes}, now())
+        Job.objects.update_running_jobs([(recipe_job_1.job.id, recipe_job_1.job.num_exes, node.id, now())])
         results = JobResults()
         results.add_file_list_parameter('Test Output 1', [product_test_utils.create_product().id])
         job_test_utils.create_job_exe(job=recipe_job_1.job, status='COMPLETED', output=results)
@@ -700,12 +908,12 @@ class TestQueueManagerQueueNewRecipe(TransactionTestCase):
         self.assertTrue(new_recipe_job_2.is_original)
 
         # Complete both the old and new job 2 and check that only the new recipe completes
-        Job.objects.update_jobs_to_running({recipe_job_2.job.id: recipe_job_2.job.num_exes}, now())
+        Job.objects.update_running_jobs([(recipe_job_2.job.id, recipe_job_2.job.num_exes, node.id, now())])
         results = JobResults()
         results.add_file_list_parameter('Test Output 2', [product_test_utils.create_product().id])
         job_test_utils.create_job_exe(job=recipe_job_2.job, status='COMPLETED', output=results)
         Queue.objects.handle_job_completion(recipe_job_2.job_id, recipe_job_2.job.num_exes, now())
-        Job.objects.update_jobs_to_running({new_recipe_job_2.job.id: new_recipe_job_2.job.num_exes}, now())
+        Job.objects.update_running_jobs([(new_recipe_job_2.job.id, new_recipe_job_2.job.num_exes, node.id, now())])
         results = JobResults()
         results.add_file_list_parameter('Test Output 2', [product_test_utils.create_product().id])
         job_test_utils.create_job_exe(job=new_recipe_job_2.job, status='COMPLETED', output=results)
@@ -848,3 +1056,85 @@ class TestQueueManagerRequeueJobs(TransactionTestCase):
         self.assertEqual(job_b_2.status, 'BLOCKED')
         job_b_3 = Job.objects.get(id=self.job_b_3.id)
         self.assertEqual(job_b_3.status, 'BLOCKED')
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the queue benchmark' % BENCHMARK_ENV_VAR)
+class TestQueueBenchmark(TestCase):
+    """Measures the size of the queue table and the time taken to read queued job executions for scheduling, compared to
+    each queue row carrying its own copy of the job interface. The benchmark is slow so it is only run when the
+    SCALE_QUEUE_BENCHMARK environment variable is set. Set SCALE_QUEUE_BENCHMARK_ROWS to change the depth of the queue.
+    """
+
+    NUM_JOB_TYPES = 30
+    BATCH_SIZE = 5000
+
+    def setUp(self):
+        django.setup()
+
+        self.num_rows = int(os.environ.get('SCALE_QUEUE_BENCHMARK_ROWS', 500000))
+        event = trigger_test_utils.create_trigger_event()
+        job_types = []
+        for _ in range(self.NUM_JOB_TYPES):
+            job_type = job_test_utils.create_job_type()
+            job_types.append((job_type, JobTypeRevision.objects.get_revision(job_type.id, job_type.revision_num)))
+        configuration = ExecutionConfiguration().get_dict()
+        resources = NodeResources([Cpus(1.0), Mem(1024.0), Disk(1024.0)]).get_json().get_dict()
+
+        queued = now()
+        for batch_start in range(0, self.num_rows, self.BATCH_SIZE):
+            jobs = []
+            for i in range(batch_start, min(batch_start + self.BATCH_SIZE, self.num_rows)):
+                job_type, job_type_rev = job_types[i % self.NUM_JOB_TYPES]
+                jobs.append(Job(job_type=job_type, job_type_rev=job_type_rev, event=event, status='QUEUED',
+                                priority=100, timeout=job_type.timeout, max_tries=job_type.max_tries, num_exes=1,
+                                queued=queued, last_status_change=queued))
+            Job.objects.bulk_create(jobs)
+            Queue.objects.bulk_create([Queue(job_type=job.job_type, job=job, job_type_rev=job.job_type_rev, exe_num=1,
+                                             priority=100, timeout=job.timeout, input_file_size=512.0,
+                                             configuration=configuration, resources=resources, queued=queued)
+                                       for job in jobs])
+
+    def test_queue_fetch(self):
+        """Compares reading the queue with shared revision interfaces against reading per-row interface copies"""
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE queue')
+            cursor.execute('SELECT pg_total_relation_size(\'queue\')')
+            table_size = cursor.fetchone()[0]
+            cursor.execute('SELECT SUM(pg_column_size(r.interface)) FROM queue q '
+                           'JOIN job_type_revision r ON q.job_type_rev_id = r.id')
+            copies_size = cursor.fetchone()[0]
+
+        print('\nQueue of %d rows across %d job types' % (self.num_rows, self.NUM_JOB_TYPES))
+        print('Queue table: %.1f MiB, per-row interface copies would add %.1f MiB' % (table_size / 1048576.0,
+                                                                                     copies_size / 1048576.0))
+        self._report('Per-row interface copies', self._run(self._fetch_copies))
+        queue_models._REVISION_INTERFACES.clear()
+        self._report('Shared revision interfaces', self._run(self._fetch_shared))
+
+    def _fetch_copies(self):
+        """Reads the queue the way it was read when each row stored its own interface JSON"""
+
+        query = Queue.objects.get_queue(QUEUE_ORDER_FIFO).annotate(interface_copy=F('job_type_rev__interface'))
+        for queue in query:
+            JobInterface(queue.interface_copy, do_validate=False)
+            queue.get_execution_configuration()
+            queue.get_resources()
+
+    def _fetch_shared(self):
+        """Reads the queue the way the scheduler does"""
+
+        queues = list(Queue.objects.get_queue(QUEUE_ORDER_FIFO))
+        Queue.objects.cache_job_interfaces(queues)
+        for queue in queues:
+            QueuedJobExecution(queue)
+
+    def _report(self, name, duration):
+        print('%s: %.1f s, %.0f rows/s' % (name, duration, self.num_rows / duration))
+
+    def _run(self, fetch_func):
+        """Runs the given fetch function and returns the duration in seconds"""
+
+        started = time.time()
+        fetch_func()
+        return time.time() - started
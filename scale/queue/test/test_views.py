@@ -99,6 +99,14 @@ class TestJobLoadView(TransactionTestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
 
+    def test_bad_max_points(self):
+        """Tests calling the job load view with a max_points value that is not positive"""
+
+        url = rest_util.get_url('/load/?max_points=0')
+        response = self.client.generic('GET', url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.content)
+
 
 class TestQueueNewJobView(TransactionTestCase):
 
@@ -53,8 +53,7 @@ def create_queue(job_type=None, priority=1, timeout=3600, cpus_required=1.0, mem
     job = job_test_utils.create_job(job_type=job_type, status='QUEUED')
     resources = NodeResources([Cpus(cpus_required), Mem(mem_required), Disk(disk_total_required)])
 
-    return Queue.objects.create(job_type=job.job_type, job=job, exe_num=job.num_exes, priority=priority,
-                                timeout=timeout, input_file_size=disk_in_required,
-                                interface=job.get_job_interface().get_dict(),
+    return Queue.objects.create(job_type=job.job_type, job=job, job_type_rev=job.job_type_rev, exe_num=job.num_exes,
+                                priority=priority, timeout=timeout, input_file_size=disk_in_required,
                                 configuration=ExecutionConfiguration().get_dict(),
                                 resources=resources.get_json().get_dict(), queued=queued)
@@ -46,10 +46,12 @@ class JobLoadView(ListAPIView):
         job_type_names = rest_util.parse_string_list(request, 'job_type_name', required=False)
         job_type_categories = rest_util.parse_string_list(request, 'job_type_category', required=False)
         job_type_priorities = rest_util.parse_string_list(request, 'job_type_priority', required=False)
+        max_points = rest_util.parse_int(request, 'max_points', required=False)
+        if max_points is not None and max_points <= 0:
+            raise rest_util.BadParameter('Parameter must be a positive integer: "max_points"')
 
-        job_loads = JobLoad.objects.get_job_loads(started, ended, job_type_ids, job_type_names, job_type_categories,
-                                                  job_type_priorities)
-        job_loads_grouped = JobLoad.objects.group_by_time(job_loads)
+        job_loads_grouped = JobLoad.objects.get_job_load_groups(started, ended, job_type_ids, job_type_names,
+                                                                job_type_categories, job_type_priorities, max_points)
 
         page = self.paginate_queryset(job_loads_grouped)
         serializer = self.get_serializer(page, many=True)
@@ -112,12 +112,11 @@ class RecipeGraph(object):
         results = []
         perm_set = set()
         temp_set = set()
-        unmarked_set = set(self._nodes.keys())
-        while unmarked_set:
-            job_name = unmarked_set.pop()
-            node = self._nodes[job_name]
-            self._get_topological_order_visit(node, results, perm_set, temp_set)
-            unmarked_set = set(self._nodes.keys()) - perm_set
+        for job_name, node in self._nodes.items():
+            if job_name not in perm_set:
+                self._get_topological_order_visit(node, results, perm_set, temp_set)
+        # Nodes are visited in reverse topological order
+        results.reverse()
         return results
 
     def _get_topological_order_visit(self, node, results, perm_set, temp_set):
@@ -125,7 +124,7 @@ class RecipeGraph(object):
 
         :param node: The job dictionary
         :type node: :class:`recipe.handlers.node.RecipeNode`
-        :param results: The list of job names in topological order
+        :param results: The list of job names in reverse topological order
         :type results: list
         :param perm_set: A permanent set of visited nodes (job names)
         :type perm_set: set
@@ -142,4 +141,4 @@ class RecipeGraph(object):
                 self._get_topological_order_visit(child_node, results, perm_set, temp_set)
             perm_set.add(node.job_name)
             temp_set.remove(node.job_name)
-            results.insert(0, node.job_name)
+            results.append(node.job_name)
@@ -2,6 +2,33 @@
 from __future__ import unicode_literals
 
 
+# The maximum number of recipe graphs kept in the graph cache before the cache is cleared
+MAX_CACHED_GRAPHS = 500
+
+# Graphs and topological orders of recipe type revisions, which never change once created
+_RECIPE_GRAPHS = {}  # {Recipe type revision ID: (Recipe graph, list of job names in topological order)}
+
+
+def get_recipe_graph(recipe):
+    """Returns the graph for the given recipe and its job names in topological order. Graphs are cached per recipe type
+    revision so that the recipe definition is only parsed once for all of the recipes of the revision.
+
+    :param recipe: The recipe model with related recipe_type_rev model
+    :type recipe: :class:`recipe.models.Recipe`
+    :returns: A tuple of the recipe graph and the list of job names in topological order
+    :rtype: (:class:`recipe.handlers.graph.RecipeGraph`, [string])
+    """
+
+    graph_tuple = _RECIPE_GRAPHS.get(recipe.recipe_type_rev_id)
+    if not graph_tuple:
+        graph = recipe.get_recipe_definition().get_graph()
+        graph_tuple = (graph, graph.get_topological_order())
+        if len(_RECIPE_GRAPHS) >= MAX_CACHED_GRAPHS:
+            _RECIPE_GRAPHS.clear()
+        _RECIPE_GRAPHS[recipe.recipe_type_rev_id] = graph_tuple
+    return graph_tuple
+
+
 class RecipeHandler(object):
     """This class handles the logic for a recipe"""
 
@@ -20,7 +47,7 @@ class RecipeHandler(object):
         self.recipe_jobs = recipe_jobs
 
         self._data = recipe.get_recipe_data()
-        self._graph = recipe.get_recipe_definition().get_graph()
+        self._graph, self._topological_order = get_recipe_graph(recipe)
         self._jobs_by_id = {}  # {Job ID: Recipe Job}
         self._jobs_by_name = {}  # {Job Name: Recipe Job}
 
@@ -37,7 +64,7 @@ class RecipeHandler(object):
 
         statuses = {}  # {Job name: status}
         jobs_to_blocked = []
-        for job_name in self._graph.get_topological_order():
+        for job_name in self._topological_order:
             job = self._jobs_by_name[job_name].job
             node = self._graph.get_node(job_name)
             if job.status in ['PENDING', 'BLOCKED']:
@@ -66,13 +93,15 @@ class RecipeHandler(object):
         :rtype: {int}
         """
 
-        job_name = self._jobs_by_id[job_id].job_name
-        node = self._graph.get_node(job_name)
         job_ids = set()
-        for child_node in node.children:
-            child_id = self._jobs_by_name[child_node.job_name].job_id
-            job_ids.add(child_id)
-            job_ids |= self.get_dependent_job_ids(child_id)  # Set union with the children of the child node
+        nodes = [self._graph.get_node(self._jobs_by_id[job_id].job_name)]
+        while nodes:
+            # Each dependent job is only visited once, even when it is reachable through several paths
+            for child_node in nodes.pop().children:
+                child_id = self._jobs_by_name[child_node.job_name].job_id
+                if child_id not in job_ids:
+                    job_ids.add(child_id)
+                    nodes.append(child_node)
         return job_ids
 
     def get_existing_jobs_to_queue(self):
@@ -84,7 +113,7 @@ class RecipeHandler(object):
 
         jobs_to_queue = []
 
-        for job_name in self._graph.get_topological_order():
+        for job_name in self._topological_order:
             job = self._jobs_by_name[job_name].job
             if job.status != 'PENDING':
                 continue  # Only PENDING jobs are able to be queued
@@ -115,7 +144,7 @@ class RecipeHandler(object):
 
         statuses = {}  # {Job name: status}
         jobs_to_pending = []
-        for job_name in self._graph.get_topological_order():
+        for job_name in self._topological_order:
             job = self._jobs_by_name[job_name].job
             node = self._graph.get_node(job_name)
             if job.status in ['PENDING', 'BLOCKED']:
@@ -7,7 +7,7 @@ import django.utils.timezone as timezone
 import django.contrib.postgres.fields
 from django.db import models, transaction
 
-from job.models import Job, JobType
+from job.models import Job, JobType, JobTypeRevision
 from recipe.configuration.data.recipe_data import RecipeData
 from recipe.configuration.definition.recipe_definition import RecipeDefinition
 from recipe.exceptions import CreateRecipeError, ReprocessError, SupersedeError
@@ -130,16 +130,79 @@ class RecipeManager(models.Manager):
         RecipeInputFile.objects.bulk_create(recipe_files)
 
         # Create recipe jobs and link them to the recipe
-        recipe_jobs = self._create_recipe_jobs(recipe, event, when, delta, superseded_jobs)
-        handler = RecipeHandler(recipe, recipe_jobs)
-        # Block any new jobs that need to be blocked
-        jobs_to_blocked = handler.get_blocked_jobs()
-        if jobs_to_blocked:
-            Job.objects.update_status(jobs_to_blocked, 'BLOCKED', when)
-        return handler
-
-    def _create_recipe_jobs(self, recipe, event, when, delta, superseded_jobs):
-        """Creates and returns the job and recipe_job models for the given new recipe. If the new recipe is superseding
+        jobs_to_create = recipe_definition.get_jobs_to_create()
+        job_type_revs = JobTypeRevision.objects.get_revisions([job_tuple[1] for job_tuple in jobs_to_create])
+        recipe_jobs = self._create_recipe_jobs(recipe, event, when, delta, superseded_jobs, jobs_to_create,
+                                               job_type_revs)
+        return self._save_recipe_jobs([(recipe, recipe_jobs)], when)[0]
+
+    @transaction.atomic
+    def create_recipes(self, recipe_type, data_list, events):
+        """Creates a batch of new recipes for the given type and returns a recipe handler for each of them. All jobs for
+        the recipes will also be created. The recipes, their jobs, and their recipe_job models are each inserted with a
+        single query, so this method should be preferred over create_recipe() when creating many recipes at once. All
+        database changes occur in an atomic transaction.
+
+        :param recipe_type: The type of the recipes to create
+        :type recipe_type: :class:`recipe.models.RecipeType`
+        :param data_list: The data to run on for each recipe
+        :type data_list: [:class:`recipe.configuration.data.recipe_data.RecipeData`]
+        :param events: The event that triggered the creation of each recipe, in the same order as data_list
+        :type events: [:class:`trigger.models.TriggerEvent`]
+        :returns: A handler for each new recipe, in the same order as data_list
+        :rtype: [:class:`recipe.handlers.handler.RecipeHandler`]
+
+        :raises :class:`recipe.exceptions.CreateRecipeError`: If general recipe parameters are invalid
+        :raises :class:`recipe.configuration.data.exceptions.InvalidRecipeData`: If the recipe data is invalid
+        """
+
+        if not recipe_type.is_active:
+            raise CreateRecipeError('Recipe type is no longer active')
+        if len(data_list) != len(events):
+            raise CreateRecipeError('Each recipe requires an event that triggered its creation')
+        if None in events:
+            raise CreateRecipeError('Event that triggered recipe creation is required')
+
+        recipe_type_rev = RecipeTypeRevision.objects.get_revision(recipe_type.id, recipe_type.revision_num)
+        recipe_definition = recipe_type_rev.get_recipe_definition()
+        when = timezone.now()
+
+        # Validate recipe data and save recipes
+        recipes = []
+        for data, event in zip(data_list, events):
+            recipe_definition.validate_data(data)
+            recipe = Recipe()
+            recipe.recipe_type = recipe_type
+            recipe.recipe_type_rev = recipe_type_rev
+            recipe.event = event
+            recipe.data = data.get_dict()
+            recipes.append(recipe)
+        self.bulk_create(recipes)
+
+        # Save models for each recipe input file
+        recipe_files = []
+        for recipe, data in zip(recipes, data_list):
+            for input_file_info in data.get_input_file_info():
+                recipe_file = RecipeInputFile()
+                recipe_file.recipe_id = recipe.id
+                recipe_file.scale_file_id = input_file_info[0]
+                recipe_file.recipe_input = input_file_info[1]
+                recipe_file.created = recipe.created
+                recipe_files.append(recipe_file)
+        RecipeInputFile.objects.bulk_create(recipe_files)
+
+        # Create recipe jobs and link them to the recipes, the job types only need to be looked up once
+        jobs_to_create = recipe_definition.get_jobs_to_create()
+        job_type_revs = JobTypeRevision.objects.get_revisions([job_tuple[1] for job_tuple in jobs_to_create])
+        recipes_and_jobs = []
+        for recipe, event in zip(recipes, events):
+            recipe_jobs = self._create_recipe_jobs(recipe, event, when, None, None, jobs_to_create, job_type_revs)
+            recipes_and_jobs.append((recipe, recipe_jobs))
+        return self._save_recipe_jobs(recipes_and_jobs, when)
+
+    def _create_recipe_jobs(self, recipe, event, when, delta, superseded_jobs, jobs_to_create, job_type_revs):
+        """Creates and returns the job and recipe_job models for the given new recipe. The new job models are not
+        saved, use _save_recipe_jobs() to insert them along with the recipe_job models. If the new recipe is superseding
         an old recipe, both delta and superseded_jobs must be provided and the caller must have obtained a model lock on
         all job models in superseded_jobs.
 
@@ -155,7 +218,11 @@ class RecipeManager(models.Manager):
             supersede. This mapping must include all jobs created by the previous recipe, not just the ones that will
             actually be replaced by the new recipe definition.
         :type superseded_jobs: {string: :class:`job.models.Job`}
-        :returns: The list of newly created recipe_job models (without id field populated)
+        :param jobs_to_create: The name and type of each job in the recipe, in the order they should be created
+        :type jobs_to_create: [(string, :class:`job.models.JobType`)]
+        :param job_type_revs: The current revision of each job type stored by job type ID
+        :type job_type_revs: {int: :class:`job.models.JobTypeRevision`}
+        :returns: The list of new recipe_job models (without id field populated)
         :rtype: [:class:`recipe.models.RecipeJob`]
 
         :raises :class:`recipe.exceptions.ReprocessError`: If recipe cannot be reprocessed
@@ -163,7 +230,7 @@ class RecipeManager(models.Manager):
 
         recipe_jobs_to_create = []
         jobs_to_supersede = []
-        for job_tuple in recipe.get_recipe_definition().get_jobs_to_create():
+        for job_tuple in jobs_to_create:
             job_name = job_tuple[0]
             job_type = job_tuple[1]
             superseded_job = None
@@ -184,8 +251,8 @@ class RecipeManager(models.Manager):
                     superseded_job = superseded_jobs[delta.get_changed_nodes()[job_name]]
                     jobs_to_supersede.append(superseded_job)
 
-            job = Job.objects.create_job(job_type, event, superseded_job)
-            job.save()
+            job_type_rev = job_type_revs.get(job_type.id)
+            job = Job.objects.create_job(job_type, event, superseded_job, job_type_rev=job_type_rev)
             recipe_job = RecipeJob()
             recipe_job.job = job
             recipe_job.job_name = job_name
@@ -210,9 +277,43 @@ class RecipeManager(models.Manager):
             # Supersede any jobs that were changed or deleted in new recipe
             Job.objects.supersede_jobs(jobs_to_supersede, when)
 
-        RecipeJob.objects.bulk_create(recipe_jobs_to_create)
         return recipe_jobs_to_create
 
+    def _save_recipe_jobs(self, recipes_and_jobs, when):
+        """Inserts the new job and recipe_job models created by _create_recipe_jobs() for the given recipes and returns
+        a handler for each recipe. New jobs that need to be blocked are given the BLOCKED status before they are
+        inserted so that the jobs and recipe_job models of all of the recipes are each inserted with a single query.
+
+        :param recipes_and_jobs: A list of tuples of each recipe with its recipe_job models
+        :type recipes_and_jobs: [(:class:`recipe.models.Recipe`, [:class:`recipe.models.RecipeJob`])]
+        :param when: The time that the recipes were created
+        :type when: :class:`datetime.datetime`
+        :returns: A handler for each recipe, in the same order as the given recipes
+        :rtype: [:class:`recipe.handlers.handler.RecipeHandler`]
+        """
+
+        new_jobs = []
+        existing_jobs_to_block = []
+        all_recipe_jobs = []
+        for recipe, recipe_jobs in recipes_and_jobs:
+            for job in RecipeHandler(recipe, recipe_jobs).get_blocked_jobs():
+                if job.id:
+                    existing_jobs_to_block.append(job)
+                else:
+                    job.status = 'BLOCKED'
+                    job.last_status_change = when
+            new_jobs.extend(recipe_job.job for recipe_job in recipe_jobs if not recipe_job.job.id)
+            all_recipe_jobs.extend(recipe_jobs)
+
+        Job.objects.bulk_create(new_jobs)
+        for recipe_job in all_recipe_jobs:
+            recipe_job.job = recipe_job.job  # Picks up the ID of a newly inserted job
+        RecipeJob.objects.bulk_create(all_recipe_jobs)
+        if existing_jobs_to_block:
+            Job.objects.update_status(existing_jobs_to_block, 'BLOCKED', when)
+
+        return [RecipeHandler(recipe, recipe_jobs) for recipe, recipe_jobs in recipes_and_jobs]
+
     def get_recipe_for_job(self, job_id):
         """Returns the original recipe for the job with the given ID (returns None if the job is not in a recipe). The
         returned model will have its related recipe_type and recipe_type_rev models populated. If the job exists in
@@ -451,6 +451,73 @@ class TestRecipeManagerCreateRecipe(TransactionTestCase):
         self.assertEqual(len(recipe_files), 1)
         self.assertEqual(recipe_files[0].scale_file_id, self.file.id)
 
+    def test_create_recipes(self):
+        """Tests calling RecipeManager.create_recipes() successfully."""
+
+        file_2 = storage_test_utils.create_file()
+        data_2 = {
+            'version': '1.0',
+            'input_data': [{
+                'name': 'Recipe Input',
+                'file_id': file_2.id,
+            }],
+            'workspace_id': self.workspace.id,
+        }
+        event_1 = trigger_test_utils.create_trigger_event()
+        event_2 = trigger_test_utils.create_trigger_event()
+
+        handlers = Recipe.objects.create_recipes(self.recipe_type, [RecipeData(self.data), RecipeData(data_2)],
+                                                 [event_1, event_2])
+
+        self.assertEqual(len(handlers), 2)
+        for handler, event, input_file in zip(handlers, [event_1, event_2], [self.file, file_2]):
+            # Make sure the handler is ready to use without re-fetching its jobs
+            self.assertIsNotNone(handler.recipe.id)
+            self.assertEqual(len(handler.recipe_jobs), 2)
+            for recipe_job in handler.recipe_jobs:
+                self.assertIsNotNone(recipe_job.job_id)
+                self.assertEqual(recipe_job.job.event_id, event.id)
+
+            recipe_job_1 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 1')
+            recipe_job_2 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 2')
+            self.assertEqual(recipe_job_1.job.job_type_id, self.job_type_1.id)
+            self.assertEqual(recipe_job_1.job.job_type_rev.revision_num, self.job_type_1.revision_num)
+            self.assertEqual(recipe_job_2.job.job_type_id, self.job_type_2.id)
+            self.assertLess(recipe_job_1.job_id, recipe_job_2.job_id)
+
+            recipe_files = RecipeInputFile.objects.filter(recipe=handler.recipe)
+            self.assertEqual(len(recipe_files), 1)
+            self.assertEqual(recipe_files[0].scale_file_id, input_file.id)
+
+    def test_successful_supersede_blocked(self):
+        """Tests calling RecipeManager.create_recipe() to supersede a recipe where a new job is blocked by a copied job
+        that failed."""
+
+        event = trigger_test_utils.create_trigger_event()
+        handler = Recipe.objects.create_recipe(recipe_type=self.recipe_type, data=RecipeData(self.data), event=event)
+        recipe = Recipe.objects.get(id=handler.recipe.id)
+        recipe_job_1 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 1')
+        recipe_job_2 = RecipeJob.objects.select_related('job').get(recipe_id=handler.recipe.id, job_name='Job 2')
+        Job.objects.filter(id=recipe_job_1.job_id).update(status='FAILED')
+        recipe_job_1.job.status = 'FAILED'
+        superseded_jobs = {'Job 1': recipe_job_1.job, 'Job 2': recipe_job_2.job}
+
+        graph = self.recipe_type.get_recipe_definition().get_graph()
+        delta = RecipeGraphDelta(graph, graph)
+        delta.reprocess_identical_node('Job 2')
+        new_handler = Recipe.objects.create_recipe(recipe_type=self.recipe_type, data=None, event=event,
+                                                   superseded_recipe=recipe, delta=delta,
+                                                   superseded_jobs=superseded_jobs)
+
+        # The new job is inserted as BLOCKED and the handler's models match the database
+        new_recipe_job_2 = RecipeJob.objects.select_related('job').get(recipe_id=new_handler.recipe.id,
+                                                                       job_name='Job 2')
+        self.assertEqual(new_recipe_job_2.job.status, 'BLOCKED')
+        self.assertIsNotNone(new_recipe_job_2.job.last_status_change)
+        handler_jobs = {recipe_job.job_name: recipe_job.job for recipe_job in new_handler.recipe_jobs}
+        self.assertEqual(handler_jobs['Job 2'].id, new_recipe_job_2.job_id)
+        self.assertEqual(handler_jobs['Job 2'].status, 'BLOCKED')
+
     def test_successful_supersede_same_recipe_type(self):
         """Tests calling RecipeManager.create_recipe() to supersede a recipe with the same recipe type."""
 
@@ -52,6 +52,9 @@ if ELASTICSEARCH_URLS:
 BROKER_URL = os.environ.get('SCALE_BROKER_URL', BROKER_URL)
 QUEUE_NAME = os.environ.get('SCALE_QUEUE_NAME', QUEUE_NAME)
 
+if os.environ.get('SCALE_SCHEDULER_METRICS_PORT'):
+    SCHEDULER_METRICS_PORT = int(os.environ.get('SCALE_SCHEDULER_METRICS_PORT'))
+
 DB_HOST = os.environ.get('SCALE_DB_HOST', '')
 if DB_HOST == '':
         DB_HOST = os.environ.get('DB_PORT_5432_TCP_ADDR', '')
@@ -5,6 +5,8 @@ from queue.models import DEFAULT_QUEUE_ORDER
 
 
 DEFAULT_NUM_MESSAGE_HANDLERS = 0
+DEFAULT_MAX_MESSAGE_HANDLERS = 0
+DEFAULT_MAX_MESSAGE_LATENCY = 30
 
 
 class SchedulerConfiguration(object):
@@ -19,9 +21,13 @@ class SchedulerConfiguration(object):
 
         self.is_paused = True
         self.num_message_handlers = DEFAULT_NUM_MESSAGE_HANDLERS
+        self.max_message_handlers = DEFAULT_MAX_MESSAGE_HANDLERS
+        self.max_message_latency = DEFAULT_MAX_MESSAGE_LATENCY
         self.queue_mode = DEFAULT_QUEUE_ORDER
 
         if scheduler:
             self.is_paused = scheduler.is_paused
             self.num_message_handlers = scheduler.num_message_handlers
+            self.max_message_handlers = scheduler.max_message_handlers
+            self.max_message_latency = scheduler.max_message_latency
             self.queue_mode = scheduler.queue_mode
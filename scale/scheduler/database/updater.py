@@ -1,43 +1,116 @@
 """Defines the class that performs the Scale database update"""
 from __future__ import unicode_literals
 
+import datetime
 import logging
+import threading
+import time
+from collections import deque
 
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils.timezone import now
 
 from job.execution.tasks.json.results.task_results import TaskResults
 from job.models import JobExecution, JobExecutionEnd, JobExecutionOutput
+from scheduler.models import Scheduler
 from util.exceptions import TerminatedCommand
 from util.parse import datetime_to_string
 
 
+# The number of workers that update job executions concurrently
+NUM_WORKERS = 4
+
+# The job ID space is split into this many ranges per worker so that workers that finish early can take more work
+RANGES_PER_WORKER = 4
+
+# Batches are sized (in job executions) to take about this long, within the minimum and maximum batch size
+TARGET_BATCH_SECONDS = 2.0
+INITIAL_BATCH_SIZE = 500
+MIN_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 10000
+
+# How often the progress and range checkpoints are saved to the database
+PROGRESS_INTERVAL = datetime.timedelta(seconds=10)
+
+
 logger = logging.getLogger(__name__)
 
 
 class DatabaseUpdater(object):
-    """This class manages the Scale database update. This class is thread-safe."""
+    """This class manages the Scale database update. The job ID space of the job executions to update is split into
+    ranges that are updated by several concurrent workers. The position of each range is checkpointed in the database
+    along with the overall progress so that an interrupted update resumes where it left off. This class is
+    thread-safe."""
 
-    def __init__(self):
+    def __init__(self, num_workers=NUM_WORKERS):
         """Constructor
+
+        :param num_workers: The number of workers that update job executions concurrently
+        :type num_workers: int
         """
 
+        self._num_workers = num_workers
         self._running = True
         self._updated_job_exe = 0
         self._total_job_exe = 0
 
+        self._error = None
+        self._lock = threading.Lock()
+        self._ranges = []  # All ranges, used for checkpoints
+        self._ranges_to_update = deque()  # Ranges not yet taken by a worker
+        self._started = None
+        self._updated_at_start = 0
+
     def update(self):
         """Runs the database update
         """
 
         self._perform_update_init()
 
-        while True:
-            if not self._running:
-                raise TerminatedCommand()
+        workers = []
+        for i in xrange(min(self._num_workers, len(self._ranges_to_update))):
+            worker = threading.Thread(target=self._run_worker, name='DatabaseUpdater-%d' % i)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(PROGRESS_INTERVAL.total_seconds())
+                self._save_progress()
+        self._save_progress()
 
-            if self._updated_job_exe >= self._total_job_exe:
-                break
-            self._perform_update_iteration()
+        if self._error:
+            raise self._error
+        if not self._running:
+            raise TerminatedCommand()
+
+    def get_progress(self):
+        """Returns the progress of the database update
+
+        :returns: The progress dict, including the rate (job executions per second), ETA, and range checkpoints
+        :rtype: dict
+        """
+
+        when = now()
+        with self._lock:
+            total = self._total_job_exe
+            updated = self._updated_job_exe
+            ranges = [key_range.get_dict() for key_range in self._ranges]
+            elapsed = (when - self._started).total_seconds() if self._started else 0.0
+            updated_now = updated - self._updated_at_start
+
+        rate = float(updated_now) / elapsed if elapsed > 0.0 else 0.0
+        eta = None
+        if updated >= total:
+            eta = when
+        elif rate > 0.0:
+            eta = when + datetime.timedelta(seconds=float(total - updated) / rate)
+
+        return {'total_count': total, 'updated_count': updated, 'rate': round(rate, 1),
+                'eta': datetime_to_string(eta) if eta else None, 'last_updated': datetime_to_string(when),
+                'ranges': ranges}
 
     def stop(self):
         """Informs the database updater to stop running
@@ -54,17 +127,124 @@ class DatabaseUpdater(object):
         msg += 'job_exe, job_exe_end, and job_exe_output models.'
         logger.info(msg)
         logger.info('Counting the number of job executions that need to be updated...')
-        self._total_job_exe = JobExecution.objects.filter(status__isnull=False).count()
-        logger.info('Found %d job executions that need to be updated', self._total_job_exe)
+        remaining = JobExecution.objects.filter(status__isnull=False).count()
+        logger.info('Found %d job executions that need to be updated', remaining)
+
+        # Resume from the checkpoints of an interrupted update if there are any
+        progress = Scheduler.objects.get_database_update()
+        ranges = [KeyRange.from_dict(range_dict) for range_dict in progress.get('ranges', [])]
+        if remaining and ranges and not all(key_range.is_done() for key_range in ranges):
+            self._total_job_exe = max(progress.get('total_count', 0), remaining)
+            logger.info('Resuming the database update from %d checkpointed range(s)', len(ranges))
+        else:
+            self._total_job_exe = remaining
+            ranges = self._create_ranges() if remaining else []
+        self._updated_job_exe = self._total_job_exe - remaining
+        self._updated_at_start = self._updated_job_exe
+        self._started = now()
+
+        self._ranges = ranges
+        self._ranges_to_update = deque(key_range for key_range in ranges if not key_range.is_done())
+        self._save_progress()
+
+    def _create_ranges(self):
+        """Splits the job IDs of the job executions that need to be updated into ranges
+
+        :returns: The list of ranges
+        :rtype: list
+        """
+
+        bounds = JobExecution.objects.filter(status__isnull=False).aggregate(min_id=Min('job_id'), max_id=Max('job_id'))
+        min_id = bounds['min_id']
+        end_id = bounds['max_id'] + 1
+        num_ranges = self._num_workers * RANGES_PER_WORKER
+        range_size = max(1, -(-(end_id - min_id) // num_ranges))  # Ceiling division
+
+        ranges = []
+        for start in xrange(min_id, end_id, range_size):
+            ranges.append(KeyRange(start, min(start + range_size, end_id)))
+        return ranges
+
+    def _get_next_range(self):
+        """Returns the next range that needs to be updated
+
+        :returns: The next range, possibly None
+        :rtype: :class:`scheduler.database.updater.KeyRange`
+        """
+
+        with self._lock:
+            if self._ranges_to_update:
+                return self._ranges_to_update.popleft()
+        return None
+
+    def _run_worker(self):
+        """Updates ranges until all ranges are updated or the updater is stopped
+        """
+
+        try:
+            while self._running:
+                key_range = self._get_next_range()
+                if not key_range:
+                    break
+                self._update_range(key_range)
+        except Exception as ex:
+            logger.exception('Database update worker encountered error')
+            with self._lock:
+                if not self._error:
+                    self._error = ex
+            self._running = False
+        finally:
+            connection.close()
+
+    def _save_progress(self):
+        """Logs the progress of the database update and saves it to the database
+        """
+
+        progress = self.get_progress()
+        total = progress['total_count']
+        percent = (float(progress['updated_count']) / float(total)) * 100.0 if total else 100.0
+        logger.info('Completed %d of %d job executions (%.1f%%) at %.1f per second, ETA %s', progress['updated_count'],
+                    total, percent, progress['rate'], progress['eta'])
+        Scheduler.objects.update_scheduler({'database_update': progress})
 
-    def _perform_update_iteration(self):
-        """Performs a single iteration of the database update
+    def _update_range(self, key_range):
+        """Updates the job executions in the given range in batches until the range is done or the updater is stopped.
+        Each batch is sized to take about TARGET_BATCH_SECONDS.
+
+        :param key_range: The range to update
+        :type key_range: :class:`scheduler.database.updater.KeyRange`
         """
 
-        # Retrieve 500 job executions that need to be updated and get job IDs
-        job_ids = set()
-        for job_exe in JobExecution.objects.filter(status__isnull=False).only('id', 'job_id')[:500]:
-            job_ids.add(job_exe.job_id)
+        batch_size = INITIAL_BATCH_SIZE
+        while self._running and not key_range.is_done():
+            started = time.time()
+
+            # Retrieve the job IDs of the next batch of job executions that need to be updated in this range
+            job_exe_qry = JobExecution.objects.filter(status__isnull=False, job_id__gte=key_range.next,
+                                                      job_id__lt=key_range.end)
+            job_ids = set(job_exe_qry.order_by('job_id').values_list('job_id', flat=True)[:batch_size])
+
+            if job_ids:
+                job_exe_count = self._update_job_exes(job_ids)
+                next_id = max(job_ids) + 1
+            else:
+                job_exe_count = 0
+                next_id = key_range.end
+
+            with self._lock:
+                key_range.next = next_id
+                self._updated_job_exe += job_exe_count
+            logger.debug('Updated %d job executions in range %d-%d', job_exe_count, key_range.start, key_range.end)
+            batch_size = get_next_batch_size(batch_size, time.time() - started)
+
+    def _update_job_exes(self, job_ids):
+        """Updates all of the job executions for the given jobs
+
+        :param job_ids: The IDs of the jobs
+        :type job_ids: set
+        :returns: The number of job executions that were updated
+        :rtype: int
+        """
 
         # Retrieve all job executions for those jobs in sorted order
         job_exe_count = 0
@@ -164,7 +344,71 @@ class DatabaseUpdater(object):
             JobExecutionEnd.objects.bulk_create(job_exe_end_models)
             JobExecutionOutput.objects.bulk_create(job_exe_output_models)
 
-        logger.info('Updated %d job executions', job_exe_count)
-        self._updated_job_exe += job_exe_count
-        percent = (float(self._updated_job_exe) / float(self._total_job_exe)) * 100.00
-        print 'Completed %s of %s job executions (%.1f%%)' % (self._updated_job_exe, self._total_job_exe, percent)
+        return job_exe_count
+
+
+class KeyRange(object):
+    """Represents a range of job IDs to update along with the position reached within the range"""
+
+    def __init__(self, start, end, next_id=None):
+        """Constructor
+
+        :param start: The first job ID in the range
+        :type start: int
+        :param end: The end of the range (exclusive)
+        :type end: int
+        :param next_id: The next job ID to update, defaults to the start of the range
+        :type next_id: int
+        """
+
+        self.start = start
+        self.end = end
+        self.next = next_id if next_id is not None else start
+
+    @staticmethod
+    def from_dict(range_dict):
+        """Returns the range represented by the given checkpoint dict
+
+        :param range_dict: The checkpoint dict
+        :type range_dict: dict
+        :returns: The range
+        :rtype: :class:`scheduler.database.updater.KeyRange`
+        """
+
+        return KeyRange(range_dict['start'], range_dict['end'], range_dict['next'])
+
+    def get_dict(self):
+        """Returns the checkpoint dict for this range
+
+        :returns: The checkpoint dict
+        :rtype: dict
+        """
+
+        return {'start': self.start, 'end': self.end, 'next': self.next}
+
+    def is_done(self):
+        """Indicates whether every job ID in this range has been updated
+
+        :returns: True if the range is done, False otherwise
+        :rtype: bool
+        """
+
+        return self.next >= self.end
+
+
+def get_next_batch_size(batch_size, duration):
+    """Returns the size of the next batch, adjusted so that a batch takes about TARGET_BATCH_SECONDS
+
+    :param batch_size: The size of the last batch
+    :type batch_size: int
+    :param duration: How long the last batch took in seconds
+    :type duration: float
+    :returns: The size of the next batch
+    :rtype: int
+    """
+
+    if duration < TARGET_BATCH_SECONDS / 2.0:
+        batch_size *= 2
+    elif duration > TARGET_BATCH_SECONDS * 2.0:
+        batch_size //= 2
+    return max(MIN_BATCH_SIZE, min(batch_size, MAX_BATCH_SIZE))
@@ -0,0 +1,74 @@
+"""Defines the class that records a distribution of durations"""
+from __future__ import unicode_literals
+
+
+# The upper bounds in seconds of the histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram(object):
+    """This class records the count of observed values that fall within each of a fixed set of buckets, along with the
+    total count and sum, matching the Prometheus histogram type. This class is not thread-safe.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Constructor
+
+        :param buckets: The sorted upper bounds of the buckets
+        :type buckets: tuple
+        """
+
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)  # Count of values <= each bucket bound (not cumulative)
+        self.count = 0
+        self.max = 0.0
+        self.sum = 0.0
+
+    def get_cumulative_counts(self):
+        """Returns the cumulative count of values less than or equal to each bucket bound
+
+        :returns: A list of (bucket bound, cumulative count) tuples
+        :rtype: list
+        """
+
+        cumulative_counts = []
+        total = 0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            total += bucket_count
+            cumulative_counts.append((bound, total))
+        return cumulative_counts
+
+    def get_quantile(self, quantile):
+        """Returns an estimate of the given quantile, which is the bound of the first bucket holding at least that
+        fraction of the values. Values beyond the last bucket are estimated by the maximum value.
+
+        :param quantile: The quantile between 0 and 1
+        :type quantile: float
+        :returns: The estimated value of the quantile, possibly None if nothing has been observed
+        :rtype: float
+        """
+
+        if not self.count:
+            return None
+
+        target = quantile * self.count
+        for bound, cumulative_count in self.get_cumulative_counts():
+            if cumulative_count >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def observe(self, value):
+        """Records the given value
+
+        :param value: The value to record
+        :type value: float
+        """
+
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
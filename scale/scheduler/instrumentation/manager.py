@@ -0,0 +1,201 @@
+"""Defines the class that manages the instrumentation metrics of the scheduler"""
+from __future__ import unicode_literals
+
+import threading
+import time
+from contextlib import contextmanager
+
+from scheduler.instrumentation.histogram import Histogram
+
+
+# Metric names
+THREAD_LOOP_SECONDS = 'scale_scheduler_thread_loop_seconds'
+THREAD_LAG_SECONDS = 'scale_scheduler_thread_lag_seconds'
+THREAD_ERRORS = 'scale_scheduler_thread_errors_total'
+PHASE_SECONDS = 'scale_scheduler_phase_seconds'
+JOBS_LAUNCHED = 'scale_scheduler_jobs_launched_total'
+TASKS_LAUNCHED = 'scale_scheduler_tasks_launched_total'
+OFFERS_RECEIVED = 'scale_scheduler_offers_received_total'
+OFFERS_USED = 'scale_scheduler_offers_used_total'
+OFFERS_DECLINED = 'scale_scheduler_offers_declined_total'
+MESSAGES_SENT = 'scale_scheduler_messages_sent_total'
+
+# The type and help text of each metric
+METRICS = {
+    THREAD_LOOP_SECONDS: ('histogram', 'Duration of each loop of a scheduler background thread'),
+    THREAD_LAG_SECONDS: ('histogram', 'How late each loop of a scheduler background thread started after its throttle'),
+    THREAD_ERRORS: ('counter', 'Number of scheduler background thread loops that raised an error'),
+    PHASE_SECONDS: ('histogram', 'Duration of each named phase within a scheduler background thread loop'),
+    JOBS_LAUNCHED: ('counter', 'Number of new job executions launched'),
+    TASKS_LAUNCHED: ('counter', 'Number of tasks launched'),
+    OFFERS_RECEIVED: ('counter', 'Number of resource offers received from Mesos'),
+    OFFERS_USED: ('counter', 'Number of resource offers accepted with at least one task'),
+    OFFERS_DECLINED: ('counter', 'Number of resource offers accepted without any tasks, which declines them'),
+    MESSAGES_SENT: ('counter', 'Number of command messages sent'),
+}
+
+
+class InstrumentationManager(object):
+    """This class manages the histograms and counters that instrument the scheduler. The metrics can be exported in the
+    Prometheus text format and are summarized in the status JSON. This class is thread-safe."""
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._counters = {}  # {(Metric name, Labels): Count}
+        self._histograms = {}  # {(Metric name, Labels): Histogram}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Clears all metrics from the manager. This method is intended for testing only.
+        """
+
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def generate_prometheus_text(self):
+        """Generates the Prometheus text exposition of all of the metrics
+
+        :returns: The metrics in the Prometheus text format
+        :rtype: string
+        """
+
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {}
+            for key, histogram in self._histograms.items():
+                histograms[key] = (histogram.get_cumulative_counts(), histogram.count, histogram.sum)
+
+        lines = []
+        for name in sorted(METRICS.keys()):
+            metric_type, help_text = METRICS[name]
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, metric_type))
+            if metric_type == 'counter':
+                for key in sorted(key for key in counters if key[0] == name):
+                    lines.append('%s%s %d' % (name, _format_labels(key[1]), counters[key]))
+            else:
+                for key in sorted(key for key in histograms if key[0] == name):
+                    cumulative_counts, count, total = histograms[key]
+                    for bound, cumulative_count in cumulative_counts:
+                        labels = key[1] + (('le', '%g' % bound),)
+                        lines.append('%s_bucket%s %d' % (name, _format_labels(labels), cumulative_count))
+                    lines.append('%s_bucket%s %d' % (name, _format_labels(key[1] + (('le', '+Inf'),)), count))
+                    lines.append('%s_sum%s %.6f' % (name, _format_labels(key[1]), total))
+                    lines.append('%s_count%s %d' % (name, _format_labels(key[1]), count))
+        return '\n'.join(lines) + '\n'
+
+    def generate_status_json(self, status_dict):
+        """Generates the portion of the status JSON that summarizes the instrumentation metrics
+
+        :param status_dict: The status JSON dict
+        :type status_dict: dict
+        """
+
+        threads_dict = {}
+        counters_dict = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                labels_dict = dict(labels)
+                thread_dict = threads_dict.setdefault(labels_dict['thread'], {'errors': 0, 'phases': {}})
+                if name == THREAD_LOOP_SECONDS:
+                    thread_dict['loops'] = histogram.count
+                    thread_dict['loop_seconds'] = _summarize_histogram(histogram)
+                elif name == THREAD_LAG_SECONDS:
+                    thread_dict['lag_seconds'] = _summarize_histogram(histogram)
+                elif name == PHASE_SECONDS:
+                    thread_dict['phases'][labels_dict['phase']] = _summarize_histogram(histogram)
+            for (name, labels), count in self._counters.items():
+                if name == THREAD_ERRORS:
+                    thread_dict = threads_dict.setdefault(dict(labels)['thread'], {'errors': 0, 'phases': {}})
+                    thread_dict['errors'] = count
+                else:
+                    counter_name = name.replace('scale_scheduler_', '', 1).replace('_total', '')
+                    counters_dict[counter_name] = counters_dict.get(counter_name, 0) + count
+
+        status_dict['instrumentation'] = {'threads': threads_dict, 'counters': counters_dict}
+
+    def increment(self, name, count=1, **labels):
+        """Increments the given counter
+
+        :param name: The name of the counter
+        :type name: string
+        :param count: The amount to increment the counter by
+        :type count: int
+        :param labels: The labels of the counter
+        :type labels: dict
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + count
+
+    def observe(self, name, value, **labels):
+        """Records the given value in the given histogram
+
+        :param name: The name of the histogram
+        :type name: string
+        :param value: The value to record
+        :type value: float
+        :param labels: The labels of the histogram
+        :type labels: dict
+        """
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    @contextmanager
+    def time_phase(self, thread, phase):
+        """Returns a context manager that records the duration of the given phase of the given thread
+
+        :param thread: The name of the thread
+        :type thread: string
+        :param phase: The name of the phase
+        :type phase: string
+        """
+
+        started = time.time()
+        try:
+            yield
+        finally:
+            self.observe(PHASE_SECONDS, time.time() - started, thread=thread, phase=phase)
+
+
+def _format_labels(labels):
+    """Formats the given labels for the Prometheus text format
+
+    :param labels: The labels as a tuple of (name, value) tuples
+    :type labels: tuple
+    :returns: The formatted labels
+    :rtype: string
+    """
+
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = ('%s' % value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append('%s="%s"' % (name, value))
+    return '{%s}' % ','.join(pairs)
+
+
+def _summarize_histogram(histogram):
+    """Summarizes the given histogram for the status JSON
+
+    :param histogram: The histogram
+    :type histogram: :class:`scheduler.instrumentation.histogram.Histogram`
+    :returns: The summary dict
+    :rtype: dict
+    """
+
+    avg = histogram.sum / histogram.count if histogram.count else 0.0
+    p95 = histogram.get_quantile(0.95) or 0.0
+    return {'count': histogram.count, 'avg': round(avg, 3), 'p95': round(p95, 3), 'max': round(histogram.max, 3)}
+
+
+instrumentation_mgr = InstrumentationManager()
@@ -0,0 +1,59 @@
+"""Defines the HTTP server that exposes the scheduler's instrumentation metrics to Prometheus"""
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from scheduler.instrumentation.manager import instrumentation_mgr
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Handles requests for the scheduler metrics"""
+
+    def do_GET(self):
+        """Responds with the metrics in the Prometheus text format
+        """
+
+        if self.path.split('?')[0] not in ('/metrics', '/metrics/'):
+            self.send_error(404)
+            return
+
+        body = instrumentation_mgr.generate_prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Logs requests at debug level instead of writing them to stderr
+        """
+
+        logger.debug('Metrics request from %s: %s', self.address_string(), format % args)
+
+
+def start_metrics_server(port, address=''):
+    """Starts a daemon thread that serves the scheduler metrics at /metrics on the given port
+
+    :param port: The port to listen on
+    :type port: int
+    :param address: The address to bind to, defaults to all interfaces
+    :type address: string
+    :returns: The HTTP server
+    :rtype: :class:`BaseHTTPServer.HTTPServer`
+    """
+
+    server = HTTPServer((address, port), MetricsRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, name='MetricsServer')
+    thread.daemon = True
+    thread.start()
+    logger.info('Serving scheduler metrics on port %d', port)
+    return server
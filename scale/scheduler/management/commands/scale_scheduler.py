@@ -19,6 +19,7 @@ except ImportError:
         def __init__(self, *args, **kargs):
             pass
 
+from scheduler.instrumentation.server import start_metrics_server
 from scheduler.manager import scheduler_mgr
 from scheduler.scale_scheduler import ScaleScheduler
 
@@ -82,6 +83,12 @@ class Command(BaseCommand):
         if webserver_address:
             framework.webui_url = webserver_address
 
+        if settings.SCHEDULER_METRICS_PORT:
+            try:
+                start_metrics_server(settings.SCHEDULER_METRICS_PORT)
+            except Exception:
+                logger.exception('Failed to start the scheduler metrics server')
+
         logger.info('Connecting to Mesos master at %s', mesos_master)
 
         # TODO(vinod): Make checkpointing the default when it is default on the slave.
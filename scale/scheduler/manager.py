@@ -38,6 +38,7 @@ class SchedulerManager(object):
         self._lock = threading.Lock()
         self._new_offer_count = 0  # Number of new offers received since last status JSON
         self._offer_launch_count = 0  # Number of offers used in launches since last status JSON
+        self._sync_durations = {}  # {Sync name: Duration in seconds of the most recent sync}
         self._task_fin_count = 0  # Number of tasks finished since last status JSON
         self._task_launch_count = 0  # Number of tasks launched since last status JSON
         self._task_update_count = 0  # Number of task updates since last status JSON
@@ -71,6 +72,18 @@ class SchedulerManager(object):
             self._task_launch_count += task_launch_count
             self._offer_launch_count = offer_launch_count
 
+    def add_sync_duration(self, name, duration):
+        """Records the duration of the most recent sync of the given name
+
+        :param name: The name of the sync
+        :type name: string
+        :param duration: The duration of the sync
+        :type duration: :class:`datetime.timedelta`
+        """
+
+        with self._lock:
+            self._sync_durations[name] = duration.total_seconds()
+
     def add_task_update_counts(self, was_task_finished, was_job_finished):
         """Add metric counts from a new task update
 
@@ -105,6 +118,7 @@ class SchedulerManager(object):
             task_fin_count = self._task_fin_count
             task_launch_count = self._task_launch_count
             task_update_count = self._task_update_count
+            sync_durations = {name: round(secs, 3) for name, secs in self._sync_durations.items()}
             self._last_json = when
             self._job_fin_count = 0
             self._job_launch_count = 0
@@ -133,7 +147,7 @@ class SchedulerManager(object):
         metrics_dict = {'new_offers_per_sec': new_offer_per_sec, 'task_updates_per_sec': task_update_per_sec,
                         'tasks_finished_per_sec': task_fin_per_sec, 'jobs_finished_per_sec': job_fin_per_sec,
                         'jobs_launched_per_sec': job_launch_per_sec, 'tasks_launched_per_sec': task_launch_per_sec,
-                        'offers_launched_per_sec': offer_launch_per_sec}
+                        'offers_launched_per_sec': offer_launch_per_sec, 'sync_durations': sync_durations}
         state_dict = {'name': state.state, 'title': state.title, 'description': state.description}
         status_dict['scheduler'] = {'hostname': self.hostname, 'mesos': mesos_dict, 'metrics': metrics_dict,
                                     'state': state_dict}
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0008_scheduler_database_update'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduler',
+            name='max_message_handlers',
+            field=models.IntegerField(default=10),
+        ),
+        migrations.AddField(
+            model_name='scheduler',
+            name='max_message_latency',
+            field=models.IntegerField(default=30),
+        ),
+    ]
@@ -28,6 +28,16 @@ class SchedulerManager(models.Manager):
             logger.exception('Initial database import missing master scheduler: 1')
             raise
 
+    def get_database_update(self):
+        """Returns the progress and range checkpoints of the Scale database update
+
+        :returns: The database update progress dict, empty if the update has not started
+        :rtype: dict
+        """
+
+        database_update = self.filter(id=1).values_list('database_update', flat=True).first()
+        return database_update if database_update else {}
+
     def initialize_scheduler(self):
         """Initializes the scheduler table by creating a model if one does not already exist
         """
@@ -132,10 +142,18 @@ class Scheduler(models.Model):
 
     :keyword is_paused: True if the entire cluster is currently paused and should not accept new jobs
     :type is_paused: :class:`django.db.models.BooleanField()`
+    :keyword num_message_handlers: The minimum number of message handlers to have scheduled
+    :type num_message_handlers: :class:`django.db.models.IntegerField`
+    :keyword max_message_handlers: The maximum number of message handlers to scale up to as the message backlog grows
+    :type max_message_handlers: :class:`django.db.models.IntegerField`
+    :keyword max_message_latency: The target maximum time in seconds that a message waits to be handled
+    :type max_message_latency: :class:`django.db.models.IntegerField`
     :keyword master_hostname: The full domain-qualified hostname of the Mesos master
     :type master_hostname: :class:`django.db.models.CharField`
     :keyword master_port: The port being used by the Mesos master REST API
     :type master_port: :class:`django.db.models.IntegerField`
+    :keyword database_update: The progress and range checkpoints of the Scale database update
+    :type database_update: :class:`django.contrib.postgres.fields.JSONField`
     """
 
     QUEUE_MODES = (
@@ -145,10 +163,13 @@ class Scheduler(models.Model):
 
     is_paused = models.BooleanField(default=False)
     num_message_handlers = models.IntegerField(default=2)
+    max_message_handlers = models.IntegerField(default=10)
+    max_message_latency = models.IntegerField(default=30)
     queue_mode = models.CharField(choices=QUEUE_MODES, default=QUEUE_ORDER_FIFO, max_length=50)
     status = django.contrib.postgres.fields.JSONField(default=dict)
     master_hostname = models.CharField(max_length=250, default='localhost')
     master_port = models.IntegerField(default=5050)
+    database_update = django.contrib.postgres.fields.JSONField(default=dict)
 
     objects = SchedulerManager()
 
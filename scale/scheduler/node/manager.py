@@ -6,6 +6,7 @@ import threading
 
 from node.models import Node
 from scheduler.node.node_class import Node as SchedulerNode
+from scheduler.sync.change_tracker import ChangeTracker
 
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,8 @@ class NodeManager(object):
         """
 
         self._agents = {}  # {Agent ID: Agent}
+        self._change_tracker = ChangeTracker()
+        self._is_scheduler_paused = None
         self._new_agents = {}  # {Agent ID: Agent}
         self._nodes = {}  # {Hostname: SchedulerNode}
         self._lock = threading.Lock()
@@ -31,6 +34,8 @@ class NodeManager(object):
             self._agents = {}
             self._new_agents = {}
             self._nodes = {}
+        self._change_tracker.reset()
+        self._is_scheduler_paused = None
 
     def generate_status_json(self, status_dict):
         """Generates the portion of the status JSON that describes the nodes
@@ -159,10 +164,23 @@ class NodeManager(object):
                 new_agents[agent.agent_id] = agent
                 hostnames.add(agent.hostname)
 
+        # Every node needs to be updated when the scheduler's paused state changes, otherwise only the node models that
+        # changed since the last sync are needed
+        if scheduler_config.is_paused != self._is_scheduler_paused:
+            self._change_tracker.reset()
+            self._is_scheduler_paused = scheduler_config.is_paused
+        modified_since = self._change_tracker.get_modified_since()
+
         # Get all existing node models needed (online and/or active)
         node_models = {}
-        for node_model in Node.objects.get_scheduler_nodes(hostnames):
+        for node_model in Node.objects.get_scheduler_nodes(hostnames, modified_since):
             node_models[node_model.hostname] = node_model
+        self._change_tracker.update(node_models.values(), modified_since)
+        # Unchanged node models are still needed for new agents
+        missing_hostnames = [agent.hostname for agent in new_agents.values() if agent.hostname not in node_models]
+        if missing_hostnames:
+            for node_model in Node.objects.filter(hostname__in=missing_hostnames):
+                node_models[node_model.hostname] = node_model
         # Create new nodes for host names that have never been seen before
         new_hostnames = []
         new_agent_ids = []
@@ -203,18 +221,19 @@ class NodeManager(object):
                 hostname = node_model.hostname
                 if hostname in self._nodes:
                     # Host name already exists, update model information
-                    node = self._nodes[hostname]
-                    node.update_from_model(node_model, scheduler_config)
-                    if node.should_be_removed():
-                        logger.info('Node %s removed since it is both offline and deprecated', hostname)
-                        del self._nodes[hostname]
-                        if node.agent_id in self._agents:
-                            del self._agents[node.agent_id]
+                    self._nodes[hostname].update_from_model(node_model, scheduler_config)
                 else:
                     # Host name does not exist, must be an active node with no agent ID yet
                     logger.info('Active node %s registered from the database (currently offline)', hostname)
                     self._nodes[hostname] = SchedulerNode('', node_model, scheduler_config)
                     self._nodes[hostname].update_from_mesos(is_online=False)
+            # Remove nodes that have gone offline, whether or not their models changed
+            for node in list(self._nodes.values()):
+                if node.should_be_removed():
+                    logger.info('Node %s removed since it is both offline and deprecated', node.hostname)
+                    del self._nodes[node.hostname]
+                    if node.agent_id in self._agents:
+                        del self._agents[node.agent_id]
             # Finished this batch of new agents
             for new_agent in new_agents.values():
                 if new_agent.agent_id in self._new_agents:
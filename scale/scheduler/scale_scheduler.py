@@ -21,6 +21,7 @@ from node.resources.resource import ScalarResource
 from queue.models import Queue
 from scheduler.cleanup.manager import cleanup_mgr
 from scheduler.initialize import initialize_system
+from scheduler.instrumentation.manager import instrumentation_mgr, OFFERS_RECEIVED
 from scheduler.manager import scheduler_mgr
 from scheduler.models import Scheduler
 from scheduler.node.agent import Agent
@@ -224,6 +225,7 @@ class ScaleScheduler(MesosScheduler):
         num_offers = len(resource_offers)
         logger.info('Received %d offer(s) with %s from %d node(s)', num_offers, total_resources, len(agents))
         scheduler_mgr.add_new_offer_count(num_offers)
+        instrumentation_mgr.increment(OFFERS_RECEIVED, num_offers)
 
         duration = now() - started
         msg = 'Scheduler resourceOffers() took %.3f seconds'
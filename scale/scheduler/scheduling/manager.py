@@ -13,13 +13,14 @@ from mesos.interface import mesos_pb2
 from job.configuration.configurators import ScheduledExecutionConfigurator
 from job.execution.job_exe import RunningJobExecution
 from job.execution.manager import job_exe_mgr
-from job.messages.running_jobs import create_running_job_messages
 from job.models import Job, JobExecution, JobExecutionEnd
 from job.tasks.manager import task_mgr
 from mesos_api.tasks import create_mesos_task
 from node.resources.node_resources import NodeResources
 from queue.job_exe import QueuedJobExecution
 from queue.models import Queue
+from scheduler.instrumentation.manager import (instrumentation_mgr, JOBS_LAUNCHED, OFFERS_DECLINED, OFFERS_USED,
+                                               TASKS_LAUNCHED)
 from scheduler.manager import scheduler_mgr
 from scheduler.node.manager import node_mgr
 from scheduler.resources.agent import ResourceSet
@@ -39,6 +40,9 @@ SCHEDULE_QUERY_WARN_THRESHOLD = datetime.timedelta(milliseconds=300)
 # Warning threshold for task launch duration
 LAUNCH_TASK_WARN_THRESHOLD = datetime.timedelta(milliseconds=300)
 
+# The name of the thread that performs scheduling, used to label the scheduling phase metrics
+THREAD_NAME = 'Scheduling'
+
 # It is considered a resource shortage if a task waits this many generations without being scheduled
 TASK_SHORTAGE_WAIT_COUNT = 10
 
@@ -76,10 +80,13 @@ class SchedulingManager(object):
         running_job_exes = job_exe_mgr.get_running_job_exes()
         workspaces = workspace_mgr.get_workspaces()
 
-        nodes = self._prepare_nodes(tasks, running_job_exes, when)
-        fulfilled_nodes = self._schedule_waiting_tasks(nodes, running_job_exes, when)
+        with instrumentation_mgr.time_phase(THREAD_NAME, 'prepare_nodes'):
+            nodes = self._prepare_nodes(tasks, running_job_exes, when)
+        with instrumentation_mgr.time_phase(THREAD_NAME, 'waiting_tasks'):
+            fulfilled_nodes = self._schedule_waiting_tasks(nodes, running_job_exes, when)
 
-        sys_tasks_scheduled = self._schedule_system_tasks(fulfilled_nodes, job_type_resources, when)
+        with instrumentation_mgr.time_phase(THREAD_NAME, 'system_tasks'):
+            sys_tasks_scheduled = self._schedule_system_tasks(fulfilled_nodes, job_type_resources, when)
 
         job_exe_count = 0
         if sys_tasks_scheduled:
@@ -95,9 +102,13 @@ class SchedulingManager(object):
             logger.warning('Scheduler framework ID changed, skipping task launch')
             return 0
 
-        self._allocate_offers(nodes)
-        task_count, offer_count = self._launch_tasks(driver, nodes)
+        with instrumentation_mgr.time_phase(THREAD_NAME, 'allocate_offers'):
+            self._allocate_offers(nodes)
+        with instrumentation_mgr.time_phase(THREAD_NAME, 'launch'):
+            task_count, offer_count = self._launch_tasks(driver, nodes)
         scheduler_mgr.add_scheduling_counts(job_exe_count, task_count, offer_count)
+        instrumentation_mgr.increment(JOBS_LAUNCHED, job_exe_count)
+        instrumentation_mgr.increment(TASKS_LAUNCHED, task_count)
         return task_count
 
     def _allocate_offers(self, nodes):
@@ -213,6 +224,11 @@ class SchedulingManager(object):
                 node_count += 1
             if mesos_offer_ids:
                 total_node_count += 1
+                # Accepting offers without any tasks declines them
+                if mesos_tasks:
+                    instrumentation_mgr.increment(OFFERS_USED, len(mesos_offer_ids))
+                else:
+                    instrumentation_mgr.increment(OFFERS_DECLINED, len(mesos_offer_ids))
                 try:
                     driver.launchTasks(mesos_offer_ids, mesos_tasks)
                 except Exception:
@@ -310,7 +326,9 @@ class SchedulingManager(object):
         ignore_job_type_ids = self._calculate_job_types_to_ignore(job_types, job_type_limits)
         started = now()
 
-        for queue in Queue.objects.get_queue(scheduler_mgr.config.queue_mode, ignore_job_type_ids)[:QUEUE_LIMIT]:
+        queues = list(Queue.objects.get_queue(scheduler_mgr.config.queue_mode, ignore_job_type_ids)[:QUEUE_LIMIT])
+        Queue.objects.cache_job_interfaces(queues)
+        for queue in queues:
             job_exe = QueuedJobExecution(queue)
 
             # Canceled job executions get processed as scheduled executions
@@ -504,14 +522,16 @@ class SchedulingManager(object):
                 available_nodes[node.node_id] = node
 
         try:
-            scheduled_job_exes = self._process_queue(available_nodes, job_types, job_type_limits, job_type_resources,
-                                                     workspaces)
-            running_job_exes = self._process_scheduled_job_executions(framework_id, scheduled_job_exes, job_types,
-                                                                      workspaces)
+            with instrumentation_mgr.time_phase(THREAD_NAME, 'queue_processing'):
+                scheduled_job_exes = self._process_queue(available_nodes, job_types, job_type_limits,
+                                                         job_type_resources, workspaces)
+            with instrumentation_mgr.time_phase(THREAD_NAME, 'db_writes'):
+                running_job_exes = self._process_scheduled_job_executions(framework_id, scheduled_job_exes, job_types,
+                                                                          workspaces)
             all_running_job_exes = []
             for node_id in running_job_exes:
                 all_running_job_exes.extend(running_job_exes[node_id])
-            job_exe_mgr.schedule_job_exes(all_running_job_exes, create_running_job_messages(all_running_job_exes))
+            job_exe_mgr.schedule_job_exes(all_running_job_exes)
             node_ids = set()
             job_exe_count = 0
             scheduled_resources = NodeResources()
@@ -12,4 +12,4 @@ class SchedulerSerializer(serializers.ModelSerializer):
     class Meta(object):
         """Meta class used to define what is serialized and how"""
         model = Scheduler
-        fields = ('is_paused', 'num_message_handlers')
+        fields = ('is_paused', 'num_message_handlers', 'max_message_handlers', 'max_message_latency')
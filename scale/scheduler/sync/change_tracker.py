@@ -0,0 +1,80 @@
+"""Defines the class that tracks which database models have changed since the scheduler last synced with them"""
+from __future__ import unicode_literals
+
+import datetime
+
+from django.utils.timezone import now
+
+
+# Models whose last_modified is this close to the high-water mark are fetched again, since last_modified is set before
+# the model's transaction commits and may come from a host with a slightly different clock
+CHANGE_WINDOW = datetime.timedelta(minutes=1)
+
+# All models are fetched at this interval in case a model was changed without updating its last_modified
+FULL_SYNC_INTERVAL = datetime.timedelta(minutes=5)
+
+
+class ChangeTracker(object):
+    """This class tracks a high-water mark of the last_modified field of a table so that each sync only needs to fetch
+    the models that have changed since the previous sync. This class is not thread-safe and should only be used by the
+    sync that owns it.
+    """
+
+    def __init__(self, change_window=CHANGE_WINDOW, full_sync_interval=FULL_SYNC_INTERVAL):
+        """Constructor
+
+        :param change_window: Models modified within this duration before the high-water mark are fetched again
+        :type change_window: :class:`datetime.timedelta`
+        :param full_sync_interval: The interval at which all models are fetched
+        :type full_sync_interval: :class:`datetime.timedelta`
+        """
+
+        self._change_window = change_window
+        self._full_sync_interval = full_sync_interval
+        self._high_water_mark = None
+        self._last_full_sync = None
+
+    def get_modified_since(self, when=None):
+        """Returns the time from which changed models should be fetched, or None if all models should be fetched
+
+        :param when: The current time, defaults to now
+        :type when: :class:`datetime.datetime`
+        :returns: The time from which to fetch changed models, possibly None
+        :rtype: :class:`datetime.datetime`
+        """
+
+        if not when:
+            when = now()
+
+        if not self._high_water_mark or not self._last_full_sync:
+            return None
+        if when - self._last_full_sync >= self._full_sync_interval:
+            return None
+        return self._high_water_mark - self._change_window
+
+    def reset(self):
+        """Resets the tracker so that all models are fetched by the next sync
+        """
+
+        self._high_water_mark = None
+        self._last_full_sync = None
+
+    def update(self, models, modified_since, when=None):
+        """Updates the high-water mark with the models fetched by a sync
+
+        :param models: The models that were fetched
+        :type models: list
+        :param modified_since: The time that was used to fetch the models, None if all models were fetched
+        :type modified_since: :class:`datetime.datetime`
+        :param when: The time the models were fetched, defaults to now
+        :type when: :class:`datetime.datetime`
+        """
+
+        if not when:
+            when = now()
+
+        if modified_since is None:
+            self._last_full_sync = when
+        for model in models:
+            if model.last_modified and (not self._high_water_mark or model.last_modified > self._high_water_mark):
+                self._high_water_mark = model.last_modified
@@ -3,7 +3,10 @@ from __future__ import unicode_literals
 
 import threading
 
+from django.db.models import Q
+
 from job.models import JobType
+from scheduler.sync.change_tracker import ChangeTracker
 
 
 # TODO: when we calculate duration averages for job types, create a new job type class that contains model, resources,
@@ -15,9 +18,11 @@ class JobTypeManager(object):
         """Constructor
         """
 
+        self._change_tracker = ChangeTracker()
         self._job_type_resources = []
         self._job_types = {}  # {Job Type ID: Job Type}
         self._lock = threading.Lock()
+        self._resources_by_id = {}  # {Job Type ID: Job Type Resources}
 
     def generate_status_json(self, status_dict):
         """Generates the portion of the status JSON that describes the job types
@@ -70,18 +75,34 @@ class JobTypeManager(object):
             return dict(self._job_types)
 
     def sync_with_database(self):
-        """Syncs with the database to retrieve updated job type models
+        """Syncs with the database to retrieve updated job type models. Only the job types that have changed since the
+        last sync are fetched and have their resources parsed.
         """
 
-        update_job_type_resources = []
-        updated_job_types = {}
-        for job_type in JobType.objects.all().iterator():
-            updated_job_types[job_type.id] = job_type
-            update_job_type_resources.append(job_type.get_resources())
+        job_type_ids = set(JobType.objects.values_list('id', flat=True))
+        with self._lock:
+            new_job_type_ids = job_type_ids - set(self._job_types.keys())
+
+        # Fetch the changed job types along with any new job types that were missed by the high-water mark
+        modified_since = self._change_tracker.get_modified_since()
+        job_type_qry = JobType.objects.all()
+        if modified_since:
+            job_type_qry = job_type_qry.filter(Q(last_modified__gte=modified_since) | Q(id__in=new_job_type_ids))
+        changed_job_types = list(job_type_qry.iterator())
+        self._change_tracker.update(changed_job_types, modified_since)
+
+        updated_resources = {}
+        for job_type in changed_job_types:
+            updated_resources[job_type.id] = job_type.get_resources()
 
         with self._lock:
-            self._job_type_resources = update_job_type_resources
-            self._job_types = updated_job_types
+            for job_type in changed_job_types:
+                self._job_types[job_type.id] = job_type
+                self._resources_by_id[job_type.id] = updated_resources[job_type.id]
+            for job_type_id in set(self._job_types.keys()) - job_type_ids:
+                del self._job_types[job_type_id]
+                del self._resources_by_id[job_type_id]
+            self._job_type_resources = list(self._resources_by_id.values())
 
 
 job_type_mgr = JobTypeManager()
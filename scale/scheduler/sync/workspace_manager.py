@@ -3,6 +3,9 @@ from __future__ import unicode_literals
 
 import threading
 
+from django.db.models import Q
+
+from scheduler.sync.change_tracker import ChangeTracker
 from storage.models import Workspace
 
 
@@ -13,8 +16,10 @@ class WorkspaceManager(object):
         """Constructor
         """
 
-        self._workspaces = {}  # {Workspace Name: Workspace}
+        self._change_tracker = ChangeTracker()
         self._lock = threading.Lock()
+        self._workspaces = {}  # {Workspace Name: Workspace}
+        self._workspaces_by_id = {}  # {Workspace ID: Workspace}
 
     def get_workspaces(self):
         """Returns a dict of all workspaces, stored by name
@@ -27,15 +32,28 @@ class WorkspaceManager(object):
             return dict(self._workspaces)
 
     def sync_with_database(self):
-        """Syncs with the database to retrieve updated workspace models
+        """Syncs with the database to retrieve updated workspace models. Only the workspaces that have changed since
+        the last sync are fetched, so unchanged workspaces keep their existing brokers.
         """
 
-        updated_workspaces = {}
-        for workspace in Workspace.objects.all().iterator():
-            updated_workspaces[workspace.name] = workspace
+        workspace_ids = set(Workspace.objects.values_list('id', flat=True))
+        with self._lock:
+            new_workspace_ids = workspace_ids - set(self._workspaces_by_id.keys())
+
+        # Fetch the changed workspaces along with any new workspaces that were missed by the high-water mark
+        modified_since = self._change_tracker.get_modified_since()
+        workspace_qry = Workspace.objects.all()
+        if modified_since:
+            workspace_qry = workspace_qry.filter(Q(last_modified__gte=modified_since) | Q(id__in=new_workspace_ids))
+        changed_workspaces = list(workspace_qry.iterator())
+        self._change_tracker.update(changed_workspaces, modified_since)
 
         with self._lock:
-            self._workspaces = updated_workspaces
+            for workspace in changed_workspaces:
+                self._workspaces_by_id[workspace.id] = workspace
+            for workspace_id in set(self._workspaces_by_id.keys()) - workspace_ids:
+                del self._workspaces_by_id[workspace_id]
+            self._workspaces = {workspace.name: workspace for workspace in self._workspaces_by_id.values()}
 
 
 workspace_mgr = WorkspaceManager()
@@ -1,10 +1,17 @@
 """Defines the class that manages pushing task status updates to the database"""
 from __future__ import unicode_literals
 
+import datetime
 import logging
 import threading
+from collections import deque
+
+from django.conf import settings
+from django.db.utils import OperationalError
+from django.utils.timezone import now
 
 from job.models import TaskUpdate
+from util.partition import TASK_UPDATE_TABLE
 from util.retry import retry_database_query
 
 
@@ -12,17 +19,24 @@ logger = logging.getLogger(__name__)
 
 
 class TaskUpdateManager(object):
-    """This class pushes task status updates to the database. This class is thread-safe."""
+    """This class pushes task status updates to the database. Updates are buffered in a bounded queue and written in
+    large batches with PostgreSQL COPY so that storms of status updates do not overwhelm the database. If the database
+    is slow or unavailable, the updates stay buffered (up to MAX_BUFFER_SIZE, after which the oldest updates are
+    dropped) and are retried on the next push. This class is thread-safe."""
 
     COUNT_WARNING_THRESHOLD = 1000  # If the total list count hits this threshold, log a warning
-    MAX_BATCH_SIZE = 500  # The maximum number of status update models to save to the database in a single batch
+    MAX_BATCH_SIZE = 5000  # The maximum number of status update models to save to the database in a single batch
+    MAX_BUFFER_SIZE = 100000  # The maximum number of status update models to hold in memory
+    PRUNE_INTERVAL = datetime.timedelta(hours=1)  # How often old task updates are pruned when retention is enabled
 
     def __init__(self):
         """Constructor
         """
 
-        self._task_updates = []
+        self._dropped_count = 0  # Number of task updates dropped since the last push due to a full buffer
+        self._last_prune = None
         self._lock = threading.Lock()
+        self._task_updates = deque()
 
     def add_task_update(self, task_update):
         """Adds the given task update to the manager so it can be pushed to the database
@@ -33,37 +47,63 @@ class TaskUpdateManager(object):
 
         if task_update:
             with self._lock:
+                if len(self._task_updates) >= TaskUpdateManager.MAX_BUFFER_SIZE:
+                    self._task_updates.popleft()
+                    self._dropped_count += 1
                 self._task_updates.append(task_update)
 
+    def get_backlog_count(self):
+        """Returns the number of task updates waiting to be pushed to the database
+
+        :returns: The number of task updates waiting to be pushed
+        :rtype: int
+        """
+
+        with self._lock:
+            return len(self._task_updates)
+
     def push_to_database(self):
-        """Pushes the recent status updates to the database
+        """Pushes the recent status updates to the database. Batches are pulled from the buffer one at a time so that
+        new task updates can continue to be added while earlier batches are being written.
 
         :returns: The total number of status updates pushed
         :rtype: int
         """
 
         with self._lock:
-            task_updates = self._task_updates
-            self._task_updates = []
+            total_count = len(self._task_updates)
+            dropped_count = self._dropped_count
+            self._dropped_count = 0
 
-        total_count = len(task_updates)
+        if dropped_count:
+            logger.error('Task update buffer is full, dropped %i task updates', dropped_count)
         if total_count >= TaskUpdateManager.COUNT_WARNING_THRESHOLD:
             logger.warning('%i task updates waiting to be pushed to database', total_count)
 
-        models = []
-        count = 0
-        for task_update in task_updates:
-            # TODO: currently only save job task updates, once job_exe_id field in TaskUpdate model allows nulls then
-            # save all models to database
-            if task_update.job_exe_id:
-                models.append(task_update)
-                count += 1
-            if count >= TaskUpdateManager.MAX_BATCH_SIZE:
+        pushed_count = 0
+        while True:
+            with self._lock:
+                batch_size = min(len(self._task_updates), TaskUpdateManager.MAX_BATCH_SIZE)
+                models = [self._task_updates.popleft() for _ in range(batch_size)]
+            if not models:
+                break
+
+            try:
                 self._bulk_save(models)
-                models = []
-                count = 0
-        if models:
-            self._bulk_save(models)
+            except OperationalError:
+                # Database is unavailable, so keep the batch and stop pushing until the next loop
+                logger.exception('Failed to push %i task updates to database, will retry', len(models))
+                self._requeue(models)
+                break
+            except Exception:
+                # Something in the batch is invalid, so save the task updates individually to only drop the bad ones
+                logger.exception('Failed to push %i task updates to database, saving them one at a time', len(models))
+                pushed_count += self._save_individually(models)
+                continue
+            pushed_count += len(models)
+
+        self._prune_old_task_updates()
+        return pushed_count
 
     @retry_database_query
     def _bulk_save(self, models):
@@ -73,7 +113,62 @@ class TaskUpdateManager(object):
         :type models: [:class:`job.models.TaskUpdate`]
         """
 
-        TaskUpdate.objects.bulk_create(models)
+        TaskUpdate.objects.copy_task_updates(models)
+
+    def _save_individually(self, models):
+        """Saves each of the given task update models with its own insert, dropping the models that cannot be saved
+
+        :param models: The list of task update models
+        :type models: [:class:`job.models.TaskUpdate`]
+        :returns: The number of task updates saved
+        :rtype: int
+        """
+
+        saved_count = 0
+        last_error = None
+        for model in models:
+            try:
+                model.save()
+                saved_count += 1
+            except Exception as ex:
+                last_error = ex
+        if last_error:
+            logger.error('Dropped %i of %i task updates that could not be saved, last error: %s',
+                         len(models) - saved_count, len(models), last_error)
+        return saved_count
+
+    def _prune_old_task_updates(self):
+        """Deletes task updates that are older than the configured retention period, at most once per PRUNE_INTERVAL
+        """
+
+        if not settings.TASK_UPDATE_RETENTION_DAYS:
+            return
+
+        when = now()
+        if self._last_prune and when - self._last_prune < TaskUpdateManager.PRUNE_INTERVAL:
+            return
+        self._last_prune = when
+
+        try:
+            # Drops whole partitions if the table is partitioned, otherwise deletes old rows in batches
+            oldest = when - datetime.timedelta(days=settings.TASK_UPDATE_RETENTION_DAYS)
+            TASK_UPDATE_TABLE.remove_old_data(oldest)
+        except Exception:
+            logger.exception('Failed to delete old task updates')
+
+    def _requeue(self, models):
+        """Puts the given task update models back at the front of the buffer so they are retried on the next push. If
+        the buffer is full, the oldest task updates are dropped.
+
+        :param models: The list of task update models
+        :type models: [:class:`job.models.TaskUpdate`]
+        """
+
+        with self._lock:
+            self._task_updates.extendleft(reversed(models))
+            while len(self._task_updates) > TaskUpdateManager.MAX_BUFFER_SIZE:
+                self._task_updates.popleft()
+                self._dropped_count += 1
 
 
 task_update_mgr = TaskUpdateManager()
@@ -9,6 +9,7 @@ from django.utils.timezone import now
 
 from job.tasks.update import TaskStatusUpdate
 from scheduler.manager import scheduler_mgr
+from scheduler.models import Scheduler
 from scheduler.tasks.db_update_task import DatabaseUpdateTask
 from scheduler.tasks.services.messaging.messaging_service import MessagingService
 from util.parse import datetime_to_string
@@ -26,8 +27,10 @@ class SystemTaskManager(object):
         """Constructor
         """
 
+        self._db_update_progress = {}
         self._db_update_task = None
         self._is_db_update_completed = False
+        self._is_db_update_progress_final = False
         self._last_db_update_task_failure = None
         self._when_db_update_completed = None
 
@@ -44,6 +47,7 @@ class SystemTaskManager(object):
 
         services_list = []
         with self._lock:
+            db_update_progress = self._db_update_progress
             is_db_update_completed = self._is_db_update_completed
             when_db_update_completed = self._when_db_update_completed
             for service in self._services:
@@ -52,6 +56,13 @@ class SystemTaskManager(object):
         db_update_dict = {'is_completed': is_db_update_completed}
         if when_db_update_completed:
             db_update_dict['completed'] = datetime_to_string(when_db_update_completed)
+        if db_update_progress:
+            total = db_update_progress['total_count']
+            updated = db_update_progress['updated_count']
+            percent = (float(updated) / float(total)) * 100.0 if total else 100.0
+            db_update_dict['progress'] = {'total_count': total, 'updated_count': updated, 'percent': round(percent, 1),
+                                          'rate': db_update_progress['rate'], 'eta': db_update_progress['eta'],
+                                          'last_updated': db_update_progress['last_updated']}
 
         status_dict['system'] = {'database_update': db_update_dict, 'services': services_list}
 
@@ -96,6 +107,30 @@ class SystemTaskManager(object):
 
         return tasks
 
+    def sync_with_database(self):
+        """Syncs with the database to retrieve the progress of the Scale database update
+        """
+
+        with self._lock:
+            if self._is_db_update_progress_final:
+                return  # Progress no longer changes once it has been retrieved after the update completed
+            is_db_update_completed = self._is_db_update_completed
+
+        db_update_progress = Scheduler.objects.get_database_update()
+
+        with self._lock:
+            self._db_update_progress = db_update_progress
+            self._is_db_update_progress_final = is_db_update_completed
+
+    def sync_services(self):
+        """Syncs the system services with their external systems, such as sampling the backlog of the messaging backend
+        to scale the messaging service. The manager lock is not held as syncing may require network calls.
+        """
+
+        when = now()
+        for service in self._services:
+            service.sync_with_backend(when)
+
     def handle_task_update(self, task_update):
         """Handles the given task update
 
@@ -0,0 +1,185 @@
+"""Defines the class that scales the number of message handlers to the backlog of command messages"""
+from __future__ import unicode_literals
+
+import datetime
+import math
+from collections import deque
+
+from util.parse import datetime_to_string
+
+
+# The initial estimate of how many messages a single handler processes per second, refined from the observed backlog
+DEFAULT_HANDLER_RATE = 5.0
+
+# The minimum estimate of how many messages a single handler processes per second
+MIN_HANDLER_RATE = 0.5
+
+# How much weight a new observation of the handler rate is given in the moving average of the rate
+RATE_SMOOTHING = 0.3
+
+# How long the backlog must call for fewer handlers before the handlers are scaled down
+SCALE_DOWN_DELAY = datetime.timedelta(minutes=2)
+
+# The number of recent scaling decisions reported in the status JSON
+MAX_DECISIONS = 10
+
+
+class MessageHandlerScaler(object):
+    """This class decides how many message handlers to run from samples of the size of the message backlog. The handlers
+    are scaled up as soon as the backlog cannot be worked off within the target latency, and only scaled down once the
+    backlog has called for fewer handlers for a period of time so that handlers are not killed between bursts of
+    messages. This class is not thread-safe and should be protected by the messaging service.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._decisions = deque(maxlen=MAX_DECISIONS)
+        self._desired_count = None  # None until the first sample has been taken
+        self._estimated_latency = None
+        self._handler_rate = DEFAULT_HANDLER_RATE
+        self._last_error = None
+        self._last_sampled = None
+        self._queue_size = None
+        self._scale_down_count = None  # The handler count to scale down to, None if not waiting to scale down
+        self._scale_down_started = None
+
+    def add_error(self, when, error):
+        """Records that the size of the backlog could not be sampled. The desired count is left unchanged.
+
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        :param error: A description of the error
+        :type error: string
+        """
+
+        self._last_error = {'time': datetime_to_string(when), 'error': error}
+
+    def add_sample(self, when, queue_size, actual_count, config):
+        """Records a sample of the size of the message backlog and updates the desired number of message handlers
+
+        :param when: The time the sample was taken
+        :type when: :class:`datetime.datetime`
+        :param queue_size: The number of messages waiting in the backlog
+        :type queue_size: int
+        :param actual_count: The number of message handlers that are running
+        :type actual_count: int
+        :param config: The scheduler configuration
+        :type config: :class:`scheduler.configuration.SchedulerConfiguration`
+        """
+
+        self._update_handler_rate(when, queue_size, actual_count)
+        self._last_error = None
+        self._last_sampled = when
+        self._queue_size = queue_size
+        self._estimated_latency = queue_size / (self._handler_rate * max(actual_count, 1))
+
+        min_count, max_count = _get_bounds(config)
+        latency = max(config.max_message_latency, 1)
+        target_count = int(math.ceil(queue_size / (self._handler_rate * latency)))
+        target_count = min(max(target_count, min_count), max_count)
+
+        current_count = self.get_desired_count(config)
+        if target_count > current_count:
+            self._scale(when, current_count, target_count, 'Backlog of %d messages exceeds the latency target' % queue_size)
+        elif target_count < current_count:
+            if self._scale_down_started is None:
+                self._scale_down_started = when
+                self._scale_down_count = target_count
+            else:
+                # Scale down to the most handlers the backlog needed while waiting
+                self._scale_down_count = max(self._scale_down_count, target_count)
+            if when - self._scale_down_started >= SCALE_DOWN_DELAY:
+                self._scale(when, current_count, self._scale_down_count, 'Backlog of %d messages is low' % queue_size)
+        else:
+            self._desired_count = current_count
+            self._scale_down_started = None
+
+    def generate_status_json(self, status_dict, config):
+        """Generates the portion of the status JSON that describes the message handler scaling
+
+        :param status_dict: The status dict for the messaging service
+        :type status_dict: dict
+        :param config: The scheduler configuration
+        :type config: :class:`scheduler.configuration.SchedulerConfiguration`
+        """
+
+        min_count, max_count = _get_bounds(config)
+        scaling_dict = {'min_count': min_count, 'max_count': max_count, 'max_latency': config.max_message_latency,
+                        'handler_rate': round(self._handler_rate, 2), 'decisions': list(self._decisions)}
+        if self._last_sampled:
+            scaling_dict['queue_size'] = self._queue_size
+            scaling_dict['estimated_latency'] = round(self._estimated_latency, 1)
+            scaling_dict['last_sampled'] = datetime_to_string(self._last_sampled)
+        if self._last_error:
+            scaling_dict['last_error'] = self._last_error
+        status_dict['autoscaling'] = scaling_dict
+
+    def get_desired_count(self, config):
+        """Returns the number of message handlers that are desired, within the bounds of the current configuration
+
+        :param config: The scheduler configuration
+        :type config: :class:`scheduler.configuration.SchedulerConfiguration`
+        :returns: The desired number of message handlers
+        :rtype: int
+        """
+
+        min_count, max_count = _get_bounds(config)
+        if self._desired_count is None:
+            return min_count
+        return min(max(self._desired_count, min_count), max_count)
+
+    def _scale(self, when, current_count, new_count, reason):
+        """Changes the desired number of message handlers and records the decision
+
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        :param current_count: The current desired number of message handlers
+        :type current_count: int
+        :param new_count: The new desired number of message handlers
+        :type new_count: int
+        :param reason: The reason for the change
+        :type reason: string
+        """
+
+        self._desired_count = new_count
+        self._scale_down_count = None
+        self._scale_down_started = None
+        self._decisions.append({'time': datetime_to_string(when), 'from': current_count, 'to': new_count,
+                                'reason': reason})
+
+    def _update_handler_rate(self, when, queue_size, actual_count):
+        """Refines the estimate of the per-handler message rate from how quickly the backlog shrank since the last
+        sample. New messages arriving in the meantime make this an underestimate, which errs towards more handlers.
+
+        :param when: The time the sample was taken
+        :type when: :class:`datetime.datetime`
+        :param queue_size: The number of messages waiting in the backlog
+        :type queue_size: int
+        :param actual_count: The number of message handlers that are running
+        :type actual_count: int
+        """
+
+        if not self._last_sampled or not actual_count or queue_size >= self._queue_size:
+            return
+        seconds = (when - self._last_sampled).total_seconds()
+        if seconds <= 0:
+            return
+
+        observed_rate = (self._queue_size - queue_size) / seconds / actual_count
+        rate = RATE_SMOOTHING * observed_rate + (1.0 - RATE_SMOOTHING) * self._handler_rate
+        self._handler_rate = max(rate, MIN_HANDLER_RATE)
+
+
+def _get_bounds(config):
+    """Returns the minimum and maximum number of message handlers from the given configuration
+
+    :param config: The scheduler configuration
+    :type config: :class:`scheduler.configuration.SchedulerConfiguration`
+    :returns: A tuple of the minimum and maximum number of message handlers
+    :rtype: tuple
+    """
+
+    min_count = max(config.num_message_handlers, 0)
+    return min_count, max(config.max_message_handlers, min_count)
@@ -2,8 +2,11 @@
 from __future__ import unicode_literals
 
 import logging
+import threading
 
+from messaging.manager import CommandMessageManager
 from scheduler.manager import scheduler_mgr
+from scheduler.tasks.services.messaging.autoscaler import MessageHandlerScaler
 from scheduler.tasks.services.messaging.message_handler_task import MessageHandlerTask
 from scheduler.tasks.services.service import Service
 
@@ -23,10 +26,36 @@ class MessagingService(Service):
         self._title = 'Messaging'
         self._description = 'Processes the backend messaging system'
 
+        self._scaler = MessageHandlerScaler()
+        self._scaler_lock = threading.Lock()
+
+    def generate_status_json(self):
+        """See :meth:`scheduler.tasks.services.service.Service.generate_status_json`"""
+
+        status_dict = super(MessagingService, self).generate_status_json()
+        with self._scaler_lock:
+            self._scaler.generate_status_json(status_dict, scheduler_mgr.config)
+        return status_dict
+
     def get_desired_task_count(self):
         """See :meth:`scheduler.tasks.services.service.Service.get_desired_task_count`"""
 
-        return scheduler_mgr.config.num_message_handlers
+        with self._scaler_lock:
+            return self._scaler.get_desired_count(scheduler_mgr.config)
+
+    def sync_with_backend(self, when):
+        """See :meth:`scheduler.tasks.services.service.Service.sync_with_backend`"""
+
+        try:
+            queue_size = CommandMessageManager().get_queue_size()
+        except Exception as ex:
+            logger.exception('Failed to retrieve the size of the message backlog')
+            with self._scaler_lock:
+                self._scaler.add_error(when, str(ex))
+            return
+
+        with self._scaler_lock:
+            self._scaler.add_sample(when, queue_size, self.get_actual_task_count(), scheduler_mgr.config)
 
     def _create_service_task(self):
         """See :meth:`scheduler.tasks.services.service.Service._create_service_task`"""
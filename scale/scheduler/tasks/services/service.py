@@ -117,6 +117,16 @@ class Service(object):
         if task.has_ended:
             del self._tasks[task.id]
 
+    def sync_with_backend(self, when):
+        """Syncs the service with any external system that determines its desired number of tasks. Services that have a
+        fixed number of tasks do not need to override this method.
+
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        """
+
+        pass
+
     @abstractmethod
     def _create_service_task(self):
         """Creates a new service task
@@ -29,6 +29,7 @@ class SystemTask(Task):
         self._uses_docker = True
         self._docker_image = self._create_scale_image_name()
         self._docker_params = []
+        self._has_static_docker_params = True  # System task parameters only come from the Scale settings
         self._is_docker_privileged = False
         self._command = None
         self._command_arguments = None
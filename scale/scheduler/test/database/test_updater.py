@@ -0,0 +1,93 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase, TransactionTestCase
+
+from job.models import JobExecution, JobExecutionEnd
+from job.test import utils as job_test_utils
+from scheduler.database.updater import DatabaseUpdater, get_next_batch_size, KeyRange, MAX_BATCH_SIZE, MIN_BATCH_SIZE
+from scheduler.models import Scheduler
+
+
+class TestDatabaseUpdater(TransactionTestCase):
+
+    def setUp(self):
+        django.setup()
+
+        Scheduler.objects.create(id=1)
+
+        # Create old job_exe models, the second job has two executions
+        self.job_1 = job_test_utils.create_job()
+        self.job_2 = job_test_utils.create_job()
+        self.job_3 = job_test_utils.create_job()
+        job_exe_ids = [job_test_utils.create_job_exe(job=self.job_1).id,
+                       job_test_utils.create_job_exe(job=self.job_2).id,
+                       job_test_utils.create_job_exe(job=self.job_2).id,
+                       job_test_utils.create_job_exe(job=self.job_3).id]
+        JobExecution.objects.filter(id__in=job_exe_ids).update(status='CANCELED')
+
+    def test_update(self):
+        """Tests updating the job executions with several workers"""
+
+        DatabaseUpdater(num_workers=2).update()
+
+        self.assertEqual(JobExecution.objects.filter(status__isnull=False).count(), 0)
+        self.assertEqual(JobExecutionEnd.objects.filter(status='CANCELED').count(), 4)
+        exe_nums = JobExecution.objects.filter(job_id=self.job_2.id).order_by('id').values_list('exe_num', flat=True)
+        self.assertListEqual(list(exe_nums), [1, 2])
+
+        progress = Scheduler.objects.get_database_update()
+        self.assertEqual(progress['total_count'], 4)
+        self.assertEqual(progress['updated_count'], 4)
+        self.assertTrue(progress['ranges'])
+        for range_dict in progress['ranges']:
+            self.assertGreaterEqual(range_dict['next'], range_dict['end'])
+
+    def test_resume(self):
+        """Tests resuming an interrupted update from its range checkpoints"""
+
+        # The first job has already been updated
+        JobExecution.objects.filter(job_id=self.job_1.id).update(status=None)
+        ranges = [KeyRange(self.job_1.id, self.job_2.id, self.job_2.id).get_dict(),
+                  KeyRange(self.job_2.id, self.job_3.id + 1).get_dict()]
+        Scheduler.objects.update_scheduler({'database_update': {'total_count': 4, 'ranges': ranges}})
+
+        updater = DatabaseUpdater(num_workers=1)
+        updater.update()
+
+        self.assertEqual(JobExecution.objects.filter(status__isnull=False).count(), 0)
+        progress = Scheduler.objects.get_database_update()
+        self.assertEqual(progress['total_count'], 4)
+        self.assertEqual(progress['updated_count'], 4)
+        self.assertListEqual([range_dict['start'] for range_dict in progress['ranges']], [self.job_1.id, self.job_2.id])
+
+    def test_nothing_to_update(self):
+        """Tests running the update when there are no job executions to update"""
+
+        JobExecution.objects.all().update(status=None)
+
+        DatabaseUpdater().update()
+
+        progress = Scheduler.objects.get_database_update()
+        self.assertEqual(progress['total_count'], 0)
+        self.assertListEqual(progress['ranges'], [])
+
+
+class TestGetNextBatchSize(TestCase):
+
+    def test_fast_batch(self):
+        """Tests that the batch size grows when batches are fast"""
+
+        self.assertEqual(get_next_batch_size(500, 0.1), 1000)
+        self.assertEqual(get_next_batch_size(MAX_BATCH_SIZE, 0.1), MAX_BATCH_SIZE)
+
+    def test_slow_batch(self):
+        """Tests that the batch size shrinks when batches are slow"""
+
+        self.assertEqual(get_next_batch_size(500, 10.0), 250)
+        self.assertEqual(get_next_batch_size(MIN_BATCH_SIZE, 10.0), MIN_BATCH_SIZE)
+
+    def test_target_batch(self):
+        """Tests that the batch size is unchanged when batches take about the target duration"""
+
+        self.assertEqual(get_next_batch_size(500, 2.0), 500)
@@ -0,0 +1,37 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+
+from scheduler.instrumentation.histogram import Histogram
+
+
+class TestHistogram(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_observe(self):
+        """Tests recording values in a histogram"""
+
+        histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+        for value in [0.05, 0.5, 0.7, 5.0, 20.0]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.sum, 26.25)
+        self.assertEqual(histogram.max, 20.0)
+        self.assertListEqual(histogram.get_cumulative_counts(), [(0.1, 1), (1.0, 3), (10.0, 4)])
+
+    def test_get_quantile(self):
+        """Tests estimating quantiles from a histogram"""
+
+        histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+        self.assertIsNone(histogram.get_quantile(0.5))
+
+        for value in [0.05, 0.5, 0.7, 5.0, 20.0]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.get_quantile(0.5), 1.0)
+        self.assertEqual(histogram.get_quantile(0.8), 10.0)
+        self.assertEqual(histogram.get_quantile(1.0), 20.0)
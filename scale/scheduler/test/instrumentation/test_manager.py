@@ -0,0 +1,63 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+
+from scheduler.instrumentation.manager import (InstrumentationManager, MESSAGES_SENT, PHASE_SECONDS, THREAD_ERRORS,
+                                               THREAD_LOOP_SECONDS)
+
+
+class TestInstrumentationManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_generate_prometheus_text(self):
+        """Tests generating the Prometheus text exposition of the metrics"""
+
+        manager = InstrumentationManager()
+        manager.observe(THREAD_LOOP_SECONDS, 0.02, thread='Scheduling')
+        manager.observe(THREAD_LOOP_SECONDS, 0.3, thread='Scheduling')
+        manager.increment(MESSAGES_SENT, 5)
+        manager.increment(MESSAGES_SENT, 2)
+
+        lines = manager.generate_prometheus_text().splitlines()
+
+        self.assertIn('# TYPE scale_scheduler_thread_loop_seconds histogram', lines)
+        self.assertIn('scale_scheduler_thread_loop_seconds_bucket{thread="Scheduling",le="0.025"} 1', lines)
+        self.assertIn('scale_scheduler_thread_loop_seconds_bucket{thread="Scheduling",le="0.5"} 2', lines)
+        self.assertIn('scale_scheduler_thread_loop_seconds_bucket{thread="Scheduling",le="+Inf"} 2', lines)
+        self.assertIn('scale_scheduler_thread_loop_seconds_count{thread="Scheduling"} 2', lines)
+        self.assertIn('scale_scheduler_thread_loop_seconds_sum{thread="Scheduling"} 0.320000', lines)
+        self.assertIn('# TYPE scale_scheduler_messages_sent_total counter', lines)
+        self.assertIn('scale_scheduler_messages_sent_total 7', lines)
+
+    def test_generate_status_json(self):
+        """Tests summarizing the metrics in the status JSON"""
+
+        manager = InstrumentationManager()
+        manager.observe(THREAD_LOOP_SECONDS, 0.5, thread='Sync')
+        manager.increment(THREAD_ERRORS, thread='Sync')
+        with manager.time_phase('Sync', 'nodes'):
+            pass
+        manager.increment(MESSAGES_SENT, 3)
+
+        status_dict = {}
+        manager.generate_status_json(status_dict)
+
+        thread_dict = status_dict['instrumentation']['threads']['Sync']
+        self.assertEqual(thread_dict['loops'], 1)
+        self.assertEqual(thread_dict['errors'], 1)
+        self.assertEqual(thread_dict['loop_seconds']['max'], 0.5)
+        self.assertEqual(thread_dict['phases']['nodes']['count'], 1)
+        self.assertDictEqual(status_dict['instrumentation']['counters'], {'messages_sent': 3})
+
+    def test_label_escaping(self):
+        """Tests that label values are escaped in the Prometheus text format"""
+
+        manager = InstrumentationManager()
+        manager.observe(PHASE_SECONDS, 1.0, thread='A "quoted" thread', phase='x')
+
+        text = manager.generate_prometheus_text()
+
+        self.assertIn('phase="x",thread="A \\"quoted\\" thread"', text)
@@ -0,0 +1,329 @@
+"""Defines a deterministic simulator that drives the scheduling manager with a synthetic cluster and queue"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+import random
+import time
+
+from django.utils.timezone import now
+
+import job.test.utils as job_test_utils
+import trigger.test.utils as trigger_test_utils
+from job.configuration.json.execution.exe_config import ExecutionConfiguration
+from job.execution.manager import job_exe_mgr
+from job.models import Job, JobTypeRevision
+from job.tasks.manager import task_mgr
+from node.resources.node_resources import NodeResources
+from node.resources.resource import Cpus, Disk, Mem, ScalarResource
+from queue.models import Queue
+from scheduler.manager import scheduler_mgr
+from scheduler.models import Scheduler
+from scheduler.node.agent import Agent
+from scheduler.node.manager import node_mgr
+from scheduler.resources.manager import resource_mgr
+from scheduler.resources.offer import ResourceOffer
+from scheduler.scheduling.manager import SchedulingManager
+from scheduler.sync.job_type_manager import job_type_mgr
+from scheduler.tasks.manager import system_task_mgr
+
+# The scheduling phases that are timed, in the order that they occur, mapped to the scheduling manager methods
+PHASES = [('prepare_nodes', '_prepare_nodes'), ('waiting_tasks', '_schedule_waiting_tasks'),
+          ('system_tasks', '_schedule_system_tasks'), ('queue_processing', '_process_queue'),
+          ('db_writes', '_process_scheduled_job_executions'), ('allocate_offers', '_allocate_offers'),
+          ('launch', '_launch_tasks')]
+
+# The resource requirements that the simulated queued jobs choose from
+JOB_RESOURCES = [(1.0, 512.0, 1024.0), (2.0, 2048.0, 4096.0), (4.0, 8192.0, 2048.0), (0.5, 256.0, 512.0)]
+
+
+class FakeDriver(object):
+    """Fake Mesos scheduler driver that captures the tasks launched by the scheduler"""
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self.launches = []  # [(List of offer IDs, List of Mesos tasks)]
+
+    def declineOffer(self, offer_id, filters=None):
+        """Ignores a declined offer
+
+        :param offer_id: The ID of the offer
+        :type offer_id: :class:`mesos_pb2.OfferID`
+        :param filters: The offer filters
+        :type filters: :class:`mesos_pb2.Filters`
+        """
+
+        pass
+
+    def launchTasks(self, offer_ids, tasks, filters=None):
+        """Captures the tasks launched on the given offers
+
+        :param offer_ids: The IDs of the offers that were accepted
+        :type offer_ids: list
+        :param tasks: The Mesos tasks to launch
+        :type tasks: list
+        :param filters: The offer filters
+        :type filters: :class:`mesos_pb2.Filters`
+        """
+
+        self.launches.append(([offer_id.value for offer_id in offer_ids], tasks))
+
+
+class SimulationResult(object):
+    """Represents the result of a single simulated scheduling round"""
+
+    def __init__(self, round_num, task_count, launch_count, durations, total_duration):
+        """Constructor
+
+        :param round_num: The number of the scheduling round, starting at 1
+        :type round_num: int
+        :param task_count: The number of tasks that were scheduled
+        :type task_count: int
+        :param launch_count: The number of launchTasks() calls made to the driver
+        :type launch_count: int
+        :param durations: The duration in seconds of each scheduling phase stored by phase name
+        :type durations: dict
+        :param total_duration: The duration in seconds of the entire scheduling round
+        :type total_duration: float
+        """
+
+        self.round_num = round_num
+        self.task_count = task_count
+        self.launch_count = launch_count
+        self.durations = durations
+        self.total_duration = total_duration
+
+    def __str__(self):
+        phases = ', '.join('%s=%.3fs' % (name, self.durations.get(name, 0.0)) for name, _method_name in PHASES)
+        return 'Round %d: %d task(s) in %.3fs (%s)' % (self.round_num, self.task_count, self.total_duration, phases)
+
+
+class SchedulingSimulator(object):
+    """Drives the real scheduling manager with a synthetic cluster of agents, resource offers, and queued job
+    executions. Mesos is replaced by a fake driver and every offer that the scheduler accepts is re-offered in the next
+    round minus the resources of the launched tasks, so tasks launched in earlier rounds remain running on their nodes.
+    All synthetic data is derived from the seed so runs are repeatable. The simulator uses the database, so it must be
+    run within a Django test case.
+    """
+
+    def __init__(self, num_nodes, queue_depth, node_resources=None, num_job_types=10, seed=1):
+        """Constructor
+
+        :param num_nodes: The number of agents (nodes) in the simulated cluster
+        :type num_nodes: int
+        :param queue_depth: The number of job executions to place on the queue
+        :type queue_depth: int
+        :param node_resources: The resources of each node, defaults to 32 CPUs, 128 GiB memory, and 1 TiB disk
+        :type node_resources: :class:`node.resources.node_resources.NodeResources`
+        :param num_job_types: The number of job types that the queued job executions are spread across
+        :type num_job_types: int
+        :param seed: The seed for generating the synthetic data
+        :type seed: int
+        """
+
+        if not node_resources:
+            node_resources = NodeResources([Cpus(32.0), Mem(131072.0), Disk(1048576.0)])
+
+        self.driver = FakeDriver()
+        self.framework_id = 'simulator'
+        self.num_nodes = num_nodes
+        self.queue_depth = queue_depth
+        self.node_resources = node_resources
+        self.num_job_types = num_job_types
+
+        self._agents = []
+        self._offer_count = 0
+        self._offers = {}  # {Offer ID: ResourceOffer}
+        self._random = random.Random(seed)
+        self._round_num = 0
+        self._scheduling_manager = None
+        self._timer = None
+
+    def run_round(self):
+        """Runs a single round of scheduling and then re-offers the resources that the round did not use
+
+        :returns: The result of the scheduling round
+        :rtype: :class:`scheduler.test.scheduling.simulator.SimulationResult`
+        """
+
+        self._round_num += 1
+        self._timer.reset()
+        launch_index = len(self.driver.launches)
+        when = now()
+
+        started = time.time()
+        task_count = self._scheduling_manager.perform_scheduling(self.driver, when)
+        total_duration = time.time() - started
+
+        launches = self.driver.launches[launch_index:]
+        self._reoffer_resources(launches, when)
+        return SimulationResult(self._round_num, task_count, len(launches), dict(self._timer.durations),
+                                total_duration)
+
+    def setup(self):
+        """Resets the scheduler managers and creates the synthetic cluster and queue
+        """
+
+        Scheduler.objects.initialize_scheduler()
+        Scheduler.objects.update(num_message_handlers=0)  # Prevent message handler tasks from scheduling
+        scheduler_mgr.sync_with_database()
+        scheduler_mgr.update_from_mesos(framework_id=self.framework_id)
+        resource_mgr.clear()
+        job_exe_mgr.clear()
+        task_mgr.clear()
+        system_task_mgr._is_db_update_completed = True  # Ignore system tasks
+
+        self._create_nodes()
+        self._create_queue()
+        job_type_mgr.sync_with_database()
+
+        self._scheduling_manager = SchedulingManager()
+        self._timer = PhaseTimer(self._scheduling_manager)
+
+        offers = []
+        for agent in self._agents:
+            offers.append(self._create_offer(agent.agent_id, self.node_resources.copy(), now()))
+        resource_mgr.add_new_offers(offers)
+
+    def _create_nodes(self):
+        """Registers the synthetic agents and makes their nodes ready to run jobs
+        """
+
+        self._agents = []
+        for i in xrange(self.num_nodes):
+            self._agents.append(Agent('agent_%d' % i, 'host_%d' % i))
+        node_mgr.clear()
+        node_mgr.register_agents(self._agents)
+        node_mgr.sync_with_database(scheduler_mgr.config)
+
+        # Skip the initial cleanup, health check, and image pull tasks
+        for node in node_mgr.get_nodes():
+            node._last_heath_task = now()
+            node._initial_cleanup_completed()
+            node._is_image_pulled = True
+            node._update_state()
+
+    def _create_offer(self, agent_id, resources, when):
+        """Creates a new resource offer for the given agent
+
+        :param agent_id: The agent ID
+        :type agent_id: string
+        :param resources: The offered resources
+        :type resources: :class:`node.resources.node_resources.NodeResources`
+        :param when: The time of the offer
+        :type when: :class:`datetime.datetime`
+        :returns: The resource offer
+        :rtype: :class:`scheduler.resources.offer.ResourceOffer`
+        """
+
+        self._offer_count += 1
+        offer = ResourceOffer('offer_%d' % self._offer_count, agent_id, self.framework_id, resources, when)
+        self._offers[offer.id] = offer
+        return offer
+
+    def _create_queue(self, batch_size=5000):
+        """Creates the synthetic queue of job executions, using bulk inserts so that very deep queues can be created
+
+        :param batch_size: The number of models to insert at a time
+        :type batch_size: int
+        """
+
+        event = trigger_test_utils.create_trigger_event()
+        job_types = []
+        for _ in xrange(self.num_job_types):
+            job_type = job_test_utils.create_job_type()
+            job_type_rev = JobTypeRevision.objects.get_revision(job_type.id, job_type.revision_num)
+            job_types.append((job_type, job_type_rev))
+        configuration = ExecutionConfiguration().get_dict()
+
+        queued_base = now() - datetime.timedelta(days=1)
+        for batch_start in xrange(0, self.queue_depth, batch_size):
+            jobs = []
+            queues = []
+            for i in xrange(batch_start, min(batch_start + batch_size, self.queue_depth)):
+                job_type, job_type_rev = self._random.choice(job_types)
+                cpus, mem, disk = self._random.choice(JOB_RESOURCES)
+                priority = self._random.randint(1, 300)
+                queued = queued_base + datetime.timedelta(seconds=i)
+                job = Job(job_type=job_type, job_type_rev=job_type_rev, event=event, status='QUEUED',
+                          priority=priority, timeout=job_type.timeout, max_tries=job_type.max_tries, num_exes=1,
+                          disk_in_required=disk / 2.0, queued=queued, last_status_change=queued)
+                resources = NodeResources([Cpus(cpus), Mem(mem), Disk(disk)])
+                jobs.append(job)
+                queues.append(Queue(job_type=job_type, job_type_rev=job_type_rev, exe_num=1, priority=priority,
+                                    timeout=job_type.timeout, input_file_size=disk / 2.0, configuration=configuration,
+                                    resources=resources.get_json().get_dict(), queued=queued))
+            Job.objects.bulk_create(jobs, batch_size=batch_size)
+            for job, queue in zip(jobs, queues):
+                queue.job = job
+            Queue.objects.bulk_create(queues, batch_size=batch_size)
+
+    def _reoffer_resources(self, launches, when):
+        """Re-offers the resources from the offers accepted in the last round that were not used by the launched tasks,
+        which is how Mesos returns the unused resources of an accepted offer
+
+        :param launches: The launchTasks() calls from the last round
+        :type launches: list
+        :param when: The time of the new offers
+        :type when: :class:`datetime.datetime`
+        """
+
+        offers = []
+        for offer_ids, mesos_tasks in launches:
+            agent_id = None
+            resources = NodeResources()
+            for offer_id in offer_ids:
+                offer = self._offers.pop(offer_id)
+                agent_id = offer.agent_id
+                resources.add(offer.resources)
+            for mesos_task in mesos_tasks:
+                task_resources = [ScalarResource(r.name, r.scalar.value) for r in mesos_task.resources]
+                resources.subtract(NodeResources(task_resources))
+            if agent_id:
+                offers.append(self._create_offer(agent_id, resources, when))
+        resource_mgr.add_new_offers(offers)
+
+
+class PhaseTimer(object):
+    """Times each phase of scheduling by wrapping the corresponding methods of a scheduling manager"""
+
+    def __init__(self, scheduling_manager):
+        """Constructor
+
+        :param scheduling_manager: The scheduling manager to time
+        :type scheduling_manager: :class:`scheduler.scheduling.manager.SchedulingManager`
+        """
+
+        self.durations = {}  # {Phase name: Seconds}
+
+        for phase_name, method_name in PHASES:
+            setattr(scheduling_manager, method_name, self._wrap(phase_name, getattr(scheduling_manager, method_name)))
+
+    def reset(self):
+        """Resets the phase durations
+        """
+
+        self.durations = {}
+
+    def _wrap(self, phase_name, method):
+        """Returns a function that calls the given method and adds its duration to the given phase
+
+        :param phase_name: The name of the phase
+        :type phase_name: string
+        :param method: The method to time
+        :type method: function
+        :returns: The timed function
+        :rtype: function
+        """
+
+        def timed_method(*args, **kwargs):
+            started = time.time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                duration = time.time() - started
+                self.durations[phase_name] = self.durations.get(phase_name, 0.0) + duration
+
+        return timed_method
@@ -0,0 +1,120 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import os
+from unittest import skipUnless
+
+import django
+from django.test import TestCase
+
+from job.models import JobExecution
+from node.resources.node_resources import NodeResources
+from node.resources.resource import Cpus, Disk, Mem
+from queue.models import Queue
+from scheduler.test.scheduling.simulator import PHASES, SchedulingSimulator
+
+# Set this environment variable to run the scheduling benchmarks
+BENCHMARK_ENV_VAR = 'SCALE_SCHEDULING_BENCHMARK'
+
+# The number of scheduling rounds to run for each benchmark
+BENCHMARK_ROUNDS = 3
+
+
+class TestSchedulingSimulator(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_run_round(self):
+        """Tests running scheduling rounds against a small simulated cluster"""
+
+        node_resources = NodeResources([Cpus(4.0), Mem(16384.0), Disk(65536.0)])
+        simulator = SchedulingSimulator(3, 50, node_resources=node_resources, num_job_types=2)
+        simulator.setup()
+
+        result_1 = simulator.run_round()
+        self.assertGreater(result_1.task_count, 0)
+        self.assertGreater(result_1.launch_count, 0)
+        self.assertLessEqual(result_1.launch_count, 3)
+        self.assertSetEqual(set(result_1.durations.keys()), {name for name, _method_name in PHASES})
+        self.assertEqual(JobExecution.objects.count(), result_1.task_count)
+        self.assertEqual(Queue.objects.count(), 50 - result_1.task_count)
+
+        # Tasks from the first round are still running, so only the remaining resources can be used
+        result_2 = simulator.run_round()
+        self.assertEqual(JobExecution.objects.count(), result_1.task_count + result_2.task_count)
+        total_cpus = 0.0
+        for _offer_ids, mesos_tasks in simulator.driver.launches:
+            for mesos_task in mesos_tasks:
+                for resource in mesos_task.resources:
+                    if resource.name == 'cpus':
+                        total_cpus += resource.scalar.value
+        self.assertLessEqual(total_cpus, 12.0)
+
+    def test_deterministic_queue(self):
+        """Tests that the simulated queue is the same for the same seed"""
+
+        simulator = SchedulingSimulator(1, 20, seed=7)
+        simulator.setup()
+        queue_1 = list(Queue.objects.order_by('queued').values_list('priority', 'resources'))
+        Queue.objects.all().delete()
+
+        simulator = SchedulingSimulator(1, 20, seed=7)
+        simulator.setup()
+        queue_2 = list(Queue.objects.order_by('queued').values_list('priority', 'resources'))
+
+        self.assertListEqual(queue_1, queue_2)
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the scheduling benchmarks' % BENCHMARK_ENV_VAR)
+class TestSchedulingBenchmark(TestCase):
+    """Benchmarks each phase of scheduling at different cluster sizes and queue depths. The benchmarks are slow and are
+    only run when the SCALE_SCHEDULING_BENCHMARK environment variable is set.
+    """
+
+    def setUp(self):
+        django.setup()
+
+    def test_100_nodes_1k_queue(self):
+        """Benchmarks scheduling with 100 nodes and 1,000 queued job executions"""
+        self._run_benchmark(100, 1000)
+
+    def test_100_nodes_100k_queue(self):
+        """Benchmarks scheduling with 100 nodes and 100,000 queued job executions"""
+        self._run_benchmark(100, 100000)
+
+    def test_1k_nodes_1k_queue(self):
+        """Benchmarks scheduling with 1,000 nodes and 1,000 queued job executions"""
+        self._run_benchmark(1000, 1000)
+
+    def test_1k_nodes_100k_queue(self):
+        """Benchmarks scheduling with 1,000 nodes and 100,000 queued job executions"""
+        self._run_benchmark(1000, 100000)
+
+    def test_5k_nodes_1k_queue(self):
+        """Benchmarks scheduling with 5,000 nodes and 1,000 queued job executions"""
+        self._run_benchmark(5000, 1000)
+
+    def test_5k_nodes_100k_queue(self):
+        """Benchmarks scheduling with 5,000 nodes and 100,000 queued job executions"""
+        self._run_benchmark(5000, 100000)
+
+    def _run_benchmark(self, num_nodes, queue_depth):
+        """Runs the scheduling rounds for a benchmark and prints the per-phase timings of each round
+
+        :param num_nodes: The number of nodes in the simulated cluster
+        :type num_nodes: int
+        :param queue_depth: The number of queued job executions
+        :type queue_depth: int
+        """
+
+        simulator = SchedulingSimulator(num_nodes, queue_depth)
+        simulator.setup()
+
+        print('\nScheduling benchmark: %d node(s), queue depth %d' % (num_nodes, queue_depth))
+        total_task_count = 0
+        for _ in range(BENCHMARK_ROUNDS):
+            result = simulator.run_round()
+            total_task_count += result.task_count
+            print(result)
+        self.assertGreater(total_task_count, 0)
@@ -0,0 +1,62 @@
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.test import TestCase
+from django.utils.timezone import utc
+from mock import MagicMock
+
+from scheduler.sync.change_tracker import ChangeTracker
+
+
+class TestChangeTracker(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def _create_model(self, last_modified):
+        model = MagicMock()
+        model.last_modified = last_modified
+        return model
+
+    def test_full_then_incremental(self):
+        """Tests that the first sync fetches all models and later syncs fetch from the high-water mark"""
+
+        when = datetime.datetime(2017, 1, 1, 12, tzinfo=utc)
+        tracker = ChangeTracker(change_window=datetime.timedelta(minutes=1),
+                                full_sync_interval=datetime.timedelta(minutes=5))
+        self.assertIsNone(tracker.get_modified_since(when))
+
+        models = [self._create_model(datetime.datetime(2017, 1, 1, 11, tzinfo=utc)),
+                  self._create_model(datetime.datetime(2017, 1, 1, 11, 30, tzinfo=utc))]
+        tracker.update(models, None, when)
+
+        modified_since = tracker.get_modified_since(when + datetime.timedelta(seconds=10))
+        self.assertEqual(modified_since, datetime.datetime(2017, 1, 1, 11, 29, tzinfo=utc))
+
+        # The high-water mark only moves forward
+        tracker.update([self._create_model(datetime.datetime(2017, 1, 1, 10, tzinfo=utc))], modified_since, when)
+        self.assertEqual(tracker.get_modified_since(when), modified_since)
+
+    def test_full_sync_interval(self):
+        """Tests that all models are periodically fetched"""
+
+        when = datetime.datetime(2017, 1, 1, 12, tzinfo=utc)
+        tracker = ChangeTracker(full_sync_interval=datetime.timedelta(minutes=5))
+        tracker.update([self._create_model(when)], None, when)
+        modified_since = tracker.get_modified_since(when + datetime.timedelta(minutes=1))
+        self.assertIsNotNone(modified_since)
+
+        # An incremental sync does not restart the full sync interval
+        tracker.update([], modified_since, when + datetime.timedelta(minutes=1))
+        self.assertIsNone(tracker.get_modified_since(when + datetime.timedelta(minutes=5)))
+
+    def test_reset(self):
+        """Tests that resetting the tracker causes all models to be fetched"""
+
+        when = datetime.datetime(2017, 1, 1, 12, tzinfo=utc)
+        tracker = ChangeTracker()
+        tracker.update([self._create_model(when)], None, when)
+        tracker.reset()
+        self.assertIsNone(tracker.get_modified_since(when))
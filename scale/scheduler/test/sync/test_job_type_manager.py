@@ -1,8 +1,13 @@
 from __future__ import unicode_literals
 
+import datetime
+
 import django
 from django.test import TestCase
+from django.utils.timezone import now
 
+import job.test.utils as job_test_utils
+from job.models import JobType
 from scheduler.sync.job_type_manager import JobTypeManager
 
 
@@ -22,3 +27,25 @@ class TestJobTypeManager(TestCase):
         manager.generate_status_json(status_dict)
 
         self.assertEqual(len(status_dict['job_types']), 1)
+
+    def test_incremental_update(self):
+        """Tests that a sync only replaces the job types that changed"""
+
+        job_type_1 = job_test_utils.create_job_type()
+        job_type_2 = job_test_utils.create_job_type()
+        manager = JobTypeManager()
+        manager.sync_with_database()
+        cached_job_type_1 = manager.get_job_type(job_type_1.id)
+
+        # Move the high-water mark past the original job types so that only the changed job type is fetched
+        JobType.objects.all().update(last_modified=now() - datetime.timedelta(hours=1))
+        manager._change_tracker._high_water_mark = now()
+        job_type_2.title = 'New Title'
+        job_type_2.save()
+        job_type_3 = job_test_utils.create_job_type()
+        manager.sync_with_database()
+
+        self.assertIs(manager.get_job_type(job_type_1.id), cached_job_type_1)
+        self.assertEqual(manager.get_job_type(job_type_2.id).title, 'New Title')
+        self.assertIsNotNone(manager.get_job_type(job_type_3.id))
+        self.assertEqual(len(manager.get_job_type_resources()), len(manager.get_job_types()))
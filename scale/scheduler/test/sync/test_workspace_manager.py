@@ -1,9 +1,14 @@
 from __future__ import unicode_literals
 
+import datetime
+
 import django
 from django.test import TestCase
+from django.utils.timezone import now
 
+import storage.test.utils as storage_test_utils
 from scheduler.sync.workspace_manager import WorkspaceManager
+from storage.models import Workspace
 
 
 class TestWorkspaceManager(TestCase):
@@ -16,3 +21,27 @@ class TestWorkspaceManager(TestCase):
 
         manager = WorkspaceManager()
         manager.sync_with_database()
+
+    def test_incremental_update(self):
+        """Tests that a sync only replaces the workspaces that changed and removes deleted workspaces"""
+
+        workspace_1 = storage_test_utils.create_workspace(name='workspace_1')
+        workspace_2 = storage_test_utils.create_workspace(name='workspace_2')
+        workspace_3 = storage_test_utils.create_workspace(name='workspace_3')
+        manager = WorkspaceManager()
+        manager.sync_with_database()
+        cached_workspace_1 = manager.get_workspaces()['workspace_1']
+
+        # Move the high-water mark past the original workspaces so that only the changed workspace is fetched
+        old_time = now() - datetime.timedelta(hours=1)
+        Workspace.objects.filter(id__in=[workspace_1.id, workspace_3.id]).update(last_modified=old_time)
+        manager._change_tracker._high_water_mark = now()
+        workspace_2.title = 'New Title'
+        workspace_2.save()
+        workspace_3.delete()
+        manager.sync_with_database()
+
+        workspaces = manager.get_workspaces()
+        self.assertSetEqual(set(workspaces.keys()), {'workspace_1', 'workspace_2'})
+        self.assertIs(workspaces['workspace_1'], cached_workspace_1)
+        self.assertEqual(workspaces['workspace_2'].title, 'New Title')
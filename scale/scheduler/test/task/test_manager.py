@@ -0,0 +1,93 @@
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.db.utils import OperationalError
+from django.test import TransactionTestCase
+from django.utils.timezone import now
+from mock import patch
+
+import job.test.utils as job_test_utils
+from job.models import TaskUpdate
+from scheduler.task.manager import TaskUpdateManager
+
+
+class TestTaskUpdateManager(TransactionTestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.job_exe = job_test_utils.create_job_exe()
+
+    def test_push_to_database(self):
+        """Tests pushing job and non-job task updates to the database"""
+
+        manager = TaskUpdateManager()
+        job_task_update = TaskUpdate(job_exe_id=self.job_exe.id, task_id='job_task', status='TASK_RUNNING',
+                                     timestamp=now(), message='Line 1\nLine\t2 \\ done')
+        node_task_update = TaskUpdate(task_id='node_task', status='TASK_FINISHED')
+        manager.add_task_update(job_task_update)
+        manager.add_task_update(node_task_update)
+
+        self.assertEqual(manager.push_to_database(), 2)
+        self.assertEqual(manager.get_backlog_count(), 0)
+
+        task_update = TaskUpdate.objects.get(task_id='job_task')
+        self.assertEqual(task_update.job_exe_id, self.job_exe.id)
+        self.assertEqual(task_update.message, 'Line 1\nLine\t2 \\ done')
+        task_update = TaskUpdate.objects.get(task_id='node_task')
+        self.assertIsNone(task_update.job_exe_id)
+        self.assertIsNone(task_update.timestamp)
+
+    def test_push_with_database_failure(self):
+        """Tests that task updates stay buffered when the database is unavailable"""
+
+        manager = TaskUpdateManager()
+        manager.add_task_update(TaskUpdate(task_id='node_task', status='TASK_FINISHED'))
+
+        with patch('scheduler.task.manager.TaskUpdate.objects.copy_task_updates') as mock_copy:
+            mock_copy.side_effect = OperationalError()
+            with patch('util.retry.time.sleep'):
+                self.assertEqual(manager.push_to_database(), 0)
+        self.assertEqual(manager.get_backlog_count(), 1)
+
+        self.assertEqual(manager.push_to_database(), 1)
+        self.assertEqual(TaskUpdate.objects.filter(task_id='node_task').count(), 1)
+
+    def test_push_with_invalid_task_update(self):
+        """Tests that a batch that cannot be copied is saved one task update at a time, dropping only the bad ones"""
+
+        manager = TaskUpdateManager()
+        manager.add_task_update(TaskUpdate(task_id='good_task', status='TASK_RUNNING'))
+        manager.add_task_update(TaskUpdate(task_id='bad_task', status='x' * 251))
+
+        self.assertEqual(manager.push_to_database(), 1)
+        self.assertEqual(manager.get_backlog_count(), 0)
+        self.assertListEqual(list(TaskUpdate.objects.values_list('task_id', flat=True)), ['good_task'])
+
+    @patch('scheduler.task.manager.TaskUpdateManager.MAX_BUFFER_SIZE', 3)
+    def test_bounded_buffer(self):
+        """Tests that the oldest task updates are dropped once the buffer is full"""
+
+        manager = TaskUpdateManager()
+        for i in range(5):
+            manager.add_task_update(TaskUpdate(task_id='task_%i' % i, status='TASK_RUNNING'))
+
+        self.assertEqual(manager.get_backlog_count(), 3)
+        manager.push_to_database()
+        task_ids = set(TaskUpdate.objects.values_list('task_id', flat=True))
+        self.assertSetEqual(task_ids, {'task_2', 'task_3', 'task_4'})
+
+    def test_prune_old_task_updates(self):
+        """Tests pruning task updates that are older than the retention period"""
+
+        when = now()
+        TaskUpdate.objects.copy_task_updates([TaskUpdate(task_id='old_task', status='TASK_RUNNING')],
+                                             when - datetime.timedelta(days=10))
+        TaskUpdate.objects.copy_task_updates([TaskUpdate(task_id='new_task', status='TASK_RUNNING')], when)
+
+        with self.settings(TASK_UPDATE_RETENTION_DAYS=5):
+            TaskUpdateManager().push_to_database()
+
+        self.assertListEqual(list(TaskUpdate.objects.values_list('task_id', flat=True)), ['new_task'])
@@ -0,0 +1,109 @@
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.test import TestCase
+from django.utils.timezone import now
+
+from scheduler.configuration import SchedulerConfiguration
+from scheduler.tasks.services.messaging.autoscaler import (DEFAULT_HANDLER_RATE, MessageHandlerScaler,
+                                                           SCALE_DOWN_DELAY)
+
+
+class TestMessageHandlerScaler(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.config = SchedulerConfiguration()
+        self.config.num_message_handlers = 2
+        self.config.max_message_handlers = 10
+        self.config.max_message_latency = 30
+        self.scaler = MessageHandlerScaler()
+
+    def test_no_samples(self):
+        """Tests that the minimum number of handlers is desired before the backlog has been sampled"""
+
+        self.assertEqual(self.scaler.get_desired_count(self.config), 2)
+
+        status_dict = {}
+        self.scaler.generate_status_json(status_dict, self.config)
+        self.assertEqual(status_dict['autoscaling']['min_count'], 2)
+        self.assertNotIn('queue_size', status_dict['autoscaling'])
+
+    def test_scale_up(self):
+        """Tests that the handlers are scaled up immediately to work off the backlog within the latency target"""
+
+        when = now()
+        queue_size = int(DEFAULT_HANDLER_RATE * 30 * 4)  # Needs 4 handlers to work off in 30 seconds
+        self.scaler.add_sample(when, queue_size, 2, self.config)
+        self.assertEqual(self.scaler.get_desired_count(self.config), 4)
+
+        # Never scales above the maximum
+        self.scaler.add_sample(when + datetime.timedelta(seconds=10), queue_size * 100, 4, self.config)
+        self.assertEqual(self.scaler.get_desired_count(self.config), 10)
+
+        status_dict = {}
+        self.scaler.generate_status_json(status_dict, self.config)
+        decisions = status_dict['autoscaling']['decisions']
+        self.assertEqual(len(decisions), 2)
+        self.assertEqual(decisions[0]['from'], 2)
+        self.assertEqual(decisions[0]['to'], 4)
+        self.assertEqual(decisions[1]['to'], 10)
+
+    def test_scale_down_delay(self):
+        """Tests that the handlers are only scaled down after the backlog has stayed low for the scale down delay"""
+
+        when = now()
+        queue_size = int(DEFAULT_HANDLER_RATE * 30 * 6)
+        self.scaler.add_sample(when, queue_size, 2, self.config)
+        self.assertEqual(self.scaler.get_desired_count(self.config), 6)
+
+        # Backlog drops, handlers should stay scaled up until the delay passes
+        self.scaler.add_sample(when + datetime.timedelta(seconds=10), 0, 6, self.config)
+        self.assertEqual(self.scaler.get_desired_count(self.config), 6)
+
+        # A small burst during the delay sets the count to scale down to
+        burst_size = int(self.scaler._handler_rate * 30 * 3)
+        self.scaler.add_sample(when + datetime.timedelta(seconds=20), burst_size, 6, self.config)
+        self.assertEqual(self.scaler.get_desired_count(self.config), 6)
+
+        self.scaler.add_sample(when + SCALE_DOWN_DELAY + datetime.timedelta(seconds=10), 0, 6, self.config)
+        self.assertEqual(self.scaler.get_desired_count(self.config), 3)
+
+    def test_handler_rate(self):
+        """Tests that the handler rate estimate is refined from how quickly the backlog shrinks"""
+
+        when = now()
+        self.scaler.add_sample(when, 10000, 2, self.config)
+        self.scaler.add_sample(when + datetime.timedelta(seconds=10), 9000, 2, self.config)
+
+        # Observed 50 messages per second per handler
+        self.assertGreater(self.scaler._handler_rate, DEFAULT_HANDLER_RATE)
+
+    def test_config_bounds(self):
+        """Tests that the desired count follows changes to the configured bounds"""
+
+        self.scaler.add_sample(now(), int(DEFAULT_HANDLER_RATE * 30 * 6), 2, self.config)
+        self.assertEqual(self.scaler.get_desired_count(self.config), 6)
+
+        self.config.max_message_handlers = 4
+        self.assertEqual(self.scaler.get_desired_count(self.config), 4)
+
+        # Autoscaling is disabled when the maximum is not above the minimum
+        self.config.num_message_handlers = 8
+        self.config.max_message_handlers = 0
+        self.assertEqual(self.scaler.get_desired_count(self.config), 8)
+
+    def test_add_error(self):
+        """Tests that a failed sample is reported and leaves the desired count unchanged"""
+
+        when = now()
+        self.scaler.add_sample(when, int(DEFAULT_HANDLER_RATE * 30 * 5), 2, self.config)
+        self.scaler.add_error(when, 'Connection refused')
+
+        status_dict = {}
+        self.scaler.generate_status_json(status_dict, self.config)
+        self.assertEqual(status_dict['autoscaling']['last_error']['error'], 'Connection refused')
+        self.assertEqual(self.scaler.get_desired_count(self.config), 5)
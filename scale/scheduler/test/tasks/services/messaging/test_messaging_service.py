@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 import django
 from django.test import TestCase
 from django.utils.timezone import now
+from mock import patch
 
 from job.tasks.manager import task_mgr
 from job.tasks.update import TaskStatusUpdate
@@ -16,6 +17,9 @@ class TestMessagingService(TestCase):
     def setUp(self):
         django.setup()
 
+        scheduler_mgr.config.max_message_handlers = 0
+        scheduler_mgr.config.max_message_latency = 30
+
     def test_generate_status_json(self):
         """Tests calling generate_status_json() successfully"""
 
@@ -92,3 +96,34 @@ class TestMessagingService(TestCase):
         # Should get one new task to schedule
         tasks = service.get_tasks_to_schedule()
         self.assertEqual(len(tasks), 1)
+
+    @patch('scheduler.tasks.services.messaging.messaging_service.CommandMessageManager')
+    def test_sync_with_backend(self, mock_msg_mgr):
+        """Tests scaling the message handlers to the size of the message backlog"""
+
+        scheduler_mgr.config.num_message_handlers = 2
+        scheduler_mgr.config.max_message_handlers = 10
+        mock_msg_mgr.return_value.get_queue_size.return_value = 1000
+
+        service = MessagingService()
+        service.sync_with_backend(now())
+
+        self.assertEqual(service.get_desired_task_count(), 7)
+        status_json = service.generate_status_json()
+        self.assertEqual(status_json['desired_count'], 7)
+        self.assertEqual(status_json['autoscaling']['queue_size'], 1000)
+        self.assertEqual(len(status_json['autoscaling']['decisions']), 1)
+
+    @patch('scheduler.tasks.services.messaging.messaging_service.CommandMessageManager')
+    def test_sync_with_backend_error(self, mock_msg_mgr):
+        """Tests that a failure to sample the message backlog leaves the message handlers at the minimum"""
+
+        scheduler_mgr.config.num_message_handlers = 2
+        scheduler_mgr.config.max_message_handlers = 10
+        mock_msg_mgr.return_value.get_queue_size.side_effect = Exception('Connection refused')
+
+        service = MessagingService()
+        service.sync_with_backend(now())
+
+        self.assertEqual(service.get_desired_task_count(), 2)
+        self.assertIn('last_error', service.generate_status_json()['autoscaling'])
@@ -10,6 +10,7 @@ from job.tasks.manager import TaskManager
 from job.tasks.update import TaskStatusUpdate
 from job.test import utils as job_test_utils
 from scheduler.manager import scheduler_mgr
+from scheduler.models import Scheduler
 from scheduler.tasks.db_update_task import DB_UPDATE_TASK_ID_PREFIX
 from scheduler.tasks.manager import SystemTaskManager
 
@@ -143,3 +144,23 @@ class TestSystemTaskManager(TestCase):
         self.assertNotEqual(task.id, task_1_id)
         self.assertNotEqual(task.id, task_2_id)
         self.assertFalse(self.system_task_mgr._is_db_update_completed)
+
+    def test_database_update_progress(self):
+        """Tests that the database update progress is synced from the database into the status JSON"""
+
+        Scheduler.objects.create(id=1)
+        progress = {'total_count': 200, 'updated_count': 50, 'rate': 10.0, 'eta': '1970-01-01T00:00:15Z',
+                    'last_updated': '1970-01-01T00:00:00Z', 'ranges': [{'start': 1, 'end': 10, 'next': 5}]}
+        Scheduler.objects.update_scheduler({'database_update': progress})
+
+        self.system_task_mgr.sync_with_database()
+        status_dict = {}
+        self.system_task_mgr.generate_status_json(status_dict)
+
+        progress_dict = status_dict['system']['database_update']['progress']
+        self.assertEqual(progress_dict['total_count'], 200)
+        self.assertEqual(progress_dict['updated_count'], 50)
+        self.assertEqual(progress_dict['percent'], 25.0)
+        self.assertEqual(progress_dict['rate'], 10.0)
+        self.assertEqual(progress_dict['eta'], '1970-01-01T00:00:15Z')
+        self.assertNotIn('ranges', progress_dict)
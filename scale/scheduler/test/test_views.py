@@ -59,6 +59,22 @@ class TestSchedulerView(TestCase):
         self.assertEqual(result['is_paused'], True)
         self.assertEqual(result['num_message_handlers'], 10)
 
+    def test_update_scheduler_message_handler_scaling(self):
+        """Test successfully calling the Update Scheduler method with the message handler scaling fields."""
+
+        json_data = {
+            'max_message_handlers': 20,
+            'max_message_latency': 60
+        }
+
+        url = rest_util.get_url('/scheduler/')
+        response = self.client.patch(url, json.dumps(json_data), 'application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        result = json.loads(response.content)
+        self.assertEqual(result['max_message_handlers'], 20)
+        self.assertEqual(result['max_message_latency'], 60)
+
     def test_update_scheduler_no_fields(self):
         """Test calling the Update Scheduler method with no fields."""
 
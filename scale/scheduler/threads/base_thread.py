@@ -1,6 +1,7 @@
 """Defines the base class for scheduler background threads"""
 from __future__ import unicode_literals
 
+import datetime
 import logging
 import math
 import time
@@ -8,6 +9,9 @@ from abc import ABCMeta
 
 from django.utils.timezone import now
 
+from scheduler.instrumentation.manager import (instrumentation_mgr, THREAD_ERRORS, THREAD_LAG_SECONDS,
+                                               THREAD_LOOP_SECONDS)
+
 
 logger = logging.getLogger(__name__)
 
@@ -39,16 +43,23 @@ class BaseSchedulerThread(object):
 
         logger.info('%s thread started', self._name)
 
+        expected_start = None
         while self._running:
 
             started = now()
+            if expected_start:
+                # Lag is how much later than intended this loop started, such as from oversleeping or lock contention
+                lag = max((started - expected_start).total_seconds(), 0.0)
+                instrumentation_mgr.observe(THREAD_LAG_SECONDS, lag, thread=self._name)
 
             try:
                 self._execute()
             except Exception:
                 logger.exception('%s thread had a critical error', self._name)
+                instrumentation_mgr.increment(THREAD_ERRORS, thread=self._name)
 
             duration = now() - started
+            instrumentation_mgr.observe(THREAD_LOOP_SECONDS, duration.total_seconds(), thread=self._name)
 
             msg = '%s thread loop took %.3f seconds'
             if duration > self._warning_threshold:
@@ -57,9 +68,12 @@ class BaseSchedulerThread(object):
                 logger.debug(msg, self._name, duration.total_seconds())
 
             # If time takes less than threshold, throttle
+            delay = 0
             if duration < self._throttle:
                 # Delay until full throttle time reached
                 delay = math.ceil(self._throttle.total_seconds() - duration.total_seconds())
+            expected_start = now() + datetime.timedelta(seconds=delay)
+            if delay:
                 time.sleep(delay)
 
         logger.info('%s thread stopped', self._name)
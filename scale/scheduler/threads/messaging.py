@@ -7,6 +7,7 @@ import logging
 
 from job.execution.manager import job_exe_mgr
 from messaging.manager import CommandMessageManager
+from scheduler.instrumentation.manager import instrumentation_mgr, MESSAGES_SENT
 from scheduler.threads.base_thread import BaseSchedulerThread
 
 
@@ -41,4 +42,5 @@ class MessagingThread(BaseSchedulerThread):
         if count:
             logger.info('Sending %d message(s)', count)
             self._manager.send_messages(self._messages)
+            instrumentation_mgr.increment(MESSAGES_SENT, count)
             self._messages = []
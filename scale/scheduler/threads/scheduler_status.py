@@ -7,6 +7,7 @@ from django.utils.timezone import now
 
 from job.execution.manager import job_exe_mgr
 from job.tasks.manager import task_mgr
+from scheduler.instrumentation.manager import instrumentation_mgr
 from scheduler.manager import scheduler_mgr
 from scheduler.models import Scheduler
 from scheduler.node.manager import node_mgr
@@ -51,4 +52,5 @@ class SchedulerStatusThread(BaseSchedulerThread):
         job_exe_mgr.generate_status_json(status_dict['nodes'], when)
         task_mgr.generate_status_json(status_dict['nodes'])
         job_type_mgr.generate_status_json(status_dict)
+        instrumentation_mgr.generate_status_json(status_dict)
         Scheduler.objects.all().update(status=status_dict)
@@ -5,15 +5,18 @@ import datetime
 import logging
 
 from django.conf import settings
+from django.utils.timezone import now
 from mesos.interface import mesos_pb2
 
 from job.execution.manager import job_exe_mgr
 from scheduler.cleanup.manager import cleanup_mgr
+from scheduler.instrumentation.manager import instrumentation_mgr, PHASE_SECONDS
 from scheduler.manager import scheduler_mgr
 from scheduler.node.manager import node_mgr
 from scheduler.resources.manager import resource_mgr
 from scheduler.sync.job_type_manager import job_type_mgr
 from scheduler.sync.workspace_manager import workspace_mgr
+from scheduler.tasks.manager import system_task_mgr
 from scheduler.threads.base_thread import BaseSchedulerThread
 from scheduler.vault.manager import secrets_mgr
 
@@ -62,11 +65,13 @@ class SyncThread(BaseSchedulerThread):
         """See :meth:`scheduler.threads.base_thread.BaseSchedulerThread._execute`
         """
 
-        scheduler_mgr.sync_with_database()
-        job_type_mgr.sync_with_database()
-        workspace_mgr.sync_with_database()
+        self._timed_sync('scheduler', scheduler_mgr.sync_with_database)
+        self._timed_sync('job_types', job_type_mgr.sync_with_database)
+        self._timed_sync('workspaces', workspace_mgr.sync_with_database)
+        self._timed_sync('system_tasks', system_task_mgr.sync_with_database)
+        self._timed_sync('services', system_task_mgr.sync_services)
 
-        node_mgr.sync_with_database(scheduler_mgr.config)
+        self._timed_sync('nodes', node_mgr.sync_with_database, scheduler_mgr.config)
         cleanup_mgr.update_nodes(node_mgr.get_nodes())
         mesos_master = scheduler_mgr.mesos_address
         resource_mgr.sync_with_mesos(mesos_master.hostname, mesos_master.port)
@@ -80,3 +85,19 @@ class SyncThread(BaseSchedulerThread):
 
         if settings.SECRETS_URL:
             secrets_mgr.sync_with_backend()
+
+    def _timed_sync(self, name, sync_func, *args):
+        """Calls the given sync function and records its duration in the scheduler metrics
+
+        :param name: The name of the sync
+        :type name: string
+        :param sync_func: The sync function to call
+        :type sync_func: function
+        """
+
+        started = now()
+        sync_func(*args)
+        duration = now() - started
+        scheduler_mgr.add_sync_duration(name, duration)
+        instrumentation_mgr.observe(PHASE_SECONDS, duration.total_seconds(), thread=self._name, phase=name)
+        logger.debug('%s sync took %.3f seconds', name, duration.total_seconds())
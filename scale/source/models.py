@@ -7,6 +7,7 @@ import django.contrib.gis.db.models as models
 from django.db import transaction
 from django.utils.timezone import now
 
+import product.lineage as lineage
 import storage.geospatial_utils as geo_utils
 from job.models import Job
 from source.triggers.parse_trigger_handler import ParseTriggerHandler
@@ -172,7 +173,7 @@ class SourceFileManager(models.GeoManager):
         :rtype: [:class:`job.models.Job`]
         """
 
-        # Order must end with job ID so we can do a distinct on the job ID and remove duplicate jobs
+        # Order ends with job ID so that jobs with the same values for the other fields are consistently ordered
         if order:
             order.append('id')
         else:
@@ -182,8 +183,7 @@ class SourceFileManager(models.GeoManager):
                                        job_type_categories=job_type_categories, batch_ids=batch_ids, 
                                        error_categories=error_categories, include_superseded=include_superseded, 
                                        order=order)
-        distinct = [field.replace('-', '') for field in order]  # Remove - char for reverse sort fields
-        jobs = jobs.filter(job_file_links__ancestor_id=source_file_id).distinct(*distinct)
+        jobs = jobs.filter(id__in=lineage.get_descendant_job_ids_query([source_file_id]))
         return jobs
 
     def get_source_products(self, source_file_id, started=None, ended=None, time_field=None, batch_ids=None,
@@ -241,10 +241,9 @@ class SourceFileManager(models.GeoManager):
                                                        is_operational=is_operational, is_published=is_published,
                                                        is_superseded=None, file_name=file_name, job_output=job_output,
                                                        recipe_ids=recipe_ids, recipe_job=recipe_job,
-                                                       recipe_type_ids=recipe_type_ids, order=order)
-        products = products.filter(ancestors__ancestor_id=source_file_id)
-        if batch_ids:
-            products = products.filter(ancestors__batch_id__in=batch_ids)
+                                                       recipe_type_ids=recipe_type_ids, batch_ids=batch_ids,
+                                                       order=order)
+        products = products.filter(id__in=lineage.get_descendant_ids_query([source_file_id]))
 
         return products
 
@@ -288,7 +287,7 @@ class SourceFileManager(models.GeoManager):
             source.ingests = []
 
         # Attempt to fetch all products derived from the source
-        products = ScaleFile.objects.filter(ancestors__ancestor_id=source.id, file_type='PRODUCT')
+        products = ScaleFile.objects.filter(id__in=lineage.get_descendant_ids_query([source.id]), file_type='PRODUCT')
         # Exclude superseded products by default
         if not include_superseded:
             products = products.filter(is_superseded=False)
@@ -65,7 +65,7 @@ class TestSourceFileManager(TestCase):
                                             job_exe=job_exe)
 
         jobs = SourceFile.objects.get_source_jobs(self.src_file.id)
-        # Should only return one job despite two file_ancestry_link models
+        # Should only return one job since both products share a single job_input_file model for the source file
         self.assertEqual(len(jobs), 1)
         self.assertEqual(jobs[0].id, job_exe.job.id)
 
@@ -26,6 +26,7 @@ class SourcesView(ListAPIView):
     """This view is the endpoint for retrieving source files."""
     queryset = ScaleFile.objects.all()
     serializer_class = SourceFileSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request):
         """Retrieves the source files for a given time range and returns it in JSON form
@@ -163,6 +164,7 @@ class SourceJobsView(ListAPIView):
     """This view is the endpoint for retrieving a list of all jobs related to a source file."""
     queryset = Job.objects.all()
     serializer_class = JobSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request, source_id=None):
         """Retrieves the jobs for a given source file ID and returns them in JSON form
@@ -211,6 +213,7 @@ class SourceProductsView(ListAPIView):
     """This view is the endpoint for retrieving products produced from a source file"""
     queryset = ScaleFile.objects.all()
     serializer_class = ProductFileSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request, source_id=None):
         """Retrieves the products for a given source file ID and returns them in JSON form
@@ -267,6 +270,7 @@ class SourceUpdatesView(ListAPIView):
     """This view is the endpoint for retrieving source file updates over a given time range."""
     queryset = ScaleFile.objects.all()
     serializer_class = SourceFileUpdateSerializer
+    cursor_ordering = ('last_modified', 'id')
 
     def list(self, request):
         """Retrieves the source file updates for a given time range and returns it in JSON form
@@ -0,0 +1,355 @@
+"""Defines the directory walker that lists the files in a locally mounted directory tree for the host broker"""
+from __future__ import unicode_literals
+
+import fnmatch
+import logging
+import os
+import re
+import stat
+import threading
+
+from six.moves.queue import Full, Queue
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+# The number of threads that scan directories concurrently
+NUM_WALK_THREADS = 8
+
+# The maximum number of files that are passed from a scanning thread to the caller at once
+BATCH_SIZE = 1000
+
+# The maximum number of batches waiting to be consumed by the caller before the scanning threads block
+MAX_QUEUED_BATCHES = 64
+
+# How long in seconds a blocked scanning thread waits before checking whether the walk has been stopped
+STOP_CHECK_INTERVAL = 0.5
+
+
+logger = logging.getLogger(__name__)
+
+
+class _ListDirEntry(object):
+    """Emulates the directory entries returned by scandir using os.listdir() and a single os.lstat() per entry, for
+    Python versions that do not provide scandir
+    """
+
+    def __init__(self, dir_path, name):
+        """Constructor
+
+        :param dir_path: The path of the directory containing the entry
+        :type dir_path: string
+        :param name: The name of the entry
+        :type name: string
+        """
+
+        self.name = name
+        self.path = os.path.join(dir_path, name)
+        self._lstat = None
+        self._stat = None
+
+    def is_dir(self, follow_symlinks=True):
+        """Indicates whether the entry is a directory
+
+        :param follow_symlinks: Whether a symbolic link to a directory counts as a directory
+        :type follow_symlinks: bool
+        :returns: True if the entry is a directory, False otherwise
+        :rtype: bool
+        """
+
+        return self._get_mode(follow_symlinks, stat.S_ISDIR)
+
+    def is_file(self, follow_symlinks=True):
+        """Indicates whether the entry is a regular file
+
+        :param follow_symlinks: Whether a symbolic link to a file counts as a file
+        :type follow_symlinks: bool
+        :returns: True if the entry is a regular file, False otherwise
+        :rtype: bool
+        """
+
+        return self._get_mode(follow_symlinks, stat.S_ISREG)
+
+    def stat(self, follow_symlinks=True):
+        """Returns the cached stat result of the entry
+
+        :param follow_symlinks: Whether to stat the target of a symbolic link
+        :type follow_symlinks: bool
+        :returns: The stat result
+        :rtype: :class:`os.stat_result`
+        """
+
+        if self._lstat is None:
+            self._lstat = os.lstat(self.path)
+        if not follow_symlinks or not stat.S_ISLNK(self._lstat.st_mode):
+            return self._lstat
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def _get_mode(self, follow_symlinks, test_func):
+        """Tests the mode of the entry, treating a broken symbolic link as neither a file nor a directory
+
+        :param follow_symlinks: Whether to test the target of a symbolic link
+        :type follow_symlinks: bool
+        :param test_func: The function that tests the mode
+        :type test_func: func
+        :returns: The result of the test
+        :rtype: bool
+        """
+
+        try:
+            return test_func(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            return False
+
+
+def _scandir(path):
+    """Returns the entries of the given directory, using scandir if it is available
+
+    :param path: The path of the directory
+    :type path: string
+    :returns: The directory entries
+    :rtype: iterator
+    """
+
+    if scandir:
+        return scandir(path)
+    return (_ListDirEntry(path, name) for name in os.listdir(path))
+
+
+def walk_files(path, max_depth=None, patterns=None, num_threads=NUM_WALK_THREADS):
+    """Generator that lists the files within the given directory tree. Subdirectories are scanned concurrently and the
+    files are yielded as they are found, in no particular order, so the full listing is never held in memory. Symbolic
+    links to files are listed, symbolic links to directories are not followed and directories that cannot be read are
+    skipped.
+
+    :param path: The path to the root directory of the tree
+    :type path: string
+    :param max_depth: The maximum depth of subdirectories to descend into, where 0 only lists the files directly within
+        the root directory and None lists the entire tree
+    :type max_depth: int
+    :param patterns: Optional list of glob patterns (such as '*.h5'), where only files with a name matching one of the
+        patterns are listed
+    :type patterns: list
+    :param num_threads: The number of threads that scan directories concurrently
+    :type num_threads: int
+    :returns: A generator of (file path relative to the root directory, file size in bytes) tuples
+    :rtype: generator
+    """
+
+    walker = DirWalker(path, max_depth, patterns)
+    if num_threads <= 1 or max_depth == 0:
+        return walker.walk_serial()
+    return walker.walk_parallel(num_threads)
+
+
+class DirWalker(object):
+    """Walks a directory tree using the type and stat information cached on each scanned directory entry, so that each
+    file requires at most one stat call and names that do not match the glob patterns are never stat'ed
+    """
+
+    def __init__(self, path, max_depth=None, patterns=None):
+        """Constructor
+
+        :param path: The path to the root directory of the tree
+        :type path: string
+        :param max_depth: The maximum depth of subdirectories to descend into, None for the entire tree
+        :type max_depth: int
+        :param patterns: Optional list of glob patterns that the file names must match
+        :type patterns: list
+        """
+
+        self._path = path
+        self._max_depth = max_depth
+        self._regexes = [re.compile(fnmatch.translate(pattern)) for pattern in patterns] if patterns else []
+
+        # Parallel walk state
+        self._dirs = Queue()  # Directories waiting to be scanned, None tells a thread to exit
+        self._results = Queue(MAX_QUEUED_BATCHES)  # Batches of files waiting to be consumed by the caller
+        self._lock = threading.Lock()
+        self._num_pending_dirs = 0  # Directories that have been queued but not completely scanned
+        self._num_threads = 0
+        self._stopped = threading.Event()
+
+    def walk_parallel(self, num_threads):
+        """Generator that walks the tree by fanning the directories out to the given number of threads
+
+        :param num_threads: The number of threads that scan directories
+        :type num_threads: int
+        :returns: A generator of (relative file path, file size) tuples
+        :rtype: generator
+        """
+
+        threads = []
+        self._num_threads = num_threads
+        self._queue_dir(self._path, '', 0)
+        for i in range(num_threads):
+            thread = threading.Thread(target=self._run_thread, name='DirWalker-%d' % i)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        try:
+            while True:
+                batch = self._results.get()
+                if batch is None:
+                    break
+                for file_info in batch:
+                    yield file_info
+        finally:
+            # Stops the threads early if the caller did not consume every file
+            self._stopped.set()
+            for thread in threads:
+                thread.join()
+
+    def walk_serial(self):
+        """Generator that walks the tree within the calling thread
+
+        :returns: A generator of (relative file path, file size) tuples
+        :rtype: generator
+        """
+
+        dirs = [(self._path, '', 0)]
+        while dirs:
+            dir_path, rel_path, depth = dirs.pop()
+            subdirs = []
+            for batch in self._scan_dir(dir_path, rel_path, depth, subdirs):
+                for file_info in batch:
+                    yield file_info
+            dirs.extend(subdirs)
+
+    def _finish_dir(self):
+        """Records that a directory has been completely scanned. Once every directory has been scanned, the caller and
+        the threads are told that the walk is complete.
+        """
+
+        with self._lock:
+            self._num_pending_dirs -= 1
+            is_complete = self._num_pending_dirs == 0
+
+        if is_complete:
+            self._put_results(None)
+            for _ in range(self._num_threads):
+                self._dirs.put(None)
+
+    def _matches(self, name):
+        """Indicates whether the given file name matches the glob patterns
+
+        :param name: The file name
+        :type name: string
+        :returns: True if the name matches or there are no patterns, False otherwise
+        :rtype: bool
+        """
+
+        if not self._regexes:
+            return True
+        for regex in self._regexes:
+            if regex.match(name):
+                return True
+        return False
+
+    def _put_results(self, batch):
+        """Passes the given batch of files to the caller, blocking while the caller is behind unless the walk has been
+        stopped
+
+        :param batch: The list of (relative file path, file size) tuples, None to signal the end of the walk
+        :type batch: list
+        """
+
+        while not self._stopped.is_set():
+            try:
+                self._results.put(batch, timeout=STOP_CHECK_INTERVAL)
+                return
+            except Full:
+                continue
+
+    def _queue_dir(self, dir_path, rel_path, depth):
+        """Queues the given directory to be scanned
+
+        :param dir_path: The path of the directory
+        :type dir_path: string
+        :param rel_path: The path of the directory relative to the root directory
+        :type rel_path: string
+        :param depth: The depth of the directory below the root directory
+        :type depth: int
+        """
+
+        with self._lock:
+            self._num_pending_dirs += 1
+        self._dirs.put((dir_path, rel_path, depth))
+
+    def _run_thread(self):
+        """Scans directories from the queue until the walk is complete
+        """
+
+        while True:
+            queued_dir = self._dirs.get()
+            if queued_dir is None:
+                return
+
+            try:
+                if not self._stopped.is_set():
+                    subdirs = []
+                    for batch in self._scan_dir(queued_dir[0], queued_dir[1], queued_dir[2], subdirs):
+                        self._put_results(batch)
+                    for subdir in subdirs:
+                        self._queue_dir(*subdir)
+            except Exception:
+                logger.exception('Error scanning directory %s', queued_dir[0])
+            finally:
+                self._finish_dir()
+
+    def _scan_dir(self, dir_path, rel_path, depth, subdirs):
+        """Generator that scans the given directory for files, yielding them in batches and appending the subdirectories
+        to descend into to the given list
+
+        :param dir_path: The path of the directory
+        :type dir_path: string
+        :param rel_path: The path of the directory relative to the root directory
+        :type rel_path: string
+        :param depth: The depth of the directory below the root directory
+        :type depth: int
+        :param subdirs: The list to append the (path, relative path, depth) tuples of the subdirectories to
+        :type subdirs: list
+        :returns: A generator of lists of (relative file path, file size) tuples
+        :rtype: generator
+        """
+
+        descend = self._max_depth is None or depth < self._max_depth
+        batch = []
+        try:
+            entries = _scandir(dir_path)
+        except OSError as ex:
+            logger.warning('Unable to scan directory %s: %s', dir_path, ex)
+            return
+
+        for entry in entries:
+            name = entry.name
+            if not descend and not self._matches(name):
+                # Nothing below the maximum depth is listed, so skip the stat of entries that cannot match
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if descend:
+                        subdirs.append((entry.path, os.path.join(rel_path, name), depth + 1))
+                    continue
+                if not self._matches(name) or not entry.is_file():
+                    continue
+                batch.append((os.path.join(rel_path, name), entry.stat().st_size))
+            except OSError:
+                # The entry was removed or is a broken link
+                continue
+
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
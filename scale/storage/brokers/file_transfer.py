@@ -0,0 +1,415 @@
+"""Defines the functions that copy files between locally mounted file systems for the host and NFS brokers"""
+from __future__ import unicode_literals
+
+import ctypes
+import ctypes.util
+import errno
+import fcntl
+import logging
+import os
+import select
+import shutil
+import stat
+import threading
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+
+# The number of files that are copied concurrently
+NUM_COPY_THREADS = 8
+
+# The maximum number of bytes requested from the kernel by a single copy call
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# The buffer size of a copy through user space
+BUFFER_SIZE = 1024 * 1024
+
+# The ioctl request that clones (reflinks) one file into another on file systems that share extents
+FICLONE = 0x40049409
+
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+# Errors that indicate a copy method is not supported by the files' file systems
+UNSUPPORTED_ERRNOS = {errno.EBADF, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EOPNOTSUPP, errno.EXDEV}
+
+# Errors that indicate that a hard link could not be created and the file should be copied
+LINK_ERRNOS = {errno.EMLINK, errno.EPERM, errno.EXDEV}
+
+
+Mount = namedtuple('Mount', ['mount_point', 'fs_type', 'source'])
+
+
+logger = logging.getLogger(__name__)
+
+
+def _load_libc():
+    """Loads the C library functions for the kernel copy system calls, if they are available
+
+    :returns: A tuple of the copy_file_range and sendfile functions, either of which may be None
+    :rtype: tuple
+    """
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    except OSError:
+        return None, None
+
+    copy_file_range_func = getattr(libc, 'copy_file_range', None)
+    if copy_file_range_func:
+        copy_file_range_func.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+                                         ctypes.c_uint]
+        copy_file_range_func.restype = ctypes.c_ssize_t
+    sendfile_func = getattr(libc, 'sendfile', None)
+    if sendfile_func:
+        sendfile_func.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t]
+        sendfile_func.restype = ctypes.c_ssize_t
+    return copy_file_range_func, sendfile_func
+
+
+_COPY_FILE_RANGE, _SENDFILE = _load_libc()
+
+
+class MountTable(object):
+    """This class caches the mount table of the current process. The table is parsed once and only parsed again after
+    the kernel reports that a file system has been mounted or unmounted. This class is thread-safe.
+    """
+
+    def __init__(self, mountinfo_path=MOUNTINFO_PATH):
+        """Constructor
+
+        :param mountinfo_path: The path of the mountinfo file to parse
+        :type mountinfo_path: string
+        """
+
+        self._mountinfo_path = mountinfo_path
+        self._mountinfo_file = None
+        self._mounts = None  # Sorted with the longest mount point first
+        self._poller = None
+        self._lock = threading.Lock()
+
+    def get_mount(self, path):
+        """Returns the mount that contains the given path
+
+        :param path: The path
+        :type path: string
+        :returns: The mount containing the path, possibly None
+        :rtype: :class:`storage.brokers.file_transfer.Mount`
+        """
+
+        path = os.path.abspath(path)
+        for mount in self.get_mounts():
+            mount_point = mount.mount_point
+            if path == mount_point or path.startswith(mount_point.rstrip(os.sep) + os.sep):
+                return mount
+        return None
+
+    def get_mounts(self):
+        """Returns the mounts of the current process, parsing the mount table again only if it has changed
+
+        :returns: The list of mounts with the longest mount point first
+        :rtype: [:class:`storage.brokers.file_transfer.Mount`]
+        """
+
+        with self._lock:
+            if self._mounts is None or self._has_changed():
+                self._mounts = self._read_mounts()
+            return self._mounts
+
+    def invalidate(self):
+        """Invalidates the cached mount table so that it is parsed again on next use
+        """
+
+        with self._lock:
+            self._mounts = None
+
+    def is_same_mount(self, path_1, path_2):
+        """Indicates whether the given paths are within the same mount
+
+        :param path_1: The first path
+        :type path_1: string
+        :param path_2: The second path
+        :type path_2: string
+        :returns: True if both paths are within the same mount, False otherwise
+        :rtype: bool
+        """
+
+        mount_1 = self.get_mount(path_1)
+        return mount_1 is not None and mount_1 == self.get_mount(path_2)
+
+    def _has_changed(self):
+        """Indicates whether the mount table has changed since it was last parsed. The kernel flags the mountinfo file
+        with an exceptional condition when a file system is mounted or unmounted. The caller must hold the lock.
+
+        :returns: True if the mount table may have changed, False otherwise
+        :rtype: bool
+        """
+
+        if not self._poller:
+            return True
+        return bool(self._poller.poll(0))
+
+    def _read_mounts(self):
+        """Parses the mount table. The caller must hold the lock.
+
+        :returns: The list of mounts with the longest mount point first
+        :rtype: [:class:`storage.brokers.file_transfer.Mount`]
+        """
+
+        if not self._mountinfo_file:
+            self._mountinfo_file = open(self._mountinfo_path, 'rb')
+            if hasattr(select, 'poll'):
+                self._poller = select.poll()
+                self._poller.register(self._mountinfo_file.fileno(), select.POLLERR | select.POLLPRI)
+        self._mountinfo_file.seek(0)
+        lines = self._mountinfo_file.read().decode('utf-8', 'replace').splitlines()
+
+        mounts = []
+        for line in lines:
+            mount = parse_mountinfo_line(line)
+            if mount:
+                mounts.append(mount)
+        mounts.sort(key=lambda mount: len(mount.mount_point), reverse=True)
+        return mounts
+
+
+def copy_file(src_path, dest_path):
+    """Copies the contents of the source file to the destination file, letting the kernel copy the data where the file
+    systems support it. The file is cloned (reflinked) if possible, then copied with copy_file_range() or sendfile(),
+    and finally copied through user space.
+
+    :param src_path: The absolute path to the source file
+    :type src_path: string
+    :param dest_path: The absolute path to the destination file
+    :type dest_path: string
+    :returns: The name of the method used to copy the file
+    :rtype: string
+    """
+
+    with open(src_path, 'rb') as src_file, open(dest_path, 'wb') as dest_file:
+        src_fd = src_file.fileno()
+        dest_fd = dest_file.fileno()
+        size = os.fstat(src_fd).st_size
+        devices = (os.fstat(src_fd).st_dev, os.fstat(dest_fd).st_dev)
+
+        for method_name, method in _COPY_METHODS:
+            if (method_name, devices) in _unsupported_methods:
+                continue
+            try:
+                if method(src_fd, dest_fd, size):
+                    return method_name
+            except (IOError, OSError) as ex:
+                if ex.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                logger.debug('Copy method %s is not supported from %s to %s', method_name, src_path, dest_path)
+                _unsupported_methods.add((method_name, devices))
+            # Start over from the beginning with the next method
+            src_file.seek(0)
+            dest_file.seek(0)
+            dest_file.truncate()
+
+        shutil.copyfileobj(src_file, dest_file, BUFFER_SIZE)
+        return 'read/write'
+
+
+def copy_files(transfers, num_threads=NUM_COPY_THREADS, mode=None):
+    """Transfers the given files concurrently using a bounded pool of threads. See transfer_file() for how each file is
+    transferred.
+
+    :param transfers: A list of tuples of the source path and destination path of each file
+    :type transfers: [(string, string)]
+    :param num_threads: The maximum number of files to transfer concurrently
+    :type num_threads: int
+    :param mode: The permissions to set on each destination file, possibly None to leave them unchanged
+    :type mode: int
+    :returns: The name of the method used to transfer each file
+    :rtype: [string]
+    """
+
+    if len(transfers) <= 1 or num_threads <= 1:
+        return [transfer_file(src_path, dest_path, mode) for src_path, dest_path in transfers]
+
+    pool = ThreadPool(min(num_threads, len(transfers)))
+    try:
+        return pool.map(_transfer_file, [(src_path, dest_path, mode) for src_path, dest_path in transfers], chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def parse_mountinfo_line(line):
+    """Parses a line of the mountinfo file
+
+    :param line: The line
+    :type line: string
+    :returns: The mount described by the line, possibly None if the line is invalid
+    :rtype: :class:`storage.brokers.file_transfer.Mount`
+    """
+
+    fields = line.split()
+    try:
+        separator = fields.index('-', 6)
+        mount_point = _unescape(fields[4])
+        fs_type = fields[separator + 1]
+        source = fields[separator + 2]
+    except (IndexError, ValueError):
+        return None
+    return Mount(mount_point, fs_type, source)
+
+
+def transfer_file(src_path, dest_path, mode=None):
+    """Transfers the source file to the destination path. A hard link is created instead of a copy when both paths are
+    within the same mount, otherwise the file is copied with copy_file(). A hard link shares its inode with the source
+    file, so later changes to the contents or permissions of either file show up in both. The file is therefore only
+    linked when the source file already has the requested permissions, and an existing destination file is removed
+    before linking rather than written through, since it may itself be a link to another file.
+
+    :param src_path: The absolute path to the source file, links are followed
+    :type src_path: string
+    :param dest_path: The absolute path to the destination file
+    :type dest_path: string
+    :param mode: The permissions to set on the destination file, possibly None to leave them unchanged
+    :type mode: int
+    :returns: The name of the method used to transfer the file
+    :rtype: string
+    """
+
+    if os.path.islink(src_path):
+        real_path = os.path.realpath(src_path)
+        logger.info('%s is a link to %s', src_path, real_path)
+        src_path = real_path
+
+    same_mode = mode is None or stat.S_IMODE(os.stat(src_path).st_mode) == mode
+    if same_mode and mount_table.is_same_mount(src_path, dest_path):
+        try:
+            _link(src_path, dest_path)
+            return 'link'
+        except OSError as ex:
+            if ex.errno not in LINK_ERRNOS:
+                raise
+
+    method_name = copy_file(src_path, dest_path)
+    if mode is not None:
+        os.chmod(dest_path, mode)
+    return method_name
+
+
+def _copy_file_range(src_fd, dest_fd, size):
+    """Copies the file with the copy_file_range() system call, which lets the file system copy the data on the server
+    (NFS 4.2) or share extents
+
+    :returns: True if the file was copied, False if the system call is not available
+    :rtype: bool
+    """
+
+    if hasattr(os, 'copy_file_range'):
+        return _copy_loop(lambda count: os.copy_file_range(src_fd, dest_fd, count), size)
+    if not _COPY_FILE_RANGE:
+        return False
+    return _copy_loop(lambda count: _check_result(_COPY_FILE_RANGE(src_fd, None, dest_fd, None, count, 0)), size)
+
+
+def _copy_loop(copy_func, size):
+    """Calls the given copy function until the given number of bytes (or the end of the file) is reached
+
+    :returns: True
+    :rtype: bool
+    """
+
+    copied = 0
+    while copied < size:
+        count = copy_func(min(CHUNK_SIZE, size - copied))
+        if count == 0:
+            break
+        copied += count
+    return True
+
+
+def _check_result(result):
+    """Checks the result of a C library call, raising an OSError if it failed
+
+    :returns: The result
+    :rtype: int
+    """
+
+    if result < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return result
+
+
+def _link(src_path, dest_path):
+    """Creates a hard link to the source file at the destination path, replacing any existing destination file
+    """
+
+    try:
+        os.link(src_path, dest_path)
+    except OSError as ex:
+        if ex.errno != errno.EEXIST:
+            raise
+        if os.path.samefile(src_path, dest_path):
+            # The destination is already a link to the source
+            return
+        logger.info('Replacing existing file %s', dest_path)
+        os.remove(dest_path)
+        os.link(src_path, dest_path)
+
+
+def _reflink(src_fd, dest_fd, size):
+    """Clones the file so that the destination shares the source's extents on copy-on-write file systems
+
+    :returns: True
+    :rtype: bool
+    """
+
+    fcntl.ioctl(dest_fd, FICLONE, src_fd)
+    return True
+
+
+def _sendfile(src_fd, dest_fd, size):
+    """Copies the file with the sendfile() system call, which copies the data within the kernel
+
+    :returns: True if the file was copied, False if the system call is not available
+    :rtype: bool
+    """
+
+    if hasattr(os, 'sendfile'):
+        return _copy_loop(lambda count: os.sendfile(dest_fd, src_fd, None, count), size)
+    if not _SENDFILE:
+        return False
+    return _copy_loop(lambda count: _check_result(_SENDFILE(dest_fd, src_fd, None, count)), size)
+
+
+def _transfer_file(transfer):
+    """Calls transfer_file() with the given tuple of source path, destination path and mode
+
+    :returns: The name of the method used to transfer the file
+    :rtype: string
+    """
+
+    return transfer_file(transfer[0], transfer[1], transfer[2])
+
+
+def _unescape(value):
+    """Decodes the octal escapes (such as \\040 for a space) used for the paths in the mountinfo file
+
+    :returns: The decoded value
+    :rtype: string
+    """
+
+    parts = value.split('\\')
+    result = parts[0]
+    for part in parts[1:]:
+        if len(part) >= 3 and part[:3].isdigit():
+            result += chr(int(part[:3], 8)) + part[3:]
+        else:
+            result += '\\' + part
+    return result
+
+
+# The kernel-assisted copy methods in order of preference
+_COPY_METHODS = [('reflink', _reflink), ('copy_file_range', _copy_file_range), ('sendfile', _sendfile)]
+
+# The (method name, (source device, destination device)) tuples for which a copy method is not supported
+_unsupported_methods = set()
+
+mount_table = MountTable()
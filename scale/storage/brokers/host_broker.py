@@ -6,9 +6,10 @@ import os
 import shutil
 
 from storage.brokers.broker import Broker, BrokerVolume, FileDetails
+from storage.brokers.dir_walker import walk_files
 from storage.brokers.exceptions import InvalidBrokerConfiguration
+from storage.brokers.file_transfer import copy_files
 from storage.exceptions import MissingFile
-from util.command import execute_command_line
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +51,7 @@ class HostBroker(Broker):
 
             # Create symlink to the file in the host mount
             logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
-            execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
+            os.symlink(path_to_download, file_download.local_path)
 
     def get_file_system_paths(self, volume_path, files):
         """See :meth:`storage.brokers.broker.Broker.get_file_system_paths`
@@ -65,30 +66,23 @@ class HostBroker(Broker):
         """See :meth:`storage.brokers.broker.Broker.list_files`
         """
 
-        for file_name in self._dir_walker(volume_path, recursive):
-            if os.path.isfile(file_name):
-                # Strip down to a workspace relative path to the file, not an absolute path
-                relative_file_name = os.path.relpath(file_name, volume_path)
-                yield FileDetails(relative_file_name, os.path.getsize(file_name))
+        for file_name, file_size in self._dir_walker(volume_path, recursive):
+            yield FileDetails(file_name, file_size)
 
     @staticmethod
     def _dir_walker(path, recursive):
-        """Generator to handle both flat and recursive directory traversal
-        
+        """Generator to handle both flat and recursive directory traversal. Subdirectories are scanned concurrently and
+        files are yielded as they are found, so large trees are never listed in memory.
+
         :param path: The path to the directory tree to walk
         :type path: string
         :param recursive: Whether directory walk is only at path or recursive
         :type recursive: bool
+        :returns: A generator of (file path relative to the given path, file size in bytes) tuples
+        :rtype: generator
         """
-        # Handle a full recursive walk of the directory tree.
-        if recursive:
-            for root, dirs, files in os.walk(path):
-                for name in files:
-                    yield os.path.join(root, name)
-        # Handle identifying files only from a single directory.
-        else:
-            for result in os.listdir(path):
-                yield os.path.join(path, result)
+
+        return walk_files(path, max_depth=None if recursive else 0)
 
     def load_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.load_configuration`
@@ -128,19 +122,24 @@ class HostBroker(Broker):
         """See :meth:`storage.brokers.broker.Broker.upload_files`
         """
 
+        transfers = []
+        created_dirs = set()
         for file_upload in file_uploads:
             path_to_upload = os.path.join(volume_path, file_upload.file.file_path)
             path_to_upload_dir = os.path.dirname(path_to_upload)
 
-            if not os.path.exists(path_to_upload_dir):
+            if path_to_upload_dir not in created_dirs and not os.path.exists(path_to_upload_dir):
                 logger.info('Creating %s', path_to_upload_dir)
                 os.makedirs(path_to_upload_dir, mode=0755)
+            created_dirs.add(path_to_upload_dir)
 
             logger.info('Copying %s to %s', file_upload.local_path, path_to_upload)
-            shutil.copy(file_upload.local_path, path_to_upload)
-            logger.info('Setting file permissions for %s', path_to_upload)
-            os.chmod(path_to_upload, 0644)
+            transfers.append((file_upload.local_path, path_to_upload))
 
+        # Copy the files concurrently, setting the file permissions of each copy
+        copy_files(transfers, mode=0644)
+
+        for file_upload in file_uploads:
             # Create new model
             file_upload.file.save()
 
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0009_auto_20171002_1542'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='scalefile',
+            index_together=set([('last_modified', 'id')]),
+        ),
+    ]
@@ -575,6 +575,7 @@ class ScaleFile(models.Model):
     class Meta(object):
         """meta information for the db"""
         db_table = 'scale_file'
+        index_together = ['last_modified', 'id']
 
 
 class WorkspaceManager(models.Manager):
@@ -0,0 +1,159 @@
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import skipUnless
+
+import django
+from django.test import TestCase
+from mock import patch
+
+from storage.brokers.dir_walker import walk_files
+
+BENCHMARK_ENV_VAR = 'SCALE_WALK_BENCHMARK'
+
+
+class TestWalkFiles(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.files = []
+        for rel_path in ['a.h5', 'b.txt', 'one/c.h5', 'one/two/d.h5', 'one/two/e.txt', 'three/four/five/f.h5']:
+            self._create_file(rel_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _create_file(self, rel_path):
+        path = os.path.join(self.temp_dir, rel_path)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as new_file:
+            new_file.write(b'0' * len(rel_path))
+        self.files.append((rel_path, len(rel_path)))
+
+    def test_parallel(self):
+        """Tests listing an entire tree with multiple threads"""
+
+        results = sorted(walk_files(self.temp_dir, num_threads=4))
+
+        self.assertListEqual(results, sorted(self.files))
+
+    def test_serial(self):
+        """Tests listing an entire tree within the calling thread"""
+
+        results = sorted(walk_files(self.temp_dir, num_threads=1))
+
+        self.assertListEqual(results, sorted(self.files))
+
+    @patch('storage.brokers.dir_walker.scandir', None)
+    def test_without_scandir(self):
+        """Tests listing an entire tree when scandir is not available"""
+
+        results = sorted(walk_files(self.temp_dir, num_threads=4))
+
+        self.assertListEqual(results, sorted(self.files))
+
+    def test_max_depth(self):
+        """Tests that the walk does not descend below the maximum depth"""
+
+        self.assertListEqual(sorted(walk_files(self.temp_dir, max_depth=0)), [('a.h5', 4), ('b.txt', 5)])
+        self.assertListEqual(sorted(walk_files(self.temp_dir, max_depth=1)), [('a.h5', 4), ('b.txt', 5),
+                                                                               ('one/c.h5', 8)])
+
+    def test_patterns(self):
+        """Tests that only files matching the glob patterns are listed"""
+
+        results = sorted(walk_files(self.temp_dir, patterns=['*.txt', 'c.*']))
+
+        self.assertListEqual(results, [('b.txt', 5), ('one/c.h5', 8), ('one/two/e.txt', 13)])
+
+    def test_symlinks(self):
+        """Tests that links to files are listed and links to directories and broken links are not followed"""
+
+        os.symlink(os.path.join(self.temp_dir, 'a.h5'), os.path.join(self.temp_dir, 'link.h5'))
+        os.symlink(os.path.join(self.temp_dir, 'one'), os.path.join(self.temp_dir, 'link_dir'))
+        os.symlink(os.path.join(self.temp_dir, 'missing'), os.path.join(self.temp_dir, 'broken'))
+
+        results = sorted(walk_files(self.temp_dir))
+
+        self.assertListEqual(results, sorted(self.files + [('link.h5', 4)]))
+
+    def test_missing_dir(self):
+        """Tests that walking a directory that does not exist lists nothing"""
+
+        self.assertListEqual(list(walk_files(os.path.join(self.temp_dir, 'missing'))), [])
+
+    def test_stop_early(self):
+        """Tests that the threads stop when the caller stops consuming the files"""
+
+        for i in range(3000):
+            self._create_file('many/%d/%d.txt' % (i % 10, i))
+
+        results = walk_files(self.temp_dir, num_threads=4)
+        next(results)
+        results.close()
+
+        self.assertListEqual([t for t in threading.enumerate() if t.name.startswith('DirWalker')], [])
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the directory walk benchmark' % BENCHMARK_ENV_VAR)
+class TestWalkFilesBenchmark(TestCase):
+    """Measures the time taken to list a generated tree of a million empty files. The benchmark is slow so it is only run
+    when the SCALE_WALK_BENCHMARK environment variable is set. Set SCALE_WALK_BENCHMARK_FILES to change the number of
+    files and SCALE_WALK_BENCHMARK_DIR to generate the tree on a specific file system, such as an NFS mount.
+    """
+
+    FILES_PER_DIR = 1000
+
+    def setUp(self):
+        django.setup()
+
+        self.num_files = int(os.environ.get('SCALE_WALK_BENCHMARK_FILES', 1000000))
+        self.temp_dir = tempfile.mkdtemp(dir=os.environ.get('SCALE_WALK_BENCHMARK_DIR'))
+        for i in range(self.num_files // self.FILES_PER_DIR):
+            dir_path = os.path.join(self.temp_dir, '%d' % (i // 10), '%d' % i)
+            os.makedirs(dir_path)
+            for j in range(self.FILES_PER_DIR):
+                open(os.path.join(dir_path, '%d.dat' % j), 'wb').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_walk_throughput(self):
+        """Compares the previous os.walk() based listing with the serial and parallel walks"""
+
+        print('\nListing %d files' % self.num_files)
+        self._report('os.walk with isfile/getsize', self._run(self._legacy_walk))
+        self._report('walk_files (1 thread)', self._run(lambda path: walk_files(path, num_threads=1)))
+        self._report('walk_files (8 threads)', self._run(lambda path: walk_files(path, num_threads=8)))
+        self._report('walk_files (8 threads, *.dat)', self._run(lambda path: walk_files(path, patterns=['*.dat'])))
+
+    def _legacy_walk(self, path):
+        """The listing used by the host broker before the parallel walker"""
+
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                file_name = os.path.join(root, name)
+                if os.path.isfile(file_name):
+                    yield os.path.relpath(file_name, path), os.path.getsize(file_name)
+
+    def _report(self, name, result):
+        count, duration = result
+        self.assertEqual(count, self.num_files)
+        print('%s: %.1f s, %.0f files/s' % (name, duration, count / duration))
+
+    def _run(self, walk_func):
+        """Consumes the given walk and returns the number of files and the duration in seconds"""
+
+        started = time.time()
+        count = 0
+        for _ in walk_func(self.temp_dir):
+            count += 1
+        return count, time.time() - started
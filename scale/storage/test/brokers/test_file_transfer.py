@@ -0,0 +1,201 @@
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import shutil
+import stat
+import tempfile
+import time
+from unittest import skipUnless
+
+import django
+from django.test import TestCase
+from mock import patch
+
+from storage.brokers.file_transfer import copy_file, copy_files, Mount, MountTable, parse_mountinfo_line, transfer_file
+
+BENCHMARK_ENV_VAR = 'SCALE_TRANSFER_BENCHMARK'
+
+MOUNTINFO = """16 36 0:3 / /proc rw,nosuid,nodev,noexec,relatime shared:5 - proc proc rw
+36 0 253:0 / / rw,relatime shared:1 - xfs /dev/mapper/vg_root-lv_root rw,attr2,inode64,noquota
+46 14 0:40 / /users rw,relatime shared:32 - nfs4 users:/users rw,vers=4.0,rsize=1048576,wsize=1048576,hard
+48 38 0:42 / /users/my\\040dir rw,relatime shared:34 - nfs4 fserver:/exports/my_dir_1 rw,vers=4.0,hard
+"""
+
+
+class TestMountTable(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.mountinfo_path = os.path.join(self.temp_dir, 'mountinfo')
+        with open(self.mountinfo_path, 'w') as mountinfo_file:
+            mountinfo_file.write(MOUNTINFO)
+        self.mount_table = MountTable(self.mountinfo_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_mount(self):
+        """Tests that the longest matching mount point is found for a path"""
+
+        self.assertEqual(self.mount_table.get_mount('/users/my dir/file.txt').source, 'fserver:/exports/my_dir_1')
+        self.assertEqual(self.mount_table.get_mount('/users/file.txt').source, 'users:/users')
+        self.assertEqual(self.mount_table.get_mount('/users2/file.txt').mount_point, '/')
+
+    def test_cached(self):
+        """Tests that the mount table is only parsed again after it has been invalidated"""
+
+        self.assertTrue(self.mount_table.is_same_mount('/users/a.txt', '/users/b.txt'))
+        with open(self.mountinfo_path, 'w') as mountinfo_file:
+            mountinfo_file.write('')
+
+        with patch.object(self.mount_table, '_has_changed', return_value=False):
+            self.assertTrue(self.mount_table.is_same_mount('/users/a.txt', '/users/b.txt'))
+        self.mount_table.invalidate()
+        self.assertFalse(self.mount_table.is_same_mount('/users/a.txt', '/users/b.txt'))
+
+    def test_parse_invalid_line(self):
+        """Tests parsing an invalid mountinfo line"""
+
+        self.assertIsNone(parse_mountinfo_line('16 36 0:3 / /proc'))
+        self.assertEqual(parse_mountinfo_line(MOUNTINFO.splitlines()[0]), Mount('/proc', 'proc', 'proc'))
+
+
+class TestCopyFiles(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _create_file(self, name, size):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'wb') as new_file:
+            new_file.write(os.urandom(size))
+        return path
+
+    def _read_file(self, path):
+        with open(path, 'rb') as the_file:
+            return the_file.read()
+
+    def test_copy_file(self):
+        """Tests that copying a file produces identical contents"""
+
+        src_path = self._create_file('src.dat', 3 * 1024 * 1024 + 7)
+        dest_path = os.path.join(self.temp_dir, 'dest.dat')
+
+        copy_file(src_path, dest_path)
+
+        self.assertEqual(self._read_file(src_path), self._read_file(dest_path))
+
+    @patch('storage.brokers.file_transfer._COPY_METHODS', [])
+    def test_copy_file_user_space(self):
+        """Tests copying a file through user space when no kernel copy method is available"""
+
+        src_path = self._create_file('src.dat', 1000)
+        dest_path = os.path.join(self.temp_dir, 'dest.dat')
+
+        self.assertEqual(copy_file(src_path, dest_path), 'read/write')
+        self.assertEqual(self._read_file(src_path), self._read_file(dest_path))
+
+    def test_transfer_same_mount(self):
+        """Tests that a file is linked instead of copied when the source and destination are on the same mount"""
+
+        src_path = self._create_file('src.dat', 1000)
+        dest_path = os.path.join(self.temp_dir, 'dest.dat')
+
+        self.assertEqual(transfer_file(src_path, dest_path), 'link')
+        self.assertEqual(os.stat(src_path).st_ino, os.stat(dest_path).st_ino)
+
+    def test_transfer_same_mount_existing(self):
+        """Tests that linking a file replaces an existing destination file without changing the file it links to"""
+
+        old_path = self._create_file('old.dat', 100)
+        old_contents = self._read_file(old_path)
+        src_path = self._create_file('src.dat', 1000)
+        dest_path = os.path.join(self.temp_dir, 'dest.dat')
+        os.link(old_path, dest_path)
+
+        self.assertEqual(transfer_file(src_path, dest_path), 'link')
+        self.assertEqual(os.stat(src_path).st_ino, os.stat(dest_path).st_ino)
+        self.assertEqual(self._read_file(old_path), old_contents)
+        self.assertEqual(transfer_file(src_path, dest_path), 'link')
+
+    def test_transfer_same_mount_mode(self):
+        """Tests that a file is copied instead of linked when its permissions would have to change"""
+
+        src_path = self._create_file('src.dat', 1000)
+        os.chmod(src_path, 0o600)
+        dest_path = os.path.join(self.temp_dir, 'dest.dat')
+
+        self.assertNotEqual(transfer_file(src_path, dest_path, mode=0o644), 'link')
+        self.assertEqual(stat.S_IMODE(os.stat(src_path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(dest_path).st_mode), 0o644)
+        self.assertEqual(self._read_file(src_path), self._read_file(dest_path))
+
+    @patch('storage.brokers.file_transfer.mount_table.is_same_mount', return_value=False)
+    def test_copy_files(self, mock_is_same_mount):
+        """Tests copying many files concurrently"""
+
+        transfers = []
+        for i in range(20):
+            src_path = self._create_file('src_%d.dat' % i, 1000 + i)
+            transfers.append((src_path, os.path.join(self.temp_dir, 'dest_%d.dat' % i)))
+
+        methods = copy_files(transfers, num_threads=4)
+
+        self.assertEqual(len(methods), 20)
+        for src_path, dest_path in transfers:
+            self.assertEqual(self._read_file(src_path), self._read_file(dest_path))
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the file transfer benchmark' % BENCHMARK_ENV_VAR)
+class TestCopyFilesBenchmark(TestCase):
+    """Measures the throughput of copying many small files between two local directories. The benchmark is slow so it is
+    only run when the SCALE_TRANSFER_BENCHMARK environment variable is set. Set SCALE_TRANSFER_BENCHMARK_DIR to run it
+    on a specific file system, such as a tmpfs or loopback mount.
+    """
+
+    NUM_FILES = 2000
+    FILE_SIZE = 64 * 1024
+
+    def setUp(self):
+        django.setup()
+
+        self.temp_dir = tempfile.mkdtemp(dir=os.environ.get('SCALE_TRANSFER_BENCHMARK_DIR'))
+        self.src_dir = os.path.join(self.temp_dir, 'src')
+        os.makedirs(self.src_dir)
+        for i in range(self.NUM_FILES):
+            with open(os.path.join(self.src_dir, '%d.dat' % i), 'wb') as new_file:
+                new_file.write(os.urandom(self.FILE_SIZE))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_copy_throughput(self):
+        """Compares a sequential shutil copy with the concurrent kernel-assisted copy"""
+
+        print('\nCopying %d files of %d KiB' % (self.NUM_FILES, self.FILE_SIZE // 1024))
+        self._report('Sequential shutil.copy', self._run(lambda transfers: [shutil.copy(*t) for t in transfers]))
+        with patch('storage.brokers.file_transfer.mount_table.is_same_mount', return_value=False):
+            self._report('Concurrent copy_files', self._run(copy_files))
+        self._report('Concurrent copy_files (same mount)', self._run(copy_files))
+
+    def _report(self, name, duration):
+        total_mb = self.NUM_FILES * self.FILE_SIZE / (1024.0 * 1024.0)
+        print('%s: %.1f files/s, %.1f MB/s' % (name, self.NUM_FILES / duration, total_mb / duration))
+
+    def _run(self, copy_func):
+        """Runs the given copy function on all of the files and returns the duration in seconds"""
+
+        dest_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        transfers = [(os.path.join(self.src_dir, '%d.dat' % i), os.path.join(dest_dir, '%d.dat' % i))
+                     for i in range(self.NUM_FILES)]
+        started = time.time()
+        copy_func(transfers)
+        return time.time() - started
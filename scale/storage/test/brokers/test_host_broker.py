@@ -63,8 +63,8 @@ class TestHostBrokerDownloadFiles(TestCase):
         self.broker.load_configuration({'type': HostBroker().broker_type, 'host_path': '/host/path'})
 
     @patch('storage.brokers.host_broker.os.path.exists')
-    @patch('storage.brokers.host_broker.execute_command_line')
-    def test_successfully(self, mock_execute, mock_exists):
+    @patch('storage.brokers.host_broker.os.symlink')
+    def test_successfully(self, mock_symlink, mock_exists):
         """Tests calling HostBroker.download_files() successfully"""
 
         mock_exists.return_value = True
@@ -88,9 +88,9 @@ class TestHostBrokerDownloadFiles(TestCase):
         self.broker.download_files(volume_path, [file_1_dl, file_2_dl])
 
         # Check results
-        two_calls = [call(['ln', '-s', full_workspace_path_file_1, local_path_file_1]),
-                     call(['ln', '-s', full_workspace_path_file_2, local_path_file_2])]
-        mock_execute.assert_has_calls(two_calls)
+        two_calls = [call(full_workspace_path_file_1, local_path_file_1),
+                     call(full_workspace_path_file_2, local_path_file_2)]
+        mock_symlink.assert_has_calls(two_calls)
 
 
 class TestHostBrokerListFiles(TestCase):
@@ -101,47 +101,46 @@ class TestHostBrokerListFiles(TestCase):
         self.root_path = '/my/test/path'
         self.broker = HostBroker()
 
-    @patch('os.listdir')
-    def test_no_files_flat_walk(self, list_dir):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _create_file(self, rel_path, size=0):
+        path = os.path.join(self.temp_dir, rel_path)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as new_file:
+            new_file.write(b'0' * size)
+        return rel_path
+
+    def test_no_files_flat_walk(self):
         """Tests calling HostBroker._dir_walker() with no files in directory"""
         
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, False)]
+        file_list = [x for x in HostBroker._dir_walker(self.temp_dir, False)]
         
         self.assertEqual(len(file_list), 0)
 
-    @patch('os.listdir')
-    def test_with_files_flat_dir_walker(self, list_dir):
+    def test_with_files_flat_dir_walker(self):
         """Tests calling HostBroker._dir_walker() with files in a directory"""
         
-        files = [str(uuid.uuid4()), str(uuid.uuid4())]
-
-        list_dir.return_value = files
+        files = [self._create_file(str(uuid.uuid4()), 1), self._create_file(str(uuid.uuid4()), 2)]
+        self._create_file(os.path.join('sub', str(uuid.uuid4())))
         
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, False)]
+        file_list = [x for x in HostBroker._dir_walker(self.temp_dir, False)]
 
-        for i in range(2):
-            self.assertEqual(os.path.join(self.root_path, files[i]), file_list[i])
-            
-        self.assertEqual(len(file_list), 2)
+        self.assertListEqual(sorted(file_list), sorted([(files[0], 1), (files[1], 2)]))
 
-    @patch('os.walk')
-    def test_with_files_recursive_dir_walker(self, walk):
+    def test_with_files_recursive_dir_walker(self):
         """Tests calling HostBroker._dir_walker() with files throughout tree"""
         
-        files = []
-        dirs = {self.root_path: str(uuid.uuid4()),
-                os.path.join(self.root_path, str(uuid.uuid4())): str(uuid.uuid4()),
-                os.path.join(self.root_path, str(uuid.uuid4())): str(uuid.uuid4())}
-
-        files = [os.path.join(x, dirs[x]) for x in dirs]
-
-        walk.return_value = [(x, (), (dirs[x],)) for x in dirs]
+        files = [self._create_file(str(uuid.uuid4())),
+                 self._create_file(os.path.join(str(uuid.uuid4()), str(uuid.uuid4()))),
+                 self._create_file(os.path.join(str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())))]
         
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, True)]
+        file_list = [x for x in HostBroker._dir_walker(self.temp_dir, True)]
         
-        for i in range(3):
-            self.assertEqual(os.path.join(self.root_path, files[i]), file_list[i])
-        self.assertEqual(len(file_list), 3)
+        self.assertListEqual(sorted(file_list), sorted([(file_name, 0) for file_name in files]))
 
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_no_files(self, walk):
@@ -151,57 +150,51 @@ class TestHostBrokerListFiles(TestCase):
         files = self.broker.list_files(self.root_path, False)
         self.assertEqual(len(list(files)), 0)
     
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_list_a_thousand(self, walk):
         """Tests calling HostBroker.list_files() with multiple batches (1000+)"""
         
-        walk.return_value = [str(uuid.uuid4()) for _ in range(1500)]
+        walk.return_value = [(str(uuid.uuid4()), 0) for _ in range(1500)]
         
         files = self.broker.list_files(self.root_path, True)
         
         self.assertEqual(len(list(files)), 1500)
     
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_list_ten(self, walk):
         """Tests calling HostBroker.list_files() to search directory"""
         
-        walk.return_value = [str(uuid.uuid4()) for _ in range(10)]
+        walk.return_value = [(str(uuid.uuid4()), 0) for _ in range(10)]
         
         files = self.broker.list_files(self.root_path, True)
         
         self.assertEqual(len(list(files)), 10)
     
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
-    @patch('storage.brokers.host_broker.HostBroker._dir_walker')
-    def test_recursive_successfully(self, walk):
+    def test_recursive_successfully(self):
         """Tests calling HostBroker.list_files() with files across multi-level 
         directory tree"""
         
-        walk.return_value = [os.path.join(str(x), str(uuid.uuid4())) for x in range(10)]
+        for x in range(10):
+            self._create_file(os.path.join(str(x), str(uuid.uuid4())), x)
 
-        files = self.broker.list_files(self.root_path, True)
+        files = self.broker.list_files(self.temp_dir, True)
         
-        self.assertEqual(len(list(files)), 10)
+        file_list = list(files)
+        self.assertEqual(len(file_list), 10)
+        self.assertEqual(sum(file_details.size for file_details in file_list), 45)
         
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
-    @patch('storage.brokers.host_broker.HostBroker._dir_walker')
-    def test_recursive_successfully_strip_path(self, walk):
+    def test_recursive_successfully_strip_path(self):
         """Tests calling HostBroker.list_files() with files across multi-level 
         directory tree verifying the host volume path is removed"""
         
-        walk.return_value = [os.path.join(self.root_path, str(x), str(uuid.uuid4())) for x in range(10)]
+        for x in range(10):
+            self._create_file(os.path.join(str(x), str(uuid.uuid4())))
 
-        files = self.broker.list_files(self.root_path, True)
+        files = self.broker.list_files(self.temp_dir, True)
         
         file_list = list(files)
         for file_details in file_list:
-            self.assertNotIn(self.root_path, file_details.file)
+            self.assertNotIn(self.temp_dir, file_details.file)
         
         self.assertEqual(len(file_list), 10)
 
@@ -290,7 +283,7 @@ class TestHostBrokerUploadFiles(TestCase):
     @patch('storage.brokers.host_broker.os.makedirs')
     @patch('storage.brokers.host_broker.os.path.exists')
     @patch('storage.brokers.host_broker.os.chmod')
-    @patch('storage.brokers.host_broker.shutil.copy')
+    @patch('storage.brokers.host_broker.copy_files')
     def test_successfully(self, mock_copy, mock_chmod, mock_exists, mock_makedirs):
         """Tests calling HostBroker.upload_files() successfully"""
 
@@ -320,9 +313,8 @@ class TestHostBrokerUploadFiles(TestCase):
         two_calls = [call(os.path.dirname(full_workspace_path_file_1), mode=0755),
                      call(os.path.dirname(full_workspace_path_file_2), mode=0755)]
         mock_makedirs.assert_has_calls(two_calls)
-        two_calls = [call(local_path_file_1, full_workspace_path_file_1),
-                     call(local_path_file_2, full_workspace_path_file_2)]
-        mock_copy.assert_has_calls(two_calls)
+        mock_copy.assert_called_once_with([(local_path_file_1, full_workspace_path_file_1),
+                                           (local_path_file_2, full_workspace_path_file_2)])
         two_calls = [call(full_workspace_path_file_1, 0644), call(full_workspace_path_file_2, 0644)]
         mock_chmod.assert_has_calls(two_calls)
 
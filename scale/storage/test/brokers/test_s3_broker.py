@@ -1,16 +1,23 @@
+from __future__ import print_function
 from __future__ import unicode_literals
 
 import os
+import shutil
+import tempfile
+from unittest import skipUnless
 
 import django
 from django.test import TestCase
 from mock import MagicMock, Mock, call, mock_open, patch
 
 import storage.test.utils as storage_test_utils
-from storage.brokers.broker import FileDownload, FileMove, FileUpload
+from storage.brokers.broker import FileDetails, FileDownload, FileMove, FileUpload
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.brokers.s3_broker import S3Broker
+from storage.models import ScaleFile
 from util.aws import S3Client
+from util.test.benchmark import BENCHMARK_ENV_VAR, Benchmark, create_benchmark_server, get_benchmark_setting
+from util.test.fake_aws import FakeAWSServer
 
 
 class TestS3Broker(TestCase):
@@ -268,3 +275,115 @@ class TestS3Broker(TestCase):
         broker = S3Broker()
 
         self.assertRaises(InvalidBrokerConfiguration, broker.validate_configuration, json_config)
+
+
+class TestS3BrokerWithFakeServer(TestCase):
+    """Tests the S3 broker transferring files to and from an in-process fake S3 server"""
+
+    def setUp(self):
+        django.setup()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = FakeAWSServer()
+        self.server.start()
+        self.server.create_bucket('my-bucket')
+
+        self.broker = S3Broker()
+        self.broker.load_configuration({
+            'type': S3Broker().broker_type,
+            'bucket_name': 'my-bucket',
+            'region_name': 'us-east-1',
+            'credentials': {
+                'access_key_id': 'ABC',
+                'secret_access_key': '123',
+            },
+        })
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_transfer_files(self):
+        """Tests uploading, listing, moving, downloading and deleting files"""
+
+        local_path = os.path.join(self.temp_dir, 'my_file.txt')
+        with open(local_path, 'wb') as local_file:
+            local_file.write(b'test contents')
+        download_path = os.path.join(self.temp_dir, 'downloaded.txt')
+        file_1 = storage_test_utils.create_file(file_path='my_dir/my_file.txt', file_size=13)
+
+        with self.settings(**self.server.get_client_settings()):
+            self.broker.upload_files(None, [FileUpload(file_1, local_path)])
+            self.broker.move_files(None, [FileMove(file_1, 'new_dir/my_file.txt')])
+            files = list(self.broker.list_files(None, True))
+            self.broker.download_files(None, [FileDownload(file_1, download_path, False)])
+            self.broker.delete_files(None, [file_1])
+            files_after_delete = list(self.broker.list_files(None, True))
+
+        self.assertListEqual(files, [FileDetails('new_dir/my_file.txt', 13)])
+        with open(download_path, 'rb') as download_file:
+            self.assertEqual(download_file.read(), b'test contents')
+        self.assertListEqual(files_after_delete, [])
+
+
+@skipUnless(os.environ.get(BENCHMARK_ENV_VAR), 'Set %s to run the S3 benchmark' % BENCHMARK_ENV_VAR)
+class TestS3BrokerBenchmark(TestCase):
+    """Measures uploading, listing and downloading files with the S3 broker against a fake S3 server. The benchmark is
+    slow so it is only run when the SCALE_AWS_BENCHMARK environment variable is set. Set SCALE_AWS_BENCHMARK_FILES and
+    SCALE_AWS_BENCHMARK_FILE_SIZE (in bytes) to change the number and size of the files, and SCALE_AWS_BENCHMARK_LATENCY
+    to add a simulated network latency (in milliseconds) to every request.
+    """
+
+    def setUp(self):
+        django.setup()
+
+        self.num_files = get_benchmark_setting('FILES', 1000)
+        self.file_size = get_benchmark_setting('FILE_SIZE', 64 * 1024)
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = create_benchmark_server()
+        self.server.start()
+        self.server.create_bucket('benchmark')
+
+        self.broker = S3Broker()
+        self.broker.load_configuration({'type': 's3', 'bucket_name': 'benchmark', 'region_name': 'us-east-1',
+                                        'credentials': {'access_key_id': 'ABC', 'secret_access_key': '123'}})
+        workspace = storage_test_utils.create_workspace()
+        self.files = []
+        for i in range(self.num_files):
+            local_path = os.path.join(self.temp_dir, '%d.dat' % i)
+            with open(local_path, 'wb') as local_file:
+                local_file.write(os.urandom(self.file_size))
+            scale_file = ScaleFile(file_name='%d.dat' % i, media_type='application/octet-stream',
+                                   file_size=self.file_size, file_path='dir_%d/%d.dat' % (i % 10, i),
+                                   workspace=workspace)
+            self.files.append((scale_file, local_path))
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_transfer_throughput(self):
+        """Measures the upload_files, list_files and download_files throughput of the S3 broker"""
+
+        total_bytes = self.num_files * self.file_size
+        print('\nTransferring %d files of %d KiB' % (self.num_files, self.file_size // 1024))
+        with self.settings(**self.server.get_client_settings()):
+            benchmark = Benchmark('upload_files')
+            with benchmark.measure():
+                self.broker.upload_files(None, [FileUpload(scale_file, path) for scale_file, path in self.files])
+            benchmark.report(self.num_files, total_bytes)
+
+            benchmark = Benchmark('list_files')
+            with benchmark.measure():
+                count = len(list(self.broker.list_files(None, True)))
+            benchmark.report(count, 0)
+            self.assertEqual(count, self.num_files)
+
+            download_dir = os.path.join(self.temp_dir, 'downloads')
+            os.makedirs(download_dir)
+            file_downloads = [FileDownload(scale_file, os.path.join(download_dir, scale_file.file_name), False)
+                              for scale_file, _ in self.files]
+            benchmark = Benchmark('download_files')
+            with benchmark.measure():
+                self.broker.download_files(None, file_downloads)
+            benchmark.report(self.num_files, total_bytes)
@@ -10,3 +10,10 @@ class UtilConfig(AppConfig):
     name = 'util'
     label = 'util'
     verbose_name = 'Util'
+
+    def ready(self):
+        """Registers the partition maintenance processor with the clock system."""
+        import job.clock as clock
+        from util.partition_maintenance import PartitionMaintenanceProcessor
+
+        clock.register_processor('scale-partitions', PartitionMaintenanceProcessor)
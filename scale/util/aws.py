@@ -18,7 +18,7 @@ AWSCredentials = namedtuple('AWSCredentials', ['access_key_id', 'secret_access_k
 class AWSClient(object):
     """Manages automatically creating and destroying clients to AWS services."""
 
-    def __init__(self, resource, config, credentials=None, region_name=None):
+    def __init__(self, resource, config, credentials=None, region_name=None, endpoint_url=None):
         """Constructor
 
         :param resource: AWS specific token for resource type. e.g., 's3', 'sqs', etc.
@@ -30,6 +30,9 @@ class AWSClient(object):
         :type credentials: :class:`util.aws.AWSCredentials`
         :param region_name: The AWS region the resource resides in.
         :type region_name: string
+        :param endpoint_url: The URL of a service that provides the AWS API, such as a local stand-in. If no URL is
+            passed, then the AWS endpoint for the region is used.
+        :type endpoint_url: string
         """
 
         self.credentials = credentials
@@ -37,6 +40,7 @@ class AWSClient(object):
         self._client = None
         self._resource_name = resource
         self._config = config
+        self._endpoint_url = endpoint_url
 
     def __enter__(self):
         """Callback handles creating a new client for AWS access."""
@@ -51,8 +55,9 @@ class AWSClient(object):
             session_args['region_name'] = self.region_name
         self._session = Session(**session_args)
 
-        self._client = self._session.client(self._resource_name, config=self._config)
-        self._resource = self._session.resource(self._resource_name, config=self._config)
+        self._client = self._session.client(self._resource_name, config=self._config, endpoint_url=self._endpoint_url)
+        self._resource = self._session.resource(self._resource_name, config=self._config,
+                                                endpoint_url=self._endpoint_url)
         return self
 
     def __exit__(self, type, value, traceback):
@@ -101,7 +106,31 @@ class SQSClient(AWSClient):
         :param region_name: The AWS region the resource resides in.
         :type region_name: string
         """
-        AWSClient.__init__(self, 'sqs', None, credentials, region_name)
+        AWSClient.__init__(self, 'sqs', None, credentials, region_name, getattr(settings, 'SQS_ENDPOINT_URL', None))
+        self._queues = {}  # Queue resources used to send and receive messages, stored by queue name
+
+    def delete_messages(self, queue_name, messages):
+        """Deletes the given received messages from an SQS queue in batches of up to 10 messages per request
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :param messages: The messages to delete
+        :type messages: [`boto3.sqs.Message`]
+        :return: The number of messages that could not be deleted
+        :rtype: int
+        """
+
+        queue = self._get_queue(queue_name)
+
+        failed = 0
+        for i in xrange(0, len(messages), 10):
+            entries = [{'Id': str(j), 'ReceiptHandle': message.receipt_handle}
+                       for j, message in enumerate(messages[i:i + 10])]
+            response = queue.delete_messages(Entries=entries)
+            for failure in response.get('Failed', []):
+                logger.warning('Unable to delete message from %s: %s', queue_name, failure.get('Message'))
+                failed += 1
+        return failed
 
     def get_queue_by_name(self, queue_name):
         """Gets a SQS queue by the given name
@@ -114,6 +143,20 @@ class SQSClient(AWSClient):
 
         return self._resource.get_queue_by_name(QueueName=queue_name)
 
+    def get_queue_size(self, queue_name):
+        """Gets the approximate number of messages waiting in a SQS queue, not counting messages that have been received
+        but not yet deleted
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :return: The approximate number of messages in the queue
+        :rtype: int
+        """
+
+        queue = self.get_queue_by_name(queue_name)
+
+        return int(queue.attributes['ApproximateNumberOfMessages'])
+
     def send_message(self, queue_name, message):
         """Send a message to SQS queue.
 
@@ -160,7 +203,7 @@ class SQSClient(AWSClient):
         :return: Generator of messages
         :rtype: Generator[`boto3.sqs.Message`]
         """
-        queue = self.get_queue_by_name(queue_name)
+        queue = self._get_queue(queue_name)
 
         # Set max_messages to lesser of 10 or batch_size
         max_messages = batch_size if batch_size < 10 else 10
@@ -178,6 +221,22 @@ class SQSClient(AWSClient):
             if count % 10 != 0 or not count:
                 break
 
+    def _get_queue(self, queue_name):
+        """Gets the SQS queue with the given name, looking up its URL only the first time that this client uses it. The
+        queue attributes are not refreshed, so get_queue_by_name() should be used to read them.
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :return: Queue resource to perform queue operations
+        :rtype: :class:`boto3.sqs.Queue`
+        """
+
+        queue = self._queues.get(queue_name)
+        if queue is None:
+            queue = self.get_queue_by_name(queue_name)
+            self._queues[queue_name] = queue
+        return queue
+
 
 class S3Client(AWSClient):
     def __init__(self, credentials=None, region_name=None):
@@ -190,7 +249,7 @@ class S3Client(AWSClient):
         :type region_name: string
         """
         config = Config(s3={'addressing_style': getattr(settings, 'S3_ADDRESSING_STYLE', 'auto')})
-        AWSClient.__init__(self, 's3', config, credentials, region_name)
+        AWSClient.__init__(self, 's3', config, credentials, region_name, getattr(settings, 'S3_ENDPOINT_URL', None))
 
     def get_bucket(self, bucket_name, validate=True):
         """Gets a reference to an S3 bucket with the given identifier.
@@ -266,9 +325,9 @@ class S3Client(AWSClient):
         iterator = paginator.paginate(**params)
 
         for page in iterator:
-            # In the event of 0 results, exit loop
+            # Pages with 0 results, or with only common prefixes when not recursive, have no contents
             if 'Contents' not in page:
-                break
+                continue
 
             for result in page['Contents']:
                 # Filter out 0 size keys, these are directory keys as S3 objects must be at least 1 Byte
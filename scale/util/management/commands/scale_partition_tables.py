@@ -0,0 +1,88 @@
+"""Defines the command line method for maintaining the Scale time-partitioned tables"""
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from util.partition import MONTHS_AHEAD, PARTITIONED_TABLES, add_months, get_month_start
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command that creates upcoming partitions and applies the retention policy of the Scale time-partitioned tables
+    """
+
+    help = 'Creates upcoming partitions and removes old data for the Scale time-partitioned tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-m', '--months-ahead', action='store', type=int, default=MONTHS_AHEAD,
+                            help='The number of months after the current month to create partitions for')
+        parser.add_argument('-a', '--archive', action='store_true', default=False,
+                            help='Detach and rename old partitions instead of dropping them')
+        parser.add_argument('-c', '--convert', action='store_true', default=False,
+                            help='Convert any unpartitioned tables into partitioned tables first')
+
+    def handle(self, *args, **options):
+        """See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method maintains the Scale time-partitioned tables.
+        """
+
+        months_ahead = options.get('months_ahead')
+        archive = options.get('archive')
+        convert = options.get('convert')
+
+        logger.info('Command starting: scale_partition_tables')
+        logger.info(' - Months ahead: %d', months_ahead)
+        logger.info(' - Archive: %s', archive)
+
+        when = timezone.now()
+        failed = 0
+        for table in PARTITIONED_TABLES:
+            try:
+                self._maintain_table(table, when, months_ahead, archive, convert)
+            except:
+                failed += 1
+                logger.exception('Unable to maintain table: %s', table.table_name)
+
+        logger.info('Command completed: scale_partition_tables')
+        if failed:
+            logger.info('Tables failed: %i', failed)
+            sys.exit(failed)
+
+    def _maintain_table(self, table, when, months_ahead, archive, convert):
+        """Creates the upcoming partitions for the given table and removes its data that is past its retention period
+
+        :param table: The partitioned table
+        :type table: :class:`util.partition.PartitionedTable`
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        :param months_ahead: The number of months after the current month to create partitions for
+        :type months_ahead: int
+        :param archive: Whether to archive old partitions instead of dropping them
+        :type archive: bool
+        :param convert: Whether to convert the table into a partitioned table if it is not already
+        :type convert: bool
+        """
+
+        if convert:
+            table.convert(when=when)
+
+        created = table.create_partitions(add_months(get_month_start(when), months_ahead), when=when)
+        logger.info('Table %s: created %d partition(s)', table.table_name, len(created))
+
+        retention_days = table.get_retention_days()
+        if retention_days is None:
+            return
+        before = when - datetime.timedelta(days=retention_days)
+        removed = table.remove_old_data(before, archive=archive)
+        if isinstance(removed, list):
+            logger.info('Table %s: removed %d partition(s) before %s', table.table_name, len(removed), before)
+        else:
+            logger.info('Table %s: deleted %d row(s) before %s', table.table_name, removed, before)
@@ -0,0 +1,427 @@
+"""Defines the classes for managing time-partitioned database tables"""
+from __future__ import unicode_literals
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+# Native range partitioning with primary keys requires PostgreSQL 11 or later
+MIN_SERVER_VERSION = 110000
+
+# The number of months after the current month that partitions are kept created for
+MONTHS_AHEAD = 2
+
+
+class PartitionedTable(object):
+    """Represents a database table that is range partitioned by month on one of its timestamp columns. Each partition is
+    named <table>_pYYYYMM and covers a single calendar month (UTC). A default partition named <table>_default holds any
+    rows whose month has no partition yet, so inserts never fail when the upcoming partitions were not created in time;
+    those rows are moved into their monthly partitions once the partitions are created. Tables that were not converted
+    to partitioned tables (such as on older PostgreSQL servers) are still supported, with retention falling back to
+    batched deletes.
+    """
+
+    def __init__(self, table_name, column, primary_key, retention_setting):
+        """Constructor
+
+        :param table_name: The name of the database table
+        :type table_name: string
+        :param column: The name of the timestamp column that the table is partitioned on
+        :type column: string
+        :param primary_key: The name of the single column primary key of the unpartitioned table
+        :type primary_key: string
+        :param retention_setting: The name of the setting that holds the number of days of data to keep
+        :type retention_setting: string
+        """
+
+        self.table_name = table_name
+        self.column = column
+        self.primary_key = primary_key
+        self.retention_setting = retention_setting
+
+    def convert(self, when=None):
+        """Converts this table into a partitioned table. The existing table is renamed and attached as the partition
+        holding all rows before the current month, and partitions are created for the current and next month (and any
+        later months that already hold rows) along with the default partition. Existing rows from the current month
+        onward are moved out of the renamed table into the new monthly partitions. This is a no-op if the table is
+        already partitioned or the database server does not support partitioning.
+
+        Since PostgreSQL can only enforce uniqueness across partitions when the partition column is part of the key, the
+        primary key of the partitioned table becomes (primary key, partition column). The original primary key column is
+        then only unique within each partition, so callers must not rely on the database to reject duplicates of it.
+
+        :param when: The current time, defaults to now
+        :type when: :class:`datetime.datetime`
+        :returns: True if the table was converted, False otherwise
+        :rtype: bool
+        """
+
+        if not is_partitioning_supported():
+            logger.warning('PostgreSQL 11 or later is required to partition table %s, leaving it unpartitioned',
+                           self.table_name)
+            return False
+        if self.is_partitioned():
+            return False
+
+        if not when:
+            when = timezone.now()
+        current_month = get_month_start(when)
+        legacy_name = '%s_legacy' % self.table_name
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('ALTER TABLE %s RENAME TO %s' % (self.table_name, legacy_name))
+                cursor.execute('CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS) PARTITION BY RANGE (%s)' %
+                               (self.table_name, legacy_name, self.column))
+                cursor.execute('ALTER TABLE %s ADD PRIMARY KEY (%s, %s)' %
+                               (self.table_name, self.primary_key, self.column))
+
+                # Move any rows from the current month onward into new monthly partitions so that the legacy table only
+                # holds rows before the current month
+                cursor.execute('SELECT max(%s) FROM %s' % (self.column, legacy_name))
+                latest = cursor.fetchone()[0]
+                through = add_months(current_month, 1)
+                if latest is not None and latest > through:
+                    through = latest
+                self.create_partitions(through, when=when)
+                cursor.execute('INSERT INTO %s SELECT * FROM %s WHERE %s >= %%s' %
+                               (self.table_name, legacy_name, self.column), [current_month])
+                cursor.execute('DELETE FROM %s WHERE %s >= %%s' % (legacy_name, self.column), [current_month])
+                if cursor.rowcount:
+                    logger.info('Moved %d row(s) of table %s into the new monthly partitions', cursor.rowcount,
+                                self.table_name)
+
+                cursor.execute('ALTER TABLE %s ADD CONSTRAINT %s_range CHECK (%s < %%s)' %
+                               (legacy_name, legacy_name, self.column), [current_month])
+                cursor.execute('ALTER TABLE %s ATTACH PARTITION %s FOR VALUES FROM (MINVALUE) TO (%%s)' %
+                               (self.table_name, legacy_name), [current_month])
+                for index_sql in self._get_index_sql(cursor, legacy_name):
+                    cursor.execute(index_sql)
+                for constraint_name, constraint_def in self._get_foreign_keys(cursor, legacy_name):
+                    cursor.execute('ALTER TABLE %s ADD CONSTRAINT %s_part %s' %
+                                   (self.table_name, constraint_name, constraint_def))
+                # The ID sequence must belong to the partitioned table so it survives when the legacy data is dropped
+                cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [legacy_name, self.primary_key])
+                sequence_name = cursor.fetchone()[0]
+                if sequence_name:
+                    cursor.execute('ALTER SEQUENCE %s OWNED BY %s.%s' %
+                                   (sequence_name, self.table_name, self.primary_key))
+
+        logger.info('Converted table %s into a table partitioned on %s', self.table_name, self.column)
+        return True
+
+    def create_partitions(self, through, when=None):
+        """Creates any missing monthly partitions from the current month through the month containing the given time,
+        along with the default partition if it is missing. Partitions are also created for the months of any rows in
+        the default partition, and those rows are moved into them.
+
+        :param through: Partitions are created through the month containing this time
+        :type through: :class:`datetime.datetime`
+        :param when: The current time, defaults to now
+        :type when: :class:`datetime.datetime`
+        :returns: The names of the partitions that were created
+        :rtype: list
+        """
+
+        if not self.is_partitioned():
+            return []
+
+        if not when:
+            when = timezone.now()
+        existing = set(self.get_partitions())
+        default_name = self.get_default_partition_name()
+        created = []
+        month = get_month_start(when)
+        last_month = get_month_start(through)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if default_name in existing:
+                    cursor.execute('SELECT min(%s), max(%s) FROM %s' % (self.column, self.column, default_name))
+                    earliest, latest = cursor.fetchone()
+                    if earliest is not None:
+                        month = min(month, get_month_start(earliest))
+                        last_month = max(last_month, get_month_start(latest))
+                else:
+                    cursor.execute('CREATE TABLE %s PARTITION OF %s DEFAULT' % (default_name, self.table_name))
+                    created.append(default_name)
+
+                while month <= last_month:
+                    partition_name = self.get_partition_name(month)
+                    if partition_name not in existing:
+                        self._create_partition(cursor, partition_name, month, add_months(month, 1))
+                        created.append(partition_name)
+                    month = add_months(month, 1)
+
+        for partition_name in created:
+            logger.info('Created partition %s', partition_name)
+        return created
+
+    def get_default_partition_name(self):
+        """Returns the name of the default partition that holds the rows of months without a partition
+
+        :returns: The name of the default partition
+        :rtype: string
+        """
+
+        return '%s_default' % self.table_name
+
+    def get_partition_name(self, month):
+        """Returns the name of the partition that holds the given month
+
+        :param month: A time within the month
+        :type month: :class:`datetime.datetime`
+        :returns: The name of the partition
+        :rtype: string
+        """
+
+        return '%s_p%04d%02d' % (self.table_name, month.year, month.month)
+
+    def get_partitions(self):
+        """Returns the names of the partitions currently attached to this table
+
+        :returns: The partition names
+        :rtype: list
+        """
+
+        qry = """
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON i.inhrelid = c.oid JOIN pg_class p ON i.inhparent = p.oid
+            WHERE p.relname = %s ORDER BY c.relname
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(qry, [self.table_name])
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_retention_days(self):
+        """Returns the number of days of data to keep in this table according to the retention policy
+
+        :returns: The number of days to keep, possibly None to keep all data
+        :rtype: int
+        """
+
+        return getattr(settings, self.retention_setting, None)
+
+    def is_partitioned(self):
+        """Indicates whether this table is currently a partitioned table
+
+        :returns: True if the table is partitioned, False otherwise
+        :rtype: bool
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [self.table_name])
+            row = cursor.fetchone()
+        return row is not None and row[0] == 'p'
+
+    def remove_old_data(self, before, archive=False, batch_size=10000):
+        """Removes the data in this table that is older than the given time. For a partitioned table, only entire
+        partitions that end at or before the given time are removed, by either dropping them or (when archiving)
+        detaching them and renaming them to archive_<partition>. For an unpartitioned table, the rows are deleted in
+        batches.
+
+        :param before: Data older than this time is removed
+        :type before: :class:`datetime.datetime`
+        :param archive: Whether to archive old partitions instead of dropping them
+        :type archive: bool
+        :param batch_size: The maximum number of rows to delete in a batch for an unpartitioned table
+        :type batch_size: int
+        :returns: The names of the removed partitions, or the number of deleted rows for an unpartitioned table
+        :rtype: list or int
+        """
+
+        if not self.is_partitioned():
+            return self._delete_old_rows(before, batch_size)
+
+        removed = []
+        for partition_name in self.get_partitions():
+            if partition_name == self.get_default_partition_name():
+                continue
+            upper_bound = self._get_partition_upper_bound(partition_name)
+            if upper_bound is None or upper_bound > before:
+                continue
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    if archive:
+                        cursor.execute('ALTER TABLE %s DETACH PARTITION %s' % (self.table_name, partition_name))
+                        cursor.execute('ALTER TABLE %s RENAME TO archive_%s' % (partition_name, partition_name))
+                    else:
+                        cursor.execute('DROP TABLE %s' % partition_name)
+            logger.info('%s partition %s', 'Archived' if archive else 'Dropped', partition_name)
+            removed.append(partition_name)
+        return removed
+
+    def _create_partition(self, cursor, partition_name, started, ended):
+        """Creates the partition for the given range. If the default partition holds rows within the range, it is
+        detached while the rows are moved into the new partition, since PostgreSQL cannot create a partition for rows
+        that are still in the default partition.
+
+        :param cursor: The database cursor
+        :type cursor: :class:`django.db.backends.utils.CursorWrapper`
+        :param partition_name: The name of the new partition
+        :type partition_name: string
+        :param started: The inclusive start of the range
+        :type started: :class:`datetime.datetime`
+        :param ended: The exclusive end of the range
+        :type ended: :class:`datetime.datetime`
+        """
+
+        default_name = self.get_default_partition_name()
+        range_where = '%s >= %%s AND %s < %%s' % (self.column, self.column)
+        cursor.execute('SELECT 1 FROM %s WHERE %s LIMIT 1' % (default_name, range_where), [started, ended])
+        if not cursor.fetchone():
+            cursor.execute('CREATE TABLE %s PARTITION OF %s FOR VALUES FROM (%%s) TO (%%s)' %
+                           (partition_name, self.table_name), [started, ended])
+            return
+
+        cursor.execute('ALTER TABLE %s DETACH PARTITION %s' % (self.table_name, default_name))
+        cursor.execute('CREATE TABLE %s PARTITION OF %s FOR VALUES FROM (%%s) TO (%%s)' %
+                       (partition_name, self.table_name), [started, ended])
+        cursor.execute('INSERT INTO %s SELECT * FROM %s WHERE %s' % (partition_name, default_name, range_where),
+                       [started, ended])
+        cursor.execute('DELETE FROM %s WHERE %s' % (default_name, range_where), [started, ended])
+        logger.info('Moved %d row(s) of table %s from the default partition into partition %s', cursor.rowcount,
+                    self.table_name, partition_name)
+        cursor.execute('ALTER TABLE %s ATTACH PARTITION %s DEFAULT' % (self.table_name, default_name))
+
+    def _delete_old_rows(self, before, batch_size):
+        """Deletes the rows in this unpartitioned table that are older than the given time in batches
+
+        :param before: Rows older than this time are deleted
+        :type before: :class:`datetime.datetime`
+        :param batch_size: The maximum number of rows to delete in a batch
+        :type batch_size: int
+        :returns: The number of deleted rows
+        :rtype: int
+        """
+
+        qry = 'DELETE FROM %s WHERE %s IN (SELECT %s FROM %s WHERE %s < %%s LIMIT %%s)'
+        qry = qry % (self.table_name, self.primary_key, self.primary_key, self.table_name, self.column)
+        total_count = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(qry, [before, batch_size])
+                count = cursor.rowcount
+            total_count += count
+            if count < batch_size:
+                break
+        return total_count
+
+    def _get_foreign_keys(self, cursor, legacy_name):
+        """Returns the foreign key constraints of the legacy table so they can be re-created on the partitioned table
+
+        :param cursor: The database cursor
+        :type cursor: :class:`django.db.backends.utils.CursorWrapper`
+        :param legacy_name: The name of the legacy table
+        :type legacy_name: string
+        :returns: The list of (constraint name, constraint definition) tuples
+        :rtype: list
+        """
+
+        qry = """
+            SELECT con.conname, pg_get_constraintdef(con.oid) FROM pg_constraint con
+            JOIN pg_class c ON con.conrelid = c.oid WHERE c.relname = %s AND con.contype = 'f'
+        """
+        cursor.execute(qry, [legacy_name])
+        return list(cursor.fetchall())
+
+    def _get_index_sql(self, cursor, legacy_name):
+        """Returns the SQL to re-create the non-unique indexes of the legacy table on the partitioned table
+
+        :param cursor: The database cursor
+        :type cursor: :class:`django.db.backends.utils.CursorWrapper`
+        :param legacy_name: The name of the legacy table
+        :type legacy_name: string
+        :returns: The list of CREATE INDEX statements
+        :rtype: list
+        """
+
+        qry = """
+            SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i JOIN pg_class c ON i.indrelid = c.oid
+            WHERE c.relname = %s AND NOT i.indisunique
+        """
+        cursor.execute(qry, [legacy_name])
+        index_sqls = []
+        for row in cursor.fetchall():
+            index_sql = row[0].replace(' ON %s ' % legacy_name, ' ON %s ' % self.table_name)
+            index_sql = index_sql.replace(' ON public.%s ' % legacy_name, ' ON public.%s ' % self.table_name)
+            # Use a new index name on the parent, the legacy partition's index is attached to it automatically
+            index_name = index_sql.split(' ON ')[0].split()[-1]
+            index_sql = index_sql.replace(' %s ON ' % index_name, ' %s_part ON ' % index_name, 1)
+            index_sqls.append(index_sql)
+        return index_sqls
+
+    def _get_partition_upper_bound(self, partition_name):
+        """Returns the exclusive upper bound of the given monthly partition, or None if the partition is not a monthly
+        partition (the legacy partition is only removed once every row in it is old enough)
+
+        :param partition_name: The name of the partition
+        :type partition_name: string
+        :returns: The upper bound of the partition
+        :rtype: :class:`datetime.datetime`
+        """
+
+        prefix = '%s_p' % self.table_name
+        if partition_name.startswith(prefix):
+            suffix = partition_name[len(prefix):]
+            if len(suffix) == 6 and suffix.isdigit():
+                month = datetime.datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=timezone.utc)
+                return add_months(month, 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT max(%s) FROM %s' % (self.column, partition_name))
+            latest = cursor.fetchone()[0]
+        if latest is None:
+            return None
+        return latest + datetime.timedelta(microseconds=1)
+
+
+def is_partitioning_supported():
+    """Indicates whether the database server supports native range partitioning of tables with primary keys
+
+    :returns: True if partitioning is supported, False otherwise
+    :rtype: bool
+    """
+
+    return connection.vendor == 'postgresql' and connection.pg_version >= MIN_SERVER_VERSION
+
+
+def add_months(month, count):
+    """Returns the start of the month that is the given number of months after the given month start
+
+    :param month: The start of a month
+    :type month: :class:`datetime.datetime`
+    :param count: The number of months to add
+    :type count: int
+    :returns: The start of the later month
+    :rtype: :class:`datetime.datetime`
+    """
+
+    month_index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def get_month_start(when):
+    """Returns the start of the month (UTC) that contains the given time
+
+    :param when: The time
+    :type when: :class:`datetime.datetime`
+    :returns: The start of the month
+    :rtype: :class:`datetime.datetime`
+    """
+
+    when = when.astimezone(timezone.utc)
+    return datetime.datetime(when.year, when.month, 1, tzinfo=timezone.utc)
+
+
+# The tables that are partitioned by time, with the settings that define their retention policies
+JOB_EXE_END_TABLE = PartitionedTable('job_exe_end', 'ended', 'job_exe_id', 'JOB_EXE_END_RETENTION_DAYS')
+JOB_LOAD_TABLE = PartitionedTable('job_load', 'measured', 'id', 'JOB_LOAD_RETENTION_DAYS')
+TASK_UPDATE_TABLE = PartitionedTable('task_update', 'created', 'id', 'TASK_UPDATE_RETENTION_DAYS')
+PARTITIONED_TABLES = [JOB_EXE_END_TABLE, JOB_LOAD_TABLE, TASK_UPDATE_TABLE]
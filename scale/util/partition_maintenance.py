@@ -0,0 +1,30 @@
+"""Defines the clock event processor for creating the upcoming partitions of the time-partitioned tables."""
+from __future__ import unicode_literals
+
+import logging
+
+import django.utils.timezone as timezone
+
+from job.clock import ClockEventProcessor
+from util.partition import MONTHS_AHEAD, PARTITIONED_TABLES, add_months, get_month_start
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintenanceProcessor(ClockEventProcessor):
+    """This class creates the monthly partitions of the time-partitioned tables ahead of time."""
+
+    def process_event(self, event, last_event=None):
+        """See :meth:`job.clock.ClockEventProcessor.process_event`.
+
+        Creates any missing partitions through MONTHS_AHEAD months after the current month, moving any rows that were
+        written to the default partitions into their new monthly partitions.
+        """
+
+        when = timezone.now()
+        through = add_months(get_month_start(when), MONTHS_AHEAD)
+        for table in PARTITIONED_TABLES:
+            try:
+                table.create_partitions(through, when=when)
+            except Exception:
+                logger.exception('Unable to create partitions for table: %s', table.table_name)
@@ -1,7 +1,10 @@
 """Defines utilities for building RESTful APIs."""
 from __future__ import unicode_literals
 
+import base64
 import datetime
+import json
+from collections import OrderedDict
 
 import django.utils.timezone as timezone
 import rest_framework.pagination as pagination
@@ -10,18 +13,174 @@ import rest_framework.serializers as serializers
 import rest_framework.status as status
 from django.conf import settings
 from django.conf.urls import include, url
+from django.db.models import DateTimeField, Q
 from rest_framework.exceptions import APIException
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 import util.parse as parse_util
 
 
 class DefaultPagination(pagination.PageNumberPagination):
-    """Default configuration class for the paging system."""
+    """Default configuration class for the paging system.
+
+    Views that define a cursor_ordering attribute (a tuple of model fields ending with a unique field) also support
+    keyset pagination, which is used when the request includes the cursor parameter (with an empty value for the first
+    page). Each keyset page is found by seeking past the ordering values of the previous page, so there is no OFFSET
+    scan and the total count is only computed if requested with include_count=true.
+    """
     page_size = 100
     page_size_query_param = 'page_size'
     max_page_size = 1000
 
+    cursor_query_param = 'cursor'
+    include_count_query_param = 'include_count'
+
+    def __init__(self):
+        """Constructor
+        """
+
+        super(DefaultPagination, self).__init__()
+
+        self._count = None
+        self._cursor_ordering = None
+        self._has_next = False
+        self._has_previous = False
+        self._page = None
+        self._request = None
+
+    def get_paginated_response(self, data):
+        """See :meth:`rest_framework.pagination.PageNumberPagination.get_paginated_response`
+        """
+
+        if not self._cursor_ordering:
+            return super(DefaultPagination, self).get_paginated_response(data)
+
+        response_data = OrderedDict()
+        if self._count is not None:
+            response_data['count'] = self._count
+        response_data['next'] = self._get_cursor_link(self._page[-1], False) if self._has_next else None
+        response_data['previous'] = self._get_cursor_link(self._page[0], True) if self._has_previous else None
+        response_data['results'] = data
+        return Response(response_data)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """See :meth:`rest_framework.pagination.PageNumberPagination.paginate_queryset`
+        """
+
+        self._cursor_ordering = getattr(view, 'cursor_ordering', None)
+        if not self._cursor_ordering or self.cursor_query_param not in request.query_params:
+            self._cursor_ordering = None
+            return super(DefaultPagination, self).paginate_queryset(queryset, request, view)
+
+        if request.query_params.getlist('order'):
+            raise BadParameter('The order parameter is not supported with the %s parameter' % self.cursor_query_param)
+
+        self._request = request
+        page_size = self.get_page_size(request)
+        if parse_bool(request, self.include_count_query_param, default_value=False, required=False):
+            self._count = queryset.count()
+
+        cursor = request.query_params[self.cursor_query_param]
+        values, is_reverse = self._decode_cursor(cursor, queryset.model) if cursor else (None, False)
+        if values:
+            queryset = queryset.filter(self._get_seek_filter(values, is_reverse))
+        if is_reverse:
+            queryset = queryset.order_by(*['-%s' % field for field in self._cursor_ordering])
+        else:
+            queryset = queryset.order_by(*self._cursor_ordering)
+
+        page = list(queryset[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if is_reverse:
+            page.reverse()
+            self._has_next = True
+            self._has_previous = has_more
+        else:
+            self._has_next = has_more
+            self._has_previous = values is not None
+
+        # Links can only be generated from the models at the edges of the page
+        if not page:
+            self._has_next = False
+            self._has_previous = False
+        self._page = page
+        return page
+
+    def _decode_cursor(self, cursor, model):
+        """Decodes the given opaque cursor into the ordering values to seek past and the direction
+
+        :param cursor: The encoded cursor
+        :type cursor: string
+        :param model: The model class of the paginated query
+        :type model: class
+        :returns: A tuple of the list of ordering values and whether to seek backwards
+        :rtype: tuple
+
+        :raises :class:`util.rest.BadParameter`: If the cursor is invalid
+        """
+
+        try:
+            cursor_dict = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            values = cursor_dict['v']
+            if len(values) != len(self._cursor_ordering):
+                raise ValueError('Cursor does not match the ordering')
+            for i, field_name in enumerate(self._cursor_ordering):
+                if isinstance(model._meta.get_field(field_name), DateTimeField):
+                    values[i] = parse_util.parse_datetime(values[i])
+            return values, bool(cursor_dict.get('r', False))
+        except Exception:
+            raise BadParameter('Invalid %s parameter' % self.cursor_query_param)
+
+    def _get_cursor_link(self, model, is_reverse):
+        """Returns the link to the page that comes after (or before when reversed) the given model
+
+        :param model: The model at the edge of the current page
+        :type model: :class:`django.db.models.Model`
+        :param is_reverse: Whether the link is to the previous page
+        :type is_reverse: bool
+        :returns: The link
+        :rtype: string
+        """
+
+        values = []
+        for field_name in self._cursor_ordering:
+            value = getattr(model, field_name)
+            if isinstance(value, datetime.datetime):
+                value = parse_util.datetime_to_string(value)
+            values.append(value)
+        cursor_dict = {'v': values}
+        if is_reverse:
+            cursor_dict['r'] = True
+        cursor = base64.urlsafe_b64encode(json.dumps(cursor_dict).encode('utf-8')).decode('ascii')
+
+        url = self._request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _get_seek_filter(self, values, is_reverse):
+        """Returns the filter for the models that come after (or before when reversed) the given ordering values. The
+        leading field is also given an inclusive range so the database can use the ordering index.
+
+        :param values: The ordering values to seek past
+        :type values: list
+        :param is_reverse: Whether to seek backwards
+        :type is_reverse: bool
+        :returns: The query filter
+        :rtype: :class:`django.db.models.Q`
+        """
+
+        compare = 'lt' if is_reverse else 'gt'
+        seek_filter = None
+        for i, field_name in enumerate(self._cursor_ordering):
+            field_filter = Q(**{'%s__%s' % (field_name, compare): values[i]})
+            for j in range(i):
+                field_filter &= Q(**{self._cursor_ordering[j]: values[j]})
+            seek_filter = field_filter if seek_filter is None else seek_filter | field_filter
+        leading_filter = Q(**{'%s__%se' % (self._cursor_ordering[0], compare): values[0]})
+        return leading_filter & seek_filter
+
 
 class ModelIdSerializer(serializers.Serializer):
     """Converts a model to a lightweight place holder object with only an identifier to REST output"""
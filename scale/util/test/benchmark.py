@@ -0,0 +1,130 @@
+"""Defines the helpers shared by the benchmarks that measure the S3 and SQS code paths against a fake AWS server"""
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from botocore.client import BaseClient
+from mock import patch
+
+from util.test.fake_aws import FakeAWSServer
+
+BENCHMARK_ENV_VAR = 'SCALE_AWS_BENCHMARK'
+
+
+def create_benchmark_server():
+    """Creates a fake AWS server that adds the request latency configured by SCALE_AWS_BENCHMARK_LATENCY, in
+    milliseconds, to every request
+
+    :returns: The fake AWS server, which has not been started
+    :rtype: :class:`util.test.fake_aws.FakeAWSServer`
+    """
+
+    return FakeAWSServer(latency=get_benchmark_setting('LATENCY', 0) / 1000.0)
+
+
+def get_benchmark_setting(name, default):
+    """Returns the integer benchmark setting from the SCALE_AWS_BENCHMARK_<name> environment variable
+
+    :param name: The name of the setting, such as 'FILES'
+    :type name: string
+    :param default: The value to use when the environment variable is not set
+    :type default: int
+    :returns: The setting
+    :rtype: int
+    """
+
+    return int(os.environ.get('%s_%s' % (BENCHMARK_ENV_VAR, name), default))
+
+
+def percentile(values, fraction):
+    """Returns the given percentile of the values using the nearest-rank method
+
+    :param values: The values
+    :type values: list
+    :param fraction: The percentile as a fraction, such as 0.99
+    :type fraction: float
+    :returns: The percentile, 0.0 if there are no values
+    :rtype: float
+    """
+
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(int(math.ceil(fraction * len(values))) - 1, 0)]
+
+
+class Benchmark(object):
+    """Measures the duration of a benchmark and the latency of every AWS API call that boto3 makes during it, from any
+    thread, and reports the throughput and latency percentiles
+    """
+
+    def __init__(self, name):
+        """Constructor
+
+        :param name: The name of the benchmark
+        :type name: string
+        """
+
+        self.name = name
+        self.duration = 0.0
+        self._latencies = defaultdict(list)  # {Operation name: [seconds]}
+        self._lock = threading.Lock()
+
+    def add_latency(self, operation, latency):
+        """Records the latency of a single operation
+
+        :param operation: The name of the operation, such as 'PutObject'
+        :type operation: string
+        :param latency: The latency in seconds
+        :type latency: float
+        """
+
+        with self._lock:
+            self._latencies[operation].append(latency)
+
+    @contextmanager
+    def measure(self):
+        """Context manager that measures the benchmark run within it
+        """
+
+        make_api_call = BaseClient._make_api_call
+        benchmark = self
+
+        def timed_api_call(client, operation_name, api_params):
+            started = time.time()
+            try:
+                return make_api_call(client, operation_name, api_params)
+            finally:
+                benchmark.add_latency(operation_name, time.time() - started)
+
+        started = time.time()
+        try:
+            with patch.object(BaseClient, '_make_api_call', timed_api_call):
+                yield self
+        finally:
+            self.duration = time.time() - started
+
+    def report(self, count, num_bytes, unit='files'):
+        """Prints the throughput of the benchmark and the latency of each operation
+
+        :param count: The number of items processed by the benchmark
+        :type count: int
+        :param num_bytes: The number of bytes processed by the benchmark
+        :type num_bytes: int
+        :param unit: The name of the items
+        :type unit: string
+        """
+
+        duration = max(self.duration, 0.000001)
+        print('%s: %d %s in %.2f s, %.1f %s/s, %.2f MB/s' % (self.name, count, unit, duration, count / duration, unit,
+                                                             num_bytes / (1024.0 * 1024.0) / duration))
+        for operation, latencies in sorted(self._latencies.items()):
+            print('    %s: %d calls, p50 %.1f ms, p99 %.1f ms' % (operation, len(latencies),
+                                                                   percentile(latencies, 0.5) * 1000.0,
+                                                                   percentile(latencies, 0.99) * 1000.0))
@@ -0,0 +1,857 @@
+"""Defines an in-process fake of the AWS S3 and SQS services, backed by the local file system, that boto3 reaches
+through an endpoint URL so that the S3 and SQS code paths can be exercised and benchmarked without AWS"""
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+
+from six import binary_type
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, quote, unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+# The size of the chunks used to stream object contents to and from the file system
+CHUNK_SIZE = 1024 * 1024
+
+# The maximum number of keys returned in a single page of a bucket listing, the same as S3
+MAX_KEYS = 1000
+
+# How long in seconds a long-polling receive waits before checking whether the server has been stopped
+STOP_CHECK_INTERVAL = 0.5
+
+
+class FakeAWSServer(object):
+    """An HTTP server on the loopback interface that implements the subset of the S3 REST API (path-style addressing)
+    and the SQS query API used by :class:`util.aws.S3Client` and :class:`util.aws.SQSClient`. Object contents are
+    stored as files in a temporary directory, while the bucket listings and queues are kept in memory. Point the clients
+    at the server with the settings from :meth:`get_client_settings`. Request signatures are not checked, so any
+    credentials are accepted, but a region must be given.
+    """
+
+    def __init__(self, root_dir=None, max_keys=MAX_KEYS, latency=0.0):
+        """Constructor
+
+        :param root_dir: The directory to store the object contents in, a new temporary directory if None
+        :type root_dir: string
+        :param max_keys: The maximum number of keys returned in each page of a bucket listing
+        :type max_keys: int
+        :param latency: The delay in seconds added to every request to simulate a network round trip
+        :type latency: float
+        """
+
+        self.max_keys = max_keys
+        self.latency = latency
+        self._is_temp_dir = root_dir is None
+        self._root_dir = tempfile.mkdtemp() if root_dir is None else root_dir
+        self._server = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+        self._lock = threading.Lock()
+        self._buckets = {}  # {Bucket name: _Bucket}
+        self._uploads = {}  # Multipart uploads in progress {Upload ID: (bucket name, key, {part number: path})}
+        self._queue_condition = threading.Condition(self._lock)
+        self._queues = {}  # {Queue name: _Queue}
+        self._request_counts = defaultdict(int)  # {Operation name: count}
+
+    @property
+    def url(self):
+        """The URL of the running server
+
+        :returns: The URL
+        :rtype: string
+        """
+
+        host, port = self._server.server_address[:2]
+        return 'http://%s:%d' % (host, port)
+
+    def start(self):
+        """Starts the server on a free port of the loopback interface
+        """
+
+        self._stopped.clear()
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), _RequestHandler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name='FakeAWSServer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops the server and removes the stored objects if they are in a temporary directory
+        """
+
+        self._stopped.set()
+        with self._queue_condition:
+            self._queue_condition.notify_all()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+        if self._is_temp_dir:
+            shutil.rmtree(self._root_dir, ignore_errors=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def create_bucket(self, bucket_name):
+        """Creates an empty bucket
+
+        :param bucket_name: The name of the bucket
+        :type bucket_name: string
+        """
+
+        bucket_dir = os.path.join(self._root_dir, 's3', bucket_name)
+        if not os.path.exists(bucket_dir):
+            os.makedirs(bucket_dir)
+        with self._lock:
+            self._buckets[bucket_name] = _Bucket(bucket_dir)
+
+    def create_queue(self, queue_name, visibility_timeout=30):
+        """Creates an empty queue
+
+        :param queue_name: The name of the queue
+        :type queue_name: string
+        :param visibility_timeout: The default number of seconds that a received message is hidden from other receivers
+        :type visibility_timeout: int
+        """
+
+        with self._lock:
+            self._queues[queue_name] = _Queue(queue_name, visibility_timeout)
+
+    def get_client_settings(self):
+        """Returns the Django settings that point the S3 and SQS clients at this server, for use with the settings()
+        method of a test case
+
+        :returns: The settings
+        :rtype: dict
+        """
+
+        return {'S3_ADDRESSING_STYLE': 'path', 'S3_ENDPOINT_URL': self.url, 'SQS_ENDPOINT_URL': self.url}
+
+    def get_message_latencies(self, queue_name):
+        """Returns the time between sending and deleting each message that has been deleted from the given queue
+
+        :param queue_name: The name of the queue
+        :type queue_name: string
+        :returns: The latencies in seconds, in the order the messages were deleted
+        :rtype: [float]
+        """
+
+        with self._lock:
+            return list(self._queues[queue_name].latencies)
+
+    def get_queue_size(self, queue_name):
+        """Returns the number of messages in the given queue that have not been deleted, including received messages
+
+        :param queue_name: The name of the queue
+        :type queue_name: string
+        :returns: The number of messages
+        :rtype: int
+        """
+
+        with self._lock:
+            queue = self._queues[queue_name]
+            return len(queue.messages) + len(queue.in_flight)
+
+    def get_request_counts(self):
+        """Returns the number of requests handled for each S3 and SQS operation, such as 'PutObject' and
+        'ReceiveMessage'
+
+        :returns: The request counts by operation name
+        :rtype: dict
+        """
+
+        with self._lock:
+            return dict(self._request_counts)
+
+    def put_object(self, bucket_name, key, data):
+        """Stores an object directly without a request, for quickly populating a bucket
+
+        :param bucket_name: The name of the bucket
+        :type bucket_name: string
+        :param key: The object key
+        :type key: string
+        :param data: The object contents
+        :type data: bytes
+        """
+
+        bucket = self._buckets[bucket_name]
+        path = bucket.new_path()
+        with open(path, 'wb') as data_file:
+            data_file.write(data)
+        self._add_object(bucket, key, path, len(data), '"%s"' % hashlib.md5(data).hexdigest())
+
+    def send_message(self, queue_name, body):
+        """Sends a message directly without a request, for quickly populating a queue
+
+        :param queue_name: The name of the queue
+        :type queue_name: string
+        :param body: The message body
+        :type body: string
+        """
+
+        with self._queue_condition:
+            self._queues[queue_name].send(body)
+            self._queue_condition.notify_all()
+
+    def _add_object(self, bucket, key, path, size, etag, content_type=None, storage_class=None):
+        """Adds or replaces an object whose contents have been written to the given path
+
+        :returns: The new object
+        :rtype: :class:`util.test.fake_aws._Object`
+        """
+
+        s3_object = _Object(path, size, etag, content_type, storage_class)
+        with self._lock:
+            old_object = bucket.objects.get(key)
+            if old_object is None:
+                insort(bucket.keys, key)
+            bucket.objects[key] = s3_object
+        if old_object:
+            _remove_file(old_object.path)
+        return s3_object
+
+    def _count_request(self, operation):
+        """Records that a request for the given operation has been received
+        """
+
+        with self._lock:
+            self._request_counts[operation] += 1
+
+    def _delete_object(self, bucket, key):
+        """Deletes the given object if it exists
+        """
+
+        with self._lock:
+            s3_object = bucket.objects.pop(key, None)
+            if s3_object:
+                bucket.keys.pop(bisect_left(bucket.keys, key))
+        if s3_object:
+            _remove_file(s3_object.path)
+
+    def _list_objects(self, bucket, prefix, delimiter, marker, max_keys):
+        """Lists a page of the keys in the given bucket following the S3 ListObjects (version 1) rules
+
+        :returns: A tuple of the list of (key, object) tuples, the list of common prefixes and whether the listing was
+            truncated
+        :rtype: tuple
+        """
+
+        contents = []
+        common_prefixes = []
+        is_truncated = False
+        with self._lock:
+            keys = bucket.keys
+            i = bisect_right(keys, marker) if marker else bisect_left(keys, prefix)
+            while i < len(keys):
+                key = keys[i]
+                if not key.startswith(prefix):
+                    break
+                pos = key.find(delimiter, len(prefix)) if delimiter else -1
+                common_prefix = key[:pos + len(delimiter)] if pos >= 0 else None
+                if common_prefix and marker and common_prefix <= marker:
+                    # The common prefix was already returned by the previous page
+                    i += 1
+                    continue
+                if len(contents) + len(common_prefixes) >= max_keys:
+                    is_truncated = True
+                    break
+                if common_prefix:
+                    common_prefixes.append(common_prefix)
+                    while i < len(keys) and keys[i].startswith(common_prefix):
+                        i += 1
+                else:
+                    contents.append((key, bucket.objects[key]))
+                    i += 1
+        return contents, common_prefixes, is_truncated
+
+
+class _Bucket(object):
+    """The contents of a fake S3 bucket"""
+
+    def __init__(self, bucket_dir):
+        self.bucket_dir = bucket_dir
+        self.keys = []  # Sorted list of the object keys
+        self.objects = {}  # {Key: _Object}
+
+    def new_path(self):
+        """Returns a new unique path to store object contents in
+        """
+
+        return os.path.join(self.bucket_dir, uuid.uuid4().hex)
+
+
+class _Object(object):
+    """A fake S3 object whose contents are stored in a file"""
+
+    def __init__(self, path, size, etag, content_type=None, storage_class=None):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.content_type = content_type or 'binary/octet-stream'
+        self.storage_class = storage_class or 'STANDARD'
+        self.last_modified = time.time()
+
+
+class _Queue(object):
+    """A fake SQS queue. Messages that are received but not deleted become visible again once their visibility timeout
+    expires, as with SQS. Callers must hold the server lock.
+    """
+
+    def __init__(self, name, visibility_timeout):
+        self.name = name
+        self.visibility_timeout = visibility_timeout
+        self.messages = deque()  # Visible messages waiting to be received
+        self.in_flight = {}  # Received messages that are not yet deleted {Receipt handle: (_Message, visible time)}
+        self.latencies = []  # Seconds between sending and deleting each deleted message
+
+    def delete(self, receipt_handle):
+        """Deletes the received message with the given receipt handle
+
+        :returns: True if the message was deleted, False if the receipt handle is not valid
+        :rtype: bool
+        """
+
+        in_flight = self.in_flight.pop(receipt_handle, None)
+        if in_flight is None:
+            return False
+        self.latencies.append(time.time() - in_flight[0].sent)
+        return True
+
+    def receive(self, max_messages, visibility_timeout):
+        """Receives up to the given number of visible messages
+
+        :returns: A list of (receipt handle, _Message) tuples
+        :rtype: list
+        """
+
+        current = time.time()
+        for receipt_handle, (message, visible) in list(self.in_flight.items()):
+            if visible <= current:
+                del self.in_flight[receipt_handle]
+                self.messages.appendleft(message)
+
+        received = []
+        while self.messages and len(received) < max_messages:
+            message = self.messages.popleft()
+            receipt_handle = uuid.uuid4().hex
+            self.in_flight[receipt_handle] = (message, current + visibility_timeout)
+            received.append((receipt_handle, message))
+        return received
+
+    def send(self, body):
+        """Sends a message with the given body
+
+        :returns: The new message
+        :rtype: :class:`util.test.fake_aws._Message`
+        """
+
+        message = _Message(body)
+        self.messages.append(message)
+        return message
+
+
+class _Message(object):
+    """A fake SQS message"""
+
+    def __init__(self, body):
+        self.id = str(uuid.uuid4())
+        self.body = body
+        self.md5 = hashlib.md5(body.encode('utf-8')).hexdigest()
+        self.sent = time.time()
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """HTTP server that handles each connection on its own thread and closes the open connections when it is closed"""
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class):
+        BaseHTTPServer.HTTPServer.__init__(self, server_address, handler_class)
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients such as boto3 close connections without reading the entire response
+        logger.debug('Connection from %s closed with an error', client_address, exc_info=True)
+
+    def process_request_thread(self, request, client_address):
+        with self._connections_lock:
+            self._connections.add(request)
+        try:
+            socketserver.ThreadingMixIn.process_request_thread(self, request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(request)
+
+    def server_close(self):
+        BaseHTTPServer.HTTPServer.server_close(self)
+        with self._connections_lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Handles the S3 and SQS requests sent to a fake AWS server, keeping connections alive between requests as boto3
+    does"""
+
+    protocol_version = 'HTTP/1.1'
+
+    # Buffer each response so that its headers and body are not sent as many small packets
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+
+    def do_DELETE(self):
+        self._handle()
+
+    def do_GET(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def _handle(self):
+        """Dispatches the request to the S3 or SQS handler, dropping the connection if the client goes away
+        """
+
+        url = urlparse(self.path)
+        self._query = dict((name, values[0]) for name, values in parse_qs(url.query, keep_blank_values=True).items())
+        self._body_remaining = int(self.headers.get('Content-Length') or 0)
+        if self.headers.get('Expect', '').lower() == '100-continue' and not hasattr(self, 'handle_expect_100'):
+            # Newer versions of BaseHTTPRequestHandler send this automatically
+            self.wfile.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            self.wfile.flush()
+
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        try:
+            content_type = self.headers.get('Content-Type', '')
+            if self.command == 'POST' and content_type.startswith('application/x-www-form-urlencoded'):
+                self._handle_sqs()
+            else:
+                parts = _to_text(unquote(url.path)).lstrip('/').split('/', 1)
+                self._handle_s3(parts[0], parts[1] if len(parts) > 1 else '')
+            self._discard_body()
+        except (IOError, socket.error):
+            # The client closed the connection, as boto3 does when an object is not read to the end
+            self.close_connection = True
+
+    def _discard_body(self):
+        """Reads any part of the request body that the handler did not use so that the connection can be reused
+        """
+
+        while self._body_remaining > 0:
+            self._read_body(CHUNK_SIZE)
+
+    def _read_body(self, size=None):
+        """Reads up to the given number of bytes of the request body, the rest of the body if None
+
+        :rtype: bytes
+        """
+
+        if size is None or size > self._body_remaining:
+            size = self._body_remaining
+        data = self.rfile.read(size) if size else b''
+        self._body_remaining -= len(data)
+        if size and not data:
+            self._body_remaining = 0
+        return data
+
+    def _send(self, status, body=b'', headers=None, content_type='application/xml'):
+        """Sends a response with the given body
+        """
+
+        if not isinstance(body, binary_type):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('x-amz-request-id', uuid.uuid4().hex)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_xml(self, root_name, children, status=200):
+        self._send(status, '<?xml version="1.0" encoding="UTF-8"?>\n' + _to_xml(root_name, children))
+
+    # S3 REST API
+
+    def _handle_s3(self, bucket_name, key):
+        """Handles an S3 request for the given bucket and key
+        """
+
+        bucket = self.fake._buckets.get(bucket_name)
+        if bucket is None:
+            self.fake._count_request('S3Error')
+            self._send_s3_error(404, 'NoSuchBucket', 'The specified bucket does not exist')
+        elif not key:
+            if self.command == 'HEAD':
+                self.fake._count_request('HeadBucket')
+                self._send(200)
+            elif self.command == 'GET':
+                self.fake._count_request('ListObjects')
+                self._list_objects(bucket, bucket_name)
+            else:
+                self._send_s3_error(405, 'MethodNotAllowed', 'The specified method is not allowed')
+        elif 'uploadId' in self._query or 'uploads' in self._query:
+            self._handle_multipart(bucket, bucket_name, key)
+        elif self.command in ('GET', 'HEAD'):
+            self.fake._count_request('GetObject' if self.command == 'GET' else 'HeadObject')
+            self._get_object(bucket, key)
+        elif self.command == 'PUT' and self.headers.get('x-amz-copy-source'):
+            self.fake._count_request('CopyObject')
+            self._copy_object(bucket, key)
+        elif self.command == 'PUT':
+            self.fake._count_request('PutObject')
+            path = bucket.new_path()
+            size, md5 = self._write_body(path)
+            s3_object = self.fake._add_object(bucket, key, path, size, '"%s"' % md5.hexdigest(),
+                                              self.headers.get('Content-Type'),
+                                              self.headers.get('x-amz-storage-class'))
+            self._send(200, headers={'ETag': s3_object.etag})
+        elif self.command == 'DELETE':
+            self.fake._count_request('DeleteObject')
+            self.fake._delete_object(bucket, key)
+            self._send(204)
+        else:
+            self._send_s3_error(405, 'MethodNotAllowed', 'The specified method is not allowed')
+
+    def _copy_object(self, bucket, key):
+        source = _to_text(unquote(self.headers.get('x-amz-copy-source'))).lstrip('/').split('?')[0]
+        source_bucket_name, source_key = source.split('/', 1)
+        source_bucket = self.fake._buckets.get(source_bucket_name)
+        source_object = source_bucket.objects.get(source_key) if source_bucket else None
+        if source_object is None:
+            self._send_s3_error(404, 'NoSuchKey', 'The specified key does not exist.')
+            return
+
+        path = bucket.new_path()
+        shutil.copyfile(source_object.path, path)
+        content_type = self.headers.get('Content-Type') or source_object.content_type
+        s3_object = self.fake._add_object(bucket, key, path, source_object.size, source_object.etag, content_type,
+                                          self.headers.get('x-amz-storage-class'))
+        self._send_xml('CopyObjectResult', [('LastModified', _format_iso(s3_object.last_modified)),
+                                            ('ETag', s3_object.etag)])
+
+    def _get_object(self, bucket, key):
+        s3_object = bucket.objects.get(key)
+        if s3_object is None:
+            self._send_s3_error(404, 'NoSuchKey', 'The specified key does not exist.')
+            return
+
+        start, end = 0, s3_object.size - 1
+        status = 200
+        headers = {'ETag': s3_object.etag, 'Last-Modified': formatdate(s3_object.last_modified, usegmt=True),
+                   'Content-Type': s3_object.content_type, 'Accept-Ranges': 'bytes',
+                   'x-amz-storage-class': s3_object.storage_class}
+        range_header = self.headers.get('Range')
+        if range_header and range_header.startswith('bytes='):
+            range_start, range_end = range_header[len('bytes='):].split('-')
+            start = int(range_start)
+            end = min(int(range_end), end) if range_end else end
+            status = 206
+            headers['Content-Range'] = 'bytes %d-%d/%d' % (start, end, s3_object.size)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        with open(s3_object.path, 'rb') as data_file:
+            data_file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = data_file.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                self.wfile.write(data)
+                remaining -= len(data)
+
+    def _handle_multipart(self, bucket, bucket_name, key):
+        """Handles the requests that create, upload the parts of, complete and abort a multipart upload
+        """
+
+        fake = self.fake
+        if 'uploads' in self._query:
+            fake._count_request('CreateMultipartUpload')
+            upload_id = uuid.uuid4().hex
+            with fake._lock:
+                fake._uploads[upload_id] = (bucket_name, key, {}, self.headers.get('Content-Type'),
+                                            self.headers.get('x-amz-storage-class'))
+            self._send_xml('InitiateMultipartUploadResult', [('Bucket', bucket_name), ('Key', key),
+                                                             ('UploadId', upload_id)])
+            return
+
+        upload_id = self._query['uploadId']
+        upload = fake._uploads.get(upload_id)
+        if upload is None:
+            self._send_s3_error(404, 'NoSuchUpload', 'The specified upload does not exist.')
+        elif self.command == 'PUT':
+            fake._count_request('UploadPart')
+            path = bucket.new_path()
+            size, md5 = self._write_body(path)
+            with fake._lock:
+                upload[2][int(self._query['partNumber'])] = (path, size, md5.digest())
+            self._send(200, headers={'ETag': '"%s"' % md5.hexdigest()})
+        elif self.command == 'POST':
+            fake._count_request('CompleteMultipartUpload')
+            self._read_body()
+            with fake._lock:
+                del fake._uploads[upload_id]
+            parts = [upload[2][number] for number in sorted(upload[2])]
+            path = bucket.new_path()
+            with open(path, 'wb') as data_file:
+                for part_path, _, _ in parts:
+                    with open(part_path, 'rb') as part_file:
+                        shutil.copyfileobj(part_file, data_file, CHUNK_SIZE)
+                    _remove_file(part_path)
+            etag = '"%s-%d"' % (hashlib.md5(b''.join(part[2] for part in parts)).hexdigest(), len(parts))
+            fake._add_object(bucket, key, path, sum(part[1] for part in parts), etag, upload[3], upload[4])
+            self._send_xml('CompleteMultipartUploadResult', [('Bucket', bucket_name), ('Key', key), ('ETag', etag)])
+        elif self.command == 'DELETE':
+            fake._count_request('AbortMultipartUpload')
+            with fake._lock:
+                del fake._uploads[upload_id]
+            for part_path, _, _ in upload[2].values():
+                _remove_file(part_path)
+            self._send(204)
+        else:
+            self._send_s3_error(405, 'MethodNotAllowed', 'The specified method is not allowed')
+
+    def _list_objects(self, bucket, bucket_name):
+        prefix = _to_text(self._query.get('prefix', ''))
+        delimiter = _to_text(self._query.get('delimiter', ''))
+        marker = _to_text(self._query.get('marker', ''))
+        max_keys = min(int(self._query.get('max-keys', MAX_KEYS)), self.fake.max_keys)
+        encode = _quote if self._query.get('encoding-type') == 'url' else lambda value: value
+
+        contents, common_prefixes, is_truncated = self.fake._list_objects(bucket, prefix, delimiter, marker, max_keys)
+        children = [('Name', bucket_name), ('Prefix', prefix), ('Marker', encode(marker)), ('MaxKeys', max_keys),
+                    ('IsTruncated', 'true' if is_truncated else 'false')]
+        if delimiter:
+            children.append(('Delimiter', encode(delimiter)))
+            if is_truncated:
+                last = max(contents[-1][0] if contents else '', common_prefixes[-1] if common_prefixes else '')
+                children.append(('NextMarker', encode(last)))
+        if 'encoding-type' in self._query:
+            children.append(('EncodingType', self._query['encoding-type']))
+        for key, s3_object in contents:
+            children.append(('Contents', [('Key', encode(key)), ('LastModified', _format_iso(s3_object.last_modified)),
+                                          ('ETag', s3_object.etag), ('Size', s3_object.size),
+                                          ('StorageClass', s3_object.storage_class)]))
+        for common_prefix in common_prefixes:
+            children.append(('CommonPrefixes', [('Prefix', encode(common_prefix))]))
+        self._send_xml('ListBucketResult', children)
+
+    def _send_s3_error(self, status, code, message):
+        self._send_xml('Error', [('Code', code), ('Message', message)], status)
+
+    def _write_body(self, path):
+        """Streams the request body to the given file
+
+        :returns: A tuple of the size in bytes and the MD5 hash of the body
+        :rtype: tuple
+        """
+
+        md5 = hashlib.md5()
+        size = 0
+        with open(path, 'wb') as data_file:
+            while self._body_remaining > 0:
+                data = self._read_body(CHUNK_SIZE)
+                md5.update(data)
+                data_file.write(data)
+                size += len(data)
+        return size, md5
+
+    # SQS query API
+
+    def _handle_sqs(self):
+        """Handles an SQS request, whose parameters are form encoded in the request body
+        """
+
+        params = dict((_to_text(name), _to_text(values[0]))
+                      for name, values in parse_qs(self._read_body(), keep_blank_values=True).items())
+        action = params.get('Action', '')
+        self.fake._count_request(action)
+
+        fake = self.fake
+        if action == 'GetQueueUrl':
+            if params.get('QueueName') not in fake._queues:
+                self._send_sqs_error('AWS.SimpleQueueService.NonExistentQueue',
+                                     'The specified queue does not exist for this wsdl version.')
+                return
+            queue_url = '%s/queue/%s' % (fake.url, params['QueueName'])
+            self._send_sqs_response(action, [('QueueUrl', queue_url)])
+            return
+
+        queue = fake._queues.get(params.get('QueueUrl', '').rstrip('/').split('/')[-1])
+        if queue is None:
+            self._send_sqs_error('AWS.SimpleQueueService.NonExistentQueue',
+                                 'The specified queue does not exist for this wsdl version.')
+        elif action == 'GetQueueAttributes':
+            with fake._lock:
+                attributes = {'ApproximateNumberOfMessages': len(queue.messages),
+                              'ApproximateNumberOfMessagesNotVisible': len(queue.in_flight),
+                              'VisibilityTimeout': queue.visibility_timeout,
+                              'QueueArn': 'arn:aws:sqs:us-east-1:000000000000:%s' % queue.name}
+            self._send_sqs_response(action, [('Attribute', [('Name', name), ('Value', value)])
+                                             for name, value in sorted(attributes.items())])
+        elif action == 'SendMessage':
+            with fake._queue_condition:
+                message = queue.send(params['MessageBody'])
+                fake._queue_condition.notify_all()
+            self._send_sqs_response(action, [('MessageId', message.id), ('MD5OfMessageBody', message.md5)])
+        elif action == 'SendMessageBatch':
+            results = []
+            with fake._queue_condition:
+                for entry in _get_entries(params, 'SendMessageBatchRequestEntry'):
+                    message = queue.send(entry['MessageBody'])
+                    results.append(('SendMessageBatchResultEntry', [('Id', entry['Id']), ('MessageId', message.id),
+                                                                    ('MD5OfMessageBody', message.md5)]))
+                fake._queue_condition.notify_all()
+            self._send_sqs_response(action, results)
+        elif action == 'ReceiveMessage':
+            received = self._receive_messages(queue, int(params.get('MaxNumberOfMessages', 1)),
+                                              int(params.get('WaitTimeSeconds', 0)),
+                                              int(params.get('VisibilityTimeout', queue.visibility_timeout)))
+            self._send_sqs_response(action, [('Message', [('MessageId', message.id), ('ReceiptHandle', receipt_handle),
+                                                          ('MD5OfBody', message.md5), ('Body', message.body)])
+                                             for receipt_handle, message in received])
+        elif action == 'DeleteMessage':
+            with fake._lock:
+                deleted = queue.delete(params['ReceiptHandle'])
+            if deleted:
+                self._send_sqs_response(action, None)
+            else:
+                self._send_sqs_error('ReceiptHandleIsInvalid', 'The receipt handle is not valid.')
+        elif action == 'DeleteMessageBatch':
+            results = []
+            with fake._lock:
+                for entry in _get_entries(params, 'DeleteMessageBatchRequestEntry'):
+                    if queue.delete(entry['ReceiptHandle']):
+                        results.append(('DeleteMessageBatchResultEntry', [('Id', entry['Id'])]))
+                    else:
+                        results.append(('BatchResultErrorEntry', [('Id', entry['Id']),
+                                                                  ('Code', 'ReceiptHandleIsInvalid'),
+                                                                  ('Message', 'The receipt handle is not valid.'),
+                                                                  ('SenderFault', 'true')]))
+            self._send_sqs_response(action, results)
+        else:
+            self._send_sqs_error('InvalidAction', 'The action %s is not valid for this endpoint.' % action)
+
+    def _receive_messages(self, queue, max_messages, wait_time, visibility_timeout):
+        """Receives messages from the given queue, long-polling for up to the given wait time if the queue is empty
+
+        :returns: A list of (receipt handle, _Message) tuples
+        :rtype: list
+        """
+
+        fake = self.fake
+        deadline = time.time() + wait_time
+        with fake._queue_condition:
+            while True:
+                received = queue.receive(max_messages, visibility_timeout)
+                remaining = deadline - time.time()
+                if received or remaining <= 0 or fake._stopped.is_set():
+                    return received
+                fake._queue_condition.wait(min(remaining, STOP_CHECK_INTERVAL))
+
+    def _send_sqs_error(self, code, message):
+        self._send_xml('ErrorResponse', [('Error', [('Type', 'Sender'), ('Code', code), ('Message', message)]),
+                                         ('RequestId', uuid.uuid4().hex)], 400)
+
+    def _send_sqs_response(self, action, result):
+        children = [('%sResult' % action, result)] if result is not None else []
+        children.append(('ResponseMetadata', [('RequestId', uuid.uuid4().hex)]))
+        self._send_xml('%sResponse' % action, children)
+
+
+def _format_iso(timestamp):
+    """Formats the given POSIX timestamp as an ISO-8601 string with milliseconds, as S3 does
+    """
+
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp)) + '.%03dZ' % (timestamp % 1 * 1000)
+
+
+def _get_entries(params, entry_name):
+    """Returns the batch entries encoded in the given SQS parameters as Name.N.Field, ordered by N
+
+    :returns: The list of entry dicts
+    :rtype: [dict]
+    """
+
+    entries = defaultdict(dict)
+    for name, value in params.items():
+        parts = name.split('.')
+        if len(parts) == 3 and parts[0] == entry_name:
+            entries[int(parts[1])][parts[2]] = value
+    return [entries[number] for number in sorted(entries)]
+
+
+def _quote(value):
+    """URL encodes the given key as S3 does for listings requested with an encoding type of 'url'
+    """
+
+    return _to_text(quote(value.encode('utf-8'), safe=b'/'))
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _to_text(value):
+    return value.decode('utf-8') if isinstance(value, binary_type) else value
+
+
+def _to_xml(name, value):
+    """Converts the given element to XML, where the value is either text or a list of (name, value) tuples for the
+    child elements
+    """
+
+    if value is None:
+        return '<%s/>' % name
+    if isinstance(value, list):
+        return '<%s>%s</%s>' % (name, ''.join(_to_xml(child_name, child) for child_name, child in value), name)
+    return '<%s>%s</%s>' % (name, escape('%s' % value), name)
@@ -1,5 +1,8 @@
 from __future__ import unicode_literals
 
+import os
+import shutil
+import tempfile
 from copy import deepcopy
 from datetime import datetime
 
@@ -10,7 +13,8 @@ from mock import call, patch
 from mock import MagicMock
 
 from util.aws import AWSClient, AWSCredentials, S3Client, SQSClient
-from util.exceptions import InvalidAWSCredentials
+from util.exceptions import FileDoesNotExist, InvalidAWSCredentials
+from util.test.fake_aws import FakeAWSServer
 
 
 class TestAws(TestCase):
@@ -167,6 +171,41 @@ class TestSQSClient(TestCase):
 
         send_messages.assert_has_calls(calls)
 
+    @patch('util.aws.SQSClient.get_queue_by_name')
+    def test_delete_messages(self, get_queue_by_name):
+        messages = [MagicMock(receipt_handle='handle-%d' % x) for x in range(0, 15)]
+
+        delete_messages = MagicMock(side_effect=[{'Failed': [{'Id': '3', 'Message': 'Failed'}]}, {}])
+        get_queue_by_name.return_value.delete_messages = delete_messages
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            self.assertEqual(client.delete_messages('queue', messages), 1)
+            client.delete_messages('queue', [])
+
+        self.assertEqual(delete_messages.call_count, 2)
+        entries = delete_messages.call_args_list[1][1]['Entries']
+        self.assertEqual(entries[0], {'Id': '0', 'ReceiptHandle': 'handle-10'})
+        self.assertEqual(len(entries), 5)
+
+    @patch('util.aws.SQSClient.get_queue_by_name')
+    def test_receive_messages_reuses_queue(self, get_queue_by_name):
+        get_queue_by_name.return_value.receive_messages = MagicMock(return_value=[1])
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            list(client.receive_messages('queue', batch_size=1))
+            list(client.receive_messages('queue', batch_size=1))
+
+        get_queue_by_name.assert_called_once_with('queue')
+
+    @patch('util.aws.SQSClient.get_queue_by_name')
+    def test_get_queue_size(self, get_queue_by_name):
+        get_queue_by_name.return_value.attributes = {'ApproximateNumberOfMessages': '42'}
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            self.assertEqual(client.get_queue_size('queue'), 42)
+
+        get_queue_by_name.assert_called_with('queue')
+
     @patch('util.aws.SQSClient.get_queue_by_name')
     def test_receive_messages_1_batch_size_1(self, get_queue_by_name):
         outputs = [1]
@@ -221,4 +260,83 @@ class TestSQSClient(TestCase):
             results = list(client.receive_messages('queue'))
             self.assertEquals(results, outputs)
 
-        self.assertEquals(receive_messages.call_count, 2)
\ No newline at end of file
+        self.assertEquals(receive_messages.call_count, 2)
+
+
+class TestAWSClientsWithFakeServer(TestCase):
+    """Tests the S3 and SQS clients against an in-process fake AWS server instead of mocks"""
+
+    def setUp(self):
+        django.setup()
+
+        self.credentials = AWSCredentials('ACCCESSKEY', 'SECRETKEY')
+        self.region_name = 'us-east-1'
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = FakeAWSServer(max_keys=2)
+        self.server.start()
+        self.server.create_bucket('my-bucket')
+        self.server.create_queue('my-queue')
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_s3_round_trip(self):
+        """Tests uploading, listing over multiple pages, downloading and deleting S3 objects"""
+
+        src_path = os.path.join(self.temp_dir, 'src.dat')
+        with open(src_path, 'wb') as src_file:
+            src_file.write(b'test contents')
+        dest_path = os.path.join(self.temp_dir, 'dest.dat')
+        keys = ['a/b.dat', 'c/d.dat', 'e.dat', 'f/with space.dat']
+
+        with self.settings(**self.server.get_client_settings()):
+            with S3Client(self.credentials, self.region_name) as client:
+                client.get_bucket('my-bucket')
+                for key in keys:
+                    client.get_object('my-bucket', key, False).upload_file(src_path)
+                recursive = [details.file for details in client.list_objects('my-bucket', True)]
+                # The first page of the top level only contains the common prefixes a/ and c/
+                top_level = [details.file for details in client.list_objects('my-bucket', False)]
+                prefixed = [details.file for details in client.list_objects('my-bucket', False, 'f/')]
+                client.get_object('my-bucket', 'f/with space.dat').download_file(dest_path)
+                client.get_object('my-bucket', 'e.dat').delete()
+                with self.assertRaises(FileDoesNotExist):
+                    client.get_object('my-bucket', 'e.dat')
+
+        self.assertListEqual(recursive, keys)
+        self.assertListEqual(top_level, ['e.dat'])
+        self.assertListEqual(prefixed, ['f/with space.dat'])
+        with open(dest_path, 'rb') as dest_file:
+            self.assertEqual(dest_file.read(), b'test contents')
+        self.assertEqual(self.server.get_request_counts()['ListObjects'], 5)
+
+    def test_sqs_round_trip(self):
+        """Tests sending, receiving and deleting SQS messages"""
+
+        with self.settings(**self.server.get_client_settings()):
+            with SQSClient(self.credentials, self.region_name) as client:
+                client.send_messages('my-queue', [{'Id': str(i), 'MessageBody': 'message %d' % i} for i in range(15)])
+                self.assertEqual(client.get_queue_size('my-queue'), 15)
+                messages = list(client.receive_messages('my-queue', batch_size=15, wait_time_seconds=0))
+                failed = client.delete_messages('my-queue', messages)
+
+        self.assertListEqual([message.body for message in messages], ['message %d' % i for i in range(15)])
+        self.assertEqual(failed, 0)
+        self.assertEqual(self.server.get_queue_size('my-queue'), 0)
+
+    def test_sqs_redelivery(self):
+        """Tests that a received message that is not deleted is received again after its visibility timeout"""
+
+        self.server.send_message('my-queue', 'message')
+
+        with self.settings(**self.server.get_client_settings()):
+            with SQSClient(self.credentials, self.region_name) as client:
+                first = list(client.receive_messages('my-queue', batch_size=1, wait_time_seconds=0,
+                                                     visibility_timeout_seconds=0))
+                second = list(client.receive_messages('my-queue', batch_size=1, wait_time_seconds=0))
+                third = list(client.receive_messages('my-queue', batch_size=1, wait_time_seconds=0))
+                self.assertEqual(client.delete_messages('my-queue', first), 1)
+
+        self.assertEqual([message.body for message in first + second], ['message', 'message'])
+        self.assertListEqual(third, [])
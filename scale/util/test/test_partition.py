@@ -0,0 +1,139 @@
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils.timezone import now, utc
+
+import job.test.utils as job_test_utils
+from job.models import TaskUpdate
+from util.partition import add_months, get_month_start, is_partitioning_supported, PartitionedTable
+
+
+class TestPartitionedTable(TransactionTestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.table = PartitionedTable('task_update', 'created', 'id', 'TASK_UPDATE_RETENTION_DAYS')
+
+    def test_add_months(self):
+        """Tests adding months to the start of a month, including across years"""
+
+        month = datetime.datetime(2017, 11, 1, tzinfo=utc)
+        self.assertEqual(add_months(month, 1), datetime.datetime(2017, 12, 1, tzinfo=utc))
+        self.assertEqual(add_months(month, 2), datetime.datetime(2018, 1, 1, tzinfo=utc))
+        self.assertEqual(add_months(month, -11), datetime.datetime(2016, 12, 1, tzinfo=utc))
+
+    def test_convert_populated_table(self):
+        """Tests converting a table that already holds rows from past, current, and future months"""
+
+        if not is_partitioning_supported():
+            self.skipTest('Partitioning is not supported by the database server')
+
+        when = datetime.datetime(2017, 11, 15, tzinfo=utc)
+        times = [datetime.datetime(2017, 9, 3, tzinfo=utc), datetime.datetime(2017, 10, 31, 23, 59, tzinfo=utc),
+                 datetime.datetime(2017, 11, 1, tzinfo=utc), datetime.datetime(2017, 11, 14, tzinfo=utc),
+                 datetime.datetime(2018, 2, 2, tzinfo=utc)]
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE partition_test (id serial PRIMARY KEY, created timestamp with time zone '
+                           'NOT NULL, name varchar(50))')
+            cursor.execute('CREATE INDEX partition_test_name_idx ON partition_test (name)')
+            for created in times:
+                cursor.execute('INSERT INTO partition_test (created, name) VALUES (%s, %s)', [created, 'test'])
+        table = PartitionedTable('partition_test', 'created', 'id', 'TASK_UPDATE_RETENTION_DAYS')
+
+        try:
+            self.assertTrue(table.convert(when=when))
+
+            self.assertTrue(table.is_partitioned())
+            self.assertListEqual(table.get_partitions(), ['partition_test_default', 'partition_test_legacy',
+                                                          'partition_test_p201711',
+                                                          'partition_test_p201712', 'partition_test_p201801',
+                                                          'partition_test_p201802'])
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM partition_test')
+                self.assertEqual(cursor.fetchone()[0], 5)
+                cursor.execute('SELECT count(*) FROM partition_test_legacy')
+                self.assertEqual(cursor.fetchone()[0], 2)
+                cursor.execute('SELECT count(*) FROM partition_test_p201711')
+                self.assertEqual(cursor.fetchone()[0], 2)
+                cursor.execute('INSERT INTO partition_test (created, name) VALUES (%s, %s) RETURNING id',
+                               [when, 'new'])
+                self.assertEqual(cursor.fetchone()[0], 6)
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TABLE partition_test')
+
+    def test_insert_past_created_partitions(self):
+        """Tests that rows past the created partitions go to the default partition until their partitions are created"""
+
+        if not is_partitioning_supported():
+            self.skipTest('Partitioning is not supported by the database server')
+
+        when = datetime.datetime(2017, 11, 15, tzinfo=utc)
+        future = datetime.datetime(2018, 3, 10, tzinfo=utc)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE partition_test (id serial PRIMARY KEY, created timestamp with time zone '
+                           'NOT NULL, name varchar(50))')
+        table = PartitionedTable('partition_test', 'created', 'id', 'TASK_UPDATE_RETENTION_DAYS')
+
+        try:
+            table.convert(when=when)
+            with connection.cursor() as cursor:
+                cursor.execute('INSERT INTO partition_test (created, name) VALUES (%s, %s)', [future, 'future'])
+                cursor.execute('SELECT count(*) FROM partition_test_default')
+                self.assertEqual(cursor.fetchone()[0], 1)
+
+            created = table.create_partitions(when, when=datetime.datetime(2018, 1, 5, tzinfo=utc))
+
+            self.assertListEqual(created, ['partition_test_p201801', 'partition_test_p201802',
+                                           'partition_test_p201803'])
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM partition_test_default')
+                self.assertEqual(cursor.fetchone()[0], 0)
+                cursor.execute('SELECT name FROM partition_test_p201803')
+                self.assertListEqual(cursor.fetchall(), [('future',)])
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TABLE partition_test')
+
+    def test_get_month_start(self):
+        """Tests getting the start of the month for a time"""
+
+        when = datetime.datetime(2017, 2, 28, 23, 59, 59, tzinfo=utc)
+        self.assertEqual(get_month_start(when), datetime.datetime(2017, 2, 1, tzinfo=utc))
+
+    def test_get_partition_name(self):
+        """Tests getting the name of the partition for a month"""
+
+        when = datetime.datetime(2017, 3, 15, tzinfo=utc)
+        self.assertEqual(self.table.get_partition_name(when), 'task_update_p201703')
+
+    def test_get_retention_days(self):
+        """Tests getting the retention days from the settings"""
+
+        with self.settings(TASK_UPDATE_RETENTION_DAYS=7):
+            self.assertEqual(self.table.get_retention_days(), 7)
+
+    def test_remove_old_data_unpartitioned(self):
+        """Tests removing old data from an unpartitioned table by deleting rows in batches"""
+
+        if self.table.is_partitioned():
+            self.skipTest('Table is partitioned')
+
+        job_exe = job_test_utils.create_job_exe()
+        when = now()
+        old_time = when - datetime.timedelta(days=10)
+        for _ in range(5):
+            TaskUpdate.objects.create(job_exe=job_exe, task_id='task', status='RUNNING', timestamp=old_time)
+        TaskUpdate.objects.create(job_exe=job_exe, task_id='task', status='RUNNING', timestamp=when)
+        TaskUpdate.objects.all().update(created=old_time)
+        new_update = TaskUpdate.objects.create(job_exe=job_exe, task_id='task', status='RUNNING', timestamp=when)
+
+        count = self.table.remove_old_data(when - datetime.timedelta(days=5), batch_size=2)
+
+        self.assertEqual(count, 6)
+        self.assertListEqual(list(TaskUpdate.objects.values_list('id', flat=True)), [new_update.id])